@@ -0,0 +1,106 @@
+"""
+Load test: where the capacity model stops admitting sessions.
+
+Adds emulated sessions one at a time, each a job process that spends
+--frame-cpu-ms of CPU (numpy FFTs, standing in for VAD, noise cancellation
+and audio resampling) on every 20 ms audio frame and reports its event-loop
+lag as a real job does. After each addition the worker-side CapacityModel is
+read for a few seconds. The table shows CPU, lag and load per session count,
+and whether the worker would still take a new room; sessions are added until
+the load has stayed at the threshold for two steps. The session cap is set
+high (--session-cap) so that measured CPU and lag decide admission; pass
+--session-cap 0 for the worker's default, derived from its CPUs.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_admission.py [--frame-cpu-ms 2] [--session-cap 100] [--max-sessions 32]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+
+from capacity import CPU_WINDOW, CapacityModel, LagReporter
+
+FRAME = 0.02
+
+
+def burn(seconds, samples):
+    start = time.thread_time()
+    while time.thread_time() - start < seconds:
+        np.fft.irfft(np.fft.rfft(samples))
+
+
+async def emulated_session(report_dir, frame_cpu, ready):
+    reporter = LagReporter(report_dir)
+    reporter.start()
+    ready.set()
+    samples = np.random.default_rng().standard_normal(480)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+    while True:
+        burn(frame_cpu, samples)
+        deadline += FRAME
+        await asyncio.sleep(max(deadline - loop.time(), 0))
+
+
+def run_session(report_dir, frame_cpu, ready):
+    asyncio.run(emulated_session(report_dir, frame_cpu, ready))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frame-cpu-ms", type=float, default=2.0)
+    parser.add_argument("--step-seconds", type=float, default=CPU_WINDOW + 0.5)
+    parser.add_argument("--session-cap", type=int, default=100)
+    parser.add_argument("--max-sessions", type=int, default=32)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    sessions = []
+    with tempfile.TemporaryDirectory() as report_dir:
+        model = CapacityModel(max_sessions=args.session_cap, report_dir=report_dir)
+        print(f"{model.cpu_count:g} CPUs, full load at {model.cpu_target:.0%} CPU, "
+              f"{model.lag_limit * 1000:.0f} ms lag or {model.max_sessions} sessions; threshold {model.threshold}\n")
+        print(f"{'sessions':>8} {'cpu':>6} {'lag ms':>7} {'load':>6} {'admits':>7}")
+        saturated = 0
+        try:
+            while len(sessions) < args.max_sessions and saturated < 2:
+                # Measured from when the session is running: a real job's process is prewarmed
+                ready = context.Event()
+                process = context.Process(target=run_session, args=(report_dir, args.frame_cpu_ms / 1000, ready),
+                                          daemon=True)
+                process.start()
+                ready.wait()
+                sessions.append(process)
+                worker = SimpleNamespace(active_jobs=sessions)
+
+                readings = []
+                end = time.monotonic() + args.step_seconds
+                while time.monotonic() < end:
+                    readings.append(model(worker))
+                    time.sleep(0.5)
+                # The last readings cover the whole CPU window since this session started
+                reading = model.last
+                load = max(readings[-2:])
+                admits = load < model.threshold
+                saturated = 0 if admits else saturated + 1
+                print(f"{len(sessions):>8} {reading.cpu:>6.0%} {reading.lag * 1000:>7.1f} {load:>6.2f} "
+                      f"{'yes' if admits else 'no':>7}")
+        finally:
+            for process in sessions:
+                process.kill()
+            for process in sessions:
+                process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: memory of streaming export vs load_bookings.
+
+Run from the backend directory against a MongoDB you can write to:
+
+    MONGODB_URI=mongodb://localhost:27017 uv run python benchmarks/bench_booking_export.py [--bookings 200000]
+
+Seeds a scratch collection, then compares the peak Python allocation and
+elapsed time of load_bookings' list(find()) with iter_bookings feeding the
+NDJSON writer. The scratch collection is dropped afterwards.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from export_bookings import export
+from mongodb_utils import MONGODB_DB_NAME, MONGODB_URI, iter_bookings
+
+
+class NullWriter(io.TextIOBase):
+    def write(self, text):
+        return len(text)
+
+
+def seed(collection, count, chunk=10_000):
+    collection.drop()
+    collection.create_index("booking_id", unique=True)
+    for start in range(0, count, chunk):
+        collection.insert_many([
+            {
+                "booking_id": f"{i:08X}",
+                "customer_name": f"Guest {i}",
+                "mobile_number": "9876543210",
+                "email": f"guest{i}@example.com",
+                "destination": "Goa",
+                "travel_mode": "plane",
+                "hotel_name": "The Taj Mahal Palace Goa",
+                "dates": "12-18 Dec",
+                "num_travelers": 2,
+                "total_cost": 190000,
+                "status": "confirmed",
+                "timestamp": f"2025-01-01T00:00:{i % 60:02d}",
+                "hotel_rating": 5,
+                "hotel_amenities": ["Wi-Fi", "Pool", "Breakfast", "Spa"],
+                "hotel_description": "Beachfront luxury resort with private villas and exceptional service.",
+                "hotel_price_per_night": 30000,
+            }
+            for i in range(start, min(start + chunk, count))
+        ], ordered=False)
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>14}: {count} bookings in {elapsed:6.2f} s, peak Python memory {peak / 1e6:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking export memory benchmark")
+    parser.add_argument("--bookings", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        sys.exit(f"MongoDB not reachable at {MONGODB_URI}: {e}")
+
+    collection = client[MONGODB_DB_NAME][f"bench_export_{os.getpid()}"]
+    try:
+        seed(collection, args.bookings)
+
+        def load_all():
+            # load_bookings' implementation, against the scratch collection
+            return len(list(collection.find({}, {'_id': 0})))
+
+        def stream():
+            progress = {"count": 0, "after": None}
+            export(iter_bookings(batch_size=args.batch_size, collection=collection),
+                   NullWriter(), "ndjson", None, "booking_id", progress)
+            return progress["count"]
+
+        measure("load_bookings", load_all)
+        measure("iter_bookings", stream)
+    finally:
+        collection.drop()
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
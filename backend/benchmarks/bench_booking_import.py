@@ -0,0 +1,97 @@
+"""
+Benchmark: bulk booking writes vs the single-insert loop.
+
+Run from the backend directory against a MongoDB you can write to:
+
+    MONGODB_URI=mongodb://localhost:27017 uv run python benchmarks/bench_booking_import.py [--bookings 20000]
+
+Loads the same bookings into a scratch collection three ways: one insert_one
+per booking (what looping over save_booking does), save_bookings with
+unordered insert_many chunks, and save_bookings with replace=True (upserting
+bulk_write, as a re-run migration does). The scratch collection is dropped
+afterwards.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from mongodb_utils import MONGODB_DB_NAME, MONGODB_URI, save_bookings
+
+
+def make_bookings(count):
+    return [
+        {
+            "booking_id": f"{i:08X}",
+            "customer_name": f"Guest {i}",
+            "mobile_number": "9876543210",
+            "email": f"guest{i}@example.com",
+            "destination": "Goa",
+            "travel_mode": "plane",
+            "hotel_name": "The Taj Mahal Palace Goa",
+            "dates": "12-18 Dec",
+            "num_travelers": 2,
+            "total_cost": 190000,
+            "status": "confirmed",
+            "timestamp": f"2025-01-01T00:00:{i % 60:02d}",
+        }
+        for i in range(count)
+    ]
+
+
+def reset(collection):
+    collection.drop()
+    collection.create_index("booking_id", unique=True)
+
+
+def measure(label, count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>22}: {count} bookings in {elapsed:6.2f} s ({count / elapsed:8.0f} bookings/s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk booking write benchmark")
+    parser.add_argument("--bookings", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        sys.exit(f"MongoDB not reachable at {MONGODB_URI}: {e}")
+
+    collection = client[MONGODB_DB_NAME][f"bench_import_{os.getpid()}"]
+    bookings = make_bookings(args.bookings)
+    try:
+        reset(collection)
+
+        def single():
+            # save_booking's write, once per booking
+            for booking in bookings:
+                collection.insert_one(dict(booking))
+
+        baseline = measure("insert_one loop", args.bookings, single)
+
+        reset(collection)
+        bulk = measure("save_bookings", args.bookings,
+                       lambda: save_bookings(bookings, args.chunk_size, collection=collection))
+        upsert = measure("save_bookings replace", args.bookings,
+                         lambda: save_bookings(bookings, args.chunk_size, replace=True, collection=collection))
+        print(f"Speedup: {baseline / bulk:.1f}x insert_many, {baseline / upsert:.1f}x upsert")
+    finally:
+        collection.drop()
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
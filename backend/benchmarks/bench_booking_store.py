@@ -0,0 +1,126 @@
+"""
+Benchmark: the same booking workload against each storage engine.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_booking_store.py [--bookings 2000] [--concurrency 20]
+    MONGODB_URI=mongodb://localhost:27017 uv run python benchmarks/bench_booking_store.py --engines memory sqlite mongodb
+
+Each engine saves N bookings, reads each back, looks customers up by email
+and mobile number, and cancels half of them, with `concurrency` calls in
+flight at a time as several sessions in one worker would have. Reports
+p50/p99 latency and throughput per operation. SQLite uses a temporary file;
+Mongo a scratch collection that is dropped afterwards.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from booking_store import MemoryBookingStore, SQLiteBookingStore
+
+
+def make_booking(i):
+    return {
+        "booking_id": f"{i:08X}",
+        "customer_name": f"Guest {i}",
+        "mobile_number": f"98{i % 500:08d}",
+        "email": f"guest{i % 500}@example.com",
+        "destination": "Goa",
+        "travel_mode": "plane",
+        "hotel_name": "The Taj Mahal Palace Goa",
+        "dates": "12-18 Dec",
+        "num_travelers": 2,
+        "total_cost": 190000,
+        "status": "confirmed",
+        "timestamp": f"2025-01-{1 + i % 28:02d}T10:00:{i % 60:02d}",
+        "hotel_amenities": ["Wi-Fi", "Pool", "Breakfast"],
+    }
+
+
+async def run_phase(calls, concurrency):
+    """Run coroutine factories with at most `concurrency` in flight; returns per-call ms and wall seconds."""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def timed(call):
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(call) for call in calls))
+    return samples, time.perf_counter() - start
+
+
+async def workload(store, n, concurrency):
+    rng = random.Random(0)
+    ids = [f"{i:08X}" for i in range(n)]
+    phases = {
+        "save": [lambda i=i: store.save_booking(make_booking(i)) for i in range(n)],
+        "get": [lambda b=b: store.get_booking(b) for b in rng.sample(ids, n)],
+        "find email": [lambda i=i: store.find_bookings(email=f"guest{i % 500}@example.com") for i in range(n // 4)],
+        "find mobile": [lambda i=i: store.find_bookings(mobile_number=f"98{i % 500:08d}") for i in range(n // 4)],
+        "cancel": [lambda b=b: store.cancel_booking(b) for b in ids[::2]],
+    }
+    results = {}
+    for name, calls in phases.items():
+        results[name] = await run_phase(calls, concurrency)
+    return results
+
+
+def report(engine, results):
+    for name, (samples, wall) in results.items():
+        p99 = statistics.quantiles(samples, n=100, method="inclusive")[98] if len(samples) > 1 else samples[0]
+        print(f"{engine:>8} {name:>12} {len(samples):7d} {statistics.median(samples):9.3f} {p99:9.3f} {len(samples) / wall:10.0f}")
+
+
+async def open_mongo():
+    from mongodb_utils import BOOKING_INDEXES, MONGODB_URI, AsyncBookingRepository
+
+    store = AsyncBookingRepository(collection_name=f"bench_store_{os.getpid()}", serverSelectionTimeoutMS=3000)
+    try:
+        collection = await store.get_collection()
+    except Exception as e:
+        sys.exit(f"MongoDB not reachable at {MONGODB_URI}: {e}")
+    await collection.create_indexes(BOOKING_INDEXES)
+    return store
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Booking storage engine benchmark")
+    parser.add_argument("--engines", nargs="+", choices=["memory", "sqlite", "mongodb"], default=["memory", "sqlite"])
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'engine':>8} {'operation':>12} {'calls':>7} {'p50 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for engine in args.engines:
+        with tempfile.TemporaryDirectory() as tmp:
+            if engine == "memory":
+                store = MemoryBookingStore()
+            elif engine == "sqlite":
+                store = SQLiteBookingStore(os.path.join(tmp, "bookings.db"))
+            else:
+                store = await open_mongo()
+            try:
+                await store.warm()
+                report(engine, await workload(store, args.bookings, args.concurrency))
+            finally:
+                if engine == "mongodb":
+                    await (await store.get_collection()).drop()
+                await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Benchmark: cancel_booking latency, read-then-update vs one find_one_and_update.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_cancel_latency.py
+    MONGODB_URI=mongodb://localhost:27017 uv run python benchmarks/bench_cancel_latency.py --mongodb
+
+By default a fake collection sleeps for a simulated network round trip per
+operation, which is what dominates both paths. With --mongodb the same
+comparison runs against a scratch collection on a real server, which is
+dropped afterwards. The booking cache is off, so the read-then-update path
+pays for its read as it does on a cache miss.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mongodb_utils import CANCELLATION_REFUND_RATE, MONGODB_URI, AsyncBookingRepository
+
+RUNS = 200
+ROUND_TRIPS_MS = [0.5, 2.0, 10.0]
+
+
+class SlowCollection:
+    """Bookings in a dict, with a fixed delay per operation."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        self.docs[doc["booking_id"]] = dict(doc)
+
+    async def find_one(self, query, projection=None):
+        await asyncio.sleep(self.delay)
+        doc = self.docs.get(query["booking_id"])
+        return dict(doc) if doc else None
+
+    async def update_one(self, query, update):
+        await asyncio.sleep(self.delay)
+        self.docs[query["booking_id"]].update(update["$set"])
+        return SimpleNamespace(matched_count=1)
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        await asyncio.sleep(self.delay)
+        doc = self.docs.get(query["booking_id"])
+        if doc is None or doc["status"] == "cancelled":
+            return None
+        before = dict(doc)
+        doc.update(status="cancelled", refund_amount=doc["total_cost"] * CANCELLATION_REFUND_RATE)
+        return before
+
+
+async def read_then_update(repository, booking_id):
+    """cancel_booking as it was: get, check status in Python, then update."""
+    booking = await repository.get_booking(booking_id)
+    if booking and booking["status"] != "cancelled":
+        await repository.update_booking(booking_id, {"status": "cancelled"})
+
+
+async def atomic(repository, booking_id):
+    await repository.cancel_booking(booking_id)
+
+
+async def time_path(repository, collection, cancel, runs):
+    samples = []
+    for i in range(runs):
+        booking_id = f"{os.getpid() % 10000:04d}{i:04d}"
+        await collection.insert_one({"booking_id": booking_id, "total_cost": 190000, "status": "confirmed"})
+        start = time.perf_counter()
+        await cancel(repository, booking_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def row(label, old, new):
+    p50_old, p50_new = statistics.median(old), statistics.median(new)
+    p99_old = statistics.quantiles(old, n=100, method="inclusive")[98]
+    p99_new = statistics.quantiles(new, n=100, method="inclusive")[98]
+    print(f"{label:>16} {p50_old:10.2f} {p50_new:10.2f} {p99_old:10.2f} {p99_new:10.2f} {p50_old / p50_new:8.2f}x")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Cancellation latency benchmark")
+    parser.add_argument("--mongodb", action="store_true", help="measure against MONGODB_URI instead of a simulated RTT")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'round trip':>16} {'old p50 ms':>10} {'new p50 ms':>10} {'old p99 ms':>10} {'new p99 ms':>10} {'speedup':>9}")
+    if not args.mongodb:
+        for rtt in ROUND_TRIPS_MS:
+            repository = AsyncBookingRepository()
+            repository._collection = SlowCollection(rtt / 1000)
+            old = await time_path(repository, repository._collection, read_then_update, args.runs)
+            new = await time_path(repository, repository._collection, atomic, args.runs)
+            row(f"{rtt:.1f} ms (sim)", old, new)
+        return
+
+    repository = AsyncBookingRepository(collection_name=f"bench_cancel_{os.getpid()}", serverSelectionTimeoutMS=3000)
+    try:
+        collection = await repository.get_collection()
+    except Exception as e:
+        sys.exit(f"MongoDB not reachable at {MONGODB_URI}: {e}")
+    try:
+        await collection.create_index("booking_id", unique=True)
+        old = await time_path(repository, collection, read_then_update, args.runs)
+        await collection.delete_many({})
+        new = await time_path(repository, collection, atomic, args.runs)
+        row("mongodb", old, new)
+    finally:
+        await collection.drop()
+        await repository.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Benchmark: per-process catalog load time and memory, JSON vs compiled mmap.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_catalog_mmap.py [--hotels 100000] [--processes 4]
+
+Starts several fresh processes (as the worker does for jobs) that each load
+the catalog and serve a query, then reports load time and RSS / USS / PSS per
+process. USS is memory private to the process; PSS splits shared pages
+between the processes mapping them, so it shows the saving from sharing.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import psutil
+
+from bench_catalog_reload import write_catalog
+from compiled_catalog import MappedHotelCatalog, compile_catalog
+from hotel_catalog import HotelCatalog
+from travel_data import DISTANCES
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return HotelCatalog(json.load(f))
+
+
+def job(kind, path, ready, done):
+    start = time.perf_counter()
+    catalog = load_json(path) if kind == "json" else MappedHotelCatalog(path)
+    # Serve queries across every city, touching the catalog as sessions would
+    for city in catalog.destinations():
+        catalog.find_hotels(city, "high", ["Pool"], limit=3)
+    load_ms = (time.perf_counter() - start) * 1000
+    ready.put(load_ms)
+    done.wait()
+
+
+def measure(kind, path, processes):
+    ctx = mp.get_context("spawn")
+    ready, done = ctx.Queue(), ctx.Event()
+    workers = [ctx.Process(target=job, args=(kind, path, ready, done)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    load_ms = [ready.get() for _ in workers]
+
+    # Measure while every process is alive, so shared pages are split between them
+    memory = [psutil.Process(worker.pid).memory_full_info() for worker in workers]
+    done.set()
+    for worker in workers:
+        worker.join()
+
+    def mean_mb(field):
+        return sum(getattr(m, field, 0) for m in memory) / len(memory) / 1e6
+
+    print(f"{kind:>5}: load {sum(load_ms) / len(load_ms):7.1f} ms  "
+          f"RSS {mean_mb('rss'):6.1f} MB  USS {mean_mb('uss'):6.1f} MB  PSS {mean_mb('pss'):6.1f} MB  (per process)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled catalog benchmark")
+    parser.add_argument("--hotels", type=int, default=100_000)
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "hotels.json")
+        compiled_path = os.path.join(tmp, "hotels.bin")
+        write_catalog(json_path, args.hotels, args.cities, seed=1)
+
+        start = time.perf_counter()
+        with open(json_path, encoding="utf-8") as f:
+            compile_catalog(json.load(f), DISTANCES, compiled_path)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        print(f"hotels.json: {args.hotels} hotels, {os.path.getsize(json_path) / 1e6:.1f} MB")
+        print(f"hotels.bin: {os.path.getsize(compiled_path) / 1e6:.1f} MB, compiled in {compile_ms:.0f} ms")
+        print(f"{args.processes} processes:")
+        measure("json", json_path, args.processes)
+        measure("mmap", compiled_path, args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: hot reload of hotels.json while tool-style queries keep running.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_catalog_reload.py [--hotels 100000]
+
+Reports reload latency, catalog memory, and the worst gap between
+consecutive queries on the event loop during the reload.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from hotel_catalog import CatalogReloader
+
+AMENITIES = ["Wi-Fi", "Pool", "Breakfast", "Spa", "Gym", "Beach Access"]
+
+
+def write_catalog(path, num_hotels, num_cities, seed):
+    rng = random.Random(seed)
+    data = {f"City {c}": [] for c in range(num_cities)}
+    for i in range(num_hotels):
+        data[f"City {i % num_cities}"].append({
+            "name": f"Hotel {i}",
+            "rating": rng.randint(1, 5),
+            "price_per_night": rng.randrange(1000, 40000, 500),
+            "amenities": rng.sample(AMENITIES, rng.randint(1, len(AMENITIES))),
+            "availability": rng.random() > 0.1,
+            "description": "A comfortable stay close to the city centre.",
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+async def query_loop(reloader, stop, gaps):
+    last = time.perf_counter()
+    while not stop.is_set():
+        reloader.catalog.find_hotels("City 0", "high", ["Pool"], limit=3)
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Hot reload benchmark")
+    parser.add_argument("--hotels", type=int, default=100_000)
+    parser.add_argument("--cities", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hotels.json")
+        write_catalog(path, args.hotels, args.cities, seed=1)
+        reloader = CatalogReloader(path, interval=0)
+
+        write_catalog(path, args.hotels, args.cities, seed=2)
+        stop = asyncio.Event()
+        gaps = []
+        queries = asyncio.create_task(query_loop(reloader, stop, gaps))
+        await asyncio.sleep(0.1)
+        baseline = max(gaps)
+
+        reloaded = await reloader.check()
+        stop.set()
+        await queries
+
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"hotels.json: {args.hotels} hotels, {size_mb:.1f} MB")
+        print(f"reloaded: {reloaded}")
+        print(f"reload latency: {reloader.stats['last_reload_ms']:.0f} ms")
+        print(f"RSS growth during reload: {reloader.stats['rss_growth_bytes'] / 1e6:.1f} MB")
+        print(f"queries during reload: {len(gaps)}")
+        print(f"worst query gap: {max(gaps) * 1000:.1f} ms (idle baseline {baseline * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
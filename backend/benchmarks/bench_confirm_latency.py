@@ -0,0 +1,99 @@
+"""
+Benchmark: confirm_booking latency with inline SMTP vs the email outbox.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_confirm_latency.py
+
+A fake SMTP transport sleeps for the given handshake time to stand in for a
+real server. The inline path sends before returning, as confirm_booking did
+originally; the outbox path only enqueues.
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import agent
+from email_outbox import EmailOutbox, MemoryOutboxStore, render_booking_email
+
+RUNS = 20
+HANDSHAKE_DELAYS = [0.0, 0.25, 1.0]
+
+
+class MemoryRepository:
+    def __init__(self):
+        self.bookings = {}
+
+    async def save_booking(self, booking):
+        self.bookings[booking["booking_id"]] = dict(booking)
+        return True
+
+
+class SlowTransport:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def send_batch(self, messages):
+        time.sleep(self.delay)
+        return [None] * len(messages)
+
+    def close(self):
+        pass
+
+
+def make_context():
+    hotel = agent.get_catalog_reloader().catalog.hotels("Goa")[0]
+    state = agent.TravelState(
+        origin="Mumbai", destination="Goa", travel_dates="12-18 Dec",
+        num_adults=2, selected_mode="plane", hotel_name=hotel["name"],
+        customer_name="Asha", mobile_number="9876543210", email="asha@example.com",
+    )
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=state))
+
+
+async def time_confirm(runs, after_confirm=None):
+    samples = []
+    for _ in range(runs):
+        ctx = make_context()
+        start = time.perf_counter()
+        await agent.confirm_booking(ctx)
+        if after_confirm:
+            after_confirm()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def main():
+    logging.basicConfig(level=logging.ERROR)
+    repository = MemoryRepository()
+    agent.get_booking_repository = lambda: repository
+
+    print(f"{'smtp handshake':>15} {'inline p50 ms':>14} {'outbox p50 ms':>14} {'outbox max ms':>14}")
+    for delay in HANDSHAKE_DELAYS:
+        transport = SlowTransport(delay)
+        outbox = EmailOutbox(MemoryOutboxStore(), transport)
+        agent.get_email_outbox = lambda outbox=outbox: outbox
+
+        # Inline: what confirm_booking used to do, a blocking send before replying
+        def send_inline(transport=transport):
+            booking = next(reversed(repository.bookings.values()))
+            transport.send_batch([render_booking_email(booking)])
+
+        inline = await time_confirm(max(3, RUNS // 4) if delay else RUNS, send_inline)
+
+        outbox.start()
+        queued = await time_confirm(RUNS)
+        await outbox.stop(drain_timeout=0)
+
+        print(f"{delay * 1000:>13.0f}ms {statistics.median(inline):>14.2f} "
+              f"{statistics.median(queued):>14.2f} {max(queued):>14.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
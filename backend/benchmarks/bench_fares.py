@@ -0,0 +1,65 @@
+"""
+Benchmark: full fare grid from the vectorised FareTable vs per-call quoting.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_fares.py
+
+The per-call path repeats the scalar formula select_travel_mode used to run,
+once per (mode, origin, destination, party size).
+"""
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fares import FareTable
+from route_graph import RouteGraph
+from travel_data import DISTANCES, TRAVEL_MODES
+
+TRAVELERS = list(range(1, 11))
+
+
+def per_call(routes, travel_modes, travelers):
+    costs = {}
+    for mode, a, b, party in itertools.product(travel_modes, routes.cities, routes.cities, travelers):
+        distance = routes.distance(a, b)
+        mode_data = travel_modes[mode]
+        cost = distance * mode_data["cost_per_km"] * party
+        duration_hours = distance / mode_data["speed_kmh"]
+        costs[(mode, a, b, party)] = (cost, duration_hours)
+    return costs
+
+
+def random_routes(num_cities, seed=5):
+    rng = random.Random(seed)
+    cities = [f"City {i}" for i in range(num_cities)]
+    table = {(a, b): rng.randint(50, 2500) for a, b in zip(cities, cities[1:])}
+    for a in cities:
+        b = rng.choice(cities)
+        if a != b and (b, a) not in table:
+            table[(a, b)] = rng.randint(50, 2500)
+    return RouteGraph(table)
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    print(f"{'cities':>7} {'quotes':>10} {'per-call ms':>12} {'grid ms':>9} {'speedup':>8}")
+    for routes in [RouteGraph(DISTANCES), random_routes(60), random_routes(150)]:
+        n = len(routes.cities)
+        quotes = len(TRAVEL_MODES) * n * n * len(TRAVELERS)
+        scalar_ms = timed(lambda routes=routes: per_call(routes, TRAVEL_MODES, TRAVELERS))
+        grid_ms = timed(lambda routes=routes: FareTable(routes, TRAVEL_MODES).grid(TRAVELERS))
+        print(f"{n:>7} {quotes:>10} {scalar_ms:>12.1f} {grid_ms:>9.2f} {scalar_ms / grid_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: indexed hotel catalog vs the linear suggest_hotels/select_hotel scans.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_hotel_catalog.py [--hotels 100000] [--cities 20]
+"""
+import argparse
+import random
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from hotel_catalog import HotelCatalog
+
+AMENITIES = ["Wi-Fi", "Pool", "Breakfast", "Spa", "Gym", "Beach Access", "Parking", "Bar"]
+QUERIES = [
+    (None, None),
+    ("low", ["Wi-Fi"]),
+    ("high", ["Pool", "Spa"]),
+    ("medium", ["Wi-Fi", "Breakfast", "Gym"]),
+    ("high", ["Pool", "Spa", "Gym", "Bar", "Parking"]),
+]
+
+
+def generate(num_hotels, num_cities, seed=1):
+    rng = random.Random(seed)
+    data = {f"City {c}": [] for c in range(num_cities)}
+    for i in range(num_hotels):
+        data[f"City {i % num_cities}"].append({
+            "name": f"Hotel {i}",
+            "rating": rng.randint(1, 5),
+            "price_per_night": rng.randrange(1000, 40000, 500),
+            "amenities": rng.sample(AMENITIES, rng.randint(1, len(AMENITIES))),
+            "availability": rng.random() > 0.1,
+            "description": "",
+        })
+    return data
+
+
+def linear_suggest(hotels, budget, amenities):
+    filtered = []
+    for hotel in hotels:
+        if not hotel["availability"]:
+            continue
+        if budget == "low" and hotel["price_per_night"] > 5000:
+            continue
+        if budget == "high" and hotel["price_per_night"] < 15000:
+            continue
+        if amenities and not all(a in hotel["amenities"] for a in amenities):
+            continue
+        filtered.append(hotel)
+    return filtered[:3]
+
+
+def linear_select(hotels, name):
+    return next((h for h in hotels if h["name"].lower() == name.lower()), None)
+
+
+def per_call_us(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=100_000)
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    data = generate(args.hotels, args.cities)
+    city = "City 0"
+    hotels = data[city]
+
+    start = time.perf_counter()
+    catalog = HotelCatalog(data)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{args.hotels} hotels, {args.cities} cities ({len(hotels)} per city), index build {build_ms:.0f} ms\n")
+
+    print(f"{'query':<72} {'linear us':>10} {'indexed us':>11} {'speedup':>8}")
+    for budget, amenities in QUERIES:
+        assert catalog.find_hotels(city, budget, amenities, limit=3) == linear_suggest(hotels, budget, amenities)
+        linear = per_call_us(partial(linear_suggest, hotels, budget, amenities), args.repeat)
+        indexed = per_call_us(partial(catalog.find_hotels, city, budget, amenities, limit=3), args.repeat)
+        label = f"suggest budget={budget} amenities={amenities}"
+        print(f"{label:<72} {linear:>10.1f} {indexed:>11.1f} {linear / indexed:>7.0f}x")
+
+    name = hotels[-1]["name"].upper()
+    linear = per_call_us(lambda: linear_select(hotels, name), args.repeat)
+    indexed = per_call_us(lambda: catalog.get_hotel(city, name), args.repeat)
+    print(f"{'select last hotel by name':<72} {linear:>10.1f} {indexed:>11.1f} {linear / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: import time of the agent entry module, against a budget.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_import_time.py [--runs 5] [--budget-ms 2500]
+
+Imports `agent` in fresh interpreters under `python -X importtime`, reports
+the median cumulative import time and the slowest top-level imports, and
+exits non-zero when the median is over budget or a module that should load
+lazily was imported eagerly.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+
+# Loaded on first use, never by `import agent`
+LAZY_MODULES = (
+    "livekit.plugins.google",
+    "livekit.plugins.murf",
+    "livekit.plugins.deepgram",
+    "livekit.plugins.silero",
+    "livekit.plugins.noise_cancellation",
+    "livekit.plugins.turn_detector",
+    "pymongo",
+    "smtplib",
+    "mongodb_utils",
+    "email_outbox",
+    "compiled_catalog",
+)
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(?P<cumulative>\d+) \| (?P<indent> *)(?P<name>\S+)")
+
+PROBE = "import sys, agent; print(','.join(m for m in {modules!r} if m in sys.modules))"
+
+
+def import_profile():
+    """One fresh `import agent`: (cumulative us per module, eagerly loaded lazy modules)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(modules=LAZY_MODULES)],
+        cwd=SRC, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            # Nesting depth is two spaces per level; agent itself is depth 0
+            depth = len(match["indent"]) // 2
+            timings.setdefault(match["name"], (int(match["cumulative"]), depth))
+    eager = [m for m in result.stdout.strip().split(",") if m]
+    return timings, eager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2500)
+    args = parser.parse_args()
+
+    runs = [import_profile() for _ in range(args.runs)]
+    totals = [timings["agent"][0] / 1000 for timings, _ in runs]
+    median = statistics.median(totals)
+
+    timings, eager = runs[-1]
+    direct = sorted(
+        ((us, name) for name, (us, depth) in timings.items() if depth == 1),
+        reverse=True,
+    )[:8]
+    print(f"import agent: median {median:.0f} ms over {args.runs} runs (min {min(totals):.0f}, max {max(totals):.0f})")
+    print("slowest imports made by agent:")
+    for us, name in direct:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if eager:
+        print(f"FAIL: loaded eagerly: {', '.join(eager)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print(f"OK: within the {args.budget_ms:.0f} ms budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
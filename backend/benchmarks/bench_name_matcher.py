@@ -0,0 +1,91 @@
+"""
+Benchmark: fuzzy name matcher build time, query latency and top-1 accuracy as the index grows.
+
+Queries are indexed names with transcription-style noise (a dropped or
+doubled letter, a swapped vowel, an added "hotel"), so accuracy is the share
+whose intended name ranks first.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_name_matcher.py [--names 1000 10000 100000] [--queries 2000]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from name_matcher import NameMatcher
+
+SYLLABLES = ["ra", "ja", "ma", "ha", "la", "sa", "ka", "vi", "shi", "nan", "dra", "pur", "gar", "bad",
+             "tha", "lak", "sun", "dar", "mo", "ti", "ke", "ral", "go", "pal", "ban", "che", "nai"]
+KINDS = ["Palace", "Residency", "Inn", "Resort", "Grand", "Heritage", "Suites", "Retreat", "Lodge", "Regency"]
+VOWELS = "aeiou"
+
+
+def generate(num_names, seed=7):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < num_names:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+                 for _ in range(rng.randint(1, 2))]
+        names.add(" ".join([*words, rng.choice(KINDS)]))
+    return sorted(names)
+
+
+def misheard(name, rng):
+    chars = list(name.lower())
+    i = rng.randrange(1, len(chars) - 1)
+    edit = rng.choice(["drop", "double", "vowel", "hotel"])
+    if edit == "drop":
+        del chars[i]
+    elif edit == "double":
+        chars.insert(i, chars[i])
+    elif edit == "vowel":
+        vowels = [j for j, c in enumerate(chars) if c in VOWELS]
+        if vowels:
+            j = rng.choice(vowels)
+            chars[j] = rng.choice(VOWELS.replace(chars[j], ""))
+    else:
+        chars += " hotel"
+    return "".join(chars)
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"{'names':>8} {'build s':>8} {'p50 ms':>7} {'p99 ms':>7} {'top-1':>6}")
+    for num_names in args.names:
+        names = generate(num_names)
+        start = time.perf_counter()
+        matcher = NameMatcher(names)
+        build_s = time.perf_counter() - start
+
+        rng = random.Random(0)
+        queries = [(name, misheard(name, rng)) for name in rng.choices(names, k=args.queries)]
+        for _, query in queries[:50]:
+            matcher.match(query)
+
+        timings, hits = [], 0
+        for name, query in queries:
+            start = time.perf_counter()
+            matches = matcher.match(query)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits += bool(matches) and matches[0].name == name
+
+        print(f"{num_names:>8} {build_s:>8.2f} {percentile(timings, 50):>7.3f} {percentile(timings, 99):>7.3f} "
+              f"{hits / len(queries):>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
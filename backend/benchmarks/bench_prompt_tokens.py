@@ -0,0 +1,177 @@
+"""
+Benchmark: prompt tokens per LLM call, static instructions vs the previous per-catalog prompt.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_prompt_tokens.py [--cities 13 100 500]
+
+Offline: plays the scripted booking from bench_sessions.py by calling the
+tools directly, and for each LLM call (two per turn: the user message, then
+the tool output) counts the tokens sent as instructions, tool schemas and
+chat history. "before" is the prompt TravelAgent used to build, with every
+destination listed, no progress line and a tool per trip detail; "after" is
+agent.INSTRUCTIONS and agent.TRAVEL_TOOLS, plus describe_progress on the
+calls where it has changed. --cities pads the destination list with made-up
+cities to show how each prompt grows with the catalog.
+
+Tokens are estimated at 4 characters each, the usual rule of thumb for
+Gemini; the comparison, not the absolute count, is the point.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from livekit.agents.llm.utils import build_legacy_openai_schema
+
+import agent
+from bench_sessions import SCRIPT, NullTransport
+from booking_store import MemoryBookingStore
+from email_outbox import EmailOutbox, MemoryOutboxStore
+
+# The previous system prompt, rendered per catalog with every destination listed
+LEGACY_INSTRUCTIONS = """
+            You are Nikhil from "Sacred Trails India", a friendly and professional AI travel agent specializing in trips within India.
+
+            🏖️ **AVAILABLE DESTINATIONS:** {destinations}
+
+            🚀 **CONVERSATION FLOW:**
+            1. **Greeting:** Warmly greet the user and ask for their desired destination.
+            2. **Step-by-Step Collection:** After each response, ask the next question in sequence:
+               - After destination: Ask for origin city
+               - After origin: Ask for travel dates
+               - After dates: Ask for number of adults and children
+               - After travelers: Ask for budget range
+               - After budget: Ask for preferred amenities
+            3. **Travel Mode:** Once all details collected, suggest modes (bus, train, plane, private_car) with costs/durations using `select_travel_mode`. For trips without a direct connection, describe the multi-leg route with `plan_route`.
+            4. **Hotels:** Suggest hotels using `suggest_hotels`, then let user select with `select_hotel`.
+            5. **Customer Details:** Collect contact information in sequence:
+               - Ask for customer name using `set_customer_name`
+               - Ask for mobile number using `set_mobile_number`
+               - Ask for email address using `set_email`
+            6. **Booking Confirmation:** After collecting all details, summarize itinerary and use `confirm_booking` to create booking.
+            7. **Retrieval:** Handle booking lookups with `retrieve_booking`. If the caller doesn't know their booking ID, use `find_my_bookings` with their email or mobile number.
+            8. **Cancellations:** Process cancellations with `cancel_booking`.
+
+            ⚙️ **IMPORTANT RULES:**
+            - Start every conversation with a warm greeting: "Hello! Welcome to Sacred Trails India. I'm Nikhil, your travel assistant, here to help you plan your perfect trip within India."
+            - Ask questions ONE AT A TIME in the specified sequence. Wait for user response before proceeding to next question.
+            - Be enthusiastic, helpful, and professional.
+            - Use tools for all actions - don't simulate them.
+            - Handle errors gracefully (invalid destinations, unavailable options).
+            - Default to English, but be prepared for basic Hindi phrases.
+            - Always end interactions by offering further assistance.
+            - Calculate costs realistically and provide clear breakdowns.
+            - For short distances (<300km), prioritize private car or bus.
+            - For long distances (>1000km), suggest plane or train.
+            
+            📝 **FORMATTING RULES FOR SUMMARIES:**
+            - NEVER use markdown formatting like ** or * in your responses.
+            - When providing trip summaries, format each item on a new line with a period at the end.
+            - Example format:
+              Destination: Mumbai.
+              Origin: Kolkata.
+              Travel Dates: December 12th to December 18th.
+              Travelers: 2 Adults, 0 Children.
+              Budget: Medium.
+              Amenities: Wi-Fi, Breakfast.
+              Travel Mode: Plane.
+              Hotel: ITC Grand Central.
+              Customer Name: John.
+              Mobile Number: 9191919191.
+              Email: john@example.com.
+            - Keep responses clean and easy to read without any special formatting characters.
+            """
+# Schemas of the tools offered with the previous prompt: one per trip detail, the longer
+# descriptions and no set_trip_details or list_destinations, as schema_tokens counted them
+LEGACY_TOOL_TOKENS = 1383
+
+
+def tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+def schema_tokens(tools) -> int:
+    return sum(tokens(json.dumps(build_legacy_openai_schema(tool))) for tool in tools)
+
+
+async def play_script(hotel_name):
+    """Run the scripted booking through the tools; returns (tool, chat items added, progress before and after) per turn."""
+    ctx = SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState()))
+    tools = {tool.info.name: tool for tool in agent.TRAVEL_TOOLS}
+    turns = []
+    for said, name, args in SCRIPT:
+        if "hotel_name" in args:
+            args = {"hotel_name": hotel_name}
+        before = agent.describe_progress(ctx.userdata.travel_state)
+        call = json.dumps({"name": name, "arguments": args})
+        output = await tools[name](ctx, **args)
+        after = agent.describe_progress(ctx.userdata.travel_state)
+        # The spoken reply is roughly the tool output, paraphrased
+        turns.append((name, [said, call, output, output], (before, after)))
+    return turns
+
+
+def report(turns, destinations, per_turn):
+    before_static = tokens(LEGACY_INSTRUCTIONS.format(destinations="\n".join(f"* {d}" for d in destinations)))
+    after_static = tokens(agent.INSTRUCTIONS)
+    before_tools, after_tools = LEGACY_TOOL_TOKENS, schema_tokens(agent.TRAVEL_TOOLS)
+
+    history = 0
+    totals = [0, 0]
+    shown = None
+    for name, items, progress in turns:
+        user, call, output, reply = (tokens(item) for item in items)
+        # Call 1 sees the history and the user message; call 2 also the tool call and its output.
+        # Each gets the progress note only if it differs from the last one sent.
+        notes = []
+        for line in progress:
+            notes.append(tokens(agent.PROGRESS_TEMPLATE.format(progress=line)) if line != shown else 0)
+            shown = line
+        calls = [history + user, history + user + call + output]
+        before = sum(before_static + before_tools + h for h in calls)
+        after = sum(after_static + after_tools + note + h for note, h in zip(notes, calls))
+        totals[0] += before
+        totals[1] += after
+        history += user + call + output + reply
+        if per_turn:
+            print(f"{name:>20} {before:>9} {after:>9} {after - before:>+8}")
+    return before_static + before_tools, after_static + after_tools, totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per LLM call, before and after")
+    parser.add_argument("--cities", type=int, nargs="+", default=[], help="also report with this many destinations")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    store = MemoryBookingStore()
+    outbox = EmailOutbox(MemoryOutboxStore(), NullTransport())
+    agent.get_booking_repository = lambda: store
+    agent.get_email_outbox = lambda: outbox
+    catalog = agent.get_catalog_reloader().catalog
+    hotel_name = catalog.hotels("Goa")[0]["name"]
+    turns = await play_script(hotel_name)
+    destinations = catalog.destinations()
+
+    print("Prompt tokens per turn (both LLM calls), current catalog")
+    print(f"{'turn':>20} {'before':>9} {'after':>9} {'change':>8}")
+    fixed_before, fixed_after, (before, after) = report(turns, destinations, per_turn=True)
+    print(f"{'per booking':>20} {before:>9} {after:>9} {after - before:>+8} ({(after - before) / before:+.0%})")
+
+    print("\nFixed tokens per LLM call (instructions + tool schemas) and per booking, by catalog size")
+    print(f"{'cities':>8} {'before':>8} {'after':>8} {'booking before':>15} {'booking after':>14}")
+    for n in [len(destinations), *args.cities]:
+        padded = destinations + [f"City {i}" for i in range(max(0, n - len(destinations)))]
+        fixed_before, fixed_after, (before, after) = report(turns, padded, per_turn=False)
+        print(f"{n:>8} {fixed_before:>8} {fixed_after:>8} {before:>15} {after:>14}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
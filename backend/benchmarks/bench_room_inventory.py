@@ -0,0 +1,159 @@
+"""
+Benchmark: hotels with rooms free for a stay, from the availability index vs one store query per hotel,
+and reservations racing for the last rooms.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_room_inventory.py [--hotels 500] [--bookings 5000] [--clients 8]
+
+A synthetic city of --hotels hotels is booked --bookings times (random
+stays, through reserve_rooms) in a temporary SQLite store. Then the hotels
+with 2 rooms free for random stays are found three ways: RoomInventory's
+index after its one-query load, a MAX(booked) query per hotel, and the load
+itself. Last, --clients connections (as separate worker processes would
+have) race to book a hotel's last --last-rooms rooms; exactly that many
+must succeed.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from booking_store import SQLiteBookingStore
+from room_inventory import RoomInventory, hotel_rooms, stay_nights
+
+CITY = "Goa"
+PER_HOTEL = ("SELECT MAX(booked) FROM room_nights "
+             "WHERE city = ? AND hotel = ? AND night BETWEEN ? AND ?")
+
+
+class City:
+    """The part of the catalog RoomInventory reads."""
+
+    def __init__(self, hotels):
+        self._hotels = hotels
+
+    def hotels(self, city):
+        return self._hotels
+
+
+def random_stay(rng, today):
+    check_in = today + timedelta(days=rng.randrange(1, 120))
+    return check_in, check_in + timedelta(days=rng.randint(1, 7))
+
+
+def timed_ms(samples, fn):
+    start = time.perf_counter()
+    result = fn()
+    samples.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def report(name, samples):
+    p99 = statistics.quantiles(samples, n=100, method="inclusive")[98] if len(samples) > 1 else samples[0]
+    print(f"{name:>24} {len(samples):7d} {statistics.median(samples):9.3f} {p99:9.3f}")
+
+
+async def book_city(store, hotels, n, rng, today):
+    semaphore = asyncio.Semaphore(20)
+
+    async def reserve():
+        hotel = rng.choice(hotels)
+        nights = stay_nights(*random_stay(rng, today))
+        async with semaphore:
+            return await store.reserve_rooms(CITY, hotel["name"], nights, rng.randint(1, 3), hotel_rooms(hotel))
+
+    start = time.perf_counter()
+    held = await asyncio.gather(*(reserve() for _ in range(n)))
+    wall = time.perf_counter() - start
+    print(f"{n} reservations in {wall:.2f}s ({n / wall:.0f}/s), {held.count(False)} refused as full\n")
+
+
+async def compare_queries(store, hotels, queries, rng, today):
+    catalog = City(hotels)
+    load, indexed, per_hotel = [], [], []
+    for _ in range(5):
+        inventory = RoomInventory(lambda: store, refresh=0)
+        start = time.perf_counter()
+        await inventory.load(catalog, CITY)
+        load.append((time.perf_counter() - start) * 1000)
+
+    conn = store._connection()
+    mismatches = 0
+    for _ in range(queries):
+        check_in, check_out = random_stay(rng, today)
+        free = timed_ms(indexed, partial(inventory.free_hotels, catalog, CITY, check_in, check_out, 2))
+
+        def query_each(check_in=check_in, check_out=check_out):
+            first, last = check_in.isoformat(), (check_out - timedelta(days=1)).isoformat()
+            bits = 0
+            for position, hotel in enumerate(hotels):
+                booked = conn.execute(PER_HOTEL, (CITY, hotel["name"], first, last)).fetchone()[0] or 0
+                if hotel_rooms(hotel) - booked >= 2:
+                    bits |= 1 << position
+            return bits
+
+        mismatches += timed_ms(per_hotel, query_each) != free
+
+    print(f"{'query':>24} {'calls':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    report("index load (1 query)", load)
+    report("index lookup", indexed)
+    report(f"store, {len(hotels)} queries", per_hotel)
+    print(f"{'answers differing':>24} {mismatches:7d}\n")
+
+
+async def last_rooms(path, clients, last, contenders):
+    stores = [SQLiteBookingStore(path) for _ in range(clients)]
+    nights = stay_nights(date(2030, 12, 12), date(2030, 12, 18))
+    await stores[0].reserve_rooms(CITY, "Contended", nights, 20 - last, 20)
+
+    start = time.perf_counter()
+    held = await asyncio.gather(*(stores[i % clients].reserve_rooms(CITY, "Contended", nights, 1, 20)
+                                  for i in range(contenders)))
+    wall = time.perf_counter() - start
+    booked = (await stores[0].load_room_nights(CITY, "2030-01-01"))["Contended"]
+    print(f"{contenders} bookings over {clients} connections for the last {last} rooms: "
+          f"{held.count(True)} held, {held.count(False)} refused in {wall * 1000:.0f} ms; "
+          f"nights now at {min(booked.values())}-{max(booked.values())} of 20 rooms")
+    for store in stores:
+        await store.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Room inventory benchmark")
+    parser.add_argument("--hotels", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--last-rooms", type=int, default=3)
+    parser.add_argument("--contenders", type=int, default=200)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    rng = random.Random(0)
+    today = date.today()
+    hotels = [{"name": f"Hotel {i}", "rooms": rng.choice([10, 20, 40, 80])} for i in range(args.hotels)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bookings.db")
+        store = SQLiteBookingStore(path)
+        await store.warm()
+        try:
+            await book_city(store, hotels, args.bookings, rng, today)
+            await compare_queries(store, hotels, args.queries, rng, today)
+        finally:
+            await store.close()
+        await last_rooms(path, args.clients, args.last_rooms, args.contenders)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
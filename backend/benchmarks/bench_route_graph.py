@@ -0,0 +1,60 @@
+"""
+Benchmark: route graph build time and lookup cost as the city count grows.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_route_graph.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from route_graph import RouteGraph
+
+CITY_COUNTS = [13, 100, 300, 600]
+EDGES_PER_CITY = 6
+LOOKUPS = 100_000
+
+
+def random_table(num_cities, seed=3):
+    rng = random.Random(seed)
+    cities = [f"City {i}" for i in range(num_cities)]
+    table = {}
+    # A ring keeps the graph connected; extra random edges add shortcuts
+    for a, b in zip(cities, cities[1:] + cities[:1]):
+        table[(a, b)] = rng.randint(50, 800)
+    for a in cities:
+        for b in rng.sample(cities, min(EDGES_PER_CITY, num_cities)):
+            if a != b and (b, a) not in table:
+                table[(a, b)] = rng.randint(100, 2500)
+    return cities, table
+
+
+def main():
+    print(f"{'cities':>7} {'edges':>7} {'build ms':>9} {'distance ns':>12} {'path ns':>9}")
+    for num_cities in CITY_COUNTS:
+        cities, table = random_table(num_cities)
+        start = time.perf_counter()
+        graph = RouteGraph(table)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(0)
+        pairs = [(rng.choice(cities), rng.choice(cities)) for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        for a, b in pairs:
+            graph.distance(a, b)
+        distance_ns = (time.perf_counter() - start) / LOOKUPS * 1e9
+
+        start = time.perf_counter()
+        for a, b in pairs[:LOOKUPS // 10]:
+            graph.path(a, b)
+        path_ns = (time.perf_counter() - start) / (LOOKUPS // 10) * 1e9
+
+        print(f"{num_cities:>7} {len(table):>7} {build_ms:>9.1f} {distance_ns:>12.0f} {path_ns:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: per-session state memory, snapshot size and checkpoint latency.
+
+Compares the slotted TravelState and its marshal snapshot with the previous
+layout (a dict-backed dataclass with a preferences dict and the selected
+hotel's catalog entry), snapshotted as JSON. Checkpoint latency is one
+save_session per store engine, and the cost a tool call pays for
+SessionCheckpointer.checkpoint().
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_session_state.py [--sessions 10000] [--writes 2000]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import agent
+from booking_store import MemoryBookingStore, SQLiteBookingStore
+from session_state import SessionCheckpointer, TravelState, decode_state, encode_state
+
+
+@dataclass
+class LegacyTravelState:
+    """TravelState as it was before snapshots."""
+    origin: str | None = None
+    destination: str | None = None
+    travel_dates: str | None = None
+    num_adults: int = 0
+    num_children: int = 0
+    preferences: dict[str, any] = None
+    selected_mode: str | None = None
+    selected_hotel: dict | None = None
+    selected_quote: dict | None = None
+    booking_id: str | None = None
+    customer_name: str | None = None
+    mobile_number: str | None = None
+    email: str | None = None
+
+
+def sample_trip(i):
+    return {
+        "origin": "Mumbai", "destination": "Goa", "travel_dates": f"{i % 28 + 1}-{i % 28 + 2} Dec", "num_adults": 2,
+        "selected_mode": "plane",
+        "selected_quote": {"mode": "plane", "distance_km": 590, "cost": 9000 + i, "duration_hours": 1.5,
+                           "origin": "Mumbai", "destination": "Goa", "travelers": 2},
+        "customer_name": f"Caller {i}", "mobile_number": f"98765{i:05d}", "email": f"caller{i}@example.com",
+    }
+
+
+def legacy_state(i, hotel):
+    return LegacyTravelState(preferences={"budget": "medium", "amenities": ["Wi-Fi", "Pool"]},
+                             selected_hotel=hotel, **sample_trip(i))
+
+
+def compact_state(i, hotel):
+    return TravelState(budget="medium", amenities=("Wi-Fi", "Pool"), hotel_name=hotel["name"], **sample_trip(i))
+
+
+def bytes_per_session(make, sessions, hotel):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = [make(i, hotel) for i in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(states)
+
+
+def per_call_us(fn, arg, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn(arg)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+async def save_latencies(store, writes):
+    snapshot = encode_state(compact_state(0, {"name": "The Leela Goa"}))
+    await store.save_session("warm", snapshot)
+    samples = []
+    for i in range(writes):
+        start = time.perf_counter()
+        await store.save_session(f"room-{i % 100}", snapshot)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def checkpoint_call_us(writes):
+    checkpoints = SessionCheckpointer(MemoryBookingStore(), "room-1")
+    state = TravelState()
+    start = time.perf_counter()
+    for i in range(writes):
+        state.num_adults = i
+        checkpoints.checkpoint(state)
+    elapsed = time.perf_counter() - start
+    await checkpoints.flush()
+    return elapsed / writes * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--writes", type=int, default=2_000)
+    args = parser.parse_args()
+
+    hotel = agent.get_catalog_reloader().catalog.hotels("Goa")[0]
+    legacy, compact = legacy_state(1, hotel), compact_state(1, hotel)
+    legacy_json = json.dumps(asdict(legacy)).encode()
+    snapshot = encode_state(compact)
+
+    print(f"{'layout':>8} {'bytes/session':>14} {'snapshot B':>11} {'encode us':>10} {'decode us':>10}")
+    print(f"{'legacy':>8} {bytes_per_session(legacy_state, args.sessions, hotel):>14.0f} {len(legacy_json):>11} "
+          f"{per_call_us(lambda s: json.dumps(asdict(s)), legacy, args.writes):>10.2f} "
+          f"{per_call_us(json.loads, legacy_json, args.writes):>10.2f}")
+    print(f"{'compact':>8} {bytes_per_session(compact_state, args.sessions, hotel):>14.0f} {len(snapshot):>11} "
+          f"{per_call_us(encode_state, compact, args.writes):>10.2f} "
+          f"{per_call_us(decode_state, snapshot, args.writes):>10.2f}")
+
+    print(f"\n{'store':>8} {'save p50 ms':>12} {'save p99 ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, store in [("memory", MemoryBookingStore()), ("sqlite", SQLiteBookingStore(f"{tmp}/bookings.db"))]:
+            samples = await save_latencies(store, args.writes)
+            print(f"{name:>8} {percentile(samples, 50):>12.3f} {percentile(samples, 99):>12.3f}")
+            await store.close()
+
+    print(f"\ncheckpoint() per tool call: {await checkpoint_call_us(args.writes):.2f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
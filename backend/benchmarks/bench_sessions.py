@@ -0,0 +1,226 @@
+"""
+Load test: N concurrent AgentSessions booking a trip end to end, in-process.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_sessions.py [--sessions 1 10 50 100] [--llm-delay-ms 0] [--scripts single batch]
+
+Each session runs TravelAgent in a text-only AgentSession (no room, STT or
+TTS) against a scripted fake LLM. Every user turn is answered with the next
+tool call of the standard booking flow (destination, origin, dates,
+travelers, budget, amenities, mode, hotels, contact details,
+confirm_booking), then a short reply once the tool output comes back.
+Bookings go to a MemoryBookingStore and confirmation emails to an outbox
+whose sender runs but never touches the network, so the numbers measure the
+agent framework plus our tools on one event loop. Every session books the
+same hotel, so each stays in a different week (trip_dates_for) and the
+hotel's rooms don't run out; sessions that book nothing are reported.
+
+For each concurrency level it reports sessions/sec, event-loop lag sampled
+every few milliseconds (what would delay audio frames for every room in the
+worker) and p50/p99 per tool, both for the whole turn and for the tool call
+itself (function call to function output). All latencies are in ms.
+--llm-delay-ms adds a simulated model latency per LLM call, so turns from
+different sessions overlap as they would with a real model.
+
+The "single" script gives one trip detail per turn; "batch" gives them all
+in the first turn, as callers often do, and saves them with one
+set_trip_details call. Both report LLM calls per completed booking.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import count
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from livekit.agents import AgentSession, llm
+from livekit.agents.llm import ChatChunk, ChoiceDelta, FunctionToolCall
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+import agent
+from booking_store import MemoryBookingStore
+from email_outbox import EmailOutbox, MemoryOutboxStore
+
+LAG_INTERVAL = 0.005
+
+# (user says, tool the model calls, tool arguments)
+SCRIPT = [
+    ("I'd like to go to Goa", "set_trip_details", {"destination": "Goa"}),
+    ("From Mumbai", "set_trip_details", {"origin": "Mumbai"}),
+    ("12th to 18th December", "set_trip_details", {"dates": "12-18 Dec"}),
+    ("Two adults and one child", "set_trip_details", {"num_adults": 2, "num_children": 1}),
+    ("Medium budget", "set_trip_details", {"budget": "medium"}),
+    ("Wi-Fi and a pool", "set_trip_details", {"amenities": "Wi-Fi, Pool"}),
+    ("Let's fly", "select_travel_mode", {"mode": "plane"}),
+    ("Which hotels do you have?", "suggest_hotels", {}),
+    ("The first one", "select_hotel", {"hotel_name": None}),
+    ("My name is Asha Rao", "set_customer_name", {"customer_name": "Asha Rao"}),
+    ("98765 43210", "set_mobile_number", {"mobile_number": "9876543210"}),
+    ("asha@example.com", "set_email", {"email": "asha@example.com"}),
+    ("Yes, please book it", "confirm_booking", {}),
+]
+BATCH_SCRIPT = [
+    ("Two adults and a child from Mumbai to Goa, 12th to 18th December, medium budget, Wi-Fi and a pool",
+     "set_trip_details", {"destination": "Goa", "origin": "Mumbai", "dates": "12-18 Dec", "num_adults": 2,
+                          "num_children": 1, "budget": "medium", "amenities": "Wi-Fi, Pool"}),
+    *SCRIPT[6:],
+]
+SCRIPTS = {"single": SCRIPT, "batch": BATCH_SCRIPT}
+TOOL_FOR_INPUT = {said: (tool, args) for script in SCRIPTS.values() for said, tool, args in script}
+# Weeks the sessions' stays are spread over
+STAY_WEEKS = 52
+
+
+def trip_dates_for(session: int) -> str:
+    """Six nights in one of STAY_WEEKS weeks, so a few sessions at most hold rooms on any night."""
+    check_in = date(2030, 1, 7) + timedelta(weeks=session % STAY_WEEKS)
+    return f"{check_in} to {check_in + timedelta(days=6)}"
+
+
+class ScriptedStream(llm.LLMStream):
+    def __init__(self, fake_llm, *, chat_ctx, tools, conn_options, delta, delay):
+        super().__init__(fake_llm, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._delta = delta
+        self._delay = delay
+
+    async def _run(self):
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        self._event_ch.send_nowait(ChatChunk(id="scripted", delta=self._delta))
+
+
+class ScriptedLLM(llm.LLM):
+    """Answers a scripted user turn with its tool call, and a tool result with a short reply."""
+
+    def __init__(self, delay: float = 0.0, hotel_name: str = "", dates: str = "12-18 Dec"):
+        super().__init__()
+        self.delay = delay
+        self.hotel_name = hotel_name
+        self.dates = dates
+        self._call_ids = count()
+        self.calls = 0
+
+    def chat(self, *, chat_ctx, tools=None, conn_options=DEFAULT_API_CONNECT_OPTIONS, **kwargs):
+        self.calls += 1
+        # Skip the progress note TravelAgent.llm_node adds when the trip changes
+        last = next(item for item in reversed(chat_ctx.items)
+                    if item.type != "message" or not item.text_content.startswith("<trip_progress>"))
+        if last.type == "message" and last.role == "user":
+            tool, args = TOOL_FOR_INPUT[last.text_content]
+            if "hotel_name" in args:
+                args = {"hotel_name": self.hotel_name}
+            if "dates" in args:
+                args = {**args, "dates": self.dates}
+            call = FunctionToolCall(name=tool, arguments=json.dumps(args), call_id=f"call_{next(self._call_ids)}")
+            delta = ChoiceDelta(role="assistant", tool_calls=[call])
+        else:
+            delta = ChoiceDelta(role="assistant", content="Done.")
+        return ScriptedStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options,
+                              delta=delta, delay=self.delay)
+
+
+class NullTransport:
+    def send_batch(self, messages):
+        return [None] * len(messages)
+
+    def close(self):
+        pass
+
+
+async def sample_loop_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append((time.perf_counter() - start - LAG_INTERVAL) * 1000)
+
+
+async def run_session(script, delay, hotel_name, dates, turns, tools):
+    """Run one scripted booking; returns the number of LLM calls it took, or None if nothing was booked."""
+    userdata = agent.Userdata(travel_state=agent.TravelState())
+    fake_llm = ScriptedLLM(delay, hotel_name, dates)
+    async with AgentSession(llm=fake_llm, userdata=userdata) as session:
+        userdata.agent_session = session
+        await session.start(agent.TravelAgent())
+        for said, tool, _ in script:
+            start = time.perf_counter()
+            result = await session.run(user_input=said)
+            turns[tool].append((time.perf_counter() - start) * 1000)
+            calls = {e.item.call_id: e.item.created_at for e in result.events if e.type == "function_call"}
+            for e in result.events:
+                if e.type == "function_call_output" and e.item.call_id in calls:
+                    tools[tool].append((e.item.created_at - calls[e.item.call_id]) * 1000)
+    return fake_llm.calls if userdata.travel_state.booking_id is not None else None
+
+
+def p(samples, q):
+    if not samples:
+        return float("nan")
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1] if len(samples) > 1 else samples[0]
+
+
+async def run_level(script, n, delay, hotel_name):
+    turns, tools, lags = defaultdict(list), defaultdict(list), []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_loop_lag(stop, lags))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_session(script, delay, hotel_name, trip_dates_for(i), turns, tools)
+                                     for i in range(n)), return_exceptions=True)
+    wall = time.perf_counter() - start
+    stop.set()
+    await sampler
+
+    llm_calls = [r for r in results if isinstance(r, int)]
+    booked = len(llm_calls)
+    all_turns = [t for samples in turns.values() for t in samples]
+    print(f"{n:>9} {booked:>7} {booked / wall:>13.1f} {statistics.fmean(llm_calls) if llm_calls else 0:>9.1f} "
+          f"{p(all_turns, 50):>9.1f} {p(all_turns, 99):>9.1f} "
+          f"{p(lags, 50):>8.2f} {p(lags, 99):>8.2f} {max(lags, default=0):>8.1f}")
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        print(f"          {len(errors)} sessions failed, first: {errors[0]!r}")
+    if booked + len(errors) < n:
+        print(f"          {n - booked - len(errors)} sessions ended without a booking")
+    for _, tool, _ in script:
+        print(f"          {tool:>20} turn p50 {p(turns[tool], 50):7.1f} p99 {p(turns[tool], 99):7.1f}"
+              f"   tool p50 {p(tools[tool], 50):6.1f} p99 {p(tools[tool], 99):6.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent AgentSession load test")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50, 100], help="concurrency levels")
+    parser.add_argument("--llm-delay-ms", type=float, default=0.0, help="simulated latency per LLM call")
+    parser.add_argument("--scripts", nargs="+", choices=list(SCRIPTS), default=["single"], help="conversations to run")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger("livekit.agents").setLevel(logging.ERROR)
+
+    store = MemoryBookingStore()
+    agent.get_booking_repository = lambda: store
+    outbox = EmailOutbox(MemoryOutboxStore(), NullTransport())
+    agent.get_email_outbox = lambda: outbox
+    outbox.start()
+    hotel_name = agent.get_catalog_reloader().catalog.find_hotels("Goa", budget="medium", amenities=["Wi-Fi", "Pool"],
+                                                                 limit=1)[0]["name"]
+
+    # One untimed session first, so lazy imports and the catalog load don't land in the first level
+    await run_session(SCRIPT, 0, hotel_name, trip_dates_for(0), defaultdict(list), defaultdict(list))
+    try:
+        for name in args.scripts:
+            print(f"\n{name} script\n{'sessions':>9} {'booked':>7} {'sessions/s':>13} {'LLM calls':>9} {'turn p50':>9} "
+                  f"{'turn p99':>9} {'lag p50':>8} {'lag p99':>8} {'lag max':>8}   (ms)")
+            for n in args.sessions:
+                await run_level(SCRIPTS[name], n, args.llm_delay_ms / 1000, hotel_name)
+    finally:
+        await outbox.stop(drain_timeout=1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,255 @@
+"""
+Benchmark: latency and allocations of every function tool, with a regression gate.
+
+Run from the backend directory:
+
+    uv run python benchmarks/bench_tools.py                  # report only
+    uv run python benchmarks/bench_tools.py --save-baseline  # record this machine's baseline
+    uv run python benchmarks/bench_tools.py --check          # exit 1 on regressions past --threshold
+
+Each tool is called directly with a stub RunContext (just `userdata`) holding
+a session state prepared for it, so the numbers cover our code only: no
+LLM, no network. Bookings go to a MemoryBookingStore and confirmation
+emails to an outbox that is never drained. State preparation is not timed;
+for confirm_booking it gives back the rooms the previous call held, so
+every call books the same hotel and dates rather than finding it full.
+Replies are checked against EXPECTED, so a scenario can't quietly start
+measuring an error path.
+
+Latency is sampled per call with perf_counter_ns over several rounds; the
+p50 reported and gated on is the best round's, and p90/p99/max cover all
+samples. Allocations are measured in a separate pass under tracemalloc
+(peak bytes allocated during the call), so tracing overhead doesn't skew
+the timings. Baselines are machine-specific and are written to
+benchmarks/baselines/, which is not checked in.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from itertools import count
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from livekit.agents.llm import is_function_tool
+
+import agent
+from booking_store import MemoryBookingStore
+from email_outbox import EmailOutbox, MemoryOutboxStore
+
+BASELINE_FILE = Path(__file__).parent / "baselines" / "bench_tools.json"
+# Regressions smaller than these are treated as noise, whatever the ratio
+MIN_DELTA_US = 5.0
+MIN_DELTA_KB = 1.0
+# Bookings on file for the customer before each tool runs
+SEEDED_BOOKINGS = 3
+# Text every reply of these tools must contain
+EXPECTED = {
+    "confirm_booking": "booking has been confirmed",
+    "cancel_booking": "cancelled. Refund amount",
+}
+
+_ids = count()
+
+
+class NullTransport:
+    def send_batch(self, messages):
+        return [None] * len(messages)
+
+    def close(self):
+        pass
+
+
+def context(**state) -> SimpleNamespace:
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState(**state)))
+
+
+def planned(**extra) -> dict:
+    """Session state just before hotel selection."""
+    return dict(origin="Mumbai", destination="Goa", travel_dates="12-18 Dec", num_adults=2, num_children=1,
+                budget="medium", amenities=("Wi-Fi", "Pool"), **extra)
+
+
+def completed() -> dict:
+    hotel = agent.get_catalog_reloader().catalog.hotels("Goa")[0]
+    return planned(selected_mode="plane", hotel_name=hotel["name"], customer_name="Asha Rao",
+                   mobile_number="9876543210", email="asha@example.com")
+
+
+async def saved_booking(store) -> str:
+    booking_id = f"B{next(_ids):07d}"
+    await store.save_booking({
+        "booking_id": booking_id, "customer_name": "Asha Rao", "mobile_number": "9876543210",
+        "email": "asha@example.com", "destination": "Goa", "travel_mode": "plane",
+        "hotel_name": "Taj Fort Aguada", "dates": "12-18 Dec", "num_travelers": 3,
+        "total_cost": 190000, "status": "confirmed",
+    })
+    return booking_id
+
+
+def scenarios(store):
+    """Tool name -> async prepare() returning (ctx, args) for one call."""
+
+    def fixed(state, *args):
+        async def prepare():
+            return context(**state()), args
+        return prepare
+
+    async def with_booking():
+        return context(), (await saved_booking(store),)
+
+    booked = []
+
+    async def completed_trip():
+        if booked:
+            booking_id = booked.pop().userdata.travel_state.booking_id
+            booking = await store.get_booking(booking_id) if booking_id else None
+            if booking:
+                await agent.get_room_inventory().release_booking(booking)
+        ctx = context(**completed())
+        booked.append(ctx)
+        return ctx, ()
+
+    return {
+        "set_trip_details": fixed(dict, "goa", "Mumbai", "12-18 Dec", 2, 1, "medium", "Wi-Fi, Pool"),
+        "select_travel_mode": fixed(planned, "plane"),
+        "plan_route": fixed(lambda: {"origin": "Manali", "destination": "Goa"}),
+        "suggest_hotels": fixed(planned),
+        "select_hotel": fixed(planned, "Taj Fort Aguada"),
+        "set_customer_name": fixed(planned, "Asha Rao"),
+        "set_mobile_number": fixed(planned, "+91 98765 43210"),
+        "set_email": fixed(planned, " Asha@Example.com "),
+        "confirm_booking": completed_trip,
+        "retrieve_booking": with_booking,
+        "find_my_bookings": fixed(lambda: {"email": "asha@example.com"}),
+        "cancel_booking": with_booking,
+        "list_destinations": fixed(dict, "ba"),
+    }
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1] if len(samples) > 1 else samples[0]
+
+
+def check(name, reply):
+    expected = EXPECTED.get(name)
+    if expected and expected not in reply:
+        sys.exit(f"{name} scenario no longer succeeds: {reply[:200]}")
+
+
+async def measure(name, tool, prepare, iterations, rounds, warmup, alloc_iterations):
+    for _ in range(warmup):
+        ctx, args = await prepare()
+        check(name, await tool(ctx, *args))
+
+    samples, round_p50s = [], []
+    for _ in range(rounds):
+        gc.collect()
+        round_samples = []
+        for _ in range(iterations // rounds):
+            ctx, args = await prepare()
+            start = time.perf_counter_ns()
+            reply = await tool(ctx, *args)
+            round_samples.append((time.perf_counter_ns() - start) / 1000)
+            check(name, reply)
+        samples += round_samples
+        round_p50s.append(statistics.median(round_samples))
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(alloc_iterations):
+        ctx, args = await prepare()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        reply = await tool(ctx, *args)
+        peaks.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+        check(name, reply)
+    tracemalloc.stop()
+
+    return {
+        # Best round, so a burst of noise from other processes doesn't read as a regression
+        "p50_us": min(round_p50s),
+        "p90_us": percentile(samples, 90),
+        "p99_us": percentile(samples, 99),
+        "max_us": max(samples),
+        "peak_kb": statistics.median(peaks),
+    }
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key, floor in (("p50_us", MIN_DELTA_US), ("peak_kb", MIN_DELTA_KB)):
+            limit = base[key] * (1 + threshold)
+            if result[key] > limit and result[key] - base[key] > floor:
+                found.append(f"{name}: {key} {result[key]:.1f} vs baseline {base[key]:.1f} (limit {limit:.1f})")
+    return found
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Per-tool latency and allocation benchmark")
+    parser.add_argument("--tools", nargs="+", help="only these tools")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds; p50 is the best round's")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--alloc-iterations", type=int, default=200)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any tool regressed past --threshold")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction (default: 0.25)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    tools = {name: obj for name, obj in vars(agent).items() if is_function_tool(obj)}
+    missing = sorted(set(tools) - set(scenarios(None)))
+    if missing:
+        sys.exit(f"No benchmark scenario for tools: {', '.join(missing)}")
+    names = args.tools or sorted(tools, key=list(scenarios(None)).index)
+
+    results = {}
+    print(f"{'tool':>20} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>9} {'peak KB':>8}")
+    for name in names:
+        # Fresh stores per tool, so bookings saved by one tool don't slow down the next
+        store = MemoryBookingStore()
+        outbox = EmailOutbox(MemoryOutboxStore(), NullTransport())
+        agent.get_booking_repository = lambda store=store: store
+        agent.get_email_outbox = lambda outbox=outbox: outbox
+        for _ in range(SEEDED_BOOKINGS):
+            await saved_booking(store)
+        result = await measure(name, tools[name], scenarios(store)[name], args.iterations, args.rounds,
+                               args.warmup, args.alloc_iterations)
+        results[name] = result
+        print(f"{name:>20} {result['p50_us']:9.1f} {result['p90_us']:9.1f} {result['p99_us']:9.1f} "
+              f"{result['max_us']:9.1f} {result['peak_kb']:8.1f}")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        saved = json.loads(args.baseline.read_text())["tools"] if args.baseline.exists() else {}
+        saved.update(results)
+        meta = {"python": platform.python_version(), "machine": platform.machine(), "iterations": args.iterations}
+        args.baseline.write_text(json.dumps({"meta": meta, "tools": saved}, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+        found = regressions(results, json.loads(args.baseline.read_text())["tools"], args.threshold)
+        if found:
+            print("\nRegressions:\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print(f"\nNo regressions past {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,122 +1,64 @@
-import logging
+import asyncio
+import functools
+import gc
 import json
+import logging
 import os
-import asyncio
+import sys
+import threading
 import uuid
-from datetime import datetime
-from typing import Annotated, Literal, Optional, List, Dict
+import weakref
 from dataclasses import dataclass
-import sys
-import os
+from datetime import datetime
 from pathlib import Path
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Annotated, Optional, Union
 
 # Add src directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from mongodb_utils import load_bookings, save_booking, get_booking, update_booking
-
-
-
 from dotenv import load_dotenv
-from pydantic import Field
 from livekit.agents import (
     Agent,
     AgentSession,
+    ChatContext,
     JobContext,
     JobProcess,
     RoomInputOptions,
+    RunContext,
     WorkerOptions,
     cli,
     function_tool,
-    RunContext,
 )
+from pydantic import Field
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+# Storage, email, catalog and plugin modules are imported on first use (see the
+# accessors below) so spawning a process or importing this module for tests stays fast
+import metrics
+from session_state import SessionCheckpointer, TravelState, session_key
+from travel_data import DISTANCES, TRAVEL_MODES
+from trip_quotes import DEFAULT_NIGHTS, TripQuotes, trip_dates
+from warmup import run_async_stage, run_stages
+
+if TYPE_CHECKING:
+    from booking_store import BookingStore
+    from compiled_catalog import MappedHotelCatalog
+    from fares import FareTable
+    from hotel_catalog import CatalogReloader, HotelCatalog
+    from name_matcher import NameMatcher
+    from room_inventory import RoomInventory
+    from route_graph import RouteGraph
 
 logger = logging.getLogger("agent")
-load_dotenv(".env.local")
 
 
 
 HOTELS_FILE = "hotels.json"
+# Built from HOTELS_FILE and DISTANCES by compiled_catalog.py; mapped read-only and
+# shared through the page cache by every job process on the host
+COMPILED_CATALOG_FILE = "hotels.bin"
 BOOKINGS_FILE = "booking.json"
 
-# Travel modes data
-TRAVEL_MODES = {
-    "bus": {"cost_per_km": 2, "speed_kmh": 50, "description": "Comfortable bus service with AC"},
-    "train": {"cost_per_km": 1.5, "speed_kmh": 60, "description": "Railway service with various classes"},
-    "plane": {"cost_per_km": 5, "speed_kmh": 500, "description": "Air travel for long distances"},
-    "private_car": {"cost_per_km": 10, "speed_kmh": 40, "description": "Private vehicle for short distances"}
-}
-
-# Sample distances from major cities (in km)
-DISTANCES = {
-    # Delhi connections
-    ("Delhi", "Mumbai"): 1400,
-    ("Delhi", "Goa"): 1800,
-    ("Delhi", "Jaipur"): 280,
-    ("Delhi", "Bangalore"): 2150,
-    ("Delhi", "Kerala"): 2700,
-    ("Delhi", "Kolkata"): 1500,
-    ("Delhi", "Hyderabad"): 1550,
-    ("Delhi", "Udaipur"): 660,
-    ("Delhi", "Agra"): 230,
-    ("Delhi", "Chennai"): 2200,
-    ("Delhi", "Shimla"): 350,
-    ("Delhi", "Manali"): 540,
-    # Mumbai connections
-    ("Mumbai", "Goa"): 580,
-    ("Mumbai", "Jaipur"): 1200,
-    ("Mumbai", "Bangalore"): 980,
-    ("Mumbai", "Kerala"): 1300,
-    ("Mumbai", "Kolkata"): 2000,
-    ("Mumbai", "Hyderabad"): 710,
-    ("Mumbai", "Udaipur"): 650,
-    ("Mumbai", "Agra"): 1200,
-    ("Mumbai", "Chennai"): 1330,
-    ("Mumbai", "Shimla"): 1700,
-    ("Mumbai", "Manali"): 1900,
-    # Goa connections
-    ("Goa", "Jaipur"): 1600,
-    ("Goa", "Bangalore"): 560,
-    ("Goa", "Kerala"): 600,
-    ("Goa", "Kolkata"): 1900,
-    ("Goa", "Hyderabad"): 660,
-    ("Goa", "Chennai"): 900,
-    # Bangalore connections
-    ("Bangalore", "Kerala"): 550,
-    ("Bangalore", "Kolkata"): 1870,
-    ("Bangalore", "Hyderabad"): 570,
-    ("Bangalore", "Chennai"): 350,
-    ("Bangalore", "Jaipur"): 1900,
-    # Kerala connections
-    ("Kerala", "Chennai"): 700,
-    ("Kerala", "Hyderabad"): 1000,
-    ("Kerala", "Kolkata"): 2100,
-    # Kolkata connections
-    ("Kolkata", "Hyderabad"): 1500,
-    ("Kolkata", "Chennai"): 1670,
-    ("Kolkata", "Jaipur"): 1500,
-    # Hyderabad connections
-    ("Hyderabad", "Chennai"): 630,
-    ("Hyderabad", "Jaipur"): 1400,
-    ("Hyderabad", "Udaipur"): 1100,
-    # Udaipur connections
-    ("Udaipur", "Jaipur"): 400,
-    ("Udaipur", "Agra"): 630,
-    # Agra connections
-    ("Agra", "Jaipur"): 240,
-    # Shimla connections
-    ("Shimla", "Manali"): 250,
-    ("Shimla", "Jaipur"): 600,
-    # Chennai connections
-    ("Chennai", "Jaipur"): 2000
-}
-
 def load_hotels():
     """Load hotel data from JSON file."""
     try:
@@ -130,268 +72,359 @@ def load_hotels():
         logger.error(f"Error loading hotels: {e}")
         return {}
 
-# Load hotel data immediately on startup
-HOTEL_DATA = load_hotels()
-
-
-@dataclass
-class TravelState:
-    """Tracks the current travel planning context"""
-    origin: str | None = None
-    destination: str | None = None
-    travel_dates: str | None = None
-    num_adults: int = 0
-    num_children: int = 0
-    preferences: Dict[str, any] = None
-    selected_mode: str | None = None
-    selected_hotel: Dict | None = None
-    booking_id: str | None = None
-    customer_name: str | None = None
-    mobile_number: str | None = None
-    email: str | None = None
+def compiled_catalog_path() -> Optional[str]:
+    """Path of the compiled catalog, if one has been built."""
+    from compiled_catalog import is_compiled_catalog
+
+    compiled = os.path.join(os.path.dirname(__file__), COMPILED_CATALOG_FILE)
+    return compiled if is_compiled_catalog(compiled) else None
+
+def open_catalog(compiled: str) -> Union["HotelCatalog", "MappedHotelCatalog"]:
+    """Map the compiled catalog, or parse hotels.json if it was edited after the compile."""
+    from compiled_catalog import MappedHotelCatalog
+    from hotel_catalog import HotelCatalog, parse_catalog
+
+    source = os.path.join(os.path.dirname(compiled), HOTELS_FILE)
+    if os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(compiled):
+        logger.warning(f"{COMPILED_CATALOG_FILE} is older than {HOTELS_FILE}; loading JSON. "
+                       f"Run src/compiled_catalog.py to rebuild it.")
+        with open(source, encoding="utf-8") as f:
+            return HotelCatalog(parse_catalog(f.read()))
+    return MappedHotelCatalog.open(compiled)
+
+def load_catalog() -> tuple["CatalogReloader", "RouteGraph"]:
+    """Open the hotel catalog and route graph, preferring the compiled file."""
+    from compiled_catalog import load_route_graph
+    from hotel_catalog import CatalogReloader, HotelCatalog
+    from route_graph import RouteGraph
+
+    source = os.path.join(os.path.dirname(__file__), HOTELS_FILE)
+    compiled = compiled_catalog_path()
+    if compiled:
+        try:
+            # hotels.json edits are served from JSON until hotels.bin is rebuilt
+            reloader = CatalogReloader(compiled, loader=open_catalog, also_watch=[source])
+            return reloader, load_route_graph(compiled, DISTANCES)
+        except Exception as e:
+            logger.error(f"Error mapping {COMPILED_CATALOG_FILE}, loading JSON instead: {e}")
+    reloader = CatalogReloader(source, HotelCatalog(load_hotels()))
+    return reloader, RouteGraph(DISTANCES)
+
+_catalog_state = None
+_catalog_lock = threading.Lock()
+
+def _get_catalog_state() -> tuple["CatalogReloader", "RouteGraph", "FareTable"]:
+    global _catalog_state
+    if _catalog_state is None:
+        # prewarm builds this from several threads at once
+        with _catalog_lock:
+            if _catalog_state is None:
+                from fares import FareTable
+
+                reloader, routes = load_catalog()
+                _catalog_state = (reloader, routes, FareTable(routes, TRAVEL_MODES))
+    return _catalog_state
+
+def get_catalog_reloader() -> "CatalogReloader":
+    """Sessions read get_catalog_reloader().catalog; catalog file updates are swapped in live."""
+    return _get_catalog_state()[0]
+
+def get_route_graph() -> "RouteGraph":
+    """All-pairs routes over DISTANCES, so pairs missing from the table still get quoted."""
+    return _get_catalog_state()[1]
+
+def get_fare_table() -> "FareTable":
+    return _get_catalog_state()[2]
+
+# Matchers per catalog snapshot, held weakly so a snapshot replaced by a reload is freed
+# with its matchers once no session holds it
+_matchers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def _catalog_matchers(catalog) -> dict[Optional[str], "NameMatcher"]:
+    matchers = _matchers.get(catalog)
+    if matchers is None:
+        matchers = _matchers.setdefault(catalog, {})
+    return matchers
+
+def city_matcher(catalog) -> "NameMatcher":
+    """Destinations and their other names, for resolving misheard cities."""
+    matchers = _catalog_matchers(catalog)
+    if None not in matchers:
+        from name_matcher import CITY_ALIASES, NameMatcher
+        matchers[None] = NameMatcher(catalog.destinations(), CITY_ALIASES)
+    return matchers[None]
+
+def hotel_matcher(catalog, city: str) -> "NameMatcher":
+    matchers = _catalog_matchers(catalog)
+    if city not in matchers:
+        from name_matcher import NameMatcher
+        matchers[city] = NameMatcher(hotel["name"] for hotel in catalog.hotels(city))
+    return matchers[city]
+
+@functools.cache
+def origin_matcher() -> "NameMatcher":
+    from name_matcher import CITY_ALIASES, NameMatcher
+    return NameMatcher(get_route_graph().cities, CITY_ALIASES)
+
+def get_booking_repository() -> "BookingStore":
+    """Process-wide booking store selected by BOOKING_STORE (imports its driver on first use)."""
+    from booking_store import get_booking_store
+    return get_booking_store()
+
+@functools.cache
+def get_room_inventory() -> "RoomInventory":
+    """Process-wide room inventory, holding rooms in the booking store."""
+    from room_inventory import RoomInventory
+    return RoomInventory(lambda: get_booking_repository())
+
+def get_email_outbox():
+    """Process-wide confirmation email outbox (imports smtplib and pymongo on first use)."""
+    from email_outbox import get_email_outbox as get_outbox
+    return get_outbox()
+
+@functools.cache
+def load_plugins() -> SimpleNamespace:
+    """Import the LiveKit plugins.
+
+    Plugins register themselves on import and must do so on the main thread,
+    so this runs from main() and prewarm before any worker threads use them.
+    """
+    from livekit.plugins import deepgram, google, murf, noise_cancellation, silero
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+    return SimpleNamespace(
+        murf=murf, silero=silero, google=google, deepgram=deepgram,
+        noise_cancellation=noise_cancellation, MultilingualModel=MultilingualModel,
+    )
 
-    def __post_init__(self):
-        if self.preferences is None:
-            self.preferences = {}
 
-@dataclass
+@dataclass(slots=True)
 class Userdata:
     travel_state: TravelState
     agent_session: Optional[AgentSession] = None
+    # Catalog snapshot pinned for the whole session, so a reload mid-call can't change prices
+    catalog: Optional[Union["HotelCatalog", "MappedHotelCatalog"]] = None
+    # Fares and hotel shortlist worked out in the background as trip details come in
+    quotes: Optional[TripQuotes] = None
+    inventory: Optional["RoomInventory"] = None
 
-
-async def send_booking_email(booking: dict) -> bool:
-    """Send booking confirmation email to customer."""
-    try:
-        sender_email = os.getenv("SMTP_EMAIL")
-        sender_password = os.getenv("SMTP_PASSWORD")
-        
-        if not sender_email or not sender_password:
-            logger.error("SMTP credentials not found in environment variables")
-            return False
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = booking['email']
-        msg['Subject'] = f"Booking Confirmation - Sacred Trails India ({booking['booking_id']})"
-        
-        # Create email body
-        body = f"""
-Dear {booking['customer_name']},
-
-Thank you for choosing Sacred Trails India! Your booking has been confirmed.
-
-🎉 BOOKING DETAILS:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Booking ID: {booking['booking_id']}
-Customer: {booking['customer_name']}
-Mobile: {booking['mobile_number']}
-Email: {booking['email']}
-
-Trip Information:
-Destination: {booking['destination']}
-Travel Mode: {booking['travel_mode'].title()}
-Hotel: {booking['hotel_name']}
-Travel Dates: {booking['dates']}
-Number of Travelers: {booking['num_travelers']}
-Hotel Rating: {booking['hotel_rating']} stars
-
-💰 COST BREAKDOWN:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Total Cost: ₹{booking['total_cost']}
-
-Hotel: ₹{booking['hotel_price_per_night']}/night for {booking['num_travelers']} travelers
-
-🏨 Hotel Details:
-{booking['hotel_description']}
-
-Hotel Amenities: {', '.join(booking['hotel_amenities'])}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-✅ Status: {booking['status'].title()}
-📅 Booking Time: {booking['timestamp']}
-
-Please save this email for your records. If you have any questions or need assistance, 
-feel free to contact us.
-
-Safe travels and enjoy your trip to {booking['destination']}!
-
-Best regards,
-Nikhil from Sacred Trails India
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-This is an automated confirmation email. Please do not reply to this email.
-        """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            text = msg.as_string()
-            server.sendmail(sender_email, booking['email'], text)
-        
-        logger.info(f"Booking confirmation email sent successfully to {booking['email']}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send booking confirmation email: {str(e)}")
-        return False
-
-
-@function_tool
-async def set_destination(
-    ctx: RunContext[Userdata],
-    destination: Annotated[str, Field(description="The destination city in India")]
-) -> str:
-    """Sets the destination for travel planning."""
-    state = ctx.userdata.travel_state
-    if destination.title() not in HOTEL_DATA:
-        available = ", ".join(HOTEL_DATA.keys())
-        return f"Sorry, we don't have hotels in {destination}. Available destinations: {available}. Please choose from these."
-    state.destination = destination.title()
-    return f"Great choice! {state.destination} is a wonderful destination. Now, where are you traveling from?"
-
-@function_tool
-async def set_origin(
-    ctx: RunContext[Userdata],
-    origin: Annotated[str, Field(description="The origin city")]
-) -> str:
-    """Sets the origin city."""
-    state = ctx.userdata.travel_state
-    state.origin = origin.title()
-    return f"Got it, traveling from {state.origin}. What are your travel dates?"
-
-@function_tool
-async def set_travel_dates(
-    ctx: RunContext[Userdata],
-    dates: Annotated[str, Field(description="Travel dates")]
-) -> str:
-    """Sets the travel dates."""
-    state = ctx.userdata.travel_state
-    state.travel_dates = dates
-    return f"Travel dates set: {dates}. How many adults and children are traveling?"
-
-@function_tool
-async def set_travelers(
+    def __post_init__(self):
+        if self.catalog is None:
+            self.catalog = get_catalog_reloader().catalog
+        if self.inventory is None:
+            self.inventory = get_room_inventory()
+        if self.quotes is None:
+            self.quotes = TripQuotes(self.catalog, get_fare_table, get_route_graph, self.inventory)
+        # A restored session gets its fares and shortlist ready too
+        self.quotes.refresh(self.travel_state)
+
+    @property
+    def selected_hotel(self) -> Optional[dict]:
+        state = self.travel_state
+        if not state.hotel_name:
+            return None
+        return self.catalog.get_hotel(state.destination, state.hotel_name)
+
+
+BUDGETS = ("low", "medium", "high")
+# The first _progress_steps entries are the details update_trip_details sets
+TRIP_DETAIL_STEPS = 6
+
+def update_trip_details(
     ctx: RunContext[Userdata],
-    num_adults: Annotated[int, Field(description="Number of adults")],
-    num_children: Annotated[int, Field(description="Number of children")]
+    destination: Optional[str] = None,
+    origin: Optional[str] = None,
+    dates: Optional[str] = None,
+    num_adults: Optional[int] = None,
+    num_children: Optional[int] = None,
+    budget: Optional[str] = None,
+    amenities: Optional[str] = None,
 ) -> str:
-    """Sets the number of travelers."""
-    state = ctx.userdata.travel_state
-    state.num_adults = num_adults
-    state.num_children = num_children
-    return f"{num_adults} adults and {num_children} children. What's your budget range? (low, medium, or high)"
+    """Validate and save any of the trip details, then say what was saved, what was wrong and what is missing.
 
-@function_tool
-async def set_budget(
-    ctx: RunContext[Userdata],
-    budget: Annotated[str, Field(description="Budget range: low, medium, or high")]
-) -> str:
-    """Sets the budget preference."""
+    Valid details are saved even when others are rejected, so the caller is
+    only asked again for the ones that were wrong.
+    """
     state = ctx.userdata.travel_state
-    if budget.lower() not in ["low", "medium", "high"]:
-        return "Please choose low, medium, or high for budget."
-    state.preferences["budget"] = budget.lower()
-    return f"Budget set to {budget}. Any preferred amenities? (e.g., 'Wi-Fi, Pool, Breakfast' or 'none')"
+    catalog = ctx.userdata.catalog
+    saved, problems = [], []
+
+    if destination is not None:
+        matcher = city_matcher(catalog)
+        city = destination.title() if destination.title() in catalog else matcher.resolve(destination)
+        if city:
+            state.destination = city
+            saved.append(f"destination {state.destination}")
+        else:
+            close = matcher.suggest(destination)
+            hint = f"did you mean {' or '.join(close)}? Confirm with the caller" if close else "list_destinations has the options"
+            problems.append(f"we don't have hotels in {destination} ({hint})")
+    if origin is not None:
+        matcher = origin_matcher()
+        city = matcher.resolve(origin)
+        close = matcher.suggest(origin) if city is None else []
+        if close:
+            # Kota isn't Kolkata: a city that only sounds like one we serve is confirmed, not assumed
+            problems.append(f"we have no routes from {origin} (did you mean {' or '.join(close)}? Confirm with the caller)")
+        else:
+            # Other unknown origins are kept as said; select_travel_mode reports when there's no route
+            city = city or origin.title()
+            if city == state.destination:
+                problems.append(f"origin {city} is the destination")
+            else:
+                state.origin = city
+                saved.append(f"origin {state.origin}")
+    if dates is not None:
+        state.travel_dates = dates
+        saved.append(f"dates {dates}")
+    if num_adults is not None or num_children is not None:
+        adults = state.num_adults if num_adults is None else num_adults
+        children = state.num_children if num_children is None else num_children
+        if adults < 0 or children < 0:
+            problems.append("traveler counts can't be negative")
+        elif children and not adults:
+            problems.append("children need at least one adult traveling with them")
+        else:
+            state.num_adults, state.num_children = adults, children
+            saved.append(f"{adults} adults and {children} children")
+    if budget is not None:
+        if budget.lower() in BUDGETS:
+            state.budget = budget.lower()
+            saved.append(f"{budget.lower()} budget")
+        else:
+            problems.append("budget must be low, medium or high")
+    if amenities is not None:
+        state.amenities = () if amenities.lower() == "none" else tuple(a.strip() for a in amenities.split(","))
+        saved.append(f"amenities {', '.join(state.amenities) or 'none'}")
+
+    # Start on the fares and shortlist the next tools will need while this reply is spoken
+    ctx.userdata.quotes.refresh(state)
+
+    missing = [label for label, value, _ in _progress_steps(state)[:TRIP_DETAIL_STEPS] if not value]
+    parts = []
+    if saved:
+        parts.append(f"Saved {', '.join(saved)}.")
+    if problems:
+        parts.append(f"Not saved: {'; '.join(problems)}.")
+    if missing:
+        parts.append(f"Still needed: {', '.join(missing)}.")
+    else:
+        parts.append("All trip details are set; offer travel modes next.")
+    return " ".join(parts)
 
 @function_tool
-async def set_amenities(
+async def set_trip_details(
     ctx: RunContext[Userdata],
-    amenities: Annotated[str, Field(description="Preferred amenities or 'none'")]
+    destination: Annotated[Optional[str], Field(description="City in India")] = None,
+    origin: Optional[str] = None,
+    dates: Optional[str] = None,
+    num_adults: Optional[int] = None,
+    num_children: Optional[int] = None,
+    budget: Annotated[Optional[str], Field(description="low, medium or high")] = None,
+    amenities: Annotated[Optional[str], Field(description="Comma separated, or 'none'")] = None,
 ) -> str:
-    """Sets the amenities preferences."""
-    state = ctx.userdata.travel_state
-    if amenities.lower() == "none":
-        state.preferences["amenities"] = []
-    else:
-        state.preferences["amenities"] = [a.strip() for a in amenities.split(",")]
-    return "Preferences set! Now let's find the best travel options for you."
+    """Saves any trip details the caller gave and reports what is still missing."""
+    return update_trip_details(ctx, destination=destination, origin=origin, dates=dates, num_adults=num_adults,
+                               num_children=num_children, budget=budget, amenities=amenities)
 
 @function_tool
 async def select_travel_mode(
     ctx: RunContext[Userdata],
-    mode: Annotated[str, Field(description="Travel mode: 'bus', 'train', 'plane', or 'private_car'")]
+    mode: Annotated[str, Field(description="bus, train, plane or private_car")]
 ) -> str:
-    """Selects the travel mode and calculates costs/duration."""
+    """Selects the travel mode and quotes its cost and duration."""
     state = ctx.userdata.travel_state
     if not state.origin or not state.destination:
         return "Please set travel details first."
 
-    distance = DISTANCES.get((state.origin, state.destination), DISTANCES.get((state.destination, state.origin), 500))  # default 500km
+    fares = await ctx.userdata.quotes.fares(state)
+    if fares is None:
+        return f"Sorry, I don't have a route from {state.origin} to {state.destination}. Please choose another origin city."
     mode_data = TRAVEL_MODES.get(mode.lower())
     if not mode_data:
         return f"Invalid mode. Available: {', '.join(TRAVEL_MODES.keys())}"
 
-    cost = distance * mode_data["cost_per_km"] * (state.num_adults + state.num_children)
-    duration_hours = distance / mode_data["speed_kmh"]
+    quote = fares["quotes"][mode.lower()]
     state.selected_mode = mode.lower()
+    state.selected_quote = quote
+
+    route = fares["route"]
+    via = f" via {', '.join(route[1:-1])}" if len(route) > 2 else ""
+    return f"Selected {mode}: Distance {quote['distance_km']}km{via}, Cost ₹{quote['cost']}, Duration {quote['duration_hours']:.1f} hours. {mode_data['description']}."
+
+@function_tool
+async def plan_route(
+    ctx: RunContext[Userdata]
+) -> str:
+    """Describes a multi-leg route leg by leg."""
+    state = ctx.userdata.travel_state
+    if not state.origin or not state.destination:
+        return "Please set travel details first."
+
+    routes = get_route_graph()
+    legs = routes.legs(state.origin, state.destination)
+    if not legs:
+        return f"Sorry, I don't have a route from {state.origin} to {state.destination}."
 
-    return f"Selected {mode}: Distance {distance}km, Cost ₹{cost}, Duration {duration_hours:.1f} hours. {mode_data['description']}."
+    steps = [f"{leg['from']} to {leg['to']} by {leg['mode'].replace('_', ' ')} ({leg['distance_km']}km)" for leg in legs]
+    distance = routes.distance(state.origin, state.destination)
+    return f"Suggested route: {', then '.join(steps)}. Total distance {distance}km."
 
 @function_tool
 async def suggest_hotels(
     ctx: RunContext[Userdata]
 ) -> str:
-    """Suggests hotels based on destination and preferences."""
+    """Suggests hotels for the trip."""
     state = ctx.userdata.travel_state
     if not state.destination:
         return "Please set destination first."
 
-    hotels = HOTEL_DATA.get(state.destination, [])
-    if not hotels:
+    # Matches for the budget and amenities, or the first few hotels if none match; only
+    # hotels with rooms free on every night when the dates are known
+    shortlist = await ctx.userdata.quotes.shortlist(state)
+    if not shortlist:
+        if trip_dates(state.travel_dates):
+            return f"No hotels in {state.destination} have rooms free for {state.travel_dates}. Ask about other dates."
         return f"No hotels found for {state.destination}."
 
-    # Filter by preferences
-    filtered = []
-    for hotel in hotels:
-        if not hotel["availability"]:
-            continue
-        if state.preferences.get("budget") == "low" and hotel["price_per_night"] > 5000:
-            continue
-        if state.preferences.get("budget") == "high" and hotel["price_per_night"] < 15000:
-            continue
-        if state.preferences.get("amenities"):
-            if not all(amenity in hotel["amenities"] for amenity in state.preferences["amenities"]):
-                continue
-        filtered.append(hotel)
-
-    if not filtered:
-        filtered = hotels[:3]  # fallback to first 3
-
     suggestions = []
-    for hotel in filtered[:3]:
-        suggestions.append(f"{hotel['name']} ({hotel['rating']}★) - ₹{hotel['price_per_night']}/night - {hotel['description']}")
+    for hotel in shortlist:
+        suggestions.append(f"{hotel['name']} ({hotel['rating']}★) - ₹{hotel['price_per_night']}/room/night - {hotel['description']}")
 
     return f"Hotel suggestions for {state.destination}:\n" + "\n".join(suggestions) + "\n\nPlease select a hotel by name."
 
 @function_tool
 async def select_hotel(
     ctx: RunContext[Userdata],
-    hotel_name: Annotated[str, Field(description="The name of the selected hotel")]
+    hotel_name: str
 ) -> str:
-    """Selects a hotel for booking."""
+    """Selects a hotel."""
     state = ctx.userdata.travel_state
     if not state.destination:
         return "Please set destination first."
 
-    hotels = HOTEL_DATA.get(state.destination, [])
-    hotel = next((h for h in hotels if h["name"].lower() == hotel_name.lower()), None)
+    catalog = ctx.userdata.catalog
+    hotel = catalog.get_hotel(state.destination, hotel_name)
+    if not hotel:
+        matcher = hotel_matcher(catalog, state.destination)
+        name = matcher.resolve(hotel_name)
+        hotel = catalog.get_hotel(state.destination, name) if name else None
     if not hotel:
+        close = matcher.suggest(hotel_name)
+        if close:
+            return f"Hotel '{hotel_name}' not found. Closest: {', '.join(close)}. Confirm with the caller."
+        hotels = catalog.hotels(state.destination)
         return f"Hotel '{hotel_name}' not found. Available: {', '.join([h['name'] for h in hotels])}"
 
-    state.selected_hotel = hotel
+    state.hotel_name = hotel["name"]
     return f"Selected {hotel['name']}. Before I can proceed with your booking, I need to collect your contact details."
 
 @function_tool
 async def set_customer_name(
     ctx: RunContext[Userdata],
-    customer_name: Annotated[str, Field(description="Customer's full name")]
+    customer_name: Annotated[str, Field(description="Full name")]
 ) -> str:
-    """Sets the customer's name for booking."""
+    """Saves the customer's name."""
     state = ctx.userdata.travel_state
     state.customer_name = customer_name.strip()
     return f"Thank you, {state.customer_name}. Now I'll need your mobile number for booking confirmations."
@@ -399,9 +432,9 @@ async def set_customer_name(
 @function_tool
 async def set_mobile_number(
     ctx: RunContext[Userdata],
-    mobile_number: Annotated[str, Field(description="Customer's mobile number")]
+    mobile_number: str
 ) -> str:
-    """Sets the customer's mobile number."""
+    """Saves the customer's mobile number."""
     state = ctx.userdata.travel_state
     # Basic validation for mobile number (10 digits)
     clean_number = ''.join(filter(str.isdigit, mobile_number))
@@ -414,9 +447,9 @@ async def set_mobile_number(
 @function_tool
 async def set_email(
     ctx: RunContext[Userdata],
-    email: Annotated[str, Field(description="Customer's email address")]
+    email: str
 ) -> str:
-    """Sets the customer's email address."""
+    """Saves the customer's email address."""
     state = ctx.userdata.travel_state
     # Basic email validation
     if '@' not in email or '.' not in email:
@@ -429,25 +462,49 @@ async def set_email(
 async def confirm_booking(
     ctx: RunContext[Userdata]
 ) -> str:
-    """Confirms and creates the booking with collected customer details."""
+    """Books the trip once every detail is collected."""
     state = ctx.userdata.travel_state
-    if not all([state.destination, state.selected_mode, state.selected_hotel, state.customer_name, state.mobile_number, state.email]):
-        missing = []
-        if not state.destination: missing.append("destination")
-        if not state.selected_mode: missing.append("travel mode")
-        if not state.selected_hotel: missing.append("hotel selection")
-        if not state.customer_name: missing.append("customer name")
-        if not state.mobile_number: missing.append("mobile number")
-        if not state.email: missing.append("email address")
+    hotel = ctx.userdata.selected_hotel
+    required = {
+        "destination": state.destination,
+        "travel mode": state.selected_mode,
+        "hotel selection": hotel,
+        "customer name": state.customer_name,
+        "mobile number": state.mobile_number,
+        "email address": state.email,
+    }
+    missing = [label for label, value in required.items() if not value]
+    if missing:
         return f"Please complete all selections first. Missing: {', '.join(missing)}."
 
-    # Calculate total cost
-    distance = DISTANCES.get((state.origin, state.destination), DISTANCES.get((state.destination, state.origin), 500))
-    mode_data = TRAVEL_MODES[state.selected_mode]
-    travel_cost = distance * mode_data["cost_per_km"] * (state.num_adults + state.num_children)
-
-    # Assume 3 nights for simplicity
-    hotel_cost = state.selected_hotel["price_per_night"] * 3 * (state.num_adults + state.num_children)
+    # Charge the fare the caller was quoted, unless the trip has changed since
+    travelers = state.num_adults + state.num_children
+    quote = state.selected_quote
+    if quote is None or (quote["mode"], quote["origin"], quote["destination"], quote["travelers"]) != (
+            state.selected_mode, state.origin, state.destination, travelers):
+        fares = await ctx.userdata.quotes.fares(state)
+        quote = fares["quotes"].get(state.selected_mode) if fares else None
+    if quote is None:
+        return f"Sorry, I don't have a route from {state.origin} to {state.destination}. Please set a valid origin city."
+    travel_cost = quote["cost"]
+
+    # Hold the rooms for every night first; two callers can't both get the last one.
+    # Dates that can't be read are priced at DEFAULT_NIGHTS for the rooms needed, but hold none.
+    stay = trip_dates(state.travel_dates)
+    nights = (stay[1] - stay[0]).days if stay else DEFAULT_NIGHTS
+    from room_inventory import rooms_needed
+    rooms = rooms_needed(travelers)
+    inventory = ctx.userdata.inventory
+    if stay:
+        held = await inventory.reserve(state.destination, hotel, *stay, rooms)
+        if held is None:
+            return "Sorry, I couldn't check room availability just now. Please try again."
+        if not held:
+            state.hotel_name = None
+            return (f"Sorry, {hotel['name']} no longer has {rooms} room(s) free for {state.travel_dates}. "
+                    f"Please suggest other hotels or dates.")
+    # Hotels charge per room, two guests to a room: the rooms held are the rooms billed
+    hotel_cost = hotel["price_per_night"] * nights * rooms
     total_cost = travel_cost + hotel_cost
 
     booking_id = str(uuid.uuid4())[:8].upper()
@@ -458,27 +515,32 @@ async def confirm_booking(
         "email": state.email,
         "destination": state.destination,
         "travel_mode": state.selected_mode,
-        "hotel_name": state.selected_hotel["name"],
+        "hotel_name": hotel["name"],
         "dates": state.travel_dates,
-        "num_travelers": state.num_adults + state.num_children,
+        "nights": nights,
+        "num_travelers": travelers,
+        "rooms": rooms,
         "total_cost": total_cost,
         "status": "confirmed",
         "timestamp": datetime.now().isoformat(),
-        "hotel_rating": state.selected_hotel.get("rating"),
-        "hotel_amenities": state.selected_hotel.get("amenities", []),
-        "hotel_description": state.selected_hotel.get("description", ""),
-        "hotel_price_per_night": state.selected_hotel.get("price_per_night")
+        "hotel_rating": hotel.get("rating"),
+        "hotel_amenities": hotel.get("amenities", []),
+        "hotel_description": hotel.get("description", ""),
+        "hotel_price_per_night": hotel.get("price_per_night")
     }
+    if stay:
+        booking.update(check_in=stay[0].isoformat(), check_out=stay[1].isoformat())
 
-    if save_booking(booking):
+    if await get_booking_repository().save_booking(booking):
         state.booking_id = booking_id
     else:
+        await inventory.release_booking(booking)
         return "Failed to save booking. Please try again."
 
-    # Send booking confirmation email
-    email_sent = await send_booking_email(booking)
-    if not email_sent:
-        logger.warning(f"Failed to send email for booking {booking_id}")
+    # Queue booking confirmation email; the outbox sends it in the background
+    email_queued = await get_email_outbox().enqueue_booking_confirmation(booking)
+    if not email_queued:
+        logger.warning(f"Failed to queue email for booking {booking_id}")
 
     # Create booking data JSON for frontend to parse
     booking_json = json.dumps({
@@ -486,155 +548,319 @@ async def confirm_booking(
         "user_name": state.customer_name,
         "destination": state.destination,
         "travel_mode": state.selected_mode,
-        "hotel_name": state.selected_hotel["name"],
+        "hotel_name": hotel["name"],
         "dates": state.travel_dates,
-        "num_travelers": state.num_adults + state.num_children,
+        "nights": nights,
+        "num_travelers": travelers,
+        "rooms": rooms,
         "total_cost": total_cost,
         "status": "confirmed",
         "timestamp": datetime.now().isoformat(),
-        "hotel_rating": state.selected_hotel.get("rating"),
-        "hotel_amenities": state.selected_hotel.get("amenities", []),
-        "hotel_description": state.selected_hotel.get("description", ""),
-        "hotel_price_per_night": state.selected_hotel.get("price_per_night")
+        "hotel_rating": hotel.get("rating"),
+        "hotel_amenities": hotel.get("amenities", []),
+        "hotel_description": hotel.get("description", ""),
+        "hotel_price_per_night": hotel.get("price_per_night")
     })
 
-    email_status = " (confirmation email sent)" if email_sent else " (email failed)"
-    return f"Your booking has been confirmed! Booking ID is {booking_id}. The total cost is {total_cost} rupees. I've displayed the complete booking details on your screen and sent you a confirmation email{email_status}. Thank you for choosing Sacred Trails India! [BOOKING_DATA]{booking_json}[/BOOKING_DATA]"
+    email_status = "a confirmation email is on its way" if email_queued else "the confirmation email could not be queued"
+    return f"Your booking has been confirmed! Booking ID is {booking_id}. The total cost is {total_cost} rupees. I've displayed the complete booking details on your screen and {email_status}. Thank you for choosing Sacred Trails India! [BOOKING_DATA]{booking_json}[/BOOKING_DATA]"
 
 @function_tool
 async def retrieve_booking(
     ctx: RunContext[Userdata],
-    booking_id: Annotated[str, Field(description="The booking ID to retrieve")]
+    booking_id: str
 ) -> str:
-    """Retrieves booking details by ID."""
-    booking = get_booking(booking_id)
+    """Looks up a booking by ID."""
+    # Read past any cache: the status told to the caller must be current
+    booking = await get_booking_repository().get_booking(booking_id, fresh=True)
     if not booking:
         return f"Booking ID {booking_id} not found."
 
     return f"Booking {booking['booking_id']}: {booking['customer_name']} - {booking['travel_mode']} to {booking['destination']}, {booking['hotel_name']}, {booking['dates']}, {booking['num_travelers']} travelers, ₹{booking['total_cost']}, Status: {booking['status']}. Contact: {booking['mobile_number']}, {booking['email']}"
 
+@function_tool
+async def find_my_bookings(
+    ctx: RunContext[Userdata],
+    email: Optional[str] = None,
+    mobile_number: Optional[str] = None,
+) -> str:
+    """Finds the caller's recent bookings by email or mobile number."""
+    state = ctx.userdata.travel_state
+    email = email or state.email
+    mobile_number = mobile_number or state.mobile_number
+    if not email and not mobile_number:
+        return "Please provide the email address or mobile number used for the booking."
+
+    bookings = await get_booking_repository().find_bookings(email=email, mobile_number=mobile_number)
+    if not bookings:
+        return "No bookings found for those contact details."
+
+    lines = [f"{b['booking_id']}: {b['destination']}, {b['hotel_name']}, {b['dates']}, ₹{b['total_cost']}, Status: {b['status']}" for b in bookings]
+    return f"Found {len(bookings)} recent booking(s), newest first:\n" + "\n".join(lines)
+
 @function_tool
 async def cancel_booking(
     ctx: RunContext[Userdata],
-    booking_id: Annotated[str, Field(description="The booking ID to cancel")]
+    booking_id: str
 ) -> str:
     """Cancels a booking."""
-    booking = get_booking(booking_id)
+    from booking_store import CANCELLATION_REFUND_RATE
+
+    bookings = get_booking_repository()
+    # One conditional write; the refund is stored with the cancellation
+    booking = await bookings.cancel_booking(booking_id, CANCELLATION_REFUND_RATE)
+    if booking:
+        # Only the call that cancelled gets the booking back, so rooms are released once
+        await ctx.userdata.inventory.release_booking(booking)
+        refund = booking["total_cost"] * CANCELLATION_REFUND_RATE
+        return f"Booking {booking_id} cancelled. Refund amount: ₹{refund}."
+
+    # Nothing was cancelled; a second read only on this path explains why. It skips the
+    # cache, whose copy may predate another worker's cancel.
+    booking = await bookings.get_booking(booking_id, fresh=True)
     if not booking:
         return f"Booking ID {booking_id} not found."
-
     if booking["status"] == "cancelled":
         return "Booking already cancelled."
+    return "Failed to cancel booking. Please try again."
 
-    if update_booking(booking_id, {"status": "cancelled"}):
-        refund = booking["total_cost"] * 0.8  # 80% refund
-        return f"Booking {booking_id} cancelled. Refund amount: ₹{refund}."
-    else:
-        return "Failed to cancel booking. Please try again."
+@function_tool
+async def list_destinations(
+    ctx: RunContext[Userdata],
+    query: Annotated[Optional[str], Field(description="Part of a city name")] = None,
+) -> str:
+    """Lists the destinations we have hotels in."""
+    destinations = ctx.userdata.catalog.destinations()
+    if query:
+        destinations = [d for d in destinations if query.strip().lower() in d.lower()]
+        if not destinations:
+            return f"No destinations match '{query}'. Call list_destinations without a query for the full list."
+    return f"{len(destinations)} destination(s): {', '.join(destinations)}."
 
 # ======================================================
 # 🧠 AGENT DEFINITION
 # ======================================================
 
-class TravelAgent(Agent):
-    def __init__(self):
-        # Generate list of destinations for the prompt
-        destinations = "\n".join([f"* {dest}" for dest in HOTEL_DATA.keys()])
+# Identical for every session and turn, so it is built once per process and
+# stays a stable prefix for the model's prompt cache. Destinations come from
+# list_destinations, and booking progress from describe_progress when it changes.
+INSTRUCTIONS = """You are Nikhil from "Sacred Trails India", a friendly, professional travel agent for trips within India, speaking with callers by voice.
+
+Ask one question at a time: destination, origin city, travel dates, adults and children, budget (low, medium or high), amenities. Save whatever trip details the caller gives in one set_trip_details call and ask only for what it reports missing. Then offer travel modes (plan_route for multi-leg trips), suggest and select a hotel, collect name, mobile number and email, summarise the itinerary and confirm_booking.
+Use list_destinations when the caller asks where they can go or names a city we may not cover. Without a booking ID, find_my_bookings looks bookings up by email or mobile number.
+
+Rules:
+- Greet first: "Hello! Welcome to Sacred Trails India. I'm Nikhil, your travel assistant, here to help you plan your perfect trip within India."
+- Use tools for every action; never simulate them. Handle invalid destinations and unavailable options gracefully.
+- Be enthusiastic and clear about costs. Default to English; understand basic Hindi.
+- Under 300km prefer private car or bus; over 1000km suggest plane or train.
+- Never use markdown. In summaries put each item on its own line as "Label: value." (e.g. "Destination: Goa.").
+- A <trip_progress> note is the booking state from our system, not something the caller said.
+- End by offering further help."""
+
+# Wraps describe_progress for the model, so it isn't taken for the caller's words
+PROGRESS_TEMPLATE = "<trip_progress>\n{progress}\n</trip_progress>"
+
+def _progress_steps(state: TravelState) -> list[tuple[str, Optional[str], str]]:
+    """(label, value, what to do while it is missing) for each detail, in conversation order."""
+    travelers = state.num_adults + state.num_children
+    amenities = state.amenities
+    return [
+        ("destination", state.destination, "ask for the destination"),
+        ("origin", state.origin, "ask for the origin city"),
+        ("dates", state.travel_dates, "ask for the travel dates"),
+        ("travelers", f"{state.num_adults} adults, {state.num_children} children" if travelers else None,
+         "ask how many adults and children"),
+        ("budget", state.budget, "ask for the budget"),
+        ("amenities", (", ".join(amenities) or "none") if amenities is not None else None, "ask for preferred amenities"),
+        ("travel mode", state.selected_mode, "offer travel modes"),
+        ("hotel", state.hotel_name, "suggest hotels"),
+        ("name", state.customer_name, "ask for the customer's name"),
+        ("mobile", state.mobile_number, "ask for the mobile number"),
+        ("email", state.email, "ask for the email address"),
+    ]
+
+def describe_progress(state: TravelState) -> str:
+    """A line of what has been collected so far and what to do next, sent to the LLM when it changes."""
+    steps = _progress_steps(state)
+    collected = "; ".join(f"{label}: {value}" for label, value, _ in steps if value)
+    if state.booking_id:
+        return f"Trip so far: {collected}. Booked as {state.booking_id}."
+    next_step = next((todo for _, value, todo in steps if not value), "summarise the itinerary and confirm_booking")
+    return f"Trip so far: {collected or 'nothing yet'}. Next: {next_step}."
+
+
+TRAVEL_TOOLS = [set_trip_details, select_travel_mode, plan_route, suggest_hotels, select_hotel, set_customer_name, set_mobile_number, set_email, confirm_booking, retrieve_booking, find_my_bookings, cancel_booking, list_destinations]
+
 
+class TravelAgent(Agent):
+    def __init__(self, restored: Optional[TravelState] = None):
+        # A restored call's history is gone, so its trip so far opens the new one
+        chat_ctx = None
+        self._progress_shown = None
+        if restored is not None:
+            self._progress_shown = describe_progress(restored)
+            chat_ctx = ChatContext()
+            chat_ctx.add_message(role="user", content=PROGRESS_TEMPLATE.format(progress=self._progress_shown))
         super().__init__(
-            instructions=f"""
-            You are Nikhil from "Sacred Trails India", a friendly and professional AI travel agent specializing in trips within India.
-
-            🏖️ **AVAILABLE DESTINATIONS:** {destinations}
-
-            🚀 **CONVERSATION FLOW:**
-            1. **Greeting:** Warmly greet the user and ask for their desired destination.
-            2. **Step-by-Step Collection:** After each response, ask the next question in sequence:
-               - After destination: Ask for origin city
-               - After origin: Ask for travel dates
-               - After dates: Ask for number of adults and children
-               - After travelers: Ask for budget range
-               - After budget: Ask for preferred amenities
-            3. **Travel Mode:** Once all details collected, suggest modes (bus, train, plane, private_car) with costs/durations using `select_travel_mode`.
-            4. **Hotels:** Suggest hotels using `suggest_hotels`, then let user select with `select_hotel`.
-            5. **Customer Details:** Collect contact information in sequence:
-               - Ask for customer name using `set_customer_name`
-               - Ask for mobile number using `set_mobile_number`
-               - Ask for email address using `set_email`
-            6. **Booking Confirmation:** After collecting all details, summarize itinerary and use `confirm_booking` to create booking.
-            7. **Retrieval:** Handle booking lookups with `retrieve_booking`.
-            8. **Cancellations:** Process cancellations with `cancel_booking`.
-
-            ⚙️ **IMPORTANT RULES:**
-            - Start every conversation with a warm greeting: "Hello! Welcome to Sacred Trails India. I'm Nikhil, your travel assistant, here to help you plan your perfect trip within India."
-            - Ask questions ONE AT A TIME in the specified sequence. Wait for user response before proceeding to next question.
-            - Be enthusiastic, helpful, and professional.
-            - Use tools for all actions - don't simulate them.
-            - Handle errors gracefully (invalid destinations, unavailable options).
-            - Default to English, but be prepared for basic Hindi phrases.
-            - Always end interactions by offering further assistance.
-            - Calculate costs realistically and provide clear breakdowns.
-            - For short distances (<300km), prioritize private car or bus.
-            - For long distances (>1000km), suggest plane or train.
-            
-            📝 **FORMATTING RULES FOR SUMMARIES:**
-            - NEVER use markdown formatting like ** or * in your responses.
-            - When providing trip summaries, format each item on a new line with a period at the end.
-            - Example format:
-              Destination: Mumbai.
-              Origin: Kolkata.
-              Travel Dates: December 12th to December 18th.
-              Travelers: 2 Adults, 0 Children.
-              Budget: Medium.
-              Amenities: Wi-Fi, Breakfast.
-              Travel Mode: Plane.
-              Hotel: ITC Grand Central.
-              Customer Name: John.
-              Mobile Number: 9191919191.
-              Email: john@example.com.
-            - Keep responses clean and easy to read without any special formatting characters.
-            """,
-            tools=[set_destination, set_origin, set_travel_dates, set_travelers, set_budget, set_amenities, select_travel_mode, suggest_hotels, select_hotel, set_customer_name, set_mobile_number, set_email, confirm_booking, retrieve_booking, cancel_booking],
+            instructions=INSTRUCTIONS,
+            chat_ctx=chat_ctx,
+            # Timed copies of the tools when METRICS_PORT is set, the tools themselves otherwise
+            tools=[metrics.instrument_tool(tool) for tool in TRAVEL_TOOLS],
         )
 
+    async def llm_node(self, chat_ctx, tools, model_settings):
+        # Progress goes after the history, for this call only, so the instructions and
+        # earlier turns stay an unchanged prefix. It is a user-side message: a system one
+        # would end up in Gemini's system_instruction (livekit's google plugin merges
+        # system messages there), changing the cached prefix on every call. It is only
+        # sent when a tool has changed it; the replies in the history carry it otherwise.
+        progress = describe_progress(self.session.userdata.travel_state)
+        if progress != self._progress_shown:
+            self._progress_shown = progress
+            chat_ctx = chat_ctx.copy()
+            chat_ctx.add_message(role="user", content=PROGRESS_TEMPLATE.format(progress=progress))
+        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+            yield chunk
+
+
+def check_turn_detector() -> bool:
+    """Confirm the turn-detector model files are in the local cache."""
+    from huggingface_hub import hf_hub_download
+    from livekit.plugins.turn_detector.models import (
+        HG_MODEL,
+        MODEL_REVISIONS,
+        ONNX_FILENAME,
+    )
+
+    revision = MODEL_REVISIONS["multilingual"]
+    hf_hub_download(HG_MODEL, "languages.json", revision=revision, local_files_only=True)
+    hf_hub_download(HG_MODEL, ONNX_FILENAME, subfolder="onnx", revision=revision, local_files_only=True)
+    return True
+
+def warm_catalog() -> int:
+    """Touch every city's indexes and build the name matchers so the first search doesn't wait on them."""
+    catalog = get_catalog_reloader().catalog
+    city_matcher(catalog)
+    for city in catalog.destinations():
+        catalog.find_hotels(city, limit=1)
+        hotel_matcher(catalog, city)
+    return len(catalog.destinations())
+
+def warm_routes() -> int:
+    """Exercise route and fare lookups once over the precomputed matrices."""
+    routes, fares = get_route_graph(), get_fare_table()
+    for origin in routes.cities[:1]:
+        for destination in routes.cities:
+            routes.legs(origin, destination)
+            fares.quote(origin, destination, "train", 1)
+    return len(routes.cities)
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    """Load models and build per-process state before the first job arrives.
+
+    Stages run in parallel; any that fail are loaded lazily in the entrypoint
+    instead. Mongo needs the job's event loop, so its pool is warmed in the
+    background when the job starts.
+    """
+    plugins = load_plugins()
+    results = run_stages({
+        "vad": plugins.silero.VAD.load,
+        "turn_detector": check_turn_detector,
+        "catalog": warm_catalog,
+        "routes": warm_routes,
+    })
+    if results["vad"].ok:
+        proc.userdata["vad"] = results["vad"].value
+    proc.userdata["turn_detector"] = results["turn_detector"].ok
+    # Move the catalog, indexes and modules just loaded out of the collector's reach, once,
+    # before any session runs, so later collections don't rescan them on the event loop.
+    # Catalogs reloaded later are collected normally.
+    gc.freeze()
 
 async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {"room": ctx.room.name}
+    metrics.set_room(ctx.room.name)
 
+    # Connect the booking store (pooled Mongo connections, or the SQLite file) while
+    # the session starts, not on the first booking call
+    if "store_warmup" not in ctx.proc.userdata:
+        ctx.proc.userdata["store_warmup"] = asyncio.create_task(
+            run_async_stage("booking_store", get_booking_repository().warm)
+        )
 
-    # 1. Initialize State
-    userdata = Userdata(travel_state=TravelState())
+    # 1. Initialize State, picking up where the call left off if this caller's
+    # previous job in this room crashed or was redeployed mid-call
+    participant = await ctx.wait_for_participant()
+    checkpoints = SessionCheckpointer(get_booking_repository(),
+                                      session_key(ctx.job.room.sid or ctx.job.id, participant.identity))
+    restored = await checkpoints.restore()
+    userdata = Userdata(travel_state=restored or TravelState())
+    plugins = load_plugins()
 
     # 2. Setup Agent
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3", language="en"),
-        llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
+        stt=plugins.deepgram.STT(model="nova-3", language="en"),
+        llm=plugins.google.LLM(model="gemini-2.5-flash"),
+        tts=plugins.murf.TTS(
             voice="en-IN-Nikhil",
             style="Conversational",
             text_pacing=True,
         ),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        # Fall back to VAD turn-taking if the turn-detector model isn't available
+        turn_detection=plugins.MultilingualModel() if ctx.proc.userdata.get("turn_detector", True) else "vad",
+        vad=ctx.proc.userdata.get("vad") or plugins.silero.VAD.load(),
         userdata=userdata,
     )
 
     # 3. Store session in userdata for tools to access
     userdata.agent_session = session
 
+    # Checkpoint the trip after every tool call, in the background, until the call ends
+    checkpoints.watch(session, userdata)
+    ctx.add_shutdown_callback(checkpoints.flush)
+
+    # Deliver queued confirmation emails in the background for this process
+    outbox = get_email_outbox()
+    outbox.start()
+    ctx.add_shutdown_callback(outbox.stop)
+
+    # Drop cached bookings when another process changes them
+    bookings = get_booking_repository()
+    if bookings.invalidator is not None:
+        bookings.invalidator.start()
+        ctx.add_shutdown_callback(bookings.invalidator.stop)
+
+    # Pick up hotels.json edits for later sessions without a redeploy
+    get_catalog_reloader().start()
+
+    # Report this process's event-loop lag to the worker's load function
+    import capacity
+    lag = capacity.LagReporter()
+    lag.start()
+    ctx.add_shutdown_callback(lag.stop)
+
     # 4. Start
     await session.start(
-        agent=TravelAgent(),
+        agent=TravelAgent(restored),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            participant_identity=participant.identity,
+            noise_cancellation=plugins.noise_cancellation.BVC()
         ),
     )
 
     await ctx.connect()
 
+def main():
+    load_dotenv(".env.local")
+    # Registered here so download-files sees every plugin; job processes load them in prewarm
+    load_plugins()
+    import capacity
+    # Job processes' metrics are served by the worker on METRICS_PORT, if set; new
+    # rooms go to other workers once measured load reaches LOAD_THRESHOLD
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, **metrics.worker_options(),
+                              **capacity.worker_options()))
+
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
+    main()
@@ -0,0 +1,176 @@
+"""
+In-process booking cache with cross-process invalidation
+"""
+import asyncio
+import contextlib
+import copy
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger("booking_cache")
+
+# Cache size and entry lifetime in seconds; a TTL of 0 disables the cache. Without change
+# streams (a standalone mongod, or "none") a booking changed by another process can be read
+# stale for up to the TTL; the agent's status and cancel reads bypass the cache regardless.
+BOOKING_CACHE_SIZE = int(os.getenv("BOOKING_CACHE_SIZE", "1024"))
+BOOKING_CACHE_TTL = float(os.getenv("BOOKING_CACHE_TTL", "5"))
+# "changestream" invalidates on writes from any process; "none" relies on the TTL
+BOOKING_CACHE_INVALIDATION = os.getenv("BOOKING_CACHE_INVALIDATION", "changestream")
+# Seconds before reopening a change stream after an error
+INVALIDATION_RETRY_DELAY = 5.0
+
+# Server error code for change streams on a standalone mongod
+_CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+class BookingCache:
+    """LRU cache of bookings with a per-entry TTL.
+
+    Keys are upper-cased booking ids. Entries are deep-copied on the way in
+    and out, so callers can't mutate cached state. Only found bookings are
+    cached; a miss always goes to the database, so a booking created by
+    another process is visible immediately.
+
+    `version` changes on every invalidation. A reader takes it before going
+    to the database and passes it to put(), which then skips the fill if an
+    invalidation raced with the read, instead of caching a stale document.
+    """
+
+    def __init__(self, max_entries: int = BOOKING_CACHE_SIZE, ttl: float = BOOKING_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        # booking_id -> (expires_at, doc_id, booking)
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        # Mongo _id -> booking_id, since change events only carry the _id
+        self._by_doc_id: dict[object, str] = {}
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, booking_id: str) -> Optional[dict]:
+        key = booking_id.upper()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(entry[2])
+
+    def put(self, booking_id: str, booking: dict, doc_id=None, version: Optional[int] = None):
+        if version is not None and version != self.version:
+            return
+        key = booking_id.upper()
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self.clock() + self.ttl, doc_id, copy.deepcopy(booking))
+        if doc_id is not None:
+            self._by_doc_id[doc_id] = key
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, booking_id: str):
+        self.version += 1
+        if self._remove(booking_id.upper()):
+            self.invalidations += 1
+
+    def invalidate_doc(self, doc_id):
+        """Invalidate by Mongo _id, for change events."""
+        self.version += 1
+        key = self._by_doc_id.get(doc_id)
+        if key is not None:
+            self.invalidate(key)
+
+    def clear(self):
+        self.version += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._by_doc_id.clear()
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        if entry[1] is not None:
+            self._by_doc_id.pop(entry[1], None)
+        return True
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+        }
+
+
+class ChangeStreamInvalidator:
+    """Drops cached bookings when any process writes them.
+
+    Tails a change stream on the bookings collection, so writes from other
+    worker processes and hosts invalidate this process's cache within one
+    round trip. Change streams need a replica set; on a standalone server
+    the watcher stops and entries simply expire after the TTL. While the
+    stream is down the whole cache is cleared, since events may have been
+    missed.
+    """
+
+    def __init__(self, cache: BookingCache, get_collection, retry_delay: float = INVALIDATION_RETRY_DELAY):
+        self.cache = cache
+        self.get_collection = get_collection
+        self.retry_delay = retry_delay
+        self._task = None
+
+    async def _watch(self):
+        collection = await self.get_collection()
+        # Inserts can't make an entry stale, since misses aren't cached
+        pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+        async with await collection.watch(pipeline) as stream:
+            logger.info("Watching bookings for cache invalidation")
+            async for change in stream:
+                self.cache.invalidate_doc(change["documentKey"]["_id"])
+
+    async def _run(self):
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.cache.clear()
+                if getattr(e, "code", None) == _CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning(f"Change streams are unsupported (standalone MongoDB): bookings changed by other "
+                                   f"processes can be served stale from this cache for up to {self.cache.ttl:g}s. "
+                                   f"Run a replica set or set BOOKING_CACHE_TTL=0 to avoid it.")
+                    return
+                logger.warning(f"Booking cache invalidation stream failed, retrying: {e}")
+            await asyncio.sleep(self.retry_delay)
+
+    def start(self):
+        """Start watching on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="booking-cache-invalidator")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
@@ -0,0 +1,521 @@
+"""
+Booking storage backends: MongoDB, in-memory and SQLite
+"""
+import asyncio
+import copy
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional, Protocol
+
+import metrics
+
+logger = logging.getLogger("booking_store")
+
+# "mongodb", "memory" (single process, nothing persisted) or "sqlite" (single host)
+BOOKING_STORE = os.getenv("BOOKING_STORE", "mongodb")
+BOOKING_SQLITE_PATH = os.getenv("BOOKING_SQLITE_PATH", "bookings.db")
+# Milliseconds a SQLite writer waits for another process's write lock
+BOOKING_SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("BOOKING_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Share of total_cost refunded on cancellation
+CANCELLATION_REFUND_RATE = 0.8
+# Most bookings a customer lookup returns
+CUSTOMER_LOOKUP_LIMIT = 5
+# Seconds a session checkpoint can be restored for after its last write
+SESSION_CHECKPOINT_TTL = int(os.getenv("SESSION_CHECKPOINT_TTL", "86400"))
+
+_store = None
+
+
+class BookingStore(Protocol):
+    """What the agent needs from booking storage.
+
+    Implementations log failures and report them through the return value
+    (False, None or an empty list) rather than raising, so a storage outage
+    turns into a spoken apology instead of a crashed tool call.
+    """
+
+    # Cache invalidation task to start with the job, if the engine has one
+    invalidator: Optional[object]
+
+    async def warm(self) -> bool: ...
+    async def save_booking(self, booking: dict) -> bool: ...
+    # fresh skips any cache, for reads whose answer is told to the caller as current
+    async def get_booking(self, booking_id: str, fresh: bool = False) -> Optional[dict]: ...
+    async def update_booking(self, booking_id: str, updates: dict) -> bool: ...
+    async def delete_booking(self, booking_id: str) -> bool: ...
+    async def load_bookings(self) -> list[dict]: ...
+    async def cancel_booking(self, booking_id: str, refund_rate: float = CANCELLATION_REFUND_RATE) -> Optional[dict]: ...
+    async def find_bookings(self, email: Optional[str] = None, mobile_number: Optional[str] = None,
+                            status: Optional[str] = None, limit: int = CUSTOMER_LOOKUP_LIMIT) -> list[dict]: ...
+    # Session checkpoints: an opaque snapshot per session id, replaced on every save
+    async def save_session(self, session_id: str, snapshot: bytes) -> bool: ...
+    async def load_session(self, session_id: str, max_age: float = SESSION_CHECKPOINT_TTL) -> Optional[bytes]: ...
+    async def delete_session(self, session_id: str) -> bool: ...
+    # Room inventory: rooms booked per hotel per night (ISO dates, consecutive), changed for a whole
+    # stay at once. reserve_rooms returns False without booking any night if one lacks the rooms.
+    async def reserve_rooms(self, city: str, hotel: str, nights: list[str], rooms: int,
+                            capacity: int) -> Optional[bool]: ...
+    async def release_rooms(self, city: str, hotel: str, nights: list[str], rooms: int) -> bool: ...
+    async def load_room_nights(self, city: str, since: str) -> Optional[dict[str, dict[str, int]]]: ...
+    async def close(self): ...
+
+
+def normalise_contact(email: Optional[str], mobile_number: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    """Email and mobile number as confirm_booking stores them (lower-case, digits only)."""
+    email = email.strip().lower() if email else None
+    mobile_number = "".join(filter(str.isdigit, mobile_number)) if mobile_number else None
+    return email or None, mobile_number or None
+
+
+def cancelled_fields(booking: dict, refund_rate: float) -> dict:
+    """Fields a cancellation writes, alongside the status."""
+    return {
+        "status": "cancelled",
+        "cancelled_at": datetime.now().isoformat(),
+        "refund_rate": refund_rate,
+        "refund_amount": booking.get("total_cost", 0) * refund_rate,
+    }
+
+
+class MemoryBookingStore:
+    """Bookings in a dict, for tests, benchmarks and single-process development.
+
+    Nothing is persisted and other worker processes don't see these bookings.
+    Stored documents and the contact index sets are never mutated: every
+    write swaps in a new dict or frozenset, so a reader on any thread sees
+    either the old or the new value and no lock is needed. Read-modify-write
+    operations (update, cancel, reserve_rooms) don't await between their read
+    and write, so they are atomic on the event loop.
+    """
+
+    invalidator = None
+
+    def __init__(self):
+        self._bookings: dict[str, dict] = {}
+        # Session id -> (snapshot, time.time() it was saved)
+        self._sessions: dict[str, tuple[bytes, float]] = {}
+        # (city, hotel) -> night -> rooms booked
+        self._room_nights: dict[tuple[str, str], dict[str, int]] = {}
+        # Contact field -> value -> booking ids, for find_bookings
+        self._contacts: dict[str, dict[str, frozenset]] = {"email": {}, "mobile_number": {}}
+
+    def _put(self, key: str, booking: dict, previous: Optional[dict] = None):
+        self._bookings[key] = booking
+        for field, index in self._contacts.items():
+            old, new = (previous or {}).get(field), booking.get(field)
+            if old != new:
+                if old is not None:
+                    index[old] = index.get(old, frozenset()) - {key}
+                if new is not None:
+                    index[new] = index.get(new, frozenset()) | {key}
+
+    async def warm(self) -> bool:
+        return True
+
+    async def save_booking(self, booking: dict) -> bool:
+        booking_id = booking["booking_id"].upper()
+        if booking_id in self._bookings:
+            logger.error(f"Booking ID {booking_id} already exists")
+            return False
+        if 'timestamp' not in booking:
+            booking['timestamp'] = datetime.now().isoformat()
+        self._put(booking_id, copy.deepcopy(booking))
+        return True
+
+    async def get_booking(self, booking_id: str, fresh: bool = False) -> Optional[dict]:
+        booking = self._bookings.get(booking_id.upper())
+        return copy.deepcopy(booking) if booking is not None else None
+
+    async def update_booking(self, booking_id: str, updates: dict) -> bool:
+        key = booking_id.upper()
+        booking = self._bookings.get(key)
+        if booking is None:
+            logger.warning(f"Booking {booking_id} not found for update")
+            return False
+        self._put(key, {**booking, **copy.deepcopy(updates)}, booking)
+        return True
+
+    async def delete_booking(self, booking_id: str) -> bool:
+        key = booking_id.upper()
+        booking = self._bookings.pop(key, None)
+        if booking is None:
+            logger.warning(f"Booking {booking_id} not found for deletion")
+            return False
+        for field, index in self._contacts.items():
+            if booking.get(field) is not None:
+                index[booking[field]] = index.get(booking[field], frozenset()) - {key}
+        return True
+
+    async def load_bookings(self) -> list[dict]:
+        return [copy.deepcopy(b) for b in list(self._bookings.values())]
+
+    async def cancel_booking(self, booking_id: str, refund_rate: float = CANCELLATION_REFUND_RATE) -> Optional[dict]:
+        key = booking_id.upper()
+        booking = self._bookings.get(key)
+        if booking is None or booking.get("status") == "cancelled":
+            return None
+        self._put(key, {**booking, **cancelled_fields(booking, refund_rate)}, booking)
+        return copy.deepcopy(booking)
+
+    async def find_bookings(self, email: Optional[str] = None, mobile_number: Optional[str] = None,
+                            status: Optional[str] = None, limit: int = CUSTOMER_LOOKUP_LIMIT) -> list[dict]:
+        email, mobile_number = normalise_contact(email, mobile_number)
+        if not (email or mobile_number or status):
+            return []
+        if email or mobile_number:
+            field, value = ("email", email) if email else ("mobile_number", mobile_number)
+            candidates = [self._bookings.get(key) for key in self._contacts[field].get(value, ())]
+        else:
+            candidates = list(self._bookings.values())
+        matches = [
+            b for b in candidates
+            if b is not None
+            and (email is None or b.get("email") == email)
+            and (mobile_number is None or b.get("mobile_number") == mobile_number)
+            and (status is None or b.get("status") == status)
+        ]
+        matches.sort(key=lambda b: b.get("timestamp", ""), reverse=True)
+        return [copy.deepcopy(b) for b in matches[:limit]]
+
+    async def save_session(self, session_id: str, snapshot: bytes) -> bool:
+        self._sessions[session_id] = (snapshot, time.time())
+        return True
+
+    async def load_session(self, session_id: str, max_age: float = SESSION_CHECKPOINT_TTL) -> Optional[bytes]:
+        snapshot, saved_at = self._sessions.get(session_id, (None, 0.0))
+        return snapshot if time.time() - saved_at <= max_age else None
+
+    async def delete_session(self, session_id: str) -> bool:
+        self._sessions.pop(session_id, None)
+        return True
+
+    async def reserve_rooms(self, city: str, hotel: str, nights: list[str], rooms: int,
+                            capacity: int) -> Optional[bool]:
+        booked = self._room_nights.get((city, hotel), {})
+        if any(booked.get(night, 0) + rooms > capacity for night in nights):
+            return False
+        self._room_nights[(city, hotel)] = {**booked, **{night: booked.get(night, 0) + rooms for night in nights}}
+        return True
+
+    async def release_rooms(self, city: str, hotel: str, nights: list[str], rooms: int) -> bool:
+        booked = self._room_nights.get((city, hotel), {})
+        self._room_nights[(city, hotel)] = {**booked, **{night: max(booked.get(night, 0) - rooms, 0) for night in nights}}
+        return True
+
+    async def load_room_nights(self, city: str, since: str) -> Optional[dict[str, dict[str, int]]]:
+        loaded = {
+            hotel: {night: rooms for night, rooms in booked.items() if night >= since and rooms}
+            for (booked_city, hotel), booked in list(self._room_nights.items()) if booked_city == city
+        }
+        return {hotel: nights for hotel, nights in loaded.items() if nights}
+
+    async def close(self):
+        pass
+
+
+class SQLiteBookingStore:
+    """Bookings in a SQLite database in WAL mode, for single-host deployments.
+
+    Each booking is stored as JSON, with the fields lookups filter on copied
+    into indexed columns. WAL lets every worker process on the host read
+    while one writes; writers take the lock up front (BEGIN IMMEDIATE) and
+    wait up to busy_timeout for each other. All SQL is fixed text with
+    parameters, so sqlite3's statement cache prepares each statement once
+    per connection. Calls run on one dedicated thread per store, keeping
+    the event loop free and the connection single-threaded.
+    """
+
+    invalidator = None
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS bookings (
+            booking_id TEXT PRIMARY KEY,
+            email TEXT,
+            mobile_number TEXT,
+            status TEXT,
+            timestamp TEXT,
+            doc TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS bookings_email_timestamp ON bookings (email, timestamp)",
+        "CREATE INDEX IF NOT EXISTS bookings_mobile_number_timestamp ON bookings (mobile_number, timestamp)",
+        "CREATE INDEX IF NOT EXISTS bookings_status_timestamp ON bookings (status, timestamp)",
+        """CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            snapshot BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS room_nights (
+            city TEXT NOT NULL,
+            hotel TEXT NOT NULL,
+            night TEXT NOT NULL,
+            booked INTEGER NOT NULL,
+            PRIMARY KEY (city, hotel, night)
+        ) WITHOUT ROWID""",
+    )
+    INSERT = "INSERT INTO bookings (booking_id, email, mobile_number, status, timestamp, doc) VALUES (?, ?, ?, ?, ?, ?)"
+    SELECT = "SELECT doc FROM bookings WHERE booking_id = ?"
+    REPLACE = "UPDATE bookings SET email = ?, mobile_number = ?, status = ?, timestamp = ?, doc = ? WHERE booking_id = ?"
+    DELETE = "DELETE FROM bookings WHERE booking_id = ?"
+    SELECT_ALL = "SELECT doc FROM bookings ORDER BY rowid"
+    # One statement per combination of lookup fields, so each can use its index
+    FIND = "SELECT doc FROM bookings WHERE {} ORDER BY timestamp DESC LIMIT ?"
+    SAVE_SESSION = ("INSERT INTO sessions (session_id, snapshot, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (session_id) DO UPDATE SET snapshot = excluded.snapshot, updated_at = excluded.updated_at")
+    LOAD_SESSION = "SELECT snapshot FROM sessions WHERE session_id = ? AND updated_at >= ?"
+    DELETE_SESSION = "DELETE FROM sessions WHERE session_id = ?"
+    # Checkpoints past their TTL, deleted when the store connects
+    EXPIRE_SESSIONS = "DELETE FROM sessions WHERE updated_at < ?"
+    # A reservation adds rows for unbooked nights, then books every night of the stay only where
+    # the rooms are free; fewer rows updated than nights means one was full and it rolls back
+    ADD_ROOM_NIGHT = "INSERT OR IGNORE INTO room_nights (city, hotel, night, booked) VALUES (?, ?, ?, 0)"
+    RESERVE_ROOMS = ("UPDATE room_nights SET booked = booked + ? "
+                     "WHERE city = ? AND hotel = ? AND night BETWEEN ? AND ? AND booked + ? <= ?")
+    RELEASE_ROOMS = ("UPDATE room_nights SET booked = MAX(booked - ?, 0) "
+                     "WHERE city = ? AND hotel = ? AND night BETWEEN ? AND ?")
+    LOAD_ROOM_NIGHTS = "SELECT hotel, night, booked FROM room_nights WHERE city = ? AND night >= ? AND booked > 0"
+
+    def __init__(self, path: str = BOOKING_SQLITE_PATH, busy_timeout_ms: int = BOOKING_SQLITE_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-bookings")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                   timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps commits atomic and durable across crashes with NORMAL; only power loss can drop the last commits
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.execute(self.EXPIRE_SESSIONS, (time.time() - SESSION_CHECKPOINT_TTL,))
+            self._conn = conn
+            logger.info(f"Opened SQLite booking store: {self.path}")
+        return self._conn
+
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    @staticmethod
+    def _row(booking: dict) -> tuple:
+        return (booking.get("email"), booking.get("mobile_number"), booking.get("status"),
+                booking.get("timestamp"), json.dumps(booking, default=str))
+
+    def _read_modify_write(self, booking_id: str, change: Callable[[dict], Optional[dict]]) -> Optional[dict]:
+        """Apply change(booking) -> new booking (or None to skip) in one write transaction; returns the pre-image."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(self.SELECT, (booking_id,)).fetchone()
+            before = json.loads(row[0]) if row else None
+            after = change(before) if before is not None else None
+            if after is not None:
+                conn.execute(self.REPLACE, (*self._row(after), booking_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return before if after is not None else None
+
+    async def warm(self) -> bool:
+        try:
+            await self._run(self._connection)
+            return True
+        except Exception as e:
+            logger.warning(f"SQLite booking store warm-up failed: {e}")
+            return False
+
+    async def save_booking(self, booking: dict) -> bool:
+        if 'timestamp' not in booking:
+            booking['timestamp'] = datetime.now().isoformat()
+        booking_id = booking["booking_id"].upper()
+
+        def insert():
+            self._connection().execute(self.INSERT, (booking_id, *self._row({**booking, "booking_id": booking_id})))
+
+        try:
+            await self._run(insert)
+            logger.info(f"Saved booking {booking_id} to SQLite")
+            return True
+        except sqlite3.IntegrityError:
+            logger.error(f"Booking ID {booking_id} already exists")
+            return False
+        except Exception as e:
+            logger.error(f"Error saving booking to SQLite: {e}")
+            return False
+
+    async def get_booking(self, booking_id: str, fresh: bool = False) -> Optional[dict]:
+        def select():
+            row = self._connection().execute(self.SELECT, (booking_id.upper(),)).fetchone()
+            return json.loads(row[0]) if row else None
+
+        try:
+            return await self._run(select)
+        except Exception as e:
+            logger.error(f"Error retrieving booking from SQLite: {e}")
+            return None
+
+    async def update_booking(self, booking_id: str, updates: dict) -> bool:
+        try:
+            before = await self._run(self._read_modify_write, booking_id.upper(), lambda b: {**b, **updates})
+        except Exception as e:
+            logger.error(f"Error updating booking in SQLite: {e}")
+            return False
+        if before is None:
+            logger.warning(f"Booking {booking_id} not found for update")
+            return False
+        return True
+
+    async def delete_booking(self, booking_id: str) -> bool:
+        try:
+            deleted = await self._run(lambda: self._connection().execute(self.DELETE, (booking_id.upper(),)).rowcount)
+        except Exception as e:
+            logger.error(f"Error deleting booking from SQLite: {e}")
+            return False
+        if not deleted:
+            logger.warning(f"Booking {booking_id} not found for deletion")
+            return False
+        return True
+
+    async def load_bookings(self) -> list[dict]:
+        try:
+            rows = await self._run(lambda: self._connection().execute(self.SELECT_ALL).fetchall())
+            return [json.loads(row[0]) for row in rows]
+        except Exception as e:
+            logger.error(f"Error loading bookings from SQLite: {e}")
+            return []
+
+    async def cancel_booking(self, booking_id: str, refund_rate: float = CANCELLATION_REFUND_RATE) -> Optional[dict]:
+        def cancel(booking: dict) -> Optional[dict]:
+            if booking.get("status") == "cancelled":
+                return None
+            return {**booking, **cancelled_fields(booking, refund_rate)}
+
+        try:
+            return await self._run(self._read_modify_write, booking_id.upper(), cancel)
+        except Exception as e:
+            logger.error(f"Error cancelling booking in SQLite: {e}")
+            return None
+
+    async def find_bookings(self, email: Optional[str] = None, mobile_number: Optional[str] = None,
+                            status: Optional[str] = None, limit: int = CUSTOMER_LOOKUP_LIMIT) -> list[dict]:
+        email, mobile_number = normalise_contact(email, mobile_number)
+        if not (email or mobile_number or status):
+            return []
+        filters = {"email": email, "mobile_number": mobile_number, "status": status}
+        filters = {column: value for column, value in filters.items() if value}
+        sql = self.FIND.format(" AND ".join(f"{column} = ?" for column in filters))
+        try:
+            rows = await self._run(lambda: self._connection().execute(sql, (*filters.values(), limit)).fetchall())
+            return [json.loads(row[0]) for row in rows]
+        except Exception as e:
+            logger.error(f"Error finding bookings in SQLite: {e}")
+            return []
+
+    async def save_session(self, session_id: str, snapshot: bytes) -> bool:
+        try:
+            await self._run(lambda: self._connection().execute(self.SAVE_SESSION, (session_id, snapshot, time.time())))
+            return True
+        except Exception as e:
+            logger.error(f"Error saving session checkpoint to SQLite: {e}")
+            return False
+
+    async def load_session(self, session_id: str, max_age: float = SESSION_CHECKPOINT_TTL) -> Optional[bytes]:
+        def select():
+            row = self._connection().execute(self.LOAD_SESSION, (session_id, time.time() - max_age)).fetchone()
+            return row[0] if row else None
+
+        try:
+            return await self._run(select)
+        except Exception as e:
+            logger.error(f"Error loading session checkpoint from SQLite: {e}")
+            return None
+
+    async def delete_session(self, session_id: str) -> bool:
+        try:
+            await self._run(lambda: self._connection().execute(self.DELETE_SESSION, (session_id,)))
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting session checkpoint from SQLite: {e}")
+            return False
+
+    async def reserve_rooms(self, city: str, hotel: str, nights: list[str], rooms: int,
+                            capacity: int) -> Optional[bool]:
+        def reserve():
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(self.ADD_ROOM_NIGHT, [(city, hotel, night) for night in nights])
+                updated = conn.execute(self.RESERVE_ROOMS, (rooms, city, hotel, nights[0], nights[-1],
+                                                            rooms, capacity)).rowcount
+                held = updated == len(nights)
+                conn.execute("COMMIT" if held else "ROLLBACK")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            return held
+
+        try:
+            return await self._run(reserve)
+        except Exception as e:
+            logger.error(f"Error reserving rooms in SQLite: {e}")
+            return None
+
+    async def release_rooms(self, city: str, hotel: str, nights: list[str], rooms: int) -> bool:
+        try:
+            await self._run(lambda: self._connection().execute(self.RELEASE_ROOMS,
+                                                               (rooms, city, hotel, nights[0], nights[-1])))
+            return True
+        except Exception as e:
+            logger.error(f"Error releasing rooms in SQLite: {e}")
+            return False
+
+    async def load_room_nights(self, city: str, since: str) -> Optional[dict[str, dict[str, int]]]:
+        def select():
+            booked: dict[str, dict[str, int]] = {}
+            for hotel, night, rooms in self._connection().execute(self.LOAD_ROOM_NIGHTS, (city, since)):
+                booked.setdefault(hotel, {})[night] = rooms
+            return booked
+
+        try:
+            return await self._run(select)
+        except Exception as e:
+            logger.error(f"Error loading room inventory from SQLite: {e}")
+            return None
+
+    async def close(self):
+        def close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        await self._run(close)
+
+
+def create_booking_store(kind: str = BOOKING_STORE) -> BookingStore:
+    if kind == "mongodb":
+        # Imported here so the other engines don't load pymongo
+        from mongodb_utils import get_booking_repository
+        return get_booking_repository()
+    if kind == "memory":
+        return MemoryBookingStore()
+    if kind == "sqlite":
+        return SQLiteBookingStore()
+    raise ValueError(f"Unknown BOOKING_STORE {kind!r}; expected mongodb, memory or sqlite")
+
+
+def get_booking_store() -> BookingStore:
+    """Get the process-wide booking store selected by BOOKING_STORE, creating it if necessary."""
+    global _store
+    if _store is None:
+        _store = metrics.instrument_store(create_booking_store())
+        logger.info(f"Using {BOOKING_STORE} booking store")
+    return _store
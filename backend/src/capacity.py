@@ -0,0 +1,240 @@
+"""
+Worker load from measured CPU, event-loop lag and active sessions, for job admission
+"""
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable
+from typing import NamedTuple, Optional
+
+import psutil
+from livekit.agents.utils.hw import get_cpu_monitor
+from livekit.agents.worker import ServerEnvOption
+
+logger = logging.getLogger("capacity")
+
+# Share of the worker's CPUs (cgroup limit, else cores) its processes may use at full load
+CAPACITY_CPU_TARGET = float(os.getenv("CAPACITY_CPU_TARGET", "0.8"))
+# Event-loop lag in a job process that counts as full load: audio frames are 10-20 ms
+CAPACITY_LAG_LIMIT_MS = float(os.getenv("CAPACITY_LAG_LIMIT_MS", "50"))
+# Sessions at full load; 0 derives it from the CPUs and CAPACITY_SESSIONS_PER_CPU
+CAPACITY_MAX_SESSIONS = int(os.getenv("CAPACITY_MAX_SESSIONS", "0"))
+CAPACITY_SESSIONS_PER_CPU = float(os.getenv("CAPACITY_SESSIONS_PER_CPU", "4"))
+# Load at which the worker stops taking jobs, so they are dispatched to other workers
+LOAD_THRESHOLD = float(os.getenv("LOAD_THRESHOLD", "0.75"))
+# Most job processes kept prewarmed; fewer when the headroom left holds fewer sessions
+CAPACITY_MAX_IDLE_PROCESSES = int(os.getenv("CAPACITY_MAX_IDLE_PROCESSES", "4"))
+
+# Seconds of CPU time averaged, as LiveKit's default load does
+CPU_WINDOW = 2.5
+LAG_TICK = 0.05
+LAG_REPORT_INTERVAL = 1.0
+# Lag reports older than this are from a process that has stalled or gone
+LAG_STALE_AFTER = 5.0
+
+
+def lag_dir() -> str:
+    """Where job processes report their event-loop lag for the worker to read."""
+    return os.getenv("CAPACITY_LAG_DIR") or os.path.join(tempfile.gettempdir(), "travel-agent-capacity")
+
+
+def worker_cpus() -> float:
+    """CPUs the worker can use: the cgroup limit, or the cores it may be scheduled on if fewer."""
+    cpus = get_cpu_monitor().cpu_count()
+    if hasattr(os, "sched_getaffinity"):
+        cpus = min(cpus, len(os.sched_getaffinity(0)))
+    return cpus
+
+
+class Reading(NamedTuple):
+    cpu: float
+    lag: float
+    sessions: int
+    load: float
+
+
+def combined_load(cpu: float, lag: float, sessions: int, *, cpu_target: float = CAPACITY_CPU_TARGET,
+                  lag_limit: float = CAPACITY_LAG_LIMIT_MS / 1000, max_sessions: int = 1) -> float:
+    """Load in [0, 1]: the most saturated of CPU, event-loop lag and session count.
+
+    cpu is the share of the worker's CPUs in use and lag is in seconds. Each is
+    scaled so its limit reads 1.0, and the largest wins: lag climbs before the
+    CPU average does when work arrives in bursts, and the session count keeps
+    a quiet worker from taking more calls than it can serve once they talk.
+    """
+    return min(max(cpu / cpu_target, lag / lag_limit, sessions / max_sessions, 0.0), 1.0)
+
+
+class CapacityModel:
+    """load_fnc for WorkerOptions, measuring the worker and its job processes.
+
+    CPU is the CPU time used by the worker process and its children over the
+    last CPU_WINDOW seconds, so it counts only this worker's calls however
+    often LiveKit asks (every half second, and before each availability
+    answer). Lag is the worst that any job process reported through its
+    LagReporter.
+    """
+
+    def __init__(self, cpu_count: Optional[float] = None, *, cpu_target: float = CAPACITY_CPU_TARGET,
+                 lag_limit_ms: float = CAPACITY_LAG_LIMIT_MS, max_sessions: int = CAPACITY_MAX_SESSIONS,
+                 threshold: float = LOAD_THRESHOLD, report_dir: Optional[str] = None):
+        self.cpu_count = cpu_count or worker_cpus()
+        self.cpu_target = cpu_target
+        self.lag_limit = lag_limit_ms / 1000
+        self.max_sessions = max_sessions or max(1, round(self.cpu_count * CAPACITY_SESSIONS_PER_CPU))
+        self.threshold = threshold
+        self.report_dir = report_dir or lag_dir()
+        self.last = Reading(0.0, 0.0, 0, 0.0)
+        self._process = psutil.Process()
+        self._cpu_times = {}  # pid -> (process, CPU seconds at the last sample)
+        self._cpu_used = 0.0
+        self._samples = deque()  # (monotonic time, cumulative CPU seconds)
+        self._lock = threading.Lock()
+
+    def idle_processes(self) -> int:
+        """Job processes to keep prewarmed: the sessions that fit under the threshold, at most the maximum."""
+        return max(1, min(CAPACITY_MAX_IDLE_PROCESSES, math.floor(self.max_sessions * self.threshold)))
+
+    def _processes(self) -> list:
+        try:
+            return [self._process, *self._process.children(recursive=True)]
+        except psutil.Error:
+            return [self._process]
+
+    def sample_cpu(self, processes: Iterable[psutil.Process]) -> float:
+        """Share of the worker's CPUs used by these processes over the last CPU_WINDOW seconds."""
+        seen = {}
+        for process in processes:
+            known = self._cpu_times.get(process.pid)
+            # Process equality checks the start time too, so a recycled pid isn't diffed against
+            before = known[1] if known is not None and known[0] == process else None
+            try:
+                times = process.cpu_times()
+            except psutil.Error:
+                continue
+            used = times.user + times.system
+            # A new process counts from the sample it first appears in
+            if before is not None:
+                self._cpu_used += used - before
+            seen[process.pid] = (process, used)
+        self._cpu_times = seen
+
+        now = time.monotonic()
+        self._samples.append((now, self._cpu_used))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= CPU_WINDOW:
+            self._samples.popleft()
+        start, used_then = self._samples[0]
+        if now - start <= 0:
+            return 0.0
+        return (self._cpu_used - used_then) / (now - start) / self.cpu_count
+
+    def read_lag(self, pids: Iterable[int]) -> float:
+        """Worst recent event-loop lag, in seconds, reported by these processes."""
+        worst = 0.0
+        stale = time.time() - LAG_STALE_AFTER
+        for pid in pids:
+            path = os.path.join(self.report_dir, str(pid))
+            try:
+                if os.stat(path).st_mtime < stale:
+                    continue
+                with open(path) as f:
+                    worst = max(worst, float(f.read()))
+            except (OSError, ValueError):
+                continue
+        return worst
+
+    def measure(self, sessions: int) -> Reading:
+        with self._lock:
+            processes = self._processes()
+            cpu = self.sample_cpu(processes)
+            lag = self.read_lag(process.pid for process in processes)
+            load = combined_load(cpu, lag, sessions, cpu_target=self.cpu_target, lag_limit=self.lag_limit,
+                                 max_sessions=self.max_sessions)
+            previous, self.last = self.last, Reading(cpu, lag, sessions, load)
+
+        if (load >= self.threshold) != (previous.load >= self.threshold):
+            state = "full, not taking new sessions" if load >= self.threshold else "taking new sessions again"
+            logger.info(f"Worker {state}: load {load:.2f} (CPU {cpu:.0%}, lag {lag * 1000:.0f} ms, "
+                        f"{sessions}/{self.max_sessions} sessions)")
+        return self.last
+
+    def __call__(self, worker) -> float:
+        return self.measure(len(worker.active_jobs)).load
+
+
+class LagReporter:
+    """Measures this job process's event-loop lag and reports it to the worker's CapacityModel.
+
+    A ticker asks to wake every LAG_TICK seconds; how late it wakes is the
+    lag. The worst in each LAG_REPORT_INTERVAL is written to a file named
+    after this process.
+    """
+
+    def __init__(self, report_dir: Optional[str] = None, tick: float = LAG_TICK,
+                 interval: float = LAG_REPORT_INTERVAL):
+        self.report_dir = report_dir or lag_dir()
+        self.path = os.path.join(self.report_dir, str(os.getpid()))
+        self.tick = tick
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="lag_reporter")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        with contextlib.suppress(OSError):
+            os.remove(self.path)
+
+    def report(self, lag: float):
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                f.write(f"{lag:.4f}")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Couldn't report event-loop lag: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        worst = 0.0
+        reported = loop.time()
+        while True:
+            expected = loop.time() + self.tick
+            await asyncio.sleep(self.tick)
+            now = loop.time()
+            worst = max(worst, now - expected)
+            if now - reported >= self.interval:
+                self.report(worst)
+                worst = 0.0
+                reported = now
+
+
+def worker_options() -> dict:
+    """WorkerOptions arguments that admit jobs by measured load and size the prewarmed pool to fit.
+
+    Dev mode keeps LiveKit's defaults (no threshold, no idle processes); the
+    load is still measured and reported.
+    """
+    model = CapacityModel()
+    idle = model.idle_processes()
+    logger.info(f"Admitting jobs below load {model.threshold} ({model.max_sessions} sessions, "
+                f"{model.cpu_target:.0%} of {model.cpu_count:g} CPUs, {model.lag_limit * 1000:.0f} ms lag); "
+                f"{idle} idle processes")
+    return {
+        "load_fnc": model,
+        "load_threshold": ServerEnvOption(dev_default=math.inf, prod_default=model.threshold),
+        "num_idle_processes": ServerEnvOption(dev_default=0, prod_default=idle),
+    }
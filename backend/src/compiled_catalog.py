@@ -0,0 +1,407 @@
+"""
+Compiled, memory-mapped hotel catalog and route data
+
+hotels.json and the distance table are compiled into one columnar binary
+file: fixed-width NumPy columns, a deduplicated UTF-8 string table with
+offsets, and the precomputed route matrices. Job processes open it with
+mmap, so loading is near-zero copy and every process on the host shares the
+same page-cache pages instead of holding its own parsed copy.
+
+Usage:
+    python src/compiled_catalog.py [--hotels src/hotels.json] [--output src/hotels.bin]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from hotel_catalog import BUDGET_BANDS
+from route_graph import RouteGraph, as_number
+
+logger = logging.getLogger("compiled_catalog")
+
+MAGIC = b"STCATLG1"
+FORMAT_VERSION = 1
+MAX_AMENITIES = 64
+HOTEL_FIELDS = ("name", "rating", "price_per_night", "amenities", "availability", "description")
+
+# File layout: header, section directory, then 8-byte aligned sections
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<32sQQ")
+
+SECTION_DTYPES = {
+    "meta": np.uint8,          # JSON metadata
+    "strings": np.uint8,       # UTF-8 string data
+    "string_offsets": "<u4",   # n_strings + 1
+    "city_name": "<u4",        # per city: string id
+    "city_start": "<u4",       # per city: first hotel row
+    "city_count": "<u4",       # per city: number of hotels
+    "amenity_name": "<u4",     # amenity vocabulary: string id per bit
+    "hotel_name": "<u4",
+    "hotel_key": "<u4",        # lower-cased name, for lookups
+    "hotel_description": "<u4",
+    "hotel_extra": "<u4",      # JSON of any other fields, or the empty string
+    "hotel_rating": "<f8",
+    "hotel_price": "<f8",
+    "hotel_available": "<u1",
+    "hotel_amenity_mask": "<u8",
+    "hotel_amenity_offsets": "<u4",  # n_hotels + 1, into hotel_amenity_ids
+    "hotel_amenity_ids": "<u1",      # amenity bits in the hotel's own order
+    "name_order": "<u4",       # rows sorted by (city, key)
+    "price_order": "<u4",      # rows sorted by (city, price)
+    "sorted_price": "<f8",     # hotel_price[price_order]
+    "route_city": "<u4",       # string id per route graph city
+    "route_direct": "<f8",     # n x n
+    "route_trip": "<f8",       # n x n
+    "route_next_hop": "<i4",   # n x n
+}
+
+
+def distances_fingerprint(distances: dict[tuple[str, str], float]) -> str:
+    """Stable hash of a distance table, to detect stale compiled routes."""
+    items = sorted((a, b, float(km)) for (a, b), km in distances.items())
+    return hashlib.sha256(json.dumps(items).encode("utf-8")).hexdigest()
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.values: list[bytes] = []
+
+    def add(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value.encode("utf-8"))
+        return string_id
+
+    def arrays(self) -> tuple[bytes, np.ndarray]:
+        offsets = np.zeros(len(self.values) + 1, dtype="<u4")
+        np.cumsum([len(v) for v in self.values], out=offsets[1:])
+        return b"".join(self.values), offsets
+
+
+def compile_catalog(hotel_data: dict[str, list[dict]], distances: dict[tuple[str, str], float],
+                    output_path: str, source: str = "") -> dict:
+    """Write hotel_data and the route graph for distances to output_path atomically."""
+    strings = _StringTable()
+    empty = strings.add("")
+    amenity_bits: dict[str, int] = {}
+    columns: dict[str, list] = {name: [] for name in SECTION_DTYPES if name.startswith(("city_", "hotel_"))}
+    amenity_ids: list[int] = []
+    columns["hotel_amenity_offsets"].append(0)
+
+    for city, hotels in hotel_data.items():
+        columns["city_name"].append(strings.add(city))
+        columns["city_start"].append(len(columns["hotel_name"]))
+        columns["city_count"].append(len(hotels))
+        for hotel in hotels:
+            mask = 0
+            for amenity in hotel.get("amenities", []):
+                if amenity not in amenity_bits:
+                    if len(amenity_bits) == MAX_AMENITIES:
+                        raise ValueError(f"Compiled catalogs support up to {MAX_AMENITIES} distinct amenities")
+                    amenity_bits[amenity] = len(amenity_bits)
+                mask |= 1 << amenity_bits[amenity]
+                amenity_ids.append(amenity_bits[amenity])
+            extra = {k: v for k, v in hotel.items() if k not in HOTEL_FIELDS}
+            columns["hotel_name"].append(strings.add(hotel["name"]))
+            columns["hotel_key"].append(strings.add(hotel["name"].lower()))
+            columns["hotel_description"].append(strings.add(hotel.get("description", "")))
+            columns["hotel_extra"].append(strings.add(json.dumps(extra)) if extra else empty)
+            columns["hotel_rating"].append(hotel.get("rating", 0))
+            columns["hotel_price"].append(hotel["price_per_night"])
+            columns["hotel_available"].append(1 if hotel.get("availability") else 0)
+            columns["hotel_amenity_mask"].append(mask)
+            columns["hotel_amenity_offsets"].append(len(amenity_ids))
+
+    arrays = {name: np.asarray(values, dtype=SECTION_DTYPES[name]) for name, values in columns.items()}
+    arrays["hotel_amenity_ids"] = np.asarray(amenity_ids, dtype=SECTION_DTYPES["hotel_amenity_ids"])
+    arrays["amenity_name"] = np.asarray([strings.add(a) for a in amenity_bits], dtype="<u4")
+
+    # Per-city sorted indexes; rows of a city are contiguous, so sorting by
+    # (city row, value) keeps each city's slice at [start, start + count)
+    city_of_row = np.repeat(np.arange(len(hotel_data)), arrays["city_count"])
+    keys = [strings.values[k] for k in arrays["hotel_key"]]
+    arrays["name_order"] = np.asarray(sorted(range(len(keys)), key=lambda r: (city_of_row[r], keys[r])), dtype="<u4")
+    arrays["price_order"] = np.lexsort((arrays["hotel_price"], city_of_row)).astype("<u4")
+    arrays["sorted_price"] = arrays["hotel_price"][arrays["price_order"]]
+
+    routes = RouteGraph(distances)
+    arrays["route_city"] = np.asarray([strings.add(c) for c in routes.cities], dtype="<u4")
+    arrays["route_direct"] = routes.direct.astype("<f8")
+    arrays["route_trip"] = routes.trip.astype("<f8")
+    arrays["route_next_hop"] = routes.next_hop.astype("<i4")
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "source": source,
+        "compiled_at": datetime.now().isoformat(),
+        "hotels": len(keys),
+        "cities": len(hotel_data),
+        "distances_fingerprint": distances_fingerprint(distances),
+    }
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+    string_data, arrays["string_offsets"] = strings.arrays()
+    arrays["strings"] = np.frombuffer(string_data, dtype=np.uint8)
+
+    _write_sections(arrays, output_path)
+    logger.info(f"Compiled {meta['hotels']} hotels in {meta['cities']} cities to {output_path}")
+    return meta
+
+
+def _write_sections(arrays: dict[str, np.ndarray], output_path: str):
+    names = list(SECTION_DTYPES)
+    offset = _HEADER.size + _ENTRY.size * len(names)
+    entries = []
+    for name in names:
+        offset = (offset + 7) & ~7
+        entries.append((name, offset, arrays[name].size))
+        offset += arrays[name].nbytes
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(names)))
+        for name, section_offset, count in entries:
+            f.write(_ENTRY.pack(name.encode("ascii"), section_offset, count))
+        for name, section_offset, _ in entries:
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(np.ascontiguousarray(arrays[name]).tobytes())
+    # Replace atomically so processes mapping the old file keep a valid view
+    os.replace(tmp_path, output_path)
+
+
+def is_compiled_catalog(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _CatalogFile:
+    """Zero-copy NumPy views over the sections of a mapped catalog file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} compiled catalog")
+
+        self.sections: dict[str, np.ndarray] = {}
+        offsets: dict[str, int] = {}
+        for i in range(count):
+            raw_name, offset, size = _ENTRY.unpack_from(self.buffer, _HEADER.size + i * _ENTRY.size)
+            name = raw_name.rstrip(b"\0").decode("ascii")
+            if name in SECTION_DTYPES:
+                offsets[name] = offset
+                self.sections[name] = np.frombuffer(self.buffer, dtype=SECTION_DTYPES[name], count=size, offset=offset)
+        self.meta = json.loads(self.sections["meta"].tobytes())
+        self._string_offsets = self.sections["string_offsets"]
+        self._strings_start = offsets["strings"]
+
+    def string(self, string_id) -> str:
+        start = self._strings_start + int(self._string_offsets[string_id])
+        end = self._strings_start + int(self._string_offsets[string_id + 1])
+        return self.buffer[start:end].decode("utf-8")
+
+
+class CityHotels(Sequence):
+    """Lazy sequence of one city's hotels; dicts are built only for rows read."""
+
+    def __init__(self, catalog: "MappedHotelCatalog", start: int, count: int):
+        self._catalog = catalog
+        self._start = start
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._catalog.hotel(self._start + i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("hotel index out of range")
+        return self._catalog.hotel(self._start + index)
+
+
+class MappedHotelCatalog:
+    """HotelCatalog query API over a memory-mapped compiled catalog.
+
+    Filters run as vectorised NumPy operations over the city's column slices
+    and only the returned hotels are decoded into dicts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = _CatalogFile(path)
+        s = self.file.sections
+        self.meta = self.file.meta
+        self.amenity_bits = {self.file.string(sid): bit for bit, sid in enumerate(s["amenity_name"])}
+        self._amenity_names = list(self.amenity_bits)
+        self.cities: dict[str, tuple[int, int]] = {
+            self.file.string(sid): (int(start), int(count))
+            for sid, start, count in zip(s["city_name"], s["city_start"], s["city_count"])
+        }
+        self._name = s["hotel_name"]
+        self._key = s["hotel_key"]
+        self._description = s["hotel_description"]
+        self._extra = s["hotel_extra"]
+        self._rating = s["hotel_rating"]
+        self._price = s["hotel_price"]
+        self._available = s["hotel_available"]
+        self._amenity_mask = s["hotel_amenity_mask"]
+        self._amenity_offsets = s["hotel_amenity_offsets"]
+        self._amenity_ids = s["hotel_amenity_ids"]
+        self._name_order = s["name_order"]
+        self._price_order = s["price_order"]
+        self._sorted_price = s["sorted_price"]
+
+    @classmethod
+    def open(cls, path: str) -> "MappedHotelCatalog":
+        catalog = cls(path)
+        logger.info(f"Mapped compiled catalog {path} ({catalog.meta['hotels']} hotels)")
+        return catalog
+
+    def __contains__(self, city: str) -> bool:
+        return city in self.cities
+
+    def destinations(self) -> list[str]:
+        return list(self.cities)
+
+    def hotel(self, row: int) -> dict:
+        """Decode one hotel row into the same dict shape as hotels.json."""
+        ids = self._amenity_ids[self._amenity_offsets[row]:self._amenity_offsets[row + 1]]
+        hotel = {
+            "name": self.file.string(self._name[row]),
+            "rating": as_number(self._rating[row]),
+            "price_per_night": as_number(self._price[row]),
+            "amenities": [self._amenity_names[i] for i in ids],
+            "availability": bool(self._available[row]),
+            "description": self.file.string(self._description[row]),
+        }
+        extra = self.file.string(self._extra[row])
+        if extra:
+            hotel.update(json.loads(extra))
+        return hotel
+
+    def hotels(self, city: str) -> Sequence:
+        """All hotels for a city, in catalog order."""
+        start, count = self.cities.get(city, (0, 0))
+        return CityHotels(self, start, count)
+
+    def get_hotel(self, city: str, name: str) -> Optional[dict]:
+        """Case-insensitive exact hotel lookup by name (binary search)."""
+        if city not in self.cities:
+            return None
+        start, count = self.cities[city]
+        key = name.lower().encode("utf-8")
+        lo, hi = start, start + count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.file.string(self._key[self._name_order[mid]]).encode("utf-8") < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < start + count:
+            row = int(self._name_order[lo])
+            if self.file.string(self._key[row]) == name.lower():
+                return self.hotel(row)
+        return None
+
+    def find_hotels(self, city: str, budget: Optional[str] = None,
+                    amenities: Optional[list[str]] = None, limit: Optional[int] = None,
+                    available_only: bool = True, within: Optional[int] = None) -> list[dict]:
+        """Hotels in a city matching a budget band and required amenities, in catalog order.
+
+        `within`, if given, is a bitset of catalog positions to choose from.
+        """
+        if city not in self.cities:
+            return []
+        start, count = self.cities[city]
+        end = start + count
+
+        match = np.ones(count, dtype=bool)
+        if available_only:
+            match &= self._available[start:end].astype(bool)
+        if within is not None:
+            within &= (1 << count) - 1
+            packed = np.frombuffer(within.to_bytes((count + 7) // 8, "little"), dtype=np.uint8)
+            match &= np.unpackbits(packed, count=count, bitorder="little").astype(bool)
+        if budget in BUDGET_BANDS:
+            low, high = BUDGET_BANDS[budget]
+            price = self._price[start:end]
+            match &= (price >= low) & (price <= high)
+        if amenities:
+            if any(a not in self.amenity_bits for a in amenities):
+                return []
+            want = np.uint64(sum(1 << self.amenity_bits[a] for a in set(amenities)))
+            match &= (self._amenity_mask[start:end] & want) == want
+
+        rows = np.flatnonzero(match)
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.hotel(start + int(r)) for r in rows]
+
+    def find_by_price(self, city: str, low: float, high: float,
+                      limit: Optional[int] = None) -> list[tuple[int, dict]]:
+        """Cheapest-first (price, hotel) pairs priced within [low, high]."""
+        if city not in self.cities:
+            return []
+        start, count = self.cities[city]
+        prices = self._sorted_price[start:start + count]
+        first = start + int(np.searchsorted(prices, low, side="left"))
+        last = start + int(np.searchsorted(prices, high, side="right"))
+        if limit is not None:
+            last = min(last, first + limit)
+        return [(as_number(self._sorted_price[i]), self.hotel(int(self._price_order[i]))) for i in range(first, last)]
+
+
+def load_route_graph(path: str, distances: dict[tuple[str, str], float]) -> RouteGraph:
+    """Route graph from a compiled catalog, rebuilt if its distances are stale."""
+    catalog_file = _CatalogFile(path)
+    if catalog_file.meta.get("distances_fingerprint") != distances_fingerprint(distances):
+        logger.warning(f"Route data in {path} is out of date; rebuilding from the distance table")
+        return RouteGraph(distances)
+    s = catalog_file.sections
+    cities = [catalog_file.string(sid) for sid in s["route_city"]]
+    n = len(cities)
+    return RouteGraph.from_matrices(
+        cities,
+        direct=s["route_direct"].reshape(n, n),
+        trip=s["route_trip"].reshape(n, n),
+        next_hop=s["route_next_hop"].reshape(n, n),
+    )
+
+
+def main(argv: Optional[list[str]] = None):
+    from travel_data import DISTANCES
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Compile hotels.json and the distance table for memory-mapped loading.")
+    parser.add_argument("--hotels", default=os.path.join(here, "hotels.json"), help="hotel catalog JSON")
+    parser.add_argument("--output", default=os.path.join(here, "hotels.bin"), help="compiled catalog to write")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.hotels, encoding="utf-8") as f:
+        hotel_data = json.load(f)
+    meta = compile_catalog(hotel_data, DISTANCES, args.output, source=os.path.basename(args.hotels))
+    print(f"Wrote {args.output}: {meta['hotels']} hotels, {meta['cities']} cities, "
+          f"{os.path.getsize(args.output) / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,525 @@
+"""
+Background email outbox for booking confirmations
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import TYPE_CHECKING, Callable, Optional
+
+import metrics
+from booking_store import (
+    BOOKING_SQLITE_BUSY_TIMEOUT_MS,
+    BOOKING_SQLITE_PATH,
+    BOOKING_STORE,
+)
+
+if TYPE_CHECKING:
+    from mongodb_utils import AsyncBookingRepository
+
+logger = logging.getLogger("email_outbox")
+
+# SMTP configuration (credentials are read from SMTP_EMAIL / SMTP_PASSWORD)
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+
+# Outbox configuration
+OUTBOX_COLLECTION = os.getenv("MONGODB_OUTBOX_COLLECTION", "email_outbox")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_DRAIN_TIMEOUT = float(os.getenv("OUTBOX_DRAIN_TIMEOUT", "10"))
+
+_outbox = None
+
+
+def render_booking_email(booking: dict) -> dict:
+    """Render the confirmation email for a booking as an outbox message."""
+    subject = f"Booking Confirmation - Sacred Trails India ({booking['booking_id']})"
+    body = f"""
+Dear {booking['customer_name']},
+
+Thank you for choosing Sacred Trails India! Your booking has been confirmed.
+
+🎉 BOOKING DETAILS:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Booking ID: {booking['booking_id']}
+Customer: {booking['customer_name']}
+Mobile: {booking['mobile_number']}
+Email: {booking['email']}
+
+Trip Information:
+Destination: {booking['destination']}
+Travel Mode: {booking['travel_mode'].title()}
+Hotel: {booking['hotel_name']}
+Travel Dates: {booking['dates']}
+Number of Travelers: {booking['num_travelers']}
+Hotel Rating: {booking['hotel_rating']} stars
+
+💰 COST BREAKDOWN:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Total Cost: ₹{booking['total_cost']}
+
+Hotel: ₹{booking['hotel_price_per_night']}/room/night, {booking['rooms']} room(s) for {booking['num_travelers']} travelers
+
+🏨 Hotel Details:
+{booking['hotel_description']}
+
+Hotel Amenities: {', '.join(booking['hotel_amenities'])}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+✅ Status: {booking['status'].title()}
+📅 Booking Time: {booking['timestamp']}
+
+Please save this email for your records. If you have any questions or need assistance,
+feel free to contact us.
+
+Safe travels and enjoy your trip to {booking['destination']}!
+
+Best regards,
+Nikhil from Sacred Trails India
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+This is an automated confirmation email. Please do not reply to this email.
+        """
+    return {
+        "booking_id": booking["booking_id"],
+        "to": booking["email"],
+        "subject": subject,
+        "body": body,
+    }
+
+
+class MemoryOutboxStore:
+    """In-process outbox store for tests and local development.
+
+    Messages live only in this process, so unlike MongoOutboxStore and
+    SQLiteOutboxStore they do not survive a worker crash.
+    """
+
+    def __init__(self):
+        self.messages: dict[str, dict] = {}
+
+    async def insert(self, message: dict):
+        self.messages[message["message_id"]] = dict(message)
+
+    async def claim_batch(self, limit: int, now: float, lease_until: float) -> list[dict]:
+        batch = []
+        for message in sorted(self.messages.values(), key=lambda m: m["next_attempt_at"]):
+            if len(batch) >= limit:
+                break
+            due = message["status"] == "pending" and message["next_attempt_at"] <= now
+            expired = message["status"] == "sending" and message["lease_until"] <= now
+            if due or expired:
+                message["status"] = "sending"
+                message["lease_until"] = lease_until
+                batch.append(dict(message))
+        return batch
+
+    async def mark_sent(self, message_id: str, attempts: int):
+        self.messages[message_id].update(status="sent", attempts=attempts, sent_at=datetime.now().isoformat())
+
+    async def reschedule(self, message_id: str, attempts: int, next_attempt_at: float, error: str):
+        self.messages[message_id].update(status="pending", attempts=attempts, next_attempt_at=next_attempt_at, last_error=error)
+
+    async def mark_failed(self, message_id: str, attempts: int, error: str):
+        self.messages[message_id].update(status="failed", attempts=attempts, last_error=error)
+
+
+class MongoOutboxStore:
+    """Outbox persisted next to the bookings, so queued mail survives worker crashes.
+
+    Messages are claimed with a lease; a message left in "sending" by a crashed
+    process becomes claimable again once its lease expires.
+    """
+
+    def __init__(self, repository: Optional["AsyncBookingRepository"] = None,
+                 collection_name: str = OUTBOX_COLLECTION):
+        # Imported here so the other booking stores don't load pymongo
+        from mongodb_utils import get_booking_repository
+
+        self.repository = repository or get_booking_repository()
+        self.collection_name = collection_name
+        self._collection = None
+
+    async def get_collection(self):
+        if self._collection is None:
+            bookings = await self.repository.get_collection()
+            collection = bookings.database[self.collection_name]
+            await collection.create_index("message_id", unique=True)
+            await collection.create_index([("status", 1), ("next_attempt_at", 1)])
+            self._collection = collection
+        return self._collection
+
+    async def insert(self, message: dict):
+        collection = await self.get_collection()
+        await collection.insert_one(dict(message))
+
+    async def claim_batch(self, limit: int, now: float, lease_until: float) -> list[dict]:
+        from pymongo import ReturnDocument
+
+        collection = await self.get_collection()
+        batch = []
+        for _ in range(limit):
+            message = await collection.find_one_and_update(
+                {"$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "lease_until": {"$lte": now}},
+                ]},
+                {"$set": {"status": "sending", "lease_until": lease_until}},
+                projection={"_id": 0},
+                sort=[("next_attempt_at", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if message is None:
+                break
+            batch.append(message)
+        return batch
+
+    async def mark_sent(self, message_id: str, attempts: int):
+        collection = await self.get_collection()
+        await collection.update_one(
+            {"message_id": message_id},
+            {"$set": {"status": "sent", "attempts": attempts, "sent_at": datetime.now().isoformat()}}
+        )
+
+    async def reschedule(self, message_id: str, attempts: int, next_attempt_at: float, error: str):
+        collection = await self.get_collection()
+        await collection.update_one(
+            {"message_id": message_id},
+            {"$set": {"status": "pending", "attempts": attempts, "next_attempt_at": next_attempt_at, "last_error": error}}
+        )
+
+    async def mark_failed(self, message_id: str, attempts: int, error: str):
+        collection = await self.get_collection()
+        await collection.update_one(
+            {"message_id": message_id},
+            {"$set": {"status": "failed", "attempts": attempts, "last_error": error}}
+        )
+
+
+class SQLiteOutboxStore:
+    """Outbox in the SQLite booking database, so queued mail survives restarts with BOOKING_STORE=sqlite.
+
+    Claims take the write lock (BEGIN IMMEDIATE), so worker processes on the
+    host never claim the same message; leases expire as in MongoOutboxStore.
+    The delivery state has its own columns and the rest of the message is
+    stored as JSON. Calls run on one dedicated thread, like SQLiteBookingStore.
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS email_outbox (
+            message_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            next_attempt_at REAL NOT NULL,
+            lease_until REAL NOT NULL,
+            last_error TEXT,
+            sent_at TEXT,
+            doc TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS email_outbox_status_next_attempt_at ON email_outbox (status, next_attempt_at)",
+    )
+    STATE = ("message_id", "status", "attempts", "next_attempt_at", "lease_until", "last_error")
+    INSERT = ("INSERT INTO email_outbox (message_id, status, attempts, next_attempt_at, lease_until, last_error, doc) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?)")
+    CLAIMABLE = ("SELECT message_id, status, attempts, next_attempt_at, lease_until, last_error, doc "
+                 "FROM email_outbox WHERE (status = 'pending' AND next_attempt_at <= ?) "
+                 "OR (status = 'sending' AND lease_until <= ?) ORDER BY next_attempt_at LIMIT ?")
+    CLAIM = "UPDATE email_outbox SET status = 'sending', lease_until = ? WHERE message_id = ?"
+    MARK_SENT = "UPDATE email_outbox SET status = 'sent', attempts = ?, sent_at = ? WHERE message_id = ?"
+    RESCHEDULE = ("UPDATE email_outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? "
+                  "WHERE message_id = ?")
+    MARK_FAILED = "UPDATE email_outbox SET status = 'failed', attempts = ?, last_error = ? WHERE message_id = ?"
+
+    def __init__(self, path: str = BOOKING_SQLITE_PATH, busy_timeout_ms: int = BOOKING_SQLITE_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-outbox")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                   timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def insert(self, message: dict):
+        state = [message[field] for field in self.STATE]
+        doc = json.dumps({k: v for k, v in message.items() if k not in self.STATE}, default=str)
+        await self._run(lambda: self._connection().execute(self.INSERT, (*state, doc)))
+
+    async def claim_batch(self, limit: int, now: float, lease_until: float) -> list[dict]:
+        def claim():
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(self.CLAIMABLE, (now, now, limit)).fetchall()
+                conn.executemany(self.CLAIM, [(lease_until, row[0]) for row in rows])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return [{**json.loads(row[-1]), **dict(zip(self.STATE, row)), "status": "sending",
+                     "lease_until": lease_until} for row in rows]
+
+        return await self._run(claim)
+
+    async def mark_sent(self, message_id: str, attempts: int):
+        await self._run(lambda: self._connection().execute(
+            self.MARK_SENT, (attempts, datetime.now().isoformat(), message_id)))
+
+    async def reschedule(self, message_id: str, attempts: int, next_attempt_at: float, error: str):
+        await self._run(lambda: self._connection().execute(
+            self.RESCHEDULE, (attempts, next_attempt_at, error, message_id)))
+
+    async def mark_failed(self, message_id: str, attempts: int, error: str):
+        await self._run(lambda: self._connection().execute(self.MARK_FAILED, (attempts, error, message_id)))
+
+
+class SMTPTransport:
+    """Blocking SMTP sender that keeps one authenticated connection open.
+
+    STARTTLS and login happen once per connection rather than once per email.
+    The connection is dropped after SMTP_IDLE_TIMEOUT seconds without use and
+    transparently re-established if the server has closed it. The outbox calls
+    send_batch from a worker thread.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 timeout: float = SMTP_TIMEOUT, idle_timeout: float = SMTP_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username or os.getenv("SMTP_EMAIL")
+        self.password = password or os.getenv("SMTP_PASSWORD")
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self.username or not self.password:
+            raise smtplib.SMTPException("SMTP credentials not found in environment variables")
+        # Connect, STARTTLS and login; the outbox sends for every room, so no room label
+        with metrics.timer("smtp", "connect", room=False):
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                server.starttls()
+                server.login(self.username, self.password)
+            except Exception:
+                server.close()
+                raise
+        self._server = server
+        logger.info(f"Opened SMTP connection to {self.host}:{self.port}")
+
+    def _connection(self):
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self._close_locked()
+        if self._server is None:
+            self._connect()
+        return self._server
+
+    def _build_mime(self, message: dict) -> str:
+        msg = MIMEMultipart()
+        msg['From'] = self.username
+        msg['To'] = message['to']
+        msg['Subject'] = message['subject']
+        msg.attach(MIMEText(message['body'], 'plain'))
+        return msg.as_string()
+
+    def send(self, message: dict):
+        """Send one message, reconnecting once if the pooled connection went stale."""
+        text = self._build_mime(message)
+        with metrics.timer("smtp", "send", room=False):
+            for attempt in range(2):
+                server = self._connection()
+                try:
+                    server.sendmail(self.username, message['to'], text)
+                    self._last_used = time.monotonic()
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    self._server = None
+                    if attempt:
+                        raise
+
+    def send_batch(self, messages: list[dict]) -> list[Optional[str]]:
+        """Send messages over the shared connection, returning an error (or None) per message."""
+        errors = []
+        with self._lock:
+            for message in messages:
+                try:
+                    self.send(message)
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(str(e) or type(e).__name__)
+        return errors
+
+    def _close_locked(self):
+        # Callers hold self._lock (send_batch, via _connection, or close)
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+            logger.info("Closed SMTP connection")
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+
+class EmailOutbox:
+    """Queue of outgoing emails drained by a background sender task.
+
+    enqueue only persists the message, so callers never wait on SMTP. The
+    sender claims due messages in batches, sends them over the transport's
+    reused connection, and retries failures with exponential backoff until
+    max_attempts is reached.
+    """
+
+    def __init__(self, store, transport, batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_INTERVAL, max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 backoff_base: float = OUTBOX_BACKOFF_BASE, backoff_max: float = OUTBOX_BACKOFF_MAX,
+                 lease_seconds: float = OUTBOX_LEASE_SECONDS):
+        self.store = store
+        self.transport = transport
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    async def enqueue(self, message: dict) -> bool:
+        """Persist a message for background delivery."""
+        document = {
+            "message_id": uuid.uuid4().hex,
+            **message,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": time.time(),
+            "lease_until": 0.0,
+            "created_at": datetime.now().isoformat(),
+            "last_error": None,
+        }
+        try:
+            await self.store.insert(document)
+        except Exception as e:
+            logger.error(f"Failed to queue email to {message.get('to')}: {e}")
+            return False
+        self._wakeup.set()
+        logger.info(f"Queued email {document['message_id']} to {message.get('to')}")
+        return True
+
+    async def enqueue_booking_confirmation(self, booking: dict) -> bool:
+        """Queue the confirmation email for a saved booking."""
+        return await self.enqueue(render_booking_email(booking))
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds to wait before retry number `attempts`."""
+        return min(self.backoff_max, self.backoff_base ** attempts)
+
+    async def drain_once(self) -> int:
+        """Claim and send one batch of due messages. Returns the batch size."""
+        now = time.time()
+        batch = await self.store.claim_batch(self.batch_size, now, now + self.lease_seconds)
+        if not batch:
+            return 0
+
+        errors = await asyncio.to_thread(self.transport.send_batch, batch)
+        for message, error in zip(batch, errors):
+            attempts = message["attempts"] + 1
+            if error is None:
+                await self.store.mark_sent(message["message_id"], attempts)
+                logger.info(f"Email {message['message_id']} sent to {message['to']}")
+            elif attempts >= self.max_attempts:
+                await self.store.mark_failed(message["message_id"], attempts, error)
+                logger.error(f"Giving up on email {message['message_id']} after {attempts} attempts: {error}")
+            else:
+                retry_at = time.time() + self.backoff(attempts)
+                await self.store.reschedule(message["message_id"], attempts, retry_at, error)
+                logger.warning(f"Email {message['message_id']} failed (attempt {attempts}), retrying: {error}")
+        return len(batch)
+
+    async def flush(self):
+        """Send every message that is currently due."""
+        while await self.drain_once():
+            pass
+
+    async def _run(self):
+        while True:
+            # Clear before draining so an enqueue during the drain is not missed
+            self._wakeup.clear()
+            try:
+                sent = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Email outbox sender error: {e}")
+                sent = 0
+            if sent:
+                continue
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+
+    def start(self):
+        """Start the background sender on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="email-outbox")
+
+    async def stop(self, drain_timeout: float = OUTBOX_DRAIN_TIMEOUT):
+        """Stop the sender, giving due messages up to drain_timeout seconds to go out."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out draining email outbox; remaining messages stay queued")
+        except Exception as e:
+            logger.error(f"Error draining email outbox: {e}")
+        await asyncio.to_thread(self.transport.close)
+
+
+def get_email_outbox() -> EmailOutbox:
+    """Get the process-wide email outbox, creating it if necessary."""
+    global _outbox
+    if _outbox is None:
+        if BOOKING_STORE == "mongodb":
+            store = MongoOutboxStore()
+        elif BOOKING_STORE == "sqlite":
+            store = SQLiteOutboxStore()
+        else:
+            # The memory booking store keeps nothing, so neither does its outbox
+            logger.warning(f"Email outbox is in memory with the {BOOKING_STORE} booking store; queued mail is lost on a crash")
+            store = MemoryOutboxStore()
+        _outbox = EmailOutbox(store, SMTPTransport())
+    return _outbox
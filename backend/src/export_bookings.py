@@ -0,0 +1,119 @@
+"""
+Stream bookings out of MongoDB as NDJSON or CSV in constant memory
+
+Usage:
+    python src/export_bookings.py --format ndjson --output bookings.ndjson
+    python src/export_bookings.py --format csv --status confirmed --since 2025-01-01 > confirmed.csv
+    python src/export_bookings.py --output bookings.ndjson --append --after ABCD1234
+"""
+import argparse
+import csv
+import json
+import sys
+from collections.abc import Iterable, Sequence
+from contextlib import nullcontext
+from typing import Optional, TextIO
+
+from dotenv import load_dotenv
+
+# Default CSV columns, in the order confirm_booking writes them
+BOOKING_FIELDS = [
+    "booking_id", "customer_name", "mobile_number", "email", "destination", "travel_mode",
+    "hotel_name", "dates", "num_travelers", "total_cost", "status", "timestamp",
+    "hotel_rating", "hotel_amenities", "hotel_description", "hotel_price_per_night",
+]
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=str)
+    return value
+
+
+def write_ndjson(bookings: Iterable[dict], out: TextIO) -> Iterable[dict]:
+    for booking in bookings:
+        out.write(json.dumps(booking, default=str, ensure_ascii=False) + "\n")
+        yield booking
+
+
+def write_csv(bookings: Iterable[dict], out: TextIO, fields: Optional[Sequence[str]] = None,
+              header: bool = True) -> Iterable[dict]:
+    writer = csv.DictWriter(out, fieldnames=list(fields or BOOKING_FIELDS), extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    for booking in bookings:
+        writer.writerow({k: _csv_value(v) for k, v in booking.items()})
+        yield booking
+
+
+def build_filter(status: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> dict:
+    """Mongo filter for a status and an ISO timestamp range [since, until)."""
+    query: dict = {}
+    if status:
+        query["status"] = status
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = since
+        if until:
+            query["timestamp"]["$lt"] = until
+    return query
+
+
+def export(bookings: Iterable[dict], out: TextIO, fmt: str, fields: Optional[Sequence[str]],
+           order: str, progress: dict, header: bool = True):
+    """Write bookings to `out`, keeping the count and resume key of the last one written in `progress`."""
+    from mongodb_utils import keyset_after
+
+    written = write_csv(bookings, out, fields, header=header) if fmt == "csv" else write_ndjson(bookings, out)
+    for booking in written:
+        progress["count"] += 1
+        progress["after"] = keyset_after(booking, order)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Export bookings as NDJSON or CSV without loading them all into memory.")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    parser.add_argument("--append", action="store_true", help="append to --output, e.g. when resuming (CSV header is skipped)")
+    parser.add_argument("--status", help="only bookings with this status")
+    parser.add_argument("--since", help="only bookings with timestamp >= this ISO date/time")
+    parser.add_argument("--until", help="only bookings with timestamp < this ISO date/time")
+    parser.add_argument("--fields", nargs="+", help="fields to export (default: all for NDJSON, the booking fields for CSV)")
+    parser.add_argument("--order", choices=["booking_id", "timestamp"], default="booking_id", help="export and resume order")
+    parser.add_argument("--after", help="resume after this key (comma-separated, as printed by an interrupted export)")
+    parser.add_argument("--batch-size", type=int, help="documents per cursor batch")
+    args = parser.parse_args(argv)
+
+    load_dotenv(".env.local")
+    # Imported after .env.local is loaded, since it reads its configuration at import
+    from mongodb_utils import EXPORT_BATCH_SIZE, KEYSET_ORDERS, iter_bookings
+
+    after = args.after.split(",") if args.after else None
+    if after is not None and len(after) != len(KEYSET_ORDERS[args.order]):
+        parser.error(f"--after for --order {args.order} needs {len(KEYSET_ORDERS[args.order])} comma-separated values")
+
+    bookings = iter_bookings(
+        build_filter(args.status, args.since, args.until),
+        fields=args.fields,
+        order=args.order,
+        after=after,
+        batch_size=args.batch_size or EXPORT_BATCH_SIZE,
+    )
+    mode = "a" if args.append else "w"
+    progress = {"count": 0, "after": None}
+    with open(args.output, mode, newline="", encoding="utf-8") if args.output else nullcontext(sys.stdout) as out:
+        try:
+            export(bookings, out, args.format, args.fields, args.order, progress, header=not args.append)
+        except (Exception, KeyboardInterrupt) as e:
+            print(f"Export stopped after {progress['count']} bookings: {e!r}", file=sys.stderr)
+            if progress["after"]:
+                print(f"Resume with: --append --after {','.join(map(str, progress['after']))}", file=sys.stderr)
+            sys.exit(1)
+    print(f"Exported {progress['count']} bookings", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
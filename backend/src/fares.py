@@ -0,0 +1,145 @@
+"""
+Vectorised fare quotes over every travel mode and city pair
+
+Usage:
+    python src/fares.py --travelers 1 2 4 > fares.csv
+    python src/fares.py --modes plane train --set plane.cost_per_km=4.5 --output what_if.csv
+"""
+import argparse
+import copy
+import csv
+import logging
+import sys
+from collections.abc import Iterator, Sequence
+from contextlib import nullcontext
+from typing import Optional
+
+import numpy as np
+
+from route_graph import RouteGraph, as_number
+from travel_data import DISTANCES, TRAVEL_MODES
+
+logger = logging.getLogger("fares")
+
+
+class FareTable:
+    """Cost and duration for every (mode, origin, destination) at once.
+
+    Costs are held per traveler as a (modes, cities, cities) array, so a whole
+    fare sheet for several party sizes is one broadcast multiply, and a single
+    quote is an array lookup. Unreachable pairs are inf.
+    """
+
+    def __init__(self, routes: RouteGraph, travel_modes: dict[str, dict]):
+        self.routes = routes
+        self.travel_modes = travel_modes
+        self.modes: list[str] = list(travel_modes)
+        self.mode_index = {mode: m for m, mode in enumerate(self.modes)}
+        self.cost_per_km = np.array([travel_modes[mode]["cost_per_km"] for mode in self.modes], dtype=float)
+        self.speed_kmh = np.array([travel_modes[mode]["speed_kmh"] for mode in self.modes], dtype=float)
+
+        trip = routes.trip[None, :, :]
+        self.cost_per_traveler = self.cost_per_km[:, None, None] * trip
+        self.duration_hours = trip / self.speed_kmh[:, None, None]
+
+    def with_overrides(self, overrides: dict[str, dict]) -> "FareTable":
+        """A new table with some mode fields replaced, for what-if pricing."""
+        travel_modes = copy.deepcopy(self.travel_modes)
+        for mode, fields in overrides.items():
+            travel_modes.setdefault(mode, {}).update(fields)
+        return FareTable(self.routes, travel_modes)
+
+    def grid(self, travelers: Sequence[int]) -> np.ndarray:
+        """Total cost array shaped (modes, cities, cities, len(travelers))."""
+        return self.cost_per_traveler[..., None] * np.asarray(travelers, dtype=float)
+
+    def quote(self, origin: str, destination: str, mode: str, travelers: int) -> Optional[dict]:
+        """Quote one trip, or None for an unknown mode, city or unreachable pair."""
+        m = self.mode_index.get(mode)
+        distance = self.routes.distance(origin, destination)
+        if m is None or distance is None:
+            return None
+        i, j = self.routes.index[origin], self.routes.index[destination]
+        return {
+            "mode": mode,
+            "distance_km": distance,
+            "cost": as_number(self.cost_per_traveler[m, i, j] * travelers),
+            "duration_hours": float(self.duration_hours[m, i, j]),
+        }
+
+    def sheet(self, travelers: Sequence[int], modes: Optional[Sequence[str]] = None) -> Iterator[dict]:
+        """Fare sheet rows for every reachable pair of distinct cities."""
+        modes = list(modes or self.modes)
+        mode_ids = [self.mode_index[mode] for mode in modes]
+        costs = self.grid(travelers)[mode_ids]
+        durations = self.duration_hours[mode_ids]
+        trip = self.routes.trip
+        cities = self.routes.cities
+
+        pairs = np.argwhere(np.isfinite(trip) & ~np.eye(len(cities), dtype=bool))
+        for k, mode in enumerate(modes):
+            for i, j in pairs:
+                for p, party in enumerate(travelers):
+                    yield {
+                        "origin": cities[i],
+                        "destination": cities[j],
+                        "mode": mode,
+                        "travelers": party,
+                        "distance_km": as_number(trip[i, j]),
+                        "cost": as_number(costs[k, i, j, p]),
+                        "duration_hours": round(float(durations[k, i, j]), 2),
+                    }
+
+
+def _parse_overrides(values: Sequence[str]) -> dict[str, dict]:
+    overrides: dict[str, dict] = {}
+    for value in values:
+        key, _, number = value.partition("=")
+        mode, _, field = key.partition(".")
+        if not number or not field:
+            raise ValueError(f"Expected MODE.FIELD=VALUE, got {value!r}")
+        overrides.setdefault(mode, {})[field] = float(number)
+    return overrides
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a fare sheet for every travel mode and city pair.")
+    parser.add_argument("--travelers", type=int, nargs="+", default=[1, 2, 3, 4], help="party sizes to quote")
+    parser.add_argument("--modes", nargs="+", choices=list(TRAVEL_MODES), help="modes to include (default: all)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="MODE.FIELD=VALUE",
+                        help="what-if change to TRAVEL_MODES, e.g. plane.cost_per_km=4.5 (repeatable)")
+    parser.add_argument("--output", help="CSV file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    table = FareTable(RouteGraph(DISTANCES), TRAVEL_MODES)
+    fields = ["origin", "destination", "mode", "travelers", "distance_km", "cost", "duration_hours"]
+    rows = table.sheet(args.travelers, args.modes)
+
+    if args.overrides:
+        try:
+            overrides = _parse_overrides(args.overrides)
+        except ValueError as e:
+            parser.error(str(e))
+        what_if = table.with_overrides(overrides)
+        fields += ["what_if_cost", "what_if_duration_hours", "cost_change_pct"]
+        rows = _with_what_if(rows, what_if.sheet(args.travelers, args.modes))
+
+    with open(args.output, "w", newline="", encoding="utf-8") if args.output else nullcontext(sys.stdout) as out:
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _with_what_if(rows: Iterator[dict], what_if_rows: Iterator[dict]) -> Iterator[dict]:
+    for row, changed in zip(rows, what_if_rows):
+        change = (changed["cost"] - row["cost"]) / row["cost"] * 100 if row["cost"] else 0.0
+        yield {
+            **row,
+            "what_if_cost": changed["cost"],
+            "what_if_duration_hours": changed["duration_hours"],
+            "cost_change_pct": round(change, 2),
+        }
+
+
+if __name__ == "__main__":
+    main()
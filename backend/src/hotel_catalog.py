@@ -0,0 +1,317 @@
+"""
+Indexed hotel catalog for fast destination queries
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from typing import Callable, Optional
+
+try:
+    import psutil
+except ImportError:  # memory reporting is optional
+    psutil = None
+
+logger = logging.getLogger("hotel_catalog")
+
+# Seconds between hotels.json change checks; 0 disables hot reload
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "30"))
+
+# Price bounds per budget band, inclusive. Medium does not restrict price.
+BUDGET_BANDS = {
+    "low": (0, 5000),
+    "medium": (0, math.inf),
+    "high": (15000, math.inf),
+}
+
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"\s*")
+
+
+def _expect(text: str, pos: int, chars: str) -> tuple[str, int]:
+    """Skip whitespace and consume one of `chars`, returning it and the new position."""
+    pos = _whitespace.match(text, pos).end()
+    char = text[pos:pos + 1]
+    if not char or char not in chars:
+        raise ValueError(f"Expected one of {chars!r} at position {pos} in hotel catalog")
+    return char, pos + 1
+
+
+def parse_catalog(text: str) -> dict[str, list[dict]]:
+    """Parse the `{city: [hotel, ...]}` layout of hotels.json one hotel at a time.
+
+    Gives the same result as json.loads, but as many small decode calls rather
+    than one long one, so a parse in a background thread never holds the GIL
+    long enough to stall the event loop.
+    """
+    decode = _decoder.raw_decode
+    skip = _whitespace.match
+    data = {}
+    _, pos = _expect(text, 0, "{")
+    if text[skip(text, pos).end():].startswith("}"):
+        return json.loads(text)
+
+    while True:
+        city, pos = decode(text, skip(text, pos).end())
+        _, pos = _expect(text, pos, ":")
+        _, pos = _expect(text, pos, "[")
+        hotels = []
+        if text[skip(text, pos).end():].startswith("]"):
+            _, pos = _expect(text, pos, "]")
+        else:
+            while True:
+                hotel, pos = decode(text, skip(text, pos).end())
+                hotels.append(hotel)
+                char, pos = _expect(text, pos, ",]")
+                if char == "]":
+                    break
+        data[city] = hotels
+        char, pos = _expect(text, pos, ",}")
+        if char == "}":
+            break
+
+    if skip(text, pos).end() != len(text):
+        raise ValueError(f"Extra data at position {pos} in hotel catalog")
+    return data
+
+
+def _rss_bytes() -> Optional[int]:
+    return psutil.Process().memory_info().rss if psutil else None
+
+
+def _bitset(positions: Iterable[int], size: int) -> int:
+    """Build a bitset from positions in O(size)."""
+    flags = ["0"] * size
+    for position in positions:
+        flags[size - 1 - position] = "1"
+    return int("".join(flags), 2) if size else 0
+
+
+def _bit_positions(bits: int, limit: int) -> list[int]:
+    """Positions of the lowest `limit` set bits, in ascending order."""
+    if limit <= 8:
+        positions = []
+        while bits and len(positions) < limit:
+            low = bits & -bits
+            positions.append(low.bit_length() - 1)
+            bits ^= low
+        return positions
+    positions = [i for i, flag in enumerate(reversed(bin(bits)[2:])) if flag == "1"]
+    return positions[:limit]
+
+
+class CityIndex:
+    """Lookup structures for the hotels of a single city.
+
+    Hotel sets are Python ints used as bitsets over positions in `hotels`, so
+    combining filters is a single AND and results come out in catalog order.
+    """
+
+    def __init__(self, hotels: list[dict], amenity_bits: dict[str, int]):
+        self.hotels = hotels
+        self.by_name: dict[str, dict] = {}
+        available = []
+        amenities: dict[str, list[int]] = {}
+
+        for position, hotel in enumerate(hotels):
+            self.by_name.setdefault(hotel["name"].lower(), hotel)
+            if hotel.get("availability"):
+                available.append(position)
+            for amenity in hotel.get("amenities", []):
+                amenity_bits.setdefault(amenity, len(amenity_bits))
+                amenities.setdefault(amenity, []).append(position)
+
+        size = len(hotels)
+        self.all = (1 << size) - 1
+        self.available = _bitset(available, size)
+        self.amenities = {amenity: _bitset(positions, size) for amenity, positions in amenities.items()}
+
+        # Sorted price index: prices[i] belongs to hotels[price_positions[i]]
+        order = sorted(range(len(hotels)), key=lambda p: hotels[p]["price_per_night"])
+        self.prices = [hotels[p]["price_per_night"] for p in order]
+        self.price_positions = order
+        self.bands = {band: self.price_range(low, high) for band, (low, high) in BUDGET_BANDS.items()}
+
+    def price_range(self, low: float, high: float) -> int:
+        """Bitset of hotels priced within [low, high]."""
+        start = bisect_left(self.prices, low)
+        end = bisect_right(self.prices, high)
+        if start == 0 and end == len(self.prices):
+            return self.all
+        return _bitset(self.price_positions[start:end], len(self.hotels))
+
+    def amenity_mask(self, amenities: Iterable[str]) -> int:
+        """Bitset of hotels offering every amenity in `amenities`."""
+        bits = self.all
+        for amenity in amenities:
+            bits &= self.amenities.get(amenity, 0)
+            if not bits:
+                break
+        return bits
+
+
+class HotelCatalog:
+    """Hotel data indexed per city at load time.
+
+    Built once from the `{city: [hotel, ...]}` structure in hotels.json and
+    read-only afterwards.
+    """
+
+    def __init__(self, hotel_data: dict[str, list[dict]]):
+        self.hotel_data = hotel_data
+        # Catalog-wide amenity vocabulary, amenity -> bit number
+        self.amenity_bits: dict[str, int] = {}
+        self.cities: dict[str, CityIndex] = {
+            city: CityIndex(hotels, self.amenity_bits) for city, hotels in hotel_data.items()
+        }
+        logger.info(f"Indexed {sum(len(h) for h in hotel_data.values())} hotels in {len(self.cities)} cities")
+
+    def __contains__(self, city: str) -> bool:
+        return city in self.cities
+
+    def destinations(self) -> list[str]:
+        return list(self.cities)
+
+    def hotels(self, city: str) -> list[dict]:
+        """All hotels for a city, in catalog order."""
+        index = self.cities.get(city)
+        return index.hotels if index else []
+
+    def get_hotel(self, city: str, name: str) -> Optional[dict]:
+        """Case-insensitive exact hotel lookup by name."""
+        index = self.cities.get(city)
+        return index.by_name.get(name.lower()) if index else None
+
+    def find_hotels(self, city: str, budget: Optional[str] = None,
+                    amenities: Optional[list[str]] = None, limit: Optional[int] = None,
+                    available_only: bool = True, within: Optional[int] = None) -> list[dict]:
+        """Hotels in a city matching a budget band and required amenities, in catalog order.
+
+        `within`, if given, is a bitset of catalog positions to choose from,
+        such as the hotels with rooms free for a stay.
+        """
+        index = self.cities.get(city)
+        if index is None:
+            return []
+
+        bits = index.available if available_only else index.all
+        if within is not None:
+            bits &= within
+        if budget:
+            bits &= index.bands.get(budget, index.all)
+        if amenities:
+            bits &= index.amenity_mask(amenities)
+
+        limit = len(index.hotels) if limit is None else limit
+        return [index.hotels[position] for position in _bit_positions(bits, limit)]
+
+    def find_by_price(self, city: str, low: float, high: float,
+                      limit: Optional[int] = None) -> list[tuple[int, dict]]:
+        """Cheapest-first (price, hotel) pairs priced within [low, high]."""
+        index = self.cities.get(city)
+        if index is None:
+            return []
+        start = bisect_left(index.prices, low)
+        end = bisect_right(index.prices, high)
+        if limit is not None:
+            end = min(end, start + limit)
+        return [(index.prices[i], index.hotels[index.price_positions[i]]) for i in range(start, end)]
+
+
+def _file_stamp(path: str) -> Optional[tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+class CatalogReloader:
+    """Keeps a HotelCatalog in sync with hotels.json without restarts.
+
+    The file is polled for a new (mtime, inode, size) stamp, so both in-place
+    edits and atomic rename deploys are picked up. Parsing and indexing run in
+    a worker thread and the finished catalog replaces `catalog` in a single
+    assignment; readers never wait on a reload, and anything holding the old
+    catalog (such as an in-flight session) keeps a consistent snapshot. A file
+    that fails to parse is logged and the current catalog stays in place.
+
+    `stats` reports the last reload time and how much the process RSS grew
+    while the new catalog was built. `loader` builds a catalog from a path and
+    defaults to parsing and indexing JSON. A change to any of `also_watch`
+    reloads too, for loaders that read more than `path`.
+    """
+
+    def __init__(self, path: str, catalog=None, interval: float = CATALOG_RELOAD_INTERVAL,
+                 loader: Optional[Callable[[str], object]] = None, also_watch: Sequence[str] = ()):
+        self.path = path
+        self.interval = interval
+        self.loader = loader
+        self.also_watch = list(also_watch)
+        self.version = self._stamp()
+        self.catalog = catalog if catalog is not None else self._build()
+        self.stats = {"reloads": 0, "failures": 0, "last_reload_ms": None, "rss_growth_bytes": None}
+        self._task = None
+
+    def _stamp(self) -> Optional[tuple]:
+        stamps = tuple(_file_stamp(path) for path in [self.path, *self.also_watch])
+        return stamps if stamps[0] is not None else None
+
+    def _build(self):
+        if self.loader is not None:
+            return self.loader(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            text = f.read()
+        return HotelCatalog(parse_catalog(text))
+
+    async def check(self) -> bool:
+        """Reload if the file changed. Returns True when a new catalog was swapped in."""
+        stamp = await asyncio.to_thread(self._stamp)
+        if stamp is None or stamp == self.version:
+            return False
+
+        start = time.perf_counter()
+        rss_before = _rss_bytes()
+        try:
+            catalog = await asyncio.to_thread(self._build)
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.error(f"Failed to reload {self.path}, keeping current catalog: {e}")
+            return False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        rss_after = _rss_bytes()
+        growth = rss_after - rss_before if rss_before is not None else None
+
+        self.catalog = catalog
+        self.version = stamp
+        self.stats.update(reloads=self.stats["reloads"] + 1, last_reload_ms=elapsed_ms, rss_growth_bytes=growth)
+        growth_text = f", RSS +{growth / 1e6:.1f} MB" if growth is not None else ""
+        logger.info(f"Reloaded hotel catalog in {elapsed_ms:.1f} ms{growth_text}")
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Hotel catalog watcher error: {e}")
+
+    def start(self):
+        """Start polling for changes on the running event loop."""
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run(), name="catalog-reloader")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
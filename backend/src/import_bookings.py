@@ -0,0 +1,125 @@
+"""
+Bulk-load bookings from JSON or NDJSON files into MongoDB
+
+Accepts NDJSON (one booking per line), a JSON array of bookings, or a legacy
+booking.json object (keyed by booking id, or with a "bookings" list). Files
+are streamed through save_bookings one chunk at a time.
+
+Usage:
+    python src/import_bookings.py booking.json
+    python src/import_bookings.py exports/*.ndjson --chunk-size 5000
+    python src/import_bookings.py booking.json --replace
+"""
+import argparse
+import json
+import sys
+import time
+from collections.abc import Iterator
+from typing import Optional, TextIO
+
+from dotenv import load_dotenv
+
+_decoder = json.JSONDecoder()
+READ_SIZE = 1 << 16
+
+
+def iter_ndjson(f: TextIO) -> Iterator[dict]:
+    for line_number, line in enumerate(f, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number}: {e}") from None
+
+
+def _iter_json_array(f: TextIO, buffer: str) -> Iterator[dict]:
+    """Decode array elements one at a time, reading the file in blocks."""
+    pos = 1  # past "["
+    while True:
+        # Skip whitespace and separators, refilling the buffer as needed
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                break
+            block = f.read(READ_SIZE)
+            if not block:
+                raise ValueError("Unterminated JSON array")
+            buffer, pos = block, 0
+        if buffer[pos] == "]":
+            return
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                block = f.read(READ_SIZE)
+                if not block:
+                    raise
+                buffer, pos = buffer[pos:] + block, 0
+        yield item
+        pos = end
+
+
+def iter_json(f: TextIO) -> Iterator[dict]:
+    """Bookings from a JSON array (streamed) or a legacy JSON object."""
+    buffer = f.read(READ_SIZE).lstrip()
+    if buffer.startswith("["):
+        yield from _iter_json_array(f, buffer)
+        return
+    data = json.loads(buffer + f.read())
+    if "booking_id" in data:
+        yield data
+        return
+    if isinstance(data.get("bookings"), list):
+        yield from data["bookings"]
+        return
+    for booking_id, booking in data.items():
+        yield {"booking_id": booking_id, **booking}
+
+
+def iter_bookings_file(path: str, fmt: str = "auto") -> Iterator[dict]:
+    if fmt == "auto":
+        fmt = "ndjson" if path.endswith((".ndjson", ".jsonl")) else "json"
+    with open(path, encoding="utf-8") as f:
+        yield from (iter_ndjson(f) if fmt == "ndjson" else iter_json(f))
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Bulk-load bookings from JSON or NDJSON files.")
+    parser.add_argument("files", nargs="+", help="booking files to load")
+    parser.add_argument("--format", choices=["auto", "json", "ndjson"], default="auto",
+                        help="input format (default: by extension, .ndjson/.jsonl are NDJSON)")
+    parser.add_argument("--chunk-size", type=int, help="bookings per bulk write")
+    parser.add_argument("--replace", action="store_true", help="overwrite bookings whose id already exists")
+    parser.add_argument("--show", type=int, default=20, help="duplicates and errors to list (default: 20)")
+    args = parser.parse_args(argv)
+
+    load_dotenv(".env.local")
+    # Imported after .env.local is loaded, since it reads its configuration at import
+    from mongodb_utils import BULK_CHUNK_SIZE, save_bookings
+
+    failed = False
+    for path in args.files:
+        start = time.perf_counter()
+        try:
+            report = save_bookings(iter_bookings_file(path, args.format), args.chunk_size or BULK_CHUNK_SIZE,
+                                   replace=args.replace)
+        except (OSError, ValueError) as e:
+            print(f"{path}: could not read: {e}", file=sys.stderr)
+            failed = True
+            continue
+        elapsed = time.perf_counter() - start
+        rate = report.written / elapsed if elapsed else 0.0
+        print(f"{path}: {report.written} written, {len(report.duplicates)} duplicates, "
+              f"{len(report.errors)} errors in {elapsed:.2f} s ({rate:.0f} bookings/s)")
+        for booking_id in report.duplicates[:args.show]:
+            print(f"  duplicate: {booking_id}")
+        for error in report.errors[:args.show]:
+            print(f"  error: {error['booking_id']}: {error['message']}")
+        failed = failed or bool(report.errors)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
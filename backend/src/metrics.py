@@ -0,0 +1,178 @@
+"""
+Prometheus metrics for function tools, booking storage, MongoDB and SMTP
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from typing import Optional
+
+logger = logging.getLogger("metrics")
+
+# Buckets from 1 ms (in-memory tools) to 10 s (a cold SMTP handshake)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Booking store methods timed by instrument_store
+STORE_OPERATIONS = (
+    "warm", "save_booking", "save_bookings", "get_booking", "update_booking",
+    "delete_booking", "load_bookings", "cancel_booking", "find_bookings", "save_session", "load_session",
+    "delete_session", "reserve_rooms", "release_rooms", "load_room_nights",
+)
+
+_metrics = None
+_disabled = nullcontext()
+_room = contextvars.ContextVar("metrics_room", default="")
+
+
+def metrics_port() -> Optional[int]:
+    """Port of the worker's /metrics endpoint, or None when METRICS_PORT is unset (metrics off)."""
+    port = os.getenv("METRICS_PORT")
+    return int(port) if port else None
+
+
+def multiproc_dir() -> str:
+    """Where job processes write their samples for the worker to aggregate."""
+    return os.getenv("METRICS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "travel-agent-metrics")
+
+
+class Metrics:
+    """Latency histogram, error counter and in-flight gauge, labelled by component, operation and room.
+
+    component is "tool", "store", "mongodb" or "smtp"; operation is the tool,
+    method or step name. Errors are exceptions raised out of the timed call;
+    calls that report failure by return value (the stores return False or
+    None) show up in latency only.
+    """
+
+    def __init__(self, registry=None, room_label: bool = True):
+        from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+
+        registry = registry or REGISTRY
+        labels = ["component", "operation", "room"]
+        self.room_label = room_label
+        self.latency = Histogram("travel_agent_call_duration_seconds", "Latency of instrumented calls",
+                                 labels, buckets=LATENCY_BUCKETS, registry=registry)
+        self.errors = Counter("travel_agent_call_errors_total", "Instrumented calls that raised",
+                              labels, registry=registry)
+        # livesum: job processes that have exited drop out of the total
+        self.in_flight = Gauge("travel_agent_calls_in_flight", "Instrumented calls currently running",
+                               labels, multiprocess_mode="livesum", registry=registry)
+
+    def timer(self, component: str, operation: str, room: bool = True) -> "_Timer":
+        room_name = _room.get() if room and self.room_label else ""
+        return _Timer(self, (component, operation, room_name))
+
+
+class _Timer:
+    __slots__ = ("labels", "metrics", "start")
+
+    def __init__(self, metrics: Metrics, labels: tuple):
+        self.metrics = metrics
+        self.labels = labels
+
+    def __enter__(self):
+        self.metrics.in_flight.labels(*self.labels).inc()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.latency.labels(*self.labels).observe(time.perf_counter() - self.start)
+        self.metrics.in_flight.labels(*self.labels).dec()
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            self.metrics.errors.labels(*self.labels).inc()
+        return False
+
+
+def get_metrics() -> Optional[Metrics]:
+    """Process-wide metrics, or None when METRICS_PORT is unset. Imports prometheus_client on first use."""
+    global _metrics
+    if _metrics is None and metrics_port() is not None:
+        _metrics = Metrics(room_label=os.getenv("METRICS_ROOM_LABEL", "true").lower() == "true")
+    return _metrics
+
+
+def enable(registry=None, room_label: bool = True) -> Metrics:
+    """Turn metrics on regardless of METRICS_PORT, e.g. with a private registry in tests."""
+    global _metrics
+    _metrics = Metrics(registry, room_label)
+    return _metrics
+
+
+def disable():
+    global _metrics
+    _metrics = None
+
+
+def set_room(name: str):
+    """Label calls made from the current task (and tasks it creates) with this room."""
+    _room.set(name)
+
+
+def timer(component: str, operation: str, room: bool = True):
+    """Context manager timing a block; a shared no-op when metrics are off."""
+    metrics = get_metrics()
+    if metrics is None:
+        return _disabled
+    return metrics.timer(component, operation, room)
+
+
+def instrument_tool(tool):
+    """A copy of a @function_tool that records its calls; the tool itself when metrics are off."""
+    from livekit.agents.llm import FunctionTool
+
+    metrics = get_metrics()
+    if metrics is None:
+        return tool
+
+    name = tool.info.name
+    func = tool._func
+
+    @functools.wraps(func)
+    async def timed(*args, **kwargs):
+        with metrics.timer("tool", name):
+            return await func(*args, **kwargs)
+
+    return FunctionTool(timed, tool.info)
+
+
+class InstrumentedStore:
+    """Booking store proxy timing the STORE_OPERATIONS; other attributes pass through."""
+
+    def __init__(self, store, metrics: Metrics):
+        self._store = store
+        for operation in STORE_OPERATIONS:
+            method = getattr(store, operation, None)
+            if method is not None:
+                setattr(self, operation, self._timed(metrics, operation, method))
+
+    @staticmethod
+    def _timed(metrics, operation, method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            with metrics.timer("store", operation):
+                return await method(*args, **kwargs)
+        return timed
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+
+def instrument_store(store):
+    """Wrap a booking store so its calls are recorded; the store itself when metrics are off."""
+    metrics = get_metrics()
+    if metrics is None:
+        return store
+    return InstrumentedStore(store, metrics)
+
+
+def worker_options() -> dict:
+    """WorkerOptions arguments that serve every job process's metrics from the worker on METRICS_PORT."""
+    port = metrics_port()
+    if port is None:
+        return {}
+    logger.info(f"Serving Prometheus metrics on :{port}/metrics")
+    return {"prometheus_port": port, "prometheus_multiproc_dir": multiproc_dir()}
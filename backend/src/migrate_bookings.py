@@ -0,0 +1,52 @@
+"""
+Create the bookings, session checkpoint and room inventory collections' indexes
+
+Workers create missing indexes when they first connect. Run this before
+deploying to build them ahead of traffic on a large collection, or with
+--check to list the missing ones; re-running only creates indexes that are
+missing.
+
+Usage:
+    python src/migrate_bookings.py
+    python src/migrate_bookings.py --check
+"""
+import argparse
+import sys
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Create missing booking, session and inventory indexes.")
+    parser.add_argument("--check", action="store_true", help="only list missing indexes; exit 1 if any")
+    args = parser.parse_args(argv)
+
+    load_dotenv(".env.local")
+    # Imported after .env.local is loaded, since it reads its configuration at import
+    from mongodb_utils import (
+        BOOKING_INDEXES,
+        INVENTORY_INDEXES,
+        MONGODB_INVENTORY_COLLECTION,
+        MONGODB_SESSIONS_COLLECTION,
+        SESSION_INDEXES,
+        ensure_indexes,
+        get_mongodb_connection,
+        missing_indexes,
+    )
+
+    _, db, collection = get_mongodb_connection()
+    targets = [(collection, BOOKING_INDEXES), (db[MONGODB_SESSIONS_COLLECTION], SESSION_INDEXES),
+               (db[MONGODB_INVENTORY_COLLECTION], INVENTORY_INDEXES)]
+    if args.check:
+        missing = [name for target, indexes in targets for name in missing_indexes(target.index_information(), indexes)]
+        for name in missing:
+            print(f"missing: {name}")
+        sys.exit(1 if missing else 0)
+
+    created = [name for target, indexes in targets for name in ensure_indexes(target, indexes)]
+    print(f"Created {len(created)} indexes" + (f": {', '.join(created)}" if created else ", all present"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,40 @@
 """
 MongoDB utilities for booking operations
 """
-import os
+import asyncio
+import atexit
 import logging
-from typing import List, Dict, Optional
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, DuplicateKeyError
-from datetime import datetime
+import os
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Optional
+
+from pymongo import (
+    ASCENDING,
+    DESCENDING,
+    AsyncMongoClient,
+    IndexModel,
+    MongoClient,
+    ReplaceOne,
+    ReturnDocument,
+)
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError
+
+import metrics
+from booking_cache import (
+    BOOKING_CACHE_INVALIDATION,
+    BOOKING_CACHE_TTL,
+    BookingCache,
+    ChangeStreamInvalidator,
+)
+from booking_store import (
+    CANCELLATION_REFUND_RATE,
+    CUSTOMER_LOOKUP_LIMIT,
+    SESSION_CHECKPOINT_TTL,
+    normalise_contact,
+)
 
 logger = logging.getLogger("mongodb")
 
@@ -14,38 +42,210 @@ logger = logging.getLogger("mongodb")
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "travel_booking")
 MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION", "bookings")
+# Session checkpoints, in the same database
+MONGODB_SESSIONS_COLLECTION = os.getenv("MONGODB_SESSIONS_COLLECTION", "sessions")
+# Rooms booked per hotel per night, one document per hotel
+MONGODB_INVENTORY_COLLECTION = os.getenv("MONGODB_INVENTORY_COLLECTION", "room_inventory")
+
+# Connection pool tuning
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "10000"))
+MONGODB_WRITE_CONCERN = os.getenv("MONGODB_WRITE_CONCERN", "")
+MONGODB_WTIMEOUT_MS = int(os.getenv("MONGODB_WTIMEOUT_MS", "0"))
+# Pooled connections opened ahead of the first booking call at job start
+MONGODB_WARM_CONNECTIONS = int(os.getenv("MONGODB_WARM_CONNECTIONS", "2"))
+
+# Documents per cursor batch when streaming bookings
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Documents per insert_many / bulk_write round trip for bulk loads
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+# Server error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Booking indexes. AsyncBookingRepository creates any that are missing when it first
+# connects (a single listIndexes round trip once they exist); migrate_bookings.py
+# creates them ahead of deploying workers. Customer lookups sort newest first, so
+# their indexes end in timestamp too.
+BOOKING_INDEXES = [
+    IndexModel([("booking_id", ASCENDING)], name="booking_id_1", unique=True),
+    # Keyset pagination in timestamp order
+    IndexModel([("timestamp", ASCENDING), ("booking_id", ASCENDING)], name="timestamp_1_booking_id_1"),
+    IndexModel([("email", ASCENDING), ("timestamp", DESCENDING)], name="email_1_timestamp_-1"),
+    IndexModel([("mobile_number", ASCENDING), ("timestamp", DESCENDING)], name="mobile_number_1_timestamp_-1"),
+    IndexModel([("status", ASCENDING), ("timestamp", ASCENDING)], name="status_1_timestamp_1"),
+]
+
+# Session checkpoint indexes, ensured the same way. Sessions are
+# looked up by _id; the TTL index lets MongoDB delete stale checkpoints.
+SESSION_INDEXES = [
+    IndexModel([("updated_at", ASCENDING)], name="updated_at_ttl", expireAfterSeconds=SESSION_CHECKPOINT_TTL),
+]
+
+# Room inventory indexes, ensured the same way. A hotel's document
+# is found by _id; the availability index loads a whole city at once.
+INVENTORY_INDEXES = [
+    IndexModel([("city", ASCENDING)], name="city_1"),
+]
+
+# Keyset pagination orders: sort fields, ending in the unique booking_id
+KEYSET_ORDERS = {
+    "booking_id": ("booking_id",),
+    "timestamp": ("timestamp", "booking_id"),
+}
 
 # Global client connection
 _client = None
 _db = None
 _collection = None
+_repository = None
+
+def get_client_options() -> dict:
+    """Build MongoClient keyword options from the pool configuration."""
+    options = {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGODB_SOCKET_TIMEOUT_MS,
+    }
+    if MONGODB_WRITE_CONCERN:
+        # "majority" stays a string, numeric values become an acknowledgement count
+        w = MONGODB_WRITE_CONCERN
+        options["w"] = int(w) if w.isdigit() else w
+    if MONGODB_WTIMEOUT_MS:
+        options["wTimeoutMS"] = MONGODB_WTIMEOUT_MS
+    return options
 
 def get_mongodb_connection():
     """Get MongoDB connection, creating it if necessary."""
     global _client, _db, _collection
-    
+
     if _client is None:
         try:
-            _client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-            # Test connection
-            _client.admin.command('ping')
+            with metrics.timer("mongodb", "connect"):
+                _client = MongoClient(MONGODB_URI, **get_client_options())
+                # Test connection
+                _client.admin.command('ping')
             _db = _client[MONGODB_DB_NAME]
             _collection = _db[MONGODB_COLLECTION]
-            
-            # Create unique index on booking_id
-            _collection.create_index("booking_id", unique=True)
-            
             logger.info(f"Connected to MongoDB: {MONGODB_DB_NAME}.{MONGODB_COLLECTION}")
         except ConnectionFailure as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
-    
+
     return _client, _db, _collection
 
-def load_bookings() -> List[Dict]:
-    """Load all bookings from MongoDB."""
+def ensure_indexes(collection=None, indexes: list[IndexModel] = BOOKING_INDEXES) -> list[str]:
+    """Create the booking (or other given) indexes that don't exist yet; returns the names created.
+
+    Only missing indexes are sent, so once they exist this is a single
+    listIndexes round trip rather than a createIndexes per index.
+    """
+    if collection is None:
+        _, _, collection = get_mongodb_connection()
+    missing = missing_indexes(collection.index_information(), indexes)
+    if missing:
+        collection.create_indexes([index for index in indexes if index.document["name"] in missing])
+        logger.info(f"Created indexes: {', '.join(missing)}")
+    return missing
+
+def missing_indexes(index_names: Iterable[str], indexes: list[IndexModel] = BOOKING_INDEXES) -> list[str]:
+    """Names of booking (or other given) indexes not among `index_names`."""
+    existing = set(index_names)
+    return [index.document["name"] for index in indexes if index.document["name"] not in existing]
+
+def customer_query(email: Optional[str] = None, mobile_number: Optional[str] = None,
+                   status: Optional[str] = None) -> dict:
+    """Filter for a customer's bookings, normalised the way confirm_booking stores them.
+
+    With both an email and a mobile number, a booking must match both.
+    """
+    query: dict = {}
+    email, mobile_number = normalise_contact(email, mobile_number)
+    if email:
+        query["email"] = email
+    if mobile_number:
+        query["mobile_number"] = mobile_number
+    if status:
+        query["status"] = status
+    return query
+
+def find_bookings(email: Optional[str] = None, mobile_number: Optional[str] = None,
+                  status: Optional[str] = None, limit: int = CUSTOMER_LOOKUP_LIMIT) -> list[dict]:
+    """A customer's bookings, newest first."""
+    query = customer_query(email, mobile_number, status)
+    if not query:
+        return []
     try:
-        client, db, collection = get_mongodb_connection()
+        _, _, collection = get_mongodb_connection()
+        return list(collection.find(query, {'_id': 0}, sort=[("timestamp", DESCENDING)], limit=limit))
+    except Exception as e:
+        logger.error(f"Error finding bookings in MongoDB: {e}")
+        return []
+
+def keyset_query(query: Optional[dict] = None, order: str = "booking_id",
+                 after: Optional[Sequence[Any]] = None) -> dict:
+    """`query` narrowed to bookings strictly after the `after` key in the given order."""
+    query = dict(query or {})
+    if after is None:
+        return query
+    fields = KEYSET_ORDERS[order]
+    if len(after) != len(fields):
+        raise ValueError(f"Expected {len(fields)} key values for order {order!r}, got {len(after)}")
+    # (a, b) > (x, y)  <=>  a > x, or a == x and b > y
+    clauses = []
+    for i, key in enumerate(fields):
+        clause = {fields[j]: after[j] for j in range(i)}
+        clause[key] = {"$gt": after[i]}
+        clauses.append(clause)
+    keyset = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+    return {"$and": [query, keyset]} if query else keyset
+
+def keyset_sort(order: str = "booking_id") -> list[tuple[str, int]]:
+    return [(field, 1) for field in KEYSET_ORDERS[order]]
+
+def keyset_after(booking: dict, order: str = "booking_id") -> list[Any]:
+    """Resume key for continuing after `booking`."""
+    return [booking.get(field) for field in KEYSET_ORDERS[order]]
+
+def _stream_projection(fields: Optional[Sequence[str]], order: str) -> dict:
+    """Projection without _id; key fields are always returned so paging can resume."""
+    if not fields:
+        return {'_id': 0}
+    projection = dict.fromkeys(fields, 1)
+    projection.update(dict.fromkeys(KEYSET_ORDERS[order], 1))
+    projection['_id'] = 0
+    return projection
+
+def iter_bookings(query: Optional[dict] = None, fields: Optional[Sequence[str]] = None,
+                  order: str = "booking_id", after: Optional[Sequence[Any]] = None,
+                  batch_size: int = EXPORT_BATCH_SIZE, collection=None) -> Iterator[dict]:
+    """Stream bookings in keyset order, one cursor batch in memory at a time.
+
+    Pass the keyset_after() of the last booking seen as `after` to resume.
+    """
+    if collection is None:
+        _, _, collection = get_mongodb_connection()
+    cursor = collection.find(
+        keyset_query(query, order, after),
+        _stream_projection(fields, order),
+        sort=keyset_sort(order),
+        batch_size=batch_size,
+    )
+    with cursor:
+        yield from cursor
+
+def load_bookings() -> list[dict]:
+    """Load all bookings from MongoDB.
+
+    Materialises the whole collection; use iter_bookings for large exports.
+    """
+    try:
+        _, _, collection = get_mongodb_connection()
         bookings = list(collection.find({}, {'_id': 0}))  # Exclude MongoDB _id field
         logger.info(f"Loaded {len(bookings)} bookings from MongoDB")
         return bookings
@@ -53,14 +253,14 @@ def load_bookings() -> List[Dict]:
         logger.error(f"Error loading bookings from MongoDB: {e}")
         return []
 
-def save_booking(booking: Dict) -> bool:
+def save_booking(booking: dict) -> bool:
     """Save a single booking to MongoDB."""
     try:
-        client, db, collection = get_mongodb_connection()
+        _, _, collection = get_mongodb_connection()
         # Add timestamp if not present
         if 'timestamp' not in booking:
             booking['timestamp'] = datetime.now().isoformat()
-        
+
         # Insert booking
         collection.insert_one(booking)
         logger.info(f"Saved booking {booking.get('booking_id')} to MongoDB")
@@ -72,10 +272,89 @@ def save_booking(booking: Dict) -> bool:
         logger.error(f"Error saving booking to MongoDB: {e}")
         return False
 
-def update_booking(booking_id: str, updates: Dict) -> bool:
+@dataclass
+class BulkWriteReport:
+    """Outcome of a bulk load, with the booking ids that were not written."""
+    written: int = 0
+    duplicates: list[str] = field(default_factory=list)
+    errors: list[dict] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return len(self.duplicates) + len(self.errors)
+
+def _chunks(bookings: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    it = iter(bookings)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+def _prepare_chunk(chunk: list[dict], report: BulkWriteReport) -> list[dict]:
+    """Copies of valid bookings with normalised ids and timestamps; invalid ones are reported."""
+    docs = []
+    for booking in chunk:
+        if not booking.get("booking_id"):
+            report.errors.append({"booking_id": None, "code": None, "message": "missing booking_id"})
+            continue
+        doc = dict(booking)
+        doc.pop("_id", None)
+        doc["booking_id"] = str(doc["booking_id"]).upper()
+        doc.setdefault("timestamp", datetime.now().isoformat())
+        docs.append(doc)
+    return docs
+
+def _replace_requests(docs: list[dict]) -> list[ReplaceOne]:
+    return [ReplaceOne({"booking_id": doc["booking_id"]}, doc, upsert=True) for doc in docs]
+
+def _written(result, replace: bool) -> int:
+    return result.upserted_count + result.matched_count if replace else len(result.inserted_ids)
+
+def _record_bulk_error(docs: list[dict], replace: bool, error: BulkWriteError, report: BulkWriteReport):
+    """Split a BulkWriteError into per-document duplicates and errors."""
+    details = error.details
+    if replace:
+        report.written += details.get("nUpserted", 0) + details.get("nMatched", 0)
+    else:
+        report.written += details.get("nInserted", 0)
+    for write_error in details.get("writeErrors", []):
+        booking_id = docs[write_error["index"]]["booking_id"]
+        if write_error.get("code") == DUPLICATE_KEY_ERROR:
+            report.duplicates.append(booking_id)
+        else:
+            report.errors.append({"booking_id": booking_id, "code": write_error.get("code"), "message": write_error.get("errmsg")})
+
+def save_bookings(bookings: Iterable[dict], chunk_size: int = BULK_CHUNK_SIZE, replace: bool = False,
+                  collection=None) -> BulkWriteReport:
+    """Write many bookings with unordered insert_many (or upserting bulk_write) in chunks.
+
+    `bookings` can be any iterable, including a stream from a file; only one
+    chunk is held at a time. A duplicate or invalid booking is reported in
+    the result and does not stop the rest of its chunk. With `replace`,
+    existing bookings with the same id are overwritten instead, which makes
+    re-running a migration safe. Errors other than per-document write errors
+    (such as a lost connection) are raised.
+    """
+    if collection is None:
+        _, _, collection = get_mongodb_connection()
+    report = BulkWriteReport()
+    for chunk in _chunks(bookings, chunk_size):
+        docs = _prepare_chunk(chunk, report)
+        if not docs:
+            continue
+        try:
+            if replace:
+                result = collection.bulk_write(_replace_requests(docs), ordered=False)
+            else:
+                result = collection.insert_many(docs, ordered=False)
+            report.written += _written(result, replace)
+        except BulkWriteError as e:
+            _record_bulk_error(docs, replace, e, report)
+    logger.info(f"Bulk saved {report.written} bookings ({len(report.duplicates)} duplicates, {len(report.errors)} errors)")
+    return report
+
+def update_booking(booking_id: str, updates: dict) -> bool:
     """Update a booking in MongoDB."""
     try:
-        client, db, collection = get_mongodb_connection()
+        _, _, collection = get_mongodb_connection()
         result = collection.update_one(
             {"booking_id": booking_id.upper()},
             {"$set": updates}
@@ -90,10 +369,42 @@ def update_booking(booking_id: str, updates: Dict) -> bool:
         logger.error(f"Error updating booking in MongoDB: {e}")
         return False
 
-def get_booking(booking_id: str) -> Optional[Dict]:
+def _cancellation(booking_id: str, refund_rate: float) -> tuple[dict, list[dict]]:
+    """Filter and update pipeline that cancel a booking that isn't cancelled yet.
+
+    The refund is computed from the stored total_cost inside the update, so
+    the status change and the refund are written together.
+    """
+    query = {"booking_id": booking_id.upper(), "status": {"$ne": "cancelled"}}
+    update = [{"$set": {
+        "status": "cancelled",
+        "cancelled_at": datetime.now().isoformat(),
+        "refund_rate": refund_rate,
+        "refund_amount": {"$multiply": ["$total_cost", refund_rate]},
+    }}]
+    return query, update
+
+def cancel_booking(booking_id: str, refund_rate: float = CANCELLATION_REFUND_RATE) -> Optional[dict]:
+    """Cancel a booking in one round trip; returns it as it was before cancelling.
+
+    Returns None if the booking doesn't exist, is already cancelled (so of
+    several concurrent cancels exactly one wins) or on error.
+    """
+    try:
+        _, _, collection = get_mongodb_connection()
+        query, update = _cancellation(booking_id, refund_rate)
+        booking = collection.find_one_and_update(query, update, {'_id': 0}, return_document=ReturnDocument.BEFORE)
+        if booking:
+            logger.info(f"Cancelled booking {booking_id} in MongoDB")
+        return booking
+    except Exception as e:
+        logger.error(f"Error cancelling booking in MongoDB: {e}")
+        return None
+
+def get_booking(booking_id: str) -> Optional[dict]:
     """Get a single booking by ID from MongoDB."""
     try:
-        client, db, collection = get_mongodb_connection()
+        _, _, collection = get_mongodb_connection()
         booking = collection.find_one({"booking_id": booking_id.upper()}, {'_id': 0})
         if booking:
             logger.info(f"Retrieved booking {booking_id} from MongoDB")
@@ -107,7 +418,7 @@ def get_booking(booking_id: str) -> Optional[Dict]:
 def delete_booking(booking_id: str) -> bool:
     """Delete a booking from MongoDB."""
     try:
-        client, db, collection = get_mongodb_connection()
+        _, _, collection = get_mongodb_connection()
         result = collection.delete_one({"booking_id": booking_id.upper()})
         if result.deleted_count > 0:
             logger.info(f"Deleted booking {booking_id} from MongoDB")
@@ -119,6 +430,383 @@ def delete_booking(booking_id: str) -> bool:
         logger.error(f"Error deleting booking from MongoDB: {e}")
         return False
 
+class AsyncBookingRepository:
+    """Async booking persistence on a pooled AsyncMongoClient.
+
+    Mirrors the synchronous helpers above but never blocks the event loop, so
+    function tools can await storage without stalling audio for other rooms
+    handled by the same worker process.
+
+    With a `cache`, get_booking reads through it, save_booking writes through
+    it and updates or deletes invalidate it. `invalidator`, when set, also
+    invalidates on writes made by other processes once started.
+    """
+
+    def __init__(self, uri: str = MONGODB_URI, db_name: str = MONGODB_DB_NAME,
+                 collection_name: str = MONGODB_COLLECTION, cache: Optional[BookingCache] = None,
+                 invalidation: str = "none", sessions_collection_name: str = MONGODB_SESSIONS_COLLECTION,
+                 inventory_collection_name: str = MONGODB_INVENTORY_COLLECTION, **client_options):
+        self.uri = uri
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.sessions_collection_name = sessions_collection_name
+        self.inventory_collection_name = inventory_collection_name
+        self.client_options = {**get_client_options(), **client_options}
+        self.cache = cache
+        self.invalidator = None
+        if cache is not None and invalidation == "changestream":
+            self.invalidator = ChangeStreamInvalidator(cache, self.get_collection)
+        self._client = None
+        self._collection = None
+        self._lock = asyncio.Lock()
+
+    async def get_collection(self):
+        """Get the bookings collection, connecting on first use."""
+        if self._collection is not None:
+            return self._collection
+
+        async with self._lock:
+            if self._collection is None:
+                client = AsyncMongoClient(self.uri, **self.client_options)
+                try:
+                    with metrics.timer("mongodb", "connect"):
+                        await client.admin.command('ping')
+                    collection = client[self.db_name][self.collection_name]
+                    await self._ensure_indexes(collection)
+                except Exception:
+                    await client.close()
+                    raise
+                self._client = client
+                self._collection = collection
+                logger.info(f"Connected to MongoDB (async): {self.db_name}.{self.collection_name}")
+        return self._collection
+
+    async def _ensure_indexes(self, collection):
+        """Create missing booking, session and inventory indexes.
+
+        Without the unique booking_id index duplicate booking IDs are not
+        rejected, so a failure here fails the connection (and warm-up) rather
+        than running without it.
+        """
+        database = collection.database
+        targets = [(collection, BOOKING_INDEXES), (database[self.sessions_collection_name], SESSION_INDEXES),
+                   (database[self.inventory_collection_name], INVENTORY_INDEXES)]
+        for target, indexes in targets:
+            missing = missing_indexes(await target.index_information(), indexes)
+            if missing:
+                try:
+                    await target.create_indexes([index for index in indexes if index.document["name"] in missing])
+                except Exception as e:
+                    logger.error(f"Could not create indexes on {target.name} ({', '.join(missing)}): {e}")
+                    raise
+                logger.info(f"Created indexes on {target.name}: {', '.join(missing)}")
+
+    async def warm(self, connections: int = MONGODB_WARM_CONNECTIONS) -> bool:
+        """Connect, ensure indexes and open pooled connections ahead of first use."""
+        try:
+            collection = await self.get_collection()
+            # Concurrent pings each check out their own connection, filling the pool
+            await asyncio.gather(*(collection.database.command('ping') for _ in range(connections)))
+            return True
+        except Exception as e:
+            logger.warning(f"MongoDB warm-up failed, will connect on first use: {e}")
+            return False
+
+    async def load_bookings(self) -> list[dict]:
+        """Load all bookings from MongoDB."""
+        try:
+            collection = await self.get_collection()
+            bookings = await collection.find({}, {'_id': 0}).to_list()
+            logger.info(f"Loaded {len(bookings)} bookings from MongoDB")
+            return bookings
+        except Exception as e:
+            logger.error(f"Error loading bookings from MongoDB: {e}")
+            return []
+
+    async def iter_bookings(self, query: Optional[dict] = None, fields: Optional[Sequence[str]] = None,
+                            order: str = "booking_id", after: Optional[Sequence[Any]] = None,
+                            batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[dict]:
+        """Stream bookings in keyset order, one cursor batch in memory at a time."""
+        collection = await self.get_collection()
+        cursor = collection.find(
+            keyset_query(query, order, after),
+            _stream_projection(fields, order),
+            sort=keyset_sort(order),
+            batch_size=batch_size,
+        )
+        async with cursor:
+            async for booking in cursor:
+                yield booking
+
+    async def get_bookings_page(self, query: Optional[dict] = None, limit: int = 50,
+                                order: str = "booking_id", after: Optional[Sequence[Any]] = None,
+                                fields: Optional[Sequence[str]] = None) -> tuple[list[dict], Optional[list[Any]]]:
+        """One page of bookings and the key to pass as `after` for the next page (None at the end)."""
+        try:
+            collection = await self.get_collection()
+            cursor = collection.find(
+                keyset_query(query, order, after),
+                _stream_projection(fields, order),
+                sort=keyset_sort(order),
+                limit=limit,
+            )
+            page = await cursor.to_list()
+            next_after = keyset_after(page[-1], order) if len(page) == limit else None
+            return page, next_after
+        except Exception as e:
+            logger.error(f"Error paging bookings from MongoDB: {e}")
+            return [], None
+
+    async def find_bookings(self, email: Optional[str] = None, mobile_number: Optional[str] = None,
+                            status: Optional[str] = None, limit: int = CUSTOMER_LOOKUP_LIMIT) -> list[dict]:
+        """A customer's bookings, newest first."""
+        query = customer_query(email, mobile_number, status)
+        if not query:
+            return []
+        try:
+            collection = await self.get_collection()
+            cursor = collection.find(query, {'_id': 0}, sort=[("timestamp", DESCENDING)], limit=limit)
+            return await cursor.to_list()
+        except Exception as e:
+            logger.error(f"Error finding bookings in MongoDB: {e}")
+            return []
+
+    async def save_booking(self, booking: dict) -> bool:
+        """Save a single booking to MongoDB."""
+        try:
+            collection = await self.get_collection()
+            if 'timestamp' not in booking:
+                booking['timestamp'] = datetime.now().isoformat()
+
+            # Insert a copy so the caller's dict doesn't pick up an ObjectId
+            result = await collection.insert_one(dict(booking))
+            if self.cache is not None:
+                self.cache.put(booking["booking_id"], booking, result.inserted_id)
+            logger.info(f"Saved booking {booking.get('booking_id')} to MongoDB")
+            return True
+        except DuplicateKeyError:
+            logger.error(f"Booking ID {booking.get('booking_id')} already exists")
+            return False
+        except Exception as e:
+            logger.error(f"Error saving booking to MongoDB: {e}")
+            return False
+
+    async def save_bookings(self, bookings: Iterable[dict], chunk_size: int = BULK_CHUNK_SIZE,
+                            replace: bool = False) -> BulkWriteReport:
+        """Async save_bookings: chunked unordered bulk writes with per-document errors."""
+        collection = await self.get_collection()
+        report = BulkWriteReport()
+        for chunk in _chunks(bookings, chunk_size):
+            docs = _prepare_chunk(chunk, report)
+            if not docs:
+                continue
+            try:
+                if replace:
+                    result = await collection.bulk_write(_replace_requests(docs), ordered=False)
+                else:
+                    result = await collection.insert_many(docs, ordered=False)
+                report.written += _written(result, replace)
+            except BulkWriteError as e:
+                _record_bulk_error(docs, replace, e, report)
+            finally:
+                if replace and self.cache is not None:
+                    for doc in docs:
+                        self.cache.invalidate(doc["booking_id"])
+        logger.info(f"Bulk saved {report.written} bookings ({len(report.duplicates)} duplicates, {len(report.errors)} errors)")
+        return report
+
+    async def update_booking(self, booking_id: str, updates: dict) -> bool:
+        """Update a booking in MongoDB."""
+        try:
+            collection = await self.get_collection()
+            result = await collection.update_one(
+                {"booking_id": booking_id.upper()},
+                {"$set": updates}
+            )
+            if result.matched_count > 0:
+                logger.info(f"Updated booking {booking_id} in MongoDB")
+                return True
+            else:
+                logger.warning(f"Booking {booking_id} not found for update")
+                return False
+        except Exception as e:
+            logger.error(f"Error updating booking in MongoDB: {e}")
+            return False
+        finally:
+            # Also on errors, since a timed-out write may still have been applied
+            if self.cache is not None:
+                self.cache.invalidate(booking_id)
+
+    async def cancel_booking(self, booking_id: str, refund_rate: float = CANCELLATION_REFUND_RATE) -> Optional[dict]:
+        """Cancel a booking in one round trip; returns it as it was before cancelling.
+
+        Returns None if the booking doesn't exist, is already cancelled or on error.
+        """
+        try:
+            collection = await self.get_collection()
+            query, update = _cancellation(booking_id, refund_rate)
+            booking = await collection.find_one_and_update(query, update, {'_id': 0},
+                                                           return_document=ReturnDocument.BEFORE)
+            if booking:
+                logger.info(f"Cancelled booking {booking_id} in MongoDB")
+            return booking
+        except Exception as e:
+            logger.error(f"Error cancelling booking in MongoDB: {e}")
+            return None
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(booking_id)
+
+    async def get_booking(self, booking_id: str, fresh: bool = False) -> Optional[dict]:
+        """Get a single booking by ID, from the cache when possible unless `fresh`."""
+        version = None
+        if self.cache is not None:
+            booking = None if fresh else self.cache.get(booking_id)
+            if booking is not None:
+                return booking
+            version = self.cache.version
+        try:
+            collection = await self.get_collection()
+            booking = await collection.find_one({"booking_id": booking_id.upper()})
+            if booking:
+                doc_id = booking.pop('_id', None)
+                if self.cache is not None:
+                    self.cache.put(booking_id, booking, doc_id, version)
+                logger.info(f"Retrieved booking {booking_id} from MongoDB")
+            else:
+                logger.info(f"Booking {booking_id} not found in MongoDB")
+            return booking
+        except Exception as e:
+            logger.error(f"Error retrieving booking from MongoDB: {e}")
+            return None
+
+    async def delete_booking(self, booking_id: str) -> bool:
+        """Delete a booking from MongoDB."""
+        try:
+            collection = await self.get_collection()
+            result = await collection.delete_one({"booking_id": booking_id.upper()})
+            if result.deleted_count > 0:
+                logger.info(f"Deleted booking {booking_id} from MongoDB")
+                return True
+            else:
+                logger.warning(f"Booking {booking_id} not found for deletion")
+                return False
+        except Exception as e:
+            logger.error(f"Error deleting booking from MongoDB: {e}")
+            return False
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(booking_id)
+
+    async def save_session(self, session_id: str, snapshot: bytes) -> bool:
+        """Replace a session's checkpoint."""
+        try:
+            collection = await self.get_collection()
+            sessions = collection.database[self.sessions_collection_name]
+            await sessions.replace_one(
+                {"_id": session_id},
+                {"snapshot": snapshot, "updated_at": datetime.now(timezone.utc)},
+                upsert=True,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error saving session checkpoint to MongoDB: {e}")
+            return False
+
+    async def load_session(self, session_id: str, max_age: float = SESSION_CHECKPOINT_TTL) -> Optional[bytes]:
+        """A session's checkpoint, unless it is older than max_age seconds."""
+        try:
+            collection = await self.get_collection()
+            sessions = collection.database[self.sessions_collection_name]
+            # The TTL monitor only runs every minute or so, so expiry is checked here too
+            since = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+            doc = await sessions.find_one({"_id": session_id, "updated_at": {"$gte": since}}, {"snapshot": 1})
+            return bytes(doc["snapshot"]) if doc else None
+        except Exception as e:
+            logger.error(f"Error loading session checkpoint from MongoDB: {e}")
+            return None
+
+    async def delete_session(self, session_id: str) -> bool:
+        """Remove a session's checkpoint, once there is nothing left to resume."""
+        try:
+            collection = await self.get_collection()
+            await collection.database[self.sessions_collection_name].delete_one({"_id": session_id})
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting session checkpoint from MongoDB: {e}")
+            return False
+
+    async def _inventory(self):
+        collection = await self.get_collection()
+        return collection.database[self.inventory_collection_name]
+
+    async def reserve_rooms(self, city: str, hotel: str, nights: list[str], rooms: int,
+                            capacity: int) -> Optional[bool]:
+        """Book rooms on every night of a stay in one conditional update of the hotel's document.
+
+        The filter only matches while each night has the rooms free (a night
+        not booked yet has no field), so the $inc applies to all nights or none.
+        """
+        query = {"_id": f"{city}/{hotel}",
+                 **{f"nights.{night}": {"$not": {"$gt": capacity - rooms}} for night in nights}}
+        update = {"$inc": {f"nights.{night}": rooms for night in nights},
+                  "$setOnInsert": {"city": city, "hotel": hotel}}
+        try:
+            inventory = await self._inventory()
+            try:
+                await inventory.update_one(query, update, upsert=True)
+                return True
+            except DuplicateKeyError:
+                # The document exists, so the filter failed on a full night, or another
+                # process created it first; without the upsert only the first is final
+                result = await inventory.update_one(query, update)
+                return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Error reserving rooms in MongoDB: {e}")
+            return None
+
+    async def release_rooms(self, city: str, hotel: str, nights: list[str], rooms: int) -> bool:
+        """Give back rooms on every night of a stay in one update."""
+        try:
+            inventory = await self._inventory()
+            await inventory.update_one({"_id": f"{city}/{hotel}"},
+                                       {"$inc": {f"nights.{night}": -rooms for night in nights}})
+            return True
+        except Exception as e:
+            logger.error(f"Error releasing rooms in MongoDB: {e}")
+            return False
+
+    async def load_room_nights(self, city: str, since: str) -> Optional[dict[str, dict[str, int]]]:
+        """Rooms booked per night from `since` on, per hotel in a city."""
+        try:
+            inventory = await self._inventory()
+            docs = await inventory.find({"city": city}, {"hotel": 1, "nights": 1}).to_list()
+            loaded = {
+                doc["hotel"]: {night: rooms for night, rooms in doc.get("nights", {}).items()
+                               if night >= since and rooms > 0}
+                for doc in docs
+            }
+            return {hotel: nights for hotel, nights in loaded.items() if nights}
+        except Exception as e:
+            logger.error(f"Error loading room inventory from MongoDB: {e}")
+            return None
+
+    async def close(self):
+        """Close the async MongoDB client."""
+        if self._client:
+            await self._client.close()
+            logger.info("Closed async MongoDB connection")
+            self._client = None
+            self._collection = None
+
+def get_booking_repository() -> AsyncBookingRepository:
+    """Get the process-wide async booking repository, creating it if necessary."""
+    global _repository
+    if _repository is None:
+        cache = BookingCache() if BOOKING_CACHE_TTL > 0 else None
+        _repository = AsyncBookingRepository(cache=cache, invalidation=BOOKING_CACHE_INVALIDATION)
+    return _repository
+
 def close_connection():
     """Close MongoDB connection."""
     global _client
@@ -128,5 +816,4 @@ def close_connection():
         _client = None
 
 # Register cleanup function
-import atexit
-atexit.register(close_connection)
\ No newline at end of file
+atexit.register(close_connection)
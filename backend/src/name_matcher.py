@@ -0,0 +1,264 @@
+"""
+Fuzzy and phonetic matching of spoken city and hotel names
+"""
+import logging
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("name_matcher")
+
+# Other names callers use for our destinations, alias -> catalog name
+CITY_ALIASES = {
+    "Bengaluru": "Bangalore",
+    "Bombay": "Mumbai",
+    "Calcutta": "Kolkata",
+    "Madras": "Chennai",
+    "New Delhi": "Delhi",
+    "Dilli": "Delhi",
+    "Simla": "Shimla",
+    "Panaji": "Goa",
+    "Panjim": "Goa",
+    "Kochi": "Kerala",
+    "Cochin": "Kerala",
+    "Trivandrum": "Kerala",
+    "Thiruvananthapuram": "Kerala",
+    "Kovalam": "Kerala",
+    "Alleppey": "Kerala",
+    "Alappuzha": "Kerala",
+    "Munnar": "Kerala",
+}
+
+# Words transcripts add or drop around hotel names
+STOPWORDS = frozenset({"the", "hotel", "and", "a", "an", "of"})
+
+# Score of a match on the phonetic key alone; trigram similarity can only raise it
+PHONETIC_SCORE = 0.8
+# Score of a name that sounds like it contains the query ("trident" in "Trident Nariman Point")
+CONTAINED_SCORE = 0.7
+# resolve() accepts an exact name or alias, or a trigram match scoring at least this that
+# clearly beats the runner-up. Contained matches are only suggested: real cities we don't
+# list sound like ones we do (Kota/Kolkata), and Mangalore is 0.78 from Bangalore on
+# trigrams alone.
+ACCEPT_SCORE = 0.8
+ACCEPT_MARGIN = 0.1
+# A phonetic match is accepted too when no other name sounds the same and the spellings are
+# at least this similar on trigrams, clearly more than the runner-up ("Udaypur" is 0.57 from
+# Udaipur). Gaya sounds like Goa but shares no trigram with it, so it is only suggested.
+PHONETIC_ACCEPT_SCORE = 0.5
+# Lowest score offered back as a "did you mean"
+SUGGEST_SCORE = 0.35
+# Posting entries read per query, rarest trigrams first, and candidates then scored exactly
+CANDIDATE_POSTINGS = 8192
+RESCORED = 64
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+# Spellings that sound alike in Indian English, longest first
+PHONETIC_RULES = [
+    ("ksh", "ks"), ("ph", "f"), ("bh", "b"), ("dh", "d"), ("th", "t"), ("kh", "k"), ("gh", "g"),
+    ("sh", "s"), ("ch", "c"), ("ck", "k"), ("c", "k"), ("q", "k"), ("w", "v"), ("z", "j"), ("x", "ks"),
+]
+PHONETIC_PATTERN = re.compile("|".join(source for source, _ in PHONETIC_RULES))
+PHONETIC_MAP = dict(PHONETIC_RULES)
+SILENT_H = re.compile(r"\Bh")
+INITIAL_VOWELS = re.compile(r"\b[aeiou]+")
+VOWELS = re.compile(r"\B[aeiouy]+")
+REPEATS = re.compile(r"(.)\1+")
+
+
+def normalise(name: str) -> str:
+    """Lowercase words without punctuation or filler words, e.g. "Taj Hotel & Spa" -> "taj spa"."""
+    words = [w for w in NON_ALNUM.split(name.lower()) if w and w not in STOPWORDS]
+    return " ".join(words)
+
+
+def phonetic_key(text: str) -> str:
+    """Consonant skeleton of normalised text, so "udaypur", "udaipur" and "oodaipoor" agree.
+
+    Aspirated and alternative spellings are folded together, an "h" inside a
+    word is dropped, a word's leading vowels become "a", other vowels are
+    dropped and doubled letters collapsed.
+    """
+    text = SILENT_H.sub("", PHONETIC_PATTERN.sub(lambda m: PHONETIC_MAP[m.group()], text))
+    text = VOWELS.sub("", INITIAL_VOWELS.sub("a", text))
+    return REPEATS.sub(r"\1", text).replace(" ", "")
+
+
+def trigrams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a: set, b: set) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+@dataclass
+class Match:
+    name: str
+    score: float
+    # The alias or spelling in the index that matched, if not the name itself
+    matched: Optional[str] = None
+    # What the score came from: "exact", "trigram", "phonetic" or "contained"
+    how: str = "trigram"
+
+
+class NameMatcher:
+    """Ranked fuzzy lookup over a fixed set of names, with optional aliases.
+
+    Each entry is indexed by its character trigrams and by its phonetic key.
+    A query scores entries by trigram Dice similarity, gives phonetic matches
+    at least PHONETIC_SCORE, candidates whose phonetic key contains the
+    query's at least CONTAINED_SCORE and an exact normalised match 1.0.
+    Aliases are indexed like names but resolve to the name they stand for.
+
+    Query cost is bounded rather than growing with the index: candidates
+    are counted from the postings of the query's rarest trigrams only, up to
+    CANDIDATE_POSTINGS entries, so common trigrams ("pal", "ace") are read
+    only when nothing rarer is shared. The RESCORED best candidates then get
+    an exact Dice score from their own trigram rows.
+    """
+
+    def __init__(self, names: Iterable[str], aliases: Optional[dict[str, str]] = None):
+        names = list(dict.fromkeys(names))
+        entries = [(name, name) for name in names]
+        known = set(names)
+        entries += [(alias, target) for alias, target in (aliases or {}).items() if target in known]
+
+        self.names = names
+        name_ids = {name: i for i, name in enumerate(names)}
+        self.spellings: list[str] = [spelling for spelling, _ in entries]
+        self.targets = np.array([name_ids[target] for _, target in entries], dtype=np.int32)
+        self.exact: dict[str, int] = {}
+        self.phonetic: dict[str, list[int]] = {}
+        self.keys: list[str] = []
+        self.gram_ids: dict[str, int] = {}
+        postings: list[list[int]] = []
+        rows: list[int] = []
+        sizes = np.zeros(len(entries), dtype=np.int32)
+        for entry, (spelling, _) in enumerate(entries):
+            text = normalise(spelling)
+            self.exact.setdefault(text, entry)
+            self.keys.append(phonetic_key(text))
+            self.phonetic.setdefault(self.keys[entry], []).append(entry)
+            grams = trigrams(text)
+            sizes[entry] = len(grams)
+            for gram in grams:
+                gram_id = self.gram_ids.setdefault(gram, len(self.gram_ids))
+                if gram_id == len(postings):
+                    postings.append([])
+                postings[gram_id].append(entry)
+                rows.append(gram_id)
+        self.sizes = sizes
+        # Entry i's trigram ids are rows[offsets[i]:offsets[i + 1]]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.rows = np.array(rows, dtype=np.int32)
+        self.postings = [np.array(ids, dtype=np.int32) for ids in postings]
+        logger.debug(f"Indexed {len(entries)} names and aliases, {len(self.gram_ids)} trigrams")
+
+    def __len__(self) -> int:
+        return len(self.spellings)
+
+    def _trigram_scores(self, grams: set, key: str, keep: int) -> dict[int, tuple[float, str]]:
+        """Scores of the best `keep` entries sharing the query's rarest trigrams, and what each came from.
+
+        That's Dice similarity, or CONTAINED_SCORE if higher and the entry's
+        phonetic key contains the query's.
+        """
+        ids = sorted((self.gram_ids[gram] for gram in grams if gram in self.gram_ids),
+                     key=lambda gram_id: len(self.postings[gram_id]))
+        if not ids:
+            return {}
+        read, budget = [], CANDIDATE_POSTINGS
+        for gram_id in ids:
+            if read and len(self.postings[gram_id]) > budget:
+                break
+            read.append(self.postings[gram_id])
+            budget -= len(self.postings[gram_id])
+        candidates, counts = np.unique(np.concatenate(read), return_counts=True)
+        if len(candidates) > RESCORED:
+            candidates = candidates[np.argpartition(-counts, RESCORED)[:RESCORED]]
+
+        # Exact overlap with every query trigram, from the candidates' rows
+        lengths = self.sizes[candidates]
+        ends = np.cumsum(lengths)
+        positions = np.arange(ends[-1]) + np.repeat(self.offsets[candidates] - ends + lengths, lengths)
+        in_query = np.zeros(len(self.gram_ids), dtype=bool)
+        in_query[ids] = True
+        shared = np.add.reduceat(in_query[self.rows[positions]], ends - lengths)
+        dice = 2 * shared / (len(grams) + lengths)
+        contained = np.zeros(len(candidates), dtype=bool)
+        if len(key) > 1:
+            contained = np.array([key in self.keys[entry] for entry in candidates.tolist()]) & (dice < CONTAINED_SCORE)
+            dice = np.where(contained, CONTAINED_SCORE, dice)
+        if len(candidates) > keep:
+            top = np.argpartition(-dice, keep)[:keep]
+            candidates, dice, contained = candidates[top], dice[top], contained[top]
+        return {entry: (score, "contained" if by_key else "trigram")
+                for entry, score, by_key in zip(candidates.tolist(), dice.tolist(), contained.tolist())}
+
+    def match(self, query: str, limit: int = 5) -> list[Match]:
+        """Best matching names, highest score first, each name at most once."""
+        text = normalise(query)
+        if not text:
+            return []
+
+        key = phonetic_key(text)
+        scores = self._trigram_scores(trigrams(text), key, keep=limit * 4)
+        for entry in self.phonetic.get(key, ()):
+            if scores.get(entry, (0.0,))[0] < PHONETIC_SCORE:
+                scores[entry] = (PHONETIC_SCORE, "phonetic")
+        entry = self.exact.get(text)
+        if entry is not None:
+            scores[entry] = (1.0, "exact")
+
+        matches, seen = [], set()
+        for entry, (score, how) in sorted(scores.items(), key=lambda item: -item[1][0]):
+            name = self.names[self.targets[entry]]
+            if name in seen:
+                continue
+            seen.add(name)
+            spelling = self.spellings[entry]
+            matches.append(Match(name, round(score, 3), spelling if spelling != name else None, how))
+            if len(matches) == limit:
+                break
+        return matches
+
+    def resolve(self, query: str) -> Optional[str]:
+        """The name the query means, or None unless it is a name, an alias or a close and unambiguous spelling.
+
+        A close spelling is a trigram match of at least ACCEPT_SCORE, or the
+        only name sounding like the query when their spellings are at least
+        PHONETIC_ACCEPT_SCORE alike; either must beat the runner-up by
+        ACCEPT_MARGIN. Other names that sound alike or contain the query
+        are left to suggest(), for the caller to confirm.
+        """
+        matches = self.match(query, limit=2)
+        if not matches:
+            return None
+        best = matches[0]
+        if best.how == "exact":
+            return best.name
+        if best.how == "trigram":
+            score, floor = best.score, ACCEPT_SCORE
+        elif best.how == "phonetic":
+            text = normalise(query)
+            entries = self.phonetic[phonetic_key(text)]
+            if len({self.targets[entry] for entry in entries}) > 1:
+                return None
+            grams = trigrams(text)
+            score = max(dice(grams, trigrams(normalise(self.spellings[entry]))) for entry in entries)
+            floor = PHONETIC_ACCEPT_SCORE
+        else:
+            return None
+        runner_up = matches[1].score if len(matches) > 1 else 0.0
+        if score < floor or score - runner_up < ACCEPT_MARGIN:
+            return None
+        return best.name
+
+    def suggest(self, query: str, limit: int = 3) -> list[str]:
+        """Names close enough to the query to offer back to the caller."""
+        return [match.name for match in self.match(query, limit) if match.score >= SUGGEST_SCORE]
@@ -0,0 +1,197 @@
+"""
+Date-aware hotel room inventory: atomic reservations in the booking store, and an in-process availability index
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from booking_store import BookingStore
+
+logger = logging.getLogger("room_inventory")
+
+# Rooms a hotel sells per night when hotels.json doesn't give it a "rooms" count
+DEFAULT_HOTEL_ROOMS = int(os.getenv("DEFAULT_HOTEL_ROOMS", "20"))
+GUESTS_PER_ROOM = 2
+# Seconds a city's availability index is used before it is reloaded from the booking store
+ROOM_INVENTORY_REFRESH = float(os.getenv("ROOM_INVENTORY_REFRESH", "10"))
+# Nights from today the index covers; stays further out aren't filtered, only checked on booking
+INDEX_NIGHTS = 400
+# Indexes kept, one per city and catalog version in use
+INDEX_ENTRIES = 64
+
+
+def hotel_rooms(hotel: dict) -> int:
+    """Rooms a hotel sells per night: its "rooms" count, or none if hotels.json marks it unavailable."""
+    if not hotel.get("availability", True):
+        return 0
+    return int(hotel.get("rooms", DEFAULT_HOTEL_ROOMS))
+
+
+def rooms_needed(travelers: int) -> int:
+    return max(1, math.ceil(travelers / GUESTS_PER_ROOM))
+
+
+def stay_nights(check_in: date, check_out: date) -> list[str]:
+    """ISO date of each night from check-in up to, not including, check-out."""
+    return [(check_in + timedelta(days=i)).isoformat() for i in range((check_out - check_in).days)]
+
+
+def booking_stay(booking: dict) -> Optional[tuple[date, date]]:
+    """A booking's check-in and check-out dates, or None if it holds no rooms."""
+    if not booking.get("check_in") or not booking.get("rooms"):
+        return None
+    return date.fromisoformat(booking["check_in"]), date.fromisoformat(booking["check_out"])
+
+
+class CityRooms:
+    """Rooms booked per night for one city's hotels, as a hotels x nights matrix.
+
+    Row i is the catalog's i-th hotel in the city and column j the night
+    first_night + j, so the hotels with rooms free for a stay are one slice,
+    a max along the nights and a compare, returned as a bitset over catalog
+    positions like the catalog's own filters.
+    """
+
+    def __init__(self, hotels: Sequence[dict], booked: dict[str, dict[str, int]], first_night: date,
+                 nights: int = INDEX_NIGHTS):
+        self.first_night = first_night
+        self.loaded_at = time.monotonic()
+        self.rows = {hotel["name"]: row for row, hotel in enumerate(hotels)}
+        self.capacity = np.array([hotel_rooms(hotel) for hotel in hotels], dtype=np.int32)
+        self.booked = np.zeros((len(self.rows), nights), dtype=np.int32)
+        for name, counts in booked.items():
+            row = self.rows.get(name)
+            if row is None:
+                continue  # no longer in the catalog
+            for night, rooms in counts.items():
+                column = (date.fromisoformat(night) - first_night).days
+                if 0 <= column < nights:
+                    self.booked[row, column] = rooms
+
+    def _columns(self, check_in: date, check_out: date) -> tuple[int, int]:
+        nights = self.booked.shape[1]
+        start = min(max((check_in - self.first_night).days, 0), nights)
+        end = min(max((check_out - self.first_night).days, 0), nights)
+        return start, end
+
+    def add(self, hotel: str, check_in: date, check_out: date, rooms: int):
+        """Count rooms booked (or released, when negative) by this process since the load."""
+        row = self.rows.get(hotel)
+        if row is not None:
+            start, end = self._columns(check_in, check_out)
+            self.booked[row, start:end] = np.maximum(self.booked[row, start:end] + rooms, 0)
+
+    def free_bits(self, check_in: date, check_out: date, rooms: int) -> int:
+        """Bitset of the hotels with `rooms` rooms free on every night of the stay."""
+        start, end = self._columns(check_in, check_out)
+        peak = self.booked[:, start:end].max(axis=1) if end > start else 0
+        free = self.capacity - peak >= rooms
+        return int.from_bytes(np.packbits(free, bitorder="little").tobytes(), "little")
+
+
+class RoomInventory:
+    """Hotel rooms per night, held and released against the booking store.
+
+    reserve() books rooms on every night of a stay in one atomic store
+    operation that only succeeds if each night has them free, so concurrent
+    bookings for the last room can't both win, from this process or another.
+    release() gives them back on cancellation.
+
+    free_hotels() answers "which hotels have rooms for these dates" for the
+    shortlist from a per-city CityRooms index, loaded with one store query
+    per city and reused for `refresh` seconds. It follows this process's own
+    reservations at once and other processes' at the next load, so it may
+    briefly offer a hotel that has just sold out; reserve() has the final say.
+    """
+
+    def __init__(self, store: Callable[[], "BookingStore"], refresh: float = ROOM_INVENTORY_REFRESH):
+        self.store = store
+        self.refresh = refresh
+        # (catalog, city) -> CityRooms, least recently loaded first
+        self._index: OrderedDict[tuple[object, str], CityRooms] = OrderedDict()
+        self._loading: dict[tuple[object, str], asyncio.Future] = {}
+
+    def free_hotels(self, catalog, city: str, check_in: date, check_out: date, rooms: int) -> Optional[int]:
+        """Bitset of the city's hotels (catalog positions) with rooms free, or None before its index loads."""
+        index = self._index.get((catalog, city))
+        return index.free_bits(check_in, check_out, rooms) if index is not None else None
+
+    def _fresh(self, key) -> bool:
+        index = self._index.get(key)
+        return index is not None and time.monotonic() - index.loaded_at < self.refresh
+
+    def prefetch(self, catalog, city: str):
+        """Start loading a city's index in the background if it is missing or stale."""
+        key = (catalog, city)
+        if self._fresh(key) or key in self._loading:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self._load(catalog, city))
+        except RuntimeError:
+            return  # no event loop: load() fetches it when awaited
+        self._loading[key] = task
+        task.add_done_callback(lambda _: self._loading.pop(key, None))
+
+    async def load(self, catalog, city: str):
+        """Make sure a city's index is at most `refresh` seconds old; concurrent callers share one query."""
+        self.prefetch(catalog, city)
+        task = self._loading.get((catalog, city))
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def _load(self, catalog, city: str):
+        first_night = date.today()
+        try:
+            booked = await self.store().load_room_nights(city, first_night.isoformat())
+        except Exception as e:
+            logger.error(f"Error loading room inventory for {city}: {e}")
+            return
+        if booked is None:
+            return  # logged by the store; the previous index, if any, stays in use
+        key = (catalog, city)
+        self._index[key] = CityRooms(catalog.hotels(city), booked, first_night)
+        self._index.move_to_end(key)
+        while len(self._index) > INDEX_ENTRIES:
+            self._index.popitem(last=False)
+
+    def _count(self, city: str, hotel: str, check_in: date, check_out: date, rooms: int):
+        for (_, indexed_city), index in self._index.items():
+            if indexed_city == city:
+                index.add(hotel, check_in, check_out, rooms)
+
+    async def reserve(self, city: str, hotel: dict, check_in: date, check_out: date, rooms: int) -> Optional[bool]:
+        """Hold rooms for every night of a stay: True if held, False if a night is full, None on a store error."""
+        capacity = hotel_rooms(hotel)
+        if rooms > capacity:
+            return False
+        held = await self.store().reserve_rooms(city, hotel["name"], stay_nights(check_in, check_out), rooms, capacity)
+        if held:
+            self._count(city, hotel["name"], check_in, check_out, rooms)
+        return held
+
+    async def release(self, city: str, hotel: str, check_in: date, check_out: date, rooms: int) -> bool:
+        """Give back rooms held for a stay."""
+        released = await self.store().release_rooms(city, hotel, stay_nights(check_in, check_out), rooms)
+        if released:
+            self._count(city, hotel, check_in, check_out, -rooms)
+        return released
+
+    async def release_booking(self, booking: dict) -> bool:
+        """Give back the rooms a booking holds; True if it held none."""
+        stay = booking_stay(booking)
+        if stay is None:
+            return True
+        released = await self.release(booking["destination"], booking["hotel_name"], *stay, booking["rooms"])
+        if not released:
+            logger.error(f"Rooms for booking {booking.get('booking_id')} were not released: "
+                         f"{booking['hotel_name']}, {booking['rooms']} from {booking['check_in']}")
+        return released
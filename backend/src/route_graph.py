@@ -0,0 +1,130 @@
+"""
+Route graph over the city distance table
+"""
+import logging
+import math
+from typing import Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger("route_graph")
+
+# Suggested mode for a single leg, by the first threshold the leg fits under (km)
+LEG_MODES = [
+    (600, "private_car"),
+    (1000, "train"),
+    (float("inf"), "plane"),
+]
+
+Number = Union[int, float]
+
+
+def as_number(value: float) -> Number:
+    """Keep whole-kilometre distances as ints, as in the distance table."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def suggest_leg_mode(distance: float) -> str:
+    """Suggested travel mode for a leg of the given length."""
+    for limit, mode in LEG_MODES:
+        if distance <= limit:
+            return mode
+    return LEG_MODES[-1][1]
+
+
+class RouteGraph:
+    """All-pairs route lookups over an undirected city distance table.
+
+    Shortest paths are precomputed once with a vectorised Floyd-Warshall into
+    dense matrices indexed by city id, so distance queries are O(1) and route
+    reconstruction is O(legs). Pairs listed in the table keep their direct
+    distance (a direct trip is what gets booked, even where a detour through
+    another city happens to be shorter); every other connected pair gets its
+    shortest multi-leg distance.
+    """
+
+    def __init__(self, distances: dict[tuple[str, str], Number]):
+        cities = sorted({city for pair in distances for city in pair})
+        self.cities: list[str] = cities
+        self.index: dict[str, int] = {city: i for i, city in enumerate(cities)}
+
+        n = len(cities)
+        direct = np.full((n, n), np.inf)
+        np.fill_diagonal(direct, 0.0)
+        for (a, b), km in distances.items():
+            i, j = self.index[a], self.index[b]
+            direct[i, j] = direct[j, i] = min(direct[i, j], km)
+
+        shortest = direct.copy()
+        # next_hop[i, j] is the city after i on the shortest path from i to j
+        next_hop = np.tile(np.arange(n), (n, 1))
+        next_hop[~np.isfinite(direct)] = -1
+        through_k = np.empty_like(shortest)
+        shorter = np.empty((n, n), dtype=bool)
+        for k in range(n):
+            np.add(shortest[:, k, None], shortest[None, k, :], out=through_k)
+            np.less(through_k, shortest, out=shorter)
+            np.copyto(shortest, through_k, where=shorter)
+            np.copyto(next_hop, np.broadcast_to(next_hop[:, k, None], (n, n)), where=shorter)
+
+        self.direct = direct
+        self.next_hop = next_hop
+        # Quoted trip distance: direct where listed, otherwise shortest path
+        self.trip = np.where(np.isfinite(direct), direct, shortest)
+        logger.info(f"Built route graph: {n} cities, {len(distances)} direct connections")
+
+    @classmethod
+    def from_matrices(cls, cities: list[str], direct: np.ndarray, trip: np.ndarray,
+                      next_hop: np.ndarray) -> "RouteGraph":
+        """A graph over precomputed matrices, e.g. views into a compiled catalog."""
+        graph = cls.__new__(cls)
+        graph.cities = list(cities)
+        graph.index = {city: i for i, city in enumerate(graph.cities)}
+        graph.direct = direct
+        graph.trip = trip
+        graph.next_hop = next_hop
+        return graph
+
+    def __contains__(self, city: str) -> bool:
+        return city in self.index
+
+    def distance(self, origin: str, destination: str) -> Optional[Number]:
+        """Trip distance in km, or None if either city is unknown or unreachable."""
+        i, j = self.index.get(origin), self.index.get(destination)
+        if i is None or j is None:
+            return None
+        km = float(self.trip[i, j])
+        return as_number(km) if math.isfinite(km) else None
+
+    def distance_via(self, origin: str, hub: str, destination: str) -> Optional[Number]:
+        """Distance travelling origin -> hub -> destination."""
+        first = self.distance(origin, hub)
+        second = self.distance(hub, destination)
+        if first is None or second is None:
+            return None
+        return first + second
+
+    def path(self, origin: str, destination: str) -> list[str]:
+        """Cities visited from origin to destination, both included ([] if unreachable)."""
+        if self.distance(origin, destination) is None:
+            return []
+        i, j = self.index[origin], self.index[destination]
+        if i == j:
+            return [origin]
+        if math.isfinite(self.direct[i, j]):
+            return [origin, destination]
+        path = [origin]
+        while i != j:
+            i = int(self.next_hop[i, j])
+            path.append(self.cities[i])
+        return path
+
+    def legs(self, origin: str, destination: str) -> list[dict]:
+        """Route as legs with distance and a suggested mode each."""
+        path = self.path(origin, destination)
+        legs = []
+        for a, b in zip(path, path[1:]):
+            km = as_number(self.direct[self.index[a], self.index[b]])
+            legs.append({"from": a, "to": b, "distance_km": km, "mode": suggest_leg_mode(km)})
+        return legs
@@ -0,0 +1,156 @@
+"""
+Per-session travel state, compact binary snapshots of it and checkpointing to the booking store
+"""
+import asyncio
+import logging
+import marshal
+import os
+from dataclasses import dataclass, fields
+from typing import Optional
+
+logger = logging.getLogger("session_state")
+
+# Seconds entrypoint waits for a room's checkpoint before starting the call afresh
+SESSION_RESTORE_TIMEOUT = float(os.getenv("SESSION_RESTORE_TIMEOUT", "1.5"))
+
+# Bumped whenever TravelState's fields change; snapshots in another format are ignored
+SNAPSHOT_VERSION = 1
+MARSHAL_VERSION = 4
+# Pending write that deletes the checkpoint; encode_state never returns empty bytes
+DELETED = b""
+# AgentSession close reasons that end the call for good; after "job_shutdown" or an error it may resume
+FINISHED_REASONS = ("participant_disconnected", "user_initiated", "task_completed")
+
+
+@dataclass(slots=True)
+class TravelState:
+    """Tracks the current travel planning context.
+
+    Plain values only, so a snapshot is a couple of hundred bytes: the hotel
+    is kept by its catalog key (the name, unique within a city) and looked up
+    in the session's catalog when needed.
+    """
+    origin: str | None = None
+    destination: str | None = None
+    travel_dates: str | None = None
+    num_adults: int = 0
+    num_children: int = 0
+    budget: str | None = None
+    # None until asked; () when the caller has no preference
+    amenities: tuple[str, ...] | None = None
+    selected_mode: str | None = None
+    hotel_name: str | None = None
+    # The fare select_travel_mode told the caller, reused by confirm_booking
+    selected_quote: dict | None = None
+    booking_id: str | None = None
+    customer_name: str | None = None
+    mobile_number: str | None = None
+    email: str | None = None
+
+
+FIELDS = [field.name for field in fields(TravelState)]
+# Types a decoded snapshot is checked against, field by field
+FIELD_TYPES = {name: (str, type(None)) for name in FIELDS}
+FIELD_TYPES.update(num_adults=(int,), num_children=(int,), amenities=(tuple, type(None)),
+                   selected_quote=(dict, type(None)))
+
+
+def session_key(room_sid: str, participant_identity: str) -> str:
+    """Checkpoint key for one caller in one room instance.
+
+    Room names are reused, so the key is the room's SID, which is new each
+    time a room is created, plus the caller's identity, which a reconnecting
+    client keeps. A new call never finds another caller's checkpoint.
+    """
+    return f"{room_sid}/{participant_identity}"
+
+
+def encode_state(state: TravelState) -> bytes:
+    """Snapshot of the state as marshal bytes of (version, field values in declaration order)."""
+    return marshal.dumps((SNAPSHOT_VERSION, tuple(getattr(state, name) for name in FIELDS)), MARSHAL_VERSION)
+
+
+def decode_state(snapshot: bytes) -> Optional[TravelState]:
+    """The state in a snapshot, or None if it is unreadable or from another snapshot version."""
+    try:
+        version, values = marshal.loads(snapshot)
+    except (EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Unreadable session snapshot: {e}")
+        return None
+    if version != SNAPSHOT_VERSION or not isinstance(values, tuple) or len(values) != len(FIELDS):
+        logger.warning(f"Ignoring session snapshot version {version}")
+        return None
+    for name, value in zip(FIELDS, values):
+        if not isinstance(value, FIELD_TYPES[name]):
+            logger.warning(f"Ignoring session snapshot with a bad {name}")
+            return None
+    return TravelState(*values)
+
+
+class SessionCheckpointer:
+    """Keeps a session's latest state in the booking store, keyed by session_key().
+
+    checkpoint() is called after every batch of tool calls and returns at
+    once. Unchanged state isn't written, and changes made while a write is in
+    flight are written together when it finishes, so tools never wait on
+    storage and a burst of calls costs at most two writes. A failed write is
+    retried by the next checkpoint. The checkpoint is deleted once the
+    booking is confirmed (it is in the store by then) or the call ends
+    normally, so only a job restarted mid-call restores it.
+    """
+
+    def __init__(self, store, session_id: str, restore_timeout: float = SESSION_RESTORE_TIMEOUT):
+        self.store = store
+        self.session_id = session_id
+        self.restore_timeout = restore_timeout
+        self._written: Optional[bytes] = None
+        self._pending: Optional[bytes] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def restore(self) -> Optional[TravelState]:
+        """The state last checkpointed for this session, or None to start afresh."""
+        try:
+            snapshot = await asyncio.wait_for(self.store.load_session(self.session_id), self.restore_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out loading checkpoint for session {self.session_id}")
+            return None
+        state = decode_state(snapshot) if snapshot is not None else None
+        if state is not None:
+            self._written = snapshot
+            logger.info(f"Restored session {self.session_id} from its checkpoint")
+        return state
+
+    def checkpoint(self, state: TravelState):
+        self._queue(DELETED if state.booking_id else encode_state(state))
+
+    def discard(self):
+        """Delete the checkpoint, in the background."""
+        self._queue(DELETED)
+
+    def _queue(self, snapshot: bytes):
+        if snapshot == (self._pending if self._pending is not None else self._written):
+            return
+        self._pending = snapshot
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._write())
+
+    async def _write(self):
+        while self._pending is not None:
+            snapshot, self._pending = self._pending, None
+            if snapshot == DELETED:
+                done = await self.store.delete_session(self.session_id)
+            else:
+                done = await self.store.save_session(self.session_id, snapshot)
+            if done:
+                self._written = snapshot
+
+    async def flush(self):
+        """Wait for checkpoints still being written."""
+        if self._task is not None:
+            await self._task
+
+    def watch(self, session, userdata):
+        """Checkpoint userdata.travel_state after each batch of tool calls, and discard it when the call ends."""
+        session.on("function_tools_executed", lambda _: self.checkpoint(userdata.travel_state))
+        session.on("close", lambda event: self.discard()
+                   if event.error is None and event.reason in FINISHED_REASONS else None)
@@ -0,0 +1,75 @@
+"""
+Static travel data: modes and the city distance table
+"""
+
+# Travel modes data
+TRAVEL_MODES = {
+    "bus": {"cost_per_km": 2, "speed_kmh": 50, "description": "Comfortable bus service with AC"},
+    "train": {"cost_per_km": 1.5, "speed_kmh": 60, "description": "Railway service with various classes"},
+    "plane": {"cost_per_km": 5, "speed_kmh": 500, "description": "Air travel for long distances"},
+    "private_car": {"cost_per_km": 10, "speed_kmh": 40, "description": "Private vehicle for short distances"}
+}
+
+# Sample distances from major cities (in km)
+DISTANCES = {
+    # Delhi connections
+    ("Delhi", "Mumbai"): 1400,
+    ("Delhi", "Goa"): 1800,
+    ("Delhi", "Jaipur"): 280,
+    ("Delhi", "Bangalore"): 2150,
+    ("Delhi", "Kerala"): 2700,
+    ("Delhi", "Kolkata"): 1500,
+    ("Delhi", "Hyderabad"): 1550,
+    ("Delhi", "Udaipur"): 660,
+    ("Delhi", "Agra"): 230,
+    ("Delhi", "Chennai"): 2200,
+    ("Delhi", "Shimla"): 350,
+    ("Delhi", "Manali"): 540,
+    # Mumbai connections
+    ("Mumbai", "Goa"): 580,
+    ("Mumbai", "Jaipur"): 1200,
+    ("Mumbai", "Bangalore"): 980,
+    ("Mumbai", "Kerala"): 1300,
+    ("Mumbai", "Kolkata"): 2000,
+    ("Mumbai", "Hyderabad"): 710,
+    ("Mumbai", "Udaipur"): 650,
+    ("Mumbai", "Agra"): 1200,
+    ("Mumbai", "Chennai"): 1330,
+    ("Mumbai", "Shimla"): 1700,
+    ("Mumbai", "Manali"): 1900,
+    # Goa connections
+    ("Goa", "Jaipur"): 1600,
+    ("Goa", "Bangalore"): 560,
+    ("Goa", "Kerala"): 600,
+    ("Goa", "Kolkata"): 1900,
+    ("Goa", "Hyderabad"): 660,
+    ("Goa", "Chennai"): 900,
+    # Bangalore connections
+    ("Bangalore", "Kerala"): 550,
+    ("Bangalore", "Kolkata"): 1870,
+    ("Bangalore", "Hyderabad"): 570,
+    ("Bangalore", "Chennai"): 350,
+    ("Bangalore", "Jaipur"): 1900,
+    # Kerala connections
+    ("Kerala", "Chennai"): 700,
+    ("Kerala", "Hyderabad"): 1000,
+    ("Kerala", "Kolkata"): 2100,
+    # Kolkata connections
+    ("Kolkata", "Hyderabad"): 1500,
+    ("Kolkata", "Chennai"): 1670,
+    ("Kolkata", "Jaipur"): 1500,
+    # Hyderabad connections
+    ("Hyderabad", "Chennai"): 630,
+    ("Hyderabad", "Jaipur"): 1400,
+    ("Hyderabad", "Udaipur"): 1100,
+    # Udaipur connections
+    ("Udaipur", "Jaipur"): 400,
+    ("Udaipur", "Agra"): 630,
+    # Agra connections
+    ("Agra", "Jaipur"): 240,
+    # Shimla connections
+    ("Shimla", "Manali"): 250,
+    ("Shimla", "Jaipur"): 600,
+    # Chennai connections
+    ("Chennai", "Jaipur"): 2000
+}
@@ -0,0 +1,205 @@
+"""
+Per-session travel quotes and hotel shortlist, computed ahead of the tools that read them
+"""
+import asyncio
+import contextlib
+import logging
+import re
+from collections.abc import Hashable
+from datetime import date
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("trip_quotes")
+
+# Hotel nights when the travel dates can't be read
+DEFAULT_NIGHTS = 3
+MAX_NIGHTS = 60
+SHORTLIST_SIZE = 3
+
+MONTHS = {name: m for m, names in enumerate([
+    ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+    ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"),
+    ("nov", "november"), ("dec", "december"),
+], start=1) for name in names}
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+DATE_TOKEN = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\b|\b([a-z]+)\b")
+
+
+def _add_months(year: int, month: int, months: int):
+    month += months
+    return year + (month - 1) // 12, (month - 1) % 12 + 1
+
+
+def trip_dates(dates: Optional[str], today: Optional[date] = None) -> Optional[tuple[date, date]]:
+    """Check-in and check-out dates from free-text travel dates, or None if they can't be read.
+
+    Understands ISO dates ("2025-12-12 to 2025-12-18") and day/month text such
+    as "12-18 Dec", "12th to 18th December", "Dec 28 - Jan 3" or "28 Dec to
+    3rd Jan". A range that ends before it starts rolls over to the next month,
+    and a day/month range that has already passed this year is next year's.
+    """
+    if not dates:
+        return None
+    iso = ISO_DATE.findall(dates)
+    try:
+        if len(iso) >= 2:
+            start, end = (date(int(y), int(m), int(d)) for y, m, d in iso[:2])
+        else:
+            days, months = [], []
+            for day, word in DATE_TOKEN.findall(dates.lower()):
+                if day and 1 <= int(day) <= 31:
+                    days.append(int(day))
+                elif word in MONTHS:
+                    months.append(MONTHS[word])
+            if len(days) < 2 or not months:
+                return None
+            today = today or date.today()
+            start_month = months[0]
+            # "Dec 28 - Jan 3" and "28 Dec to 3rd Jan" name both months; "12-18 Dec" only the last
+            end_month = months[1] if len(months) > 1 else start_month
+            start_year = today.year
+            end_year, end_month = _add_months(start_year, end_month, 12 if end_month < start_month else 0)
+            if len(months) == 1 and days[1] < days[0]:
+                # "28-3 Jan": the start is in the month before
+                start_year, start_month = _add_months(start_year, start_month, -1)
+            start, end = date(start_year, start_month, days[0]), date(end_year, end_month, days[1])
+            if end < today:
+                start, end = date(start.year + 1, start.month, start.day), date(end.year + 1, end.month, end.day)
+    except ValueError:
+        return None
+    nights = (end - start).days
+    return (start, end) if 0 < nights <= MAX_NIGHTS else None
+
+
+def trip_nights(dates: Optional[str], today: Optional[date] = None) -> Optional[int]:
+    """Nights between the first and last day in free-text travel dates, or None if they can't be read."""
+    stay = trip_dates(dates, today)
+    return (stay[1] - stay[0]).days if stay else None
+
+
+class Speculation:
+    """A value computed in the background from its inputs, and recomputed when they change.
+
+    refresh(key) starts computing for new inputs (cancelling work for old
+    ones) without waiting; get(key) returns the value for those inputs,
+    awaiting the background task if it is still running and computing inline
+    if there is none or it failed.
+    """
+
+    def __init__(self, compute: Callable[[Hashable], Any]):
+        self.compute = compute
+        self.key = None
+        self._task: Optional[asyncio.Future] = None
+
+    def refresh(self, key: Hashable):
+        if self._task is not None and key == self.key:
+            return
+        if self._task is not None:
+            self._task.cancel()
+        self.key, self._task = key, None
+        if key is None:
+            return
+        # Without a running event loop, get() computes on demand
+        with contextlib.suppress(RuntimeError):
+            self._task = asyncio.get_running_loop().create_task(self._run(key))
+
+    async def _run(self, key):
+        # Let the tool that changed the inputs return first
+        await asyncio.sleep(0)
+        return self.compute(key)
+
+    async def get(self, key: Hashable):
+        task = self._task
+        if task is not None and key == self.key:
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # the caller was cancelled, not the computation
+            except Exception as e:
+                logger.error(f"Background computation failed, retrying inline: {e}")
+        value = self.compute(key)
+        # Keep it for the next reader with the same inputs
+        self.key, self._task = key, asyncio.get_running_loop().create_future()
+        self._task.set_result(value)
+        return value
+
+
+class TripQuotes:
+    """Fares for every travel mode and the hotel shortlist for one session.
+
+    refresh(state) is called whenever trip details change; select_travel_mode,
+    suggest_hotels and confirm_booking then read results that are usually
+    ready. Each is keyed on just the details it depends on, so changing the
+    budget doesn't requote fares and changing the origin keeps the shortlist.
+    With a RoomInventory and readable dates, the shortlist only has hotels
+    with rooms free for the stay, and is redone when that set changes.
+    """
+
+    def __init__(self, catalog, fare_table: Callable, route_graph: Callable, inventory=None):
+        self.catalog = catalog
+        self.fare_table = fare_table
+        self.route_graph = route_graph
+        self.inventory = inventory
+        self._fares = Speculation(self._compute_fares)
+        self._shortlist = Speculation(self._compute_shortlist)
+
+    @staticmethod
+    def fares_key(state):
+        travelers = state.num_adults + state.num_children
+        if not state.origin or not state.destination:
+            return None
+        return state.origin, state.destination, travelers
+
+    def _stay(self, state) -> Optional[tuple[date, date]]:
+        if self.inventory is None or not state.destination:
+            return None
+        return trip_dates(state.travel_dates)
+
+    def shortlist_key(self, state):
+        if not state.destination:
+            return None
+        free = None
+        stay = self._stay(state)
+        if stay:
+            from room_inventory import rooms_needed
+            travelers = state.num_adults + state.num_children
+            free = self.inventory.free_hotels(self.catalog, state.destination, *stay, rooms_needed(travelers))
+        return state.destination, state.budget, state.amenities or None, free
+
+    def refresh(self, state):
+        self._fares.refresh(self.fares_key(state))
+        if self._stay(state):
+            self.inventory.prefetch(self.catalog, state.destination)
+        self._shortlist.refresh(self.shortlist_key(state))
+
+    async def fares(self, state) -> Optional[dict]:
+        """{"route": [cities], "quotes": {mode: quote}}, or None without a route between the cities."""
+        key = self.fares_key(state)
+        return None if key is None else await self._fares.get(key)
+
+    async def shortlist(self, state) -> list[dict]:
+        if self._stay(state):
+            await self.inventory.load(self.catalog, state.destination)
+        key = self.shortlist_key(state)
+        return [] if key is None else await self._shortlist.get(key)
+
+    def _compute_fares(self, key) -> Optional[dict]:
+        origin, destination, travelers = key
+        routes, fares = self.route_graph(), self.fare_table()
+        if routes.distance(origin, destination) is None:
+            return None
+        quotes = {}
+        for mode in fares.modes:
+            quote = fares.quote(origin, destination, mode, travelers)
+            # The inputs go with the quote, so a stored quote can be checked against the current trip
+            quotes[mode] = {**quote, "origin": origin, "destination": destination, "travelers": travelers}
+        return {"route": routes.path(origin, destination), "quotes": quotes}
+
+    def _compute_shortlist(self, key) -> list[dict]:
+        destination, budget, amenities, free = key
+        hotels = self.catalog.find_hotels(destination, budget=budget, amenities=list(amenities) if amenities else None,
+                                          limit=SHORTLIST_SIZE, within=free)
+        # Nothing matches the preferences: the first few hotels, with rooms if the dates are known
+        return list(hotels or self.catalog.find_hotels(destination, limit=SHORTLIST_SIZE, available_only=False,
+                                                       within=free))
@@ -0,0 +1,87 @@
+"""
+Staged process warm-up with per-stage timing and fallback
+"""
+import logging
+import os
+import time
+from collections.abc import Awaitable
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("warmup")
+
+# Seconds prewarm waits for its stages; stays under the worker's process initialize timeout
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "8"))
+
+
+@dataclass
+class StageResult:
+    name: str
+    ok: bool
+    elapsed_ms: float
+    value: Any = None
+    error: Optional[str] = None
+
+
+def _timed(name: str, run: Callable[[], Any]) -> StageResult:
+    start = time.perf_counter()
+    try:
+        value = run()
+    except Exception as e:
+        return StageResult(name, False, (time.perf_counter() - start) * 1000, error=str(e))
+    return StageResult(name, True, (time.perf_counter() - start) * 1000, value)
+
+
+def _log(result: StageResult):
+    if result.ok:
+        logger.info(f"Warm-up stage {result.name} ready in {result.elapsed_ms:.1f} ms")
+    else:
+        logger.warning(f"Warm-up stage {result.name} failed after {result.elapsed_ms:.1f} ms, "
+                       f"falling back to lazy loading: {result.error}")
+
+
+def run_stages(stages: dict[str, Callable[[], Any]], timeout: float = WARMUP_TIMEOUT) -> dict[str, StageResult]:
+    """Run named warm-up stages in parallel threads and return their results.
+
+    Model loads and index builds spend most of their time in native code or
+    I/O, so running them side by side shortens warm-up to roughly the slowest
+    stage. A stage that raises is logged and reported as failed, leaving its
+    dependency to load lazily on first use; stages still running after
+    `timeout` are reported as failed and left to finish in the background.
+    """
+    start = time.perf_counter()
+    results: dict[str, StageResult] = {}
+    pool = ThreadPoolExecutor(max_workers=max(len(stages), 1), thread_name_prefix="warmup")
+    futures = {name: pool.submit(_timed, name, run) for name, run in stages.items()}
+    wait(futures.values(), timeout=timeout)
+    pool.shutdown(wait=False)
+
+    for name, future in futures.items():
+        if future.done():
+            result = future.result()
+        else:
+            result = StageResult(name, False, timeout * 1000, error=f"timed out after {timeout:.1f}s")
+        results[name] = result
+        _log(result)
+
+    logger.info(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.1f} ms "
+                f"({sum(r.ok for r in results.values())}/{len(results)} stages ready)")
+    return results
+
+
+async def run_async_stage(name: str, run: Callable[[], Awaitable[Any]]) -> StageResult:
+    """Time and log a warm-up step that needs the job's event loop.
+
+    Async stages report failure through the result (a falsy return value or an
+    exception) and never raise, so they can run as fire-and-forget tasks.
+    """
+    start = time.perf_counter()
+    try:
+        value = await run()
+        result = StageResult(name, bool(value), (time.perf_counter() - start) * 1000, value,
+                             None if value else "returned no result")
+    except Exception as e:
+        result = StageResult(name, False, (time.perf_counter() - start) * 1000, error=str(e))
+    _log(result)
+    return result
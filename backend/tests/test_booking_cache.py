@@ -0,0 +1,184 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from booking_cache import BookingCache, ChangeStreamInvalidator
+from mongodb_utils import AsyncBookingRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCollection:
+    """Just enough of an AsyncCollection for the repository's booking calls."""
+
+    def __init__(self):
+        self.docs = {}
+        self.find_calls = 0
+        self.events = asyncio.Queue()
+
+    async def insert_one(self, doc):
+        doc_id = f"oid-{len(self.docs)}"
+        self.docs[doc["booking_id"]] = {"_id": doc_id, **doc}
+        return SimpleNamespace(inserted_id=doc_id)
+
+    async def find_one(self, query):
+        self.find_calls += 1
+        doc = self.docs.get(query["booking_id"])
+        return dict(doc) if doc else None
+
+    async def update_one(self, query, update):
+        doc = self.docs.get(query["booking_id"])
+        if doc:
+            doc.update(update["$set"])
+        return SimpleNamespace(matched_count=1 if doc else 0)
+
+    async def delete_one(self, query):
+        return SimpleNamespace(deleted_count=1 if self.docs.pop(query["booking_id"], None) else 0)
+
+    def external_update(self, booking_id, **fields):
+        """A write from another process, seen here only through the change stream."""
+        self.docs[booking_id].update(fields)
+        self.events.put_nowait({"operationType": "update", "documentKey": {"_id": self.docs[booking_id]["_id"]}})
+
+    async def watch(self, pipeline):
+        return FakeStream(self.events)
+
+
+class FakeStream:
+    def __init__(self, events):
+        self.events = events
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.events.get()
+
+
+def cached_repository(collection, **kwargs):
+    repository = AsyncBookingRepository(cache=BookingCache(**kwargs), invalidation="changestream")
+    repository._collection = collection
+    return repository
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = BookingCache(max_entries=2, ttl=60)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("A")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("b") is None
+    assert cache.stats["evictions"] == 1
+
+
+def test_entries_expire_after_ttl() -> None:
+    clock = FakeClock()
+    cache = BookingCache(ttl=30, clock=clock)
+    cache.put("abc", {"status": "confirmed"})
+
+    clock.now = 29
+    assert cache.get("ABC") == {"status": "confirmed"}
+    clock.now = 30
+    assert cache.get("ABC") is None
+    assert len(cache) == 0
+
+
+def test_cached_entries_are_isolated_from_callers() -> None:
+    cache = BookingCache()
+    booking = {"hotel": {"name": "Taj"}}
+    cache.put("abc", booking)
+    booking["hotel"]["name"] = "changed"
+    cache.get("abc")["hotel"]["name"] = "changed again"
+
+    assert cache.get("abc") == {"hotel": {"name": "Taj"}}
+
+
+def test_fill_racing_an_invalidation_is_dropped() -> None:
+    cache = BookingCache()
+    version = cache.version
+    cache.invalidate("abc")
+
+    cache.put("abc", {"status": "stale"}, version=version)
+
+    assert cache.get("abc") is None
+
+
+@pytest.mark.asyncio
+async def test_read_through_and_write_invalidation() -> None:
+    collection = FakeCollection()
+    bookings = cached_repository(collection)
+
+    assert await bookings.save_booking({"booking_id": "ABCD1234", "status": "confirmed"})
+    assert (await bookings.get_booking("abcd1234"))["status"] == "confirmed"
+    assert collection.find_calls == 0
+
+    assert await bookings.update_booking("abcd1234", {"status": "cancelled"})
+    assert (await bookings.get_booking("ABCD1234"))["status"] == "cancelled"
+    assert (await bookings.get_booking("ABCD1234"))["status"] == "cancelled"
+    assert collection.find_calls == 1
+    assert "_id" not in await bookings.get_booking("ABCD1234")
+
+    assert await bookings.delete_booking("abcd1234")
+    assert await bookings.get_booking("abcd1234") is None
+    assert bookings.cache.stats["hits"] == 3
+    assert bookings.cache.stats["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_change_stream_invalidates_writes_from_other_processes() -> None:
+    collection = FakeCollection()
+    bookings = cached_repository(collection)
+    await bookings.save_booking({"booking_id": "ABCD1234", "status": "confirmed"})
+    bookings.invalidator.start()
+
+    collection.external_update("ABCD1234", status="cancelled")
+    await asyncio.sleep(0.01)
+
+    assert (await bookings.get_booking("ABCD1234"))["status"] == "cancelled"
+    await bookings.invalidator.stop()
+
+
+@pytest.mark.asyncio
+async def test_fresh_reads_skip_a_stale_entry() -> None:
+    collection = FakeCollection()
+    bookings = cached_repository(collection)
+    await bookings.save_booking({"booking_id": "ABCD1234", "status": "confirmed"})
+    # Cancelled by another process, with no change stream to say so
+    collection.docs["ABCD1234"]["status"] = "cancelled"
+
+    assert (await bookings.get_booking("ABCD1234"))["status"] == "confirmed"
+    assert (await bookings.get_booking("ABCD1234", fresh=True))["status"] == "cancelled"
+    # The fresh copy replaces the stale one
+    assert (await bookings.get_booking("ABCD1234"))["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_standalone_server_falls_back_to_ttl(caplog) -> None:
+    cache = BookingCache()
+    cache.put("abc", {"status": "confirmed"})
+
+    async def unsupported():
+        raise OperationFailure("only supported on replica sets", code=40573)
+
+    invalidator = ChangeStreamInvalidator(cache, unsupported, retry_delay=0)
+    invalidator.start()
+    await asyncio.wait_for(invalidator._task, 1)
+
+    assert len(cache) == 0
+    assert any(r.levelname == "WARNING" and "served stale" in r.getMessage() for r in caplog.records)
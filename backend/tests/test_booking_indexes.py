@@ -0,0 +1,197 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import agent
+from mongodb_utils import (
+    BOOKING_INDEXES,
+    MONGODB_DB_NAME,
+    AsyncBookingRepository,
+    customer_query,
+    ensure_indexes,
+    missing_indexes,
+)
+
+INDEX_NAMES = [index.document["name"] for index in BOOKING_INDEXES]
+
+
+class FakeIndexCollection:
+    def __init__(self, existing):
+        self.indexes = {"_id_": {}, **{name: {} for name in existing}}
+        self.created = []
+
+    def index_information(self):
+        return self.indexes
+
+    def create_indexes(self, models):
+        self.created.append([m.document["name"] for m in models])
+        self.indexes.update({m.document["name"]: {} for m in models})
+
+
+class FakeAsyncIndexCollection(FakeIndexCollection):
+    def __init__(self, name, existing=(), database=None, error=None):
+        super().__init__(existing)
+        self.name = name
+        self.database = database
+        self.error = error
+
+    async def index_information(self):
+        return self.indexes
+
+    async def create_indexes(self, models):
+        if self.error:
+            raise self.error
+        super().create_indexes(models)
+
+
+class FakeRepository:
+    def __init__(self, bookings):
+        self.bookings = bookings
+        self.calls = []
+
+    async def find_bookings(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.bookings
+
+
+def test_customer_query_normalises_like_confirm_booking():
+    assert customer_query(email=" Asha@Example.COM ") == {"email": "asha@example.com"}
+    assert customer_query(mobile_number="+91 98765-43210") == {"mobile_number": "919876543210"}
+    assert customer_query(email="a@b.co", status="confirmed") == {"email": "a@b.co", "status": "confirmed"}
+    assert customer_query() == {}
+
+
+def test_ensure_indexes_creates_only_missing_ones():
+    collection = FakeIndexCollection(["booking_id_1", "timestamp_1_booking_id_1"])
+
+    created = ensure_indexes(collection)
+    assert created == ["email_1_timestamp_-1", "mobile_number_1_timestamp_-1", "status_1_timestamp_1"]
+    assert collection.created == [created]
+
+    # Idempotent: a second migration is a single listIndexes round trip
+    assert ensure_indexes(collection) == []
+    assert len(collection.created) == 1
+    assert missing_indexes(collection.index_information()) == []
+
+
+@pytest.mark.asyncio
+async def test_repository_creates_missing_indexes_on_connect():
+    database = {}
+    bookings = FakeAsyncIndexCollection("bookings", database=database)
+    database.update(sessions=FakeAsyncIndexCollection("sessions", ["updated_at_ttl"]),
+                    inventory=FakeAsyncIndexCollection("inventory"))
+    repository = AsyncBookingRepository(sessions_collection_name="sessions", inventory_collection_name="inventory")
+
+    await repository._ensure_indexes(bookings)
+
+    # A fresh deployment gets the unique booking_id index without a manual migration
+    assert bookings.created == [INDEX_NAMES]
+    assert database["sessions"].created == []
+    assert database["inventory"].created == [["city_1"]]
+    await repository._ensure_indexes(bookings)
+    assert len(bookings.created) == 1
+
+
+@pytest.mark.asyncio
+async def test_repository_fails_to_connect_without_its_unique_index():
+    database = {}
+    bookings = FakeAsyncIndexCollection("bookings", database=database, error=PyMongoError("duplicate key"))
+    database.update(sessions=FakeAsyncIndexCollection("sessions"), inventory=FakeAsyncIndexCollection("inventory"))
+    repository = AsyncBookingRepository(sessions_collection_name="sessions", inventory_collection_name="inventory")
+
+    with pytest.raises(PyMongoError):
+        await repository._ensure_indexes(bookings)
+
+
+@pytest.mark.asyncio
+async def test_find_my_bookings_falls_back_to_session_contact(monkeypatch):
+    repository = FakeRepository([{
+        "booking_id": "ABCD1234", "destination": "Goa", "hotel_name": "Taj Fort Aguada",
+        "dates": "12-18 Dec", "total_cost": 190000, "status": "confirmed",
+    }])
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: repository)
+    state = agent.TravelState(mobile_number="9876543210")
+    ctx = SimpleNamespace(userdata=agent.Userdata(travel_state=state))
+
+    reply = await agent.find_my_bookings(ctx)
+
+    assert repository.calls == [{"email": None, "mobile_number": "9876543210"}]
+    assert "ABCD1234: Goa, Taj Fort Aguada" in reply
+    assert "Status: confirmed" in reply
+
+
+@pytest.mark.asyncio
+async def test_find_my_bookings_needs_contact_details(monkeypatch):
+    repository = FakeRepository([])
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: repository)
+    ctx = SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState()))
+
+    assert "email address or mobile number" in await agent.find_my_bookings(ctx)
+    assert "No bookings found" in await agent.find_my_bookings(ctx, email="nobody@example.com")
+    assert repository.calls == [{"email": "nobody@example.com", "mobile_number": None}]
+
+
+# Query plans need a real server; set MONGODB_TEST_URI to run these
+MONGODB_TEST_URI = os.getenv("MONGODB_TEST_URI", "mongodb://localhost:27017")
+
+
+@pytest.fixture(scope="module")
+def indexed_collection():
+    client = MongoClient(MONGODB_TEST_URI, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        pytest.skip(f"MongoDB not reachable at {MONGODB_TEST_URI}")
+    collection = client[MONGODB_DB_NAME][f"test_indexes_{os.getpid()}"]
+    collection.drop()
+    ensure_indexes(collection)
+    collection.insert_many([
+        {
+            "booking_id": f"{i:08X}",
+            "email": f"guest{i % 50}@example.com",
+            "mobile_number": f"98765{i % 50:05d}",
+            "status": "cancelled" if i % 7 == 0 else "confirmed",
+            "timestamp": f"2025-01-{1 + i % 28:02d}T00:00:00",
+        }
+        for i in range(500)
+    ])
+    yield collection
+    collection.drop()
+    client.close()
+
+
+def plan_stages(plan):
+    """Stage names and index names anywhere in a winning plan."""
+    stages, indexes = [plan.get("stage")], [plan.get("indexName")]
+    children = [plan[key] for key in ("inputStage", "queryPlan") if key in plan] + plan.get("inputStages", [])
+    for child in children:
+        child_stages, child_indexes = plan_stages(child)
+        stages += child_stages
+        indexes += child_indexes
+    return stages, indexes
+
+
+def winning_plan(collection, query, sort):
+    explain = collection.find(query, {"_id": 0}, sort=sort, limit=5).explain()
+    return plan_stages(explain["queryPlanner"]["winningPlan"])
+
+
+@pytest.mark.parametrize("query, sort, index", [
+    (customer_query(email="guest7@example.com"), [("timestamp", -1)], "email_1_timestamp_-1"),
+    (customer_query(mobile_number="9876500007"), [("timestamp", -1)], "mobile_number_1_timestamp_-1"),
+    (customer_query(email="guest7@example.com", status="confirmed"), [("timestamp", -1)], "email_1_timestamp_-1"),
+    ({"status": "cancelled", "timestamp": {"$gte": "2025-01-10"}}, [("timestamp", 1)], "status_1_timestamp_1"),
+    ({"booking_id": "0000002A"}, None, "booking_id_1"),
+])
+def test_lookups_are_index_backed(indexed_collection, query, sort, index):
+    stages, indexes = winning_plan(indexed_collection, query, sort)
+
+    assert "IXSCAN" in stages
+    assert "COLLSCAN" not in stages
+    assert index in indexes
+    # Newest-first customer lookups come straight off the index, without an in-memory sort
+    assert "SORT" not in stages
@@ -0,0 +1,250 @@
+import asyncio
+import os
+
+import pytest
+
+from booking_store import (
+    CANCELLATION_REFUND_RATE,
+    MemoryBookingStore,
+    SQLiteBookingStore,
+    create_booking_store,
+)
+
+# The Mongo engine runs the same suite when MONGODB_TEST_URI is reachable
+MONGODB_TEST_URI = os.getenv("MONGODB_TEST_URI", "mongodb://localhost:27017")
+
+
+@pytest.fixture(params=["memory", "sqlite", "mongodb"])
+async def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryBookingStore()
+    elif request.param == "sqlite":
+        store = SQLiteBookingStore(str(tmp_path / "bookings.db"))
+    else:
+        from mongodb_utils import BOOKING_INDEXES, AsyncBookingRepository
+
+        store = AsyncBookingRepository(uri=MONGODB_TEST_URI, collection_name=f"test_store_{os.getpid()}",
+                                       sessions_collection_name=f"test_sessions_{os.getpid()}",
+                                       inventory_collection_name=f"test_inventory_{os.getpid()}",
+                                       serverSelectionTimeoutMS=500)
+        try:
+            collection = await store.get_collection()
+        except Exception:
+            pytest.skip(f"MongoDB not reachable at {MONGODB_TEST_URI}")
+        await collection.drop()
+        await collection.create_indexes(BOOKING_INDEXES)
+    assert await store.warm()
+    yield store
+    if request.param == "mongodb":
+        collection = await store.get_collection()
+        await collection.drop()
+        await collection.database.drop_collection(store.sessions_collection_name)
+        await collection.database.drop_collection(store.inventory_collection_name)
+    await store.close()
+
+
+def booking(booking_id="ABCD1234", **fields):
+    return {
+        "booking_id": booking_id, "customer_name": "Asha", "mobile_number": "9876543210",
+        "email": "asha@example.com", "destination": "Goa", "hotel_name": "Taj Fort Aguada",
+        "dates": "12-18 Dec", "num_travelers": 2, "total_cost": 190000, "status": "confirmed",
+        "timestamp": "2025-01-01T10:00:00", "hotel_amenities": ["Wi-Fi", "Pool"], **fields,
+    }
+
+
+async def test_save_and_get(store):
+    assert await store.save_booking(booking())
+
+    stored = await store.get_booking("abcd1234")
+    assert stored == booking()
+    assert await store.get_booking("NOPE0000") is None
+
+
+async def test_save_rejects_duplicate_ids(store):
+    assert await store.save_booking(booking())
+    assert not await store.save_booking(booking(customer_name="Someone else"))
+    assert (await store.get_booking("ABCD1234"))["customer_name"] == "Asha"
+
+
+async def test_save_adds_timestamp(store):
+    data = booking()
+    del data["timestamp"]
+    assert await store.save_booking(data)
+    assert (await store.get_booking("ABCD1234"))["timestamp"]
+
+
+async def test_returned_bookings_are_copies(store):
+    await store.save_booking(booking())
+    first = await store.get_booking("ABCD1234")
+    first["hotel_amenities"].append("Spa")
+    first["status"] = "changed"
+    assert await store.get_booking("ABCD1234") == booking()
+
+
+async def test_update(store):
+    await store.save_booking(booking())
+
+    assert await store.update_booking("abcd1234", {"num_travelers": 3, "status": "amended"})
+    stored = await store.get_booking("ABCD1234")
+    assert stored["num_travelers"] == 3
+    assert stored["status"] == "amended"
+    assert stored["customer_name"] == "Asha"
+    assert not await store.update_booking("NOPE0000", {"status": "x"})
+
+
+async def test_delete(store):
+    await store.save_booking(booking())
+
+    assert await store.delete_booking("abcd1234")
+    assert await store.get_booking("ABCD1234") is None
+    assert not await store.delete_booking("ABCD1234")
+
+
+async def test_load_bookings(store):
+    for i in range(3):
+        await store.save_booking(booking(f"BOOK000{i}"))
+
+    loaded = await store.load_bookings()
+    assert sorted(b["booking_id"] for b in loaded) == ["BOOK0000", "BOOK0001", "BOOK0002"]
+
+
+async def test_cancel_returns_pre_image_once(store):
+    await store.save_booking(booking())
+
+    before = await store.cancel_booking("abcd1234", CANCELLATION_REFUND_RATE)
+    assert before["status"] == "confirmed"
+    stored = await store.get_booking("ABCD1234")
+    assert stored["status"] == "cancelled"
+    assert stored["refund_amount"] == 190000 * CANCELLATION_REFUND_RATE
+    assert stored["refund_rate"] == CANCELLATION_REFUND_RATE
+    assert stored["cancelled_at"]
+
+    assert await store.cancel_booking("ABCD1234") is None
+    assert await store.cancel_booking("NOPE0000") is None
+
+
+async def test_parallel_cancels_succeed_once(store):
+    await store.save_booking(booking())
+
+    results = await asyncio.gather(*(store.cancel_booking("ABCD1234") for _ in range(20)))
+
+    assert sum(r is not None for r in results) == 1
+
+
+async def test_find_bookings_newest_first(store):
+    await store.save_booking(booking("OLD00001", timestamp="2025-01-01T10:00:00"))
+    await store.save_booking(booking("NEW00001", timestamp="2025-03-01T10:00:00", status="cancelled"))
+    await store.save_booking(booking("MID00001", timestamp="2025-02-01T10:00:00"))
+    await store.save_booking(booking("OTHER001", email="ravi@example.com", mobile_number="9000000000"))
+
+    by_email = await store.find_bookings(email=" Asha@Example.com ")
+    assert [b["booking_id"] for b in by_email] == ["NEW00001", "MID00001", "OLD00001"]
+    by_mobile = await store.find_bookings(mobile_number="90000 00000")
+    assert [b["booking_id"] for b in by_mobile] == ["OTHER001"]
+    both = await store.find_bookings(email="asha@example.com", mobile_number="9000000000")
+    assert both == []
+    confirmed = await store.find_bookings(email="asha@example.com", status="confirmed", limit=1)
+    assert [b["booking_id"] for b in confirmed] == ["MID00001"]
+    assert await store.find_bookings() == []
+
+
+def test_sqlite_lookups_use_indexes(tmp_path):
+    store = SQLiteBookingStore(str(tmp_path / "bookings.db"))
+    conn = store._connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    for column in ("email", "mobile_number", "status"):
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN " + store.FIND.format(f"{column} = ?"), ("x", 5)))
+        assert f"USING INDEX bookings_{column}_timestamp" in plan
+        assert "TEMP B-TREE" not in plan
+    conn.close()
+
+
+async def test_sqlite_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "bookings.db")
+    writer, reader = SQLiteBookingStore(path), SQLiteBookingStore(path)
+    await writer.save_booking(booking())
+
+    assert (await reader.cancel_booking("ABCD1234"))["status"] == "confirmed"
+    assert await writer.cancel_booking("ABCD1234") is None
+    await writer.close()
+    await reader.close()
+
+
+def test_create_booking_store_rejects_unknown_engine():
+    assert isinstance(create_booking_store("memory"), MemoryBookingStore)
+    with pytest.raises(ValueError, match="BOOKING_STORE"):
+        create_booking_store("redis")
+
+
+async def test_find_bookings_follows_updates_and_deletes(store):
+    await store.save_booking(booking())
+    await store.update_booking("ABCD1234", {"email": "asha.new@example.com"})
+
+    assert await store.find_bookings(email="asha@example.com") == []
+    assert [b["booking_id"] for b in await store.find_bookings(email="asha.new@example.com")] == ["ABCD1234"]
+    await store.delete_booking("ABCD1234")
+    assert await store.find_bookings(mobile_number="9876543210") == []
+
+
+async def test_session_checkpoints(store):
+    assert await store.load_session("room-1") is None
+
+    assert await store.save_session("room-1", b"\x00first")
+    assert await store.save_session("room-1", b"\x00second")
+    assert await store.save_session("room-2", b"other")
+
+    assert await store.load_session("room-1") == b"\x00second"
+    assert await store.load_session("room-2") == b"other"
+    # Checkpoints older than max_age seconds are not restored
+    assert await store.load_session("room-1", max_age=-1) is None
+    assert await store.delete_session("room-1")
+    assert await store.load_session("room-1") is None
+    assert await store.load_session("room-2") == b"other"
+
+
+DEC_12_TO_18 = ["2025-12-12", "2025-12-13", "2025-12-14", "2025-12-15", "2025-12-16", "2025-12-17"]
+
+
+async def test_room_reservations_cover_the_whole_stay(store):
+    assert await store.reserve_rooms("Goa", "Taj Fort Aguada", DEC_12_TO_18[3:], 3, capacity=4)
+
+    # 15-17 Dec have one room left, so a stay over them books no night at all
+    assert not await store.reserve_rooms("Goa", "Taj Fort Aguada", DEC_12_TO_18, 2, capacity=4)
+    assert await store.reserve_rooms("Goa", "Taj Fort Aguada", DEC_12_TO_18, 1, capacity=4)
+    assert await store.reserve_rooms("Goa", "Other Hotel", DEC_12_TO_18[:1], 1, capacity=4)
+    assert await store.release_rooms("Goa", "Taj Fort Aguada", DEC_12_TO_18[3:], 3)
+
+    booked = await store.load_room_nights("Goa", since="2025-12-13")
+    # Other Hotel has nothing booked from the 13th
+    assert booked == {"Taj Fort Aguada": dict.fromkeys(DEC_12_TO_18[1:], 1)}
+    assert await store.load_room_nights("Delhi", since="2025-01-01") == {}
+
+
+async def test_concurrent_bookings_for_the_last_room(store):
+    assert await store.reserve_rooms("Goa", "Taj Fort Aguada", DEC_12_TO_18, 4, capacity=5)
+
+    # Overlapping stays, all wanting the one room left on 14 Dec
+    stays = [DEC_12_TO_18[i % 3:3 + i % 3] for i in range(50)]
+    results = await asyncio.gather(*(store.reserve_rooms("Goa", "Taj Fort Aguada", nights, 1, capacity=5)
+                                     for nights in stays))
+
+    assert results.count(True) == 1
+    booked = (await store.load_room_nights("Goa", since="2025-12-01"))["Taj Fort Aguada"]
+    assert booked["2025-12-14"] == 5
+    assert max(booked.values()) == 5
+
+
+async def test_sqlite_last_room_across_connections(tmp_path):
+    # One connection per worker process, all booking the same hotel
+    path = str(tmp_path / "bookings.db")
+    stores = [SQLiteBookingStore(path, busy_timeout_ms=30000) for _ in range(8)]
+    await stores[0].reserve_rooms("Goa", "Taj Fort Aguada", DEC_12_TO_18, 9, capacity=10)
+
+    results = await asyncio.gather(*(stores[i % 8].reserve_rooms("Goa", "Taj Fort Aguada", DEC_12_TO_18, 1, 10)
+                                     for i in range(40)))
+
+    assert results.count(True) == 1
+    assert (await stores[1].load_room_nights("Goa", "2025-12-01"))["Taj Fort Aguada"] == dict.fromkeys(DEC_12_TO_18, 10)
+    for store in stores:
+        await store.close()
@@ -0,0 +1,173 @@
+import asyncio
+import copy
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+from booking_cache import BookingCache
+from mongodb_utils import CANCELLATION_REFUND_RATE, AsyncBookingRepository
+
+PARALLEL_CANCELS = 50
+
+
+def evaluate(expression, doc):
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc[expression[1:]]
+    if isinstance(expression, dict) and "$multiply" in expression:
+        result = 1
+        for term in expression["$multiply"]:
+            result *= evaluate(term, doc)
+        return result
+    return expression
+
+
+class FakeCollection:
+    """find_one_and_update with MongoDB's single-document atomicity.
+
+    Every call yields to the event loop first, so parallel cancels really
+    interleave; the match and the write then happen without a yield between
+    them, as they do on the server.
+    """
+
+    def __init__(self, docs):
+        self.docs = {d["booking_id"]: d for d in docs}
+        self.calls = {"find_one": 0, "find_one_and_update": 0, "update_one": 0}
+
+    def _matches(self, doc, query):
+        for key, cond in query.items():
+            if isinstance(cond, dict):
+                if doc.get(key) == cond["$ne"]:
+                    return False
+            elif doc.get(key) != cond:
+                return False
+        return True
+
+    async def find_one(self, query, projection=None):
+        self.calls["find_one"] += 1
+        await asyncio.sleep(0)
+        doc = self.docs.get(query["booking_id"])
+        return copy.deepcopy(doc) if doc else None
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        self.calls["find_one_and_update"] += 1
+        await asyncio.sleep(0)
+        doc = self.docs.get(query["booking_id"])
+        if doc is None or not self._matches(doc, query):
+            return None
+        before = copy.deepcopy(doc)
+        for stage in update:
+            doc.update({k: evaluate(v, doc) for k, v in stage["$set"].items()})
+        return before
+
+    async def update_one(self, query, update):
+        self.calls["update_one"] += 1
+        await asyncio.sleep(0)
+        doc = self.docs.get(query["booking_id"])
+        if doc:
+            doc.update(update["$set"])
+        return SimpleNamespace(matched_count=1 if doc else 0)
+
+
+def make_repository(cache=None):
+    repository = AsyncBookingRepository(cache=cache)
+    repository._collection = FakeCollection([
+        {"booking_id": "ABCD1234", "total_cost": 190000, "status": "confirmed"},
+        {"booking_id": "DONE0000", "total_cost": 5000, "status": "cancelled"},
+    ])
+    return repository
+
+
+def make_context():
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState()))
+
+
+async def test_cancel_returns_pre_image_and_writes_refund():
+    repository = make_repository()
+
+    before = await repository.cancel_booking("abcd1234")
+
+    assert before["status"] == "confirmed"
+    stored = repository._collection.docs["ABCD1234"]
+    assert stored["status"] == "cancelled"
+    assert stored["refund_amount"] == 190000 * CANCELLATION_REFUND_RATE
+    assert stored["refund_rate"] == CANCELLATION_REFUND_RATE
+    assert "cancelled_at" in stored
+    assert await repository.cancel_booking("ABCD1234") is None
+
+
+async def test_cancel_invalidates_cached_booking():
+    repository = make_repository(BookingCache())
+    assert (await repository.get_booking("ABCD1234"))["status"] == "confirmed"
+
+    await repository.cancel_booking("ABCD1234")
+
+    assert (await repository.get_booking("ABCD1234"))["status"] == "cancelled"
+
+
+async def test_tools_read_status_past_the_cache(monkeypatch):
+    repository = make_repository(BookingCache())
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: repository)
+    repository._collection.docs["ABCD1234"].update(
+        customer_name="Asha", travel_mode="plane", destination="Goa", hotel_name="Taj Exotica", dates="12-18 Dec",
+        num_travelers=2, mobile_number="9876543210", email="asha@example.com")
+    assert (await repository.get_booking("ABCD1234"))["status"] == "confirmed"
+    # Another worker cancels it; this process's cached copy doesn't hear about it
+    repository._collection.docs["ABCD1234"]["status"] = "cancelled"
+
+    assert "Status: cancelled" in await agent.retrieve_booking(make_context(), "ABCD1234")
+    assert await agent.cancel_booking(make_context(), "ABCD1234") == "Booking already cancelled."
+
+
+async def test_parallel_cancels_refund_exactly_once(monkeypatch):
+    repository = make_repository()
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: repository)
+
+    replies = await asyncio.gather(*(
+        agent.cancel_booking(make_context(), "ABCD1234") for _ in range(PARALLEL_CANCELS)
+    ))
+
+    refunded = [r for r in replies if "Refund amount" in r]
+    assert refunded == [f"Booking ABCD1234 cancelled. Refund amount: ₹{190000 * CANCELLATION_REFUND_RATE}."]
+    assert replies.count("Booking already cancelled.") == PARALLEL_CANCELS - 1
+    # Only the cancel itself goes through the conditional write; no read-then-write
+    assert repository._collection.calls["update_one"] == 0
+
+
+async def test_cancel_tool_reports_missing_and_already_cancelled(monkeypatch):
+    repository = make_repository()
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: repository)
+
+    assert await agent.cancel_booking(make_context(), "NOPE0000") == "Booking ID NOPE0000 not found."
+    assert await agent.cancel_booking(make_context(), "DONE0000") == "Booking already cancelled."
+    # The successful path is a single round trip
+    calls = repository._collection.calls
+    calls.update(find_one=0, find_one_and_update=0)
+    await agent.cancel_booking(make_context(), "ABCD1234")
+    assert calls == {"find_one": 0, "find_one_and_update": 1, "update_one": 0}
+
+
+# Server-side atomicity needs a real server; set MONGODB_TEST_URI to run this
+MONGODB_TEST_URI = os.getenv("MONGODB_TEST_URI", "mongodb://localhost:27017")
+
+
+async def test_parallel_cancels_against_mongodb():
+    repository = AsyncBookingRepository(uri=MONGODB_TEST_URI, collection_name=f"test_cancel_{os.getpid()}",
+                                        serverSelectionTimeoutMS=500)
+    try:
+        collection = await repository.get_collection()
+    except Exception:
+        pytest.skip(f"MongoDB not reachable at {MONGODB_TEST_URI}")
+    try:
+        await collection.insert_one({"booking_id": "ABCD1234", "total_cost": 190000, "status": "confirmed"})
+
+        results = await asyncio.gather(*(repository.cancel_booking("ABCD1234") for _ in range(PARALLEL_CANCELS)))
+
+        assert sum(r is not None for r in results) == 1
+        stored = await collection.find_one({"booking_id": "ABCD1234"})
+        assert stored["status"] == "cancelled"
+        assert stored["refund_amount"] == 190000 * CANCELLATION_REFUND_RATE
+    finally:
+        await collection.drop()
+        await repository.close()
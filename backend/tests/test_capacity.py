@@ -0,0 +1,92 @@
+import asyncio
+import math
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+import capacity
+from capacity import CapacityModel, LagReporter, combined_load
+
+
+def test_load_is_the_most_saturated_signal() -> None:
+    limits = {"cpu_target": 0.8, "lag_limit": 0.05, "max_sessions": 8}
+
+    assert combined_load(0.4, 0.005, 2, **limits) == pytest.approx(0.5)
+    assert combined_load(0.1, 0.04, 2, **limits) == pytest.approx(0.8)
+    assert combined_load(0.1, 0.0, 6, **limits) == pytest.approx(0.75)
+    assert combined_load(1.0, 0.2, 20, **limits) == 1.0
+
+
+def test_sessions_at_full_load_default_from_cpus() -> None:
+    assert CapacityModel(cpu_count=2).max_sessions == 8
+    assert CapacityModel(cpu_count=0.5, max_sessions=0).max_sessions == 2
+    assert CapacityModel(cpu_count=2, max_sessions=3).max_sessions == 3
+    # The prewarmed pool fits under the threshold and is capped
+    assert CapacityModel(cpu_count=2, threshold=0.25).idle_processes() == 2
+    assert CapacityModel(cpu_count=16).idle_processes() == 4
+
+
+def test_cpu_counts_child_processes_over_the_window() -> None:
+    model = CapacityModel(cpu_count=1)
+    busy = subprocess.Popen([sys.executable, "-c", "while True: pass"])
+    try:
+        model.sample_cpu([psutil.Process(), psutil.Process(busy.pid)])
+        time.sleep(0.5)
+        cpu = model.sample_cpu([psutil.Process(), psutil.Process(busy.pid)])
+    finally:
+        busy.kill()
+        busy.wait()
+
+    # Shares the CPU with this process and whatever else the host runs
+    assert 0.2 < cpu <= 1.1
+    # An exited process drops out without pulling the total down
+    assert model.sample_cpu([psutil.Process()]) >= 0
+
+
+async def test_lag_reports_are_read_by_pid(tmp_path) -> None:
+    reporter = LagReporter(str(tmp_path), tick=0.01, interval=0.05)
+    reporter.start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.08)  # block the loop
+    await asyncio.sleep(0.02)
+    model = CapacityModel(cpu_count=1, report_dir=str(tmp_path))
+
+    assert model.read_lag([os.getpid()]) > 0.05
+    assert model.read_lag([os.getpid() + 1]) == 0.0
+
+    await reporter.stop()
+    assert model.read_lag([os.getpid()]) == 0.0
+
+
+def test_stale_and_garbled_reports_are_ignored(tmp_path) -> None:
+    (tmp_path / "101").write_text("0.5")
+    os.utime(tmp_path / "101", (time.time() - 60,) * 2)
+    (tmp_path / "102").write_text("")
+
+    assert CapacityModel(cpu_count=1, report_dir=str(tmp_path)).read_lag([101, 102]) == 0.0
+
+
+def test_load_fnc_sheds_new_rooms_past_the_threshold(tmp_path, caplog) -> None:
+    model = CapacityModel(cpu_count=64, max_sessions=4, threshold=0.7, report_dir=str(tmp_path))
+
+    with caplog.at_level("INFO", logger="capacity"):
+        loads = [model(SimpleNamespace(active_jobs=[object()] * n)) for n in range(5)]
+
+    assert loads == pytest.approx([0.0, 0.25, 0.5, 0.75, 1.0], abs=0.05)
+    assert model.last.sessions == 4
+    assert [r.message.split(":")[0] for r in caplog.records] == ["Worker full, not taking new sessions"]
+
+
+def test_worker_options_keep_dev_defaults() -> None:
+    options = capacity.worker_options()
+
+    assert isinstance(options["load_fnc"], CapacityModel)
+    assert math.isinf(options["load_threshold"].dev_default)
+    assert options["load_threshold"].prod_default == capacity.LOAD_THRESHOLD
+    assert options["num_idle_processes"].dev_default == 0
+    assert 1 <= options["num_idle_processes"].prod_default <= capacity.CAPACITY_MAX_IDLE_PROCESSES
@@ -0,0 +1,146 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from agent import load_hotels, open_catalog
+from compiled_catalog import (
+    MappedHotelCatalog,
+    compile_catalog,
+    is_compiled_catalog,
+    load_route_graph,
+)
+from hotel_catalog import CatalogReloader, HotelCatalog
+from route_graph import RouteGraph
+from test_hotel_catalog import synthetic_hotels
+from travel_data import DISTANCES
+
+
+@pytest.fixture(scope="module")
+def hotel_data():
+    data = {**load_hotels(), "Synthetic": synthetic_hotels(500), "Empty": []}
+    data["Synthetic"][0]["check_in"] = "14:00"
+    return data
+
+
+@pytest.fixture(scope="module")
+def compiled(hotel_data, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("catalog") / "hotels.bin")
+    compile_catalog(hotel_data, DISTANCES, path)
+    return path
+
+
+@pytest.mark.parametrize("budget", [None, "low", "medium", "high"])
+@pytest.mark.parametrize("amenities", [None, ["Wi-Fi"], ["Pool", "Spa"], ["Sauna"]])
+def test_queries_match_json_catalog(hotel_data, compiled, budget, amenities) -> None:
+    expected = HotelCatalog(hotel_data)
+    mapped = MappedHotelCatalog(compiled)
+
+    assert mapped.destinations() == expected.destinations()
+    for city in hotel_data:
+        assert mapped.find_hotels(city, budget, amenities) == expected.find_hotels(city, budget, amenities)
+        assert mapped.find_hotels(city, budget, amenities, limit=3) == expected.find_hotels(city, budget, amenities, limit=3)
+        assert mapped.find_hotels(city, budget, amenities, available_only=False) == \
+            expected.find_hotels(city, budget, amenities, available_only=False)
+        # e.g. the hotels with rooms free for a stay: every third one
+        within = sum(1 << position for position in range(0, len(hotel_data[city]), 3))
+        assert mapped.find_hotels(city, budget, amenities, within=within) == \
+            expected.find_hotels(city, budget, amenities, within=within)
+
+
+def test_hotels_round_trip(hotel_data, compiled) -> None:
+    mapped = MappedHotelCatalog(compiled)
+
+    for city, hotels in hotel_data.items():
+        assert list(mapped.hotels(city)) == hotels
+        assert mapped.hotels(city)[:3] == hotels[:3]
+    assert mapped.hotels("Synthetic")[-1] == hotel_data["Synthetic"][-1]
+    assert mapped.hotels("Synthetic")[0]["check_in"] == "14:00"
+    assert len(mapped.hotels("Atlantis")) == 0
+
+
+def test_name_lookup_and_price_range(hotel_data, compiled) -> None:
+    expected = HotelCatalog(hotel_data)
+    mapped = MappedHotelCatalog(compiled)
+
+    for city, hotels in hotel_data.items():
+        for hotel in hotels:
+            assert mapped.get_hotel(city, hotel["name"].upper()) == expected.get_hotel(city, hotel["name"])
+        assert mapped.find_by_price(city, 5000, 15000) == expected.find_by_price(city, 5000, 15000)
+        assert mapped.find_by_price(city, 0, 1e9, limit=5) == expected.find_by_price(city, 0, 1e9, limit=5)
+    assert mapped.get_hotel("Mumbai", "Nowhere Inn") is None
+    assert mapped.get_hotel("Atlantis", "Hotel 1") is None
+
+
+def test_route_graph_matches(compiled) -> None:
+    expected = RouteGraph(DISTANCES)
+    mapped = load_route_graph(compiled, DISTANCES)
+
+    assert mapped.cities == expected.cities
+    np.testing.assert_array_equal(mapped.trip, expected.trip)
+    for origin in expected.cities:
+        for destination in expected.cities:
+            assert mapped.distance(origin, destination) == expected.distance(origin, destination)
+            assert mapped.legs(origin, destination) == expected.legs(origin, destination)
+
+
+def test_stale_route_data_is_rebuilt(compiled) -> None:
+    distances = {**DISTANCES, ("Mumbai", "Goa"): 1}
+
+    assert load_route_graph(compiled, distances).distance("Mumbai", "Goa") == 1
+
+
+def test_too_many_amenities_is_rejected(tmp_path) -> None:
+    hotels = [{"name": "Everything Inn", "price_per_night": 1, "amenities": [f"a{i}" for i in range(65)]}]
+
+    with pytest.raises(ValueError):
+        compile_catalog({"Goa": hotels}, DISTANCES, str(tmp_path / "hotels.bin"))
+    assert not os.path.exists(tmp_path / "hotels.bin")
+
+
+@pytest.mark.asyncio
+async def test_reloader_maps_recompiled_file(tmp_path) -> None:
+    path = str(tmp_path / "hotels.bin")
+    compile_catalog({"Goa": synthetic_hotels(3)}, DISTANCES, path)
+    reloader = CatalogReloader(path, loader=MappedHotelCatalog.open, interval=0)
+    old = reloader.catalog
+
+    compile_catalog({"Goa": synthetic_hotels(3), "Ooty": synthetic_hotels(2)}, DISTANCES, path)
+
+    assert await reloader.check()
+    assert "Ooty" in reloader.catalog
+    assert "Ooty" not in old
+    assert old.hotels("Goa")[0] == synthetic_hotels(3)[0]
+
+
+@pytest.mark.asyncio
+async def test_reloader_serves_json_edited_after_compile(tmp_path) -> None:
+    path, source = tmp_path / "hotels.bin", tmp_path / "hotels.json"
+    source.write_text(json.dumps({"Goa": synthetic_hotels(3)}), encoding="utf-8")
+    compile_catalog({"Goa": synthetic_hotels(3)}, DISTANCES, str(path))
+    os.utime(source, ns=(0, path.stat().st_mtime_ns - 1_000_000))
+    reloader = CatalogReloader(str(path), loader=open_catalog, also_watch=[str(source)], interval=0)
+    assert isinstance(reloader.catalog, MappedHotelCatalog)
+
+    source.write_text(json.dumps({"Goa": synthetic_hotels(3), "Ooty": synthetic_hotels(2)}), encoding="utf-8")
+    os.utime(source, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert await reloader.check()
+    assert isinstance(reloader.catalog, HotelCatalog)
+    assert "Ooty" in reloader.catalog
+
+    # Rebuilding hotels.bin goes back to the mapped file
+    compile_catalog({"Goa": synthetic_hotels(3), "Ooty": synthetic_hotels(2)}, DISTANCES, str(path))
+    os.utime(path, ns=(0, source.stat().st_mtime_ns + 1_000_000))
+    assert await reloader.check()
+    assert isinstance(reloader.catalog, MappedHotelCatalog)
+    assert "Ooty" in reloader.catalog
+
+
+def test_magic_check(tmp_path, compiled) -> None:
+    json_path = tmp_path / "hotels.json"
+    json_path.write_text(json.dumps({"Goa": []}))
+
+    assert is_compiled_catalog(compiled)
+    assert not is_compiled_catalog(str(json_path))
+    assert not is_compiled_catalog(str(tmp_path / "missing.bin"))
@@ -0,0 +1,245 @@
+import asyncio
+import smtplib
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import email_outbox
+from email_outbox import (
+    EmailOutbox,
+    MemoryOutboxStore,
+    SMTPTransport,
+    SQLiteOutboxStore,
+)
+
+BOOKING = {
+    "booking_id": "ABCD1234",
+    "customer_name": "Asha",
+    "mobile_number": "9876543210",
+    "email": "asha@example.com",
+    "destination": "Goa",
+    "travel_mode": "plane",
+    "hotel_name": "Taj Exotica",
+    "dates": "12-18 Dec",
+    "num_travelers": 2,
+    "rooms": 1,
+    "total_cost": 54000,
+    "status": "confirmed",
+    "timestamp": "2025-12-01T10:00:00",
+    "hotel_rating": 5,
+    "hotel_amenities": ["Wi-Fi", "Pool"],
+    "hotel_description": "Beach resort.",
+    "hotel_price_per_night": 15000,
+}
+
+
+class FakeTransport:
+    """Records sent messages; fails the first `failures` sends."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    def send_batch(self, messages):
+        time.sleep(self.delay)
+        errors = []
+        for message in messages:
+            if self.failures:
+                self.failures -= 1
+                errors.append("421 try again later")
+            else:
+                self.sent.append(message)
+                errors.append(None)
+        return errors
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSMTP:
+    """Stand-in for smtplib.SMTP that counts handshakes."""
+
+    connections = 0
+    logins = 0
+    drop_next = False
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+        self.sent = []
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        FakeSMTP.logins += 1
+
+    def sendmail(self, sender, to, text):
+        if FakeSMTP.drop_next:
+            FakeSMTP.drop_next = False
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(to)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.connections = 0
+    FakeSMTP.logins = 0
+    FakeSMTP.drop_next = False
+    monkeypatch.setattr(email_outbox.smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+@pytest.mark.asyncio
+async def test_enqueue_returns_before_delivery() -> None:
+    transport = FakeTransport(delay=0.5)
+    outbox = EmailOutbox(MemoryOutboxStore(), transport)
+    outbox.start()
+
+    start = time.perf_counter()
+    assert await outbox.enqueue_booking_confirmation(BOOKING)
+    assert time.perf_counter() - start < 0.1
+
+    await outbox.stop()
+    assert [m["to"] for m in transport.sent] == ["asha@example.com"]
+    assert transport.closed
+
+
+@pytest.mark.asyncio
+async def test_failed_sends_are_retried_with_backoff() -> None:
+    store = MemoryOutboxStore()
+    outbox = EmailOutbox(store, FakeTransport(failures=2), backoff_base=0.01)
+    await outbox.enqueue_booking_confirmation(BOOKING)
+
+    for _ in range(3):
+        await outbox.drain_once()
+        await asyncio.sleep(0.05)
+
+    (message,) = store.messages.values()
+    assert message["status"] == "sent"
+    assert message["attempts"] == 3
+    assert message["last_error"] == "421 try again later"
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts() -> None:
+    store = MemoryOutboxStore()
+    outbox = EmailOutbox(store, FakeTransport(failures=10), max_attempts=2, backoff_base=0.0)
+    await outbox.enqueue_booking_confirmation(BOOKING)
+
+    await outbox.flush()
+
+    (message,) = store.messages.values()
+    assert message["status"] == "failed"
+    assert message["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed() -> None:
+    """Messages claimed by a crashed sender are picked up again."""
+    store = MemoryOutboxStore()
+    crashed = EmailOutbox(store, FakeTransport(), lease_seconds=0.0)
+    await crashed.enqueue_booking_confirmation(BOOKING)
+    await store.claim_batch(10, time.time(), time.time())
+
+    transport = FakeTransport()
+    await EmailOutbox(store, transport).flush()
+
+    assert len(transport.sent) == 1
+
+
+def outbox_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT status, attempts, last_error FROM email_outbox").fetchall()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_outbox_survives_a_restart(tmp_path) -> None:
+    path = str(tmp_path / "bookings.db")
+    assert await EmailOutbox(SQLiteOutboxStore(path), FakeTransport()).enqueue_booking_confirmation(BOOKING)
+
+    # The process that queued it is gone; the next one on the host sends it
+    transport = FakeTransport()
+    await EmailOutbox(SQLiteOutboxStore(path), transport).flush()
+
+    (message,) = transport.sent
+    assert (message["to"], message["booking_id"]) == ("asha@example.com", "ABCD1234")
+    assert outbox_rows(path) == [("sent", 1, None)]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_outbox_retries_and_reclaims_leases(tmp_path) -> None:
+    path = str(tmp_path / "bookings.db")
+    store = SQLiteOutboxStore(path)
+    outbox = EmailOutbox(store, FakeTransport(failures=1), backoff_base=0.0)
+    await outbox.enqueue_booking_confirmation(BOOKING)
+
+    await outbox.drain_once()
+    assert outbox_rows(path) == [("pending", 1, "421 try again later")]
+
+    # Claimed by a sender that crashed before its lease ran out
+    assert len(await store.claim_batch(10, time.time(), time.time())) == 1
+    assert await store.claim_batch(10, time.time() - 60, time.time()) == []
+    transport = FakeTransport()
+    await EmailOutbox(SQLiteOutboxStore(path), transport).flush()
+
+    assert len(transport.sent) == 1
+    assert outbox_rows(path) == [("sent", 2, "421 try again later")]
+
+
+def test_smtp_connection_is_reused(fake_smtp) -> None:
+    transport = SMTPTransport(username="bot@example.com", password="secret")
+    message = email_outbox.render_booking_email(BOOKING)
+
+    assert transport.send_batch([message, message]) == [None, None]
+    assert transport.send_batch([message]) == [None]
+
+    assert fake_smtp.connections == 1
+    assert fake_smtp.logins == 1
+
+
+def test_smtp_reconnects_after_server_disconnect(fake_smtp) -> None:
+    transport = SMTPTransport(username="bot@example.com", password="secret")
+    message = email_outbox.render_booking_email(BOOKING)
+    transport.send_batch([message])
+
+    fake_smtp.drop_next = True
+    assert transport.send_batch([message]) == [None]
+    assert fake_smtp.connections == 2
+
+
+def test_smtp_reconnects_after_idle_timeout(fake_smtp) -> None:
+    transport = SMTPTransport(username="bot@example.com", password="secret", idle_timeout=0.05)
+    message = email_outbox.render_booking_email(BOOKING)
+    transport.send_batch([message])
+    time.sleep(0.1)
+
+    # Closing the idle connection inside send_batch must not wait on the lock send_batch holds
+    errors = []
+    sender = threading.Thread(target=lambda: errors.extend(transport.send_batch([message])), daemon=True)
+    sender.start()
+    sender.join(timeout=2)
+
+    assert not sender.is_alive()
+    assert errors == [None]
+    assert fake_smtp.connections == 2
+
+
+def test_smtp_missing_credentials_is_reported(monkeypatch, fake_smtp) -> None:
+    monkeypatch.delenv("SMTP_EMAIL", raising=False)
+    monkeypatch.delenv("SMTP_PASSWORD", raising=False)
+    transport = SMTPTransport()
+
+    (error,) = transport.send_batch([email_outbox.render_booking_email(BOOKING)])
+
+    assert "credentials" in error
+    assert fake_smtp.connections == 0
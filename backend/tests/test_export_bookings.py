@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+
+import pytest
+
+from export_bookings import build_filter, export, main
+from mongodb_utils import iter_bookings, keyset_after, keyset_query
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = doc.get(key)
+            ops = {"$gt": lambda a, b: a > b, "$gte": lambda a, b: a >= b, "$lt": lambda a, b: a < b}
+            if value is None or not all(ops[op](value, arg) for op, arg in cond.items()):
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs, fail_after=None):
+        self.docs = docs
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for i, doc in enumerate(self.docs):
+            if i == self.fail_after:
+                raise ConnectionError("connection reset")
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.fail_after = None
+        self.calls = []
+
+    def find(self, query, projection, sort, batch_size):
+        self.calls.append({"query": query, "projection": projection, "batch_size": batch_size})
+        keys = [field for field, _ in sort]
+        docs = sorted((d for d in self.docs if matches(d, query)), key=lambda d: [d[k] for k in keys])
+        if len(projection) > 1:
+            docs = [{k: v for k, v in d.items() if projection.get(k)} for d in docs]
+        return FakeCursor(docs, self.fail_after)
+
+
+def make_bookings(count):
+    return [
+        {
+            "booking_id": f"B{(i * 7919) % 10000:05d}",
+            "customer_name": f"Guest {i}",
+            "status": "cancelled" if i % 3 == 0 else "confirmed",
+            # Shared timestamps exercise the booking_id tiebreak
+            "timestamp": f"2025-01-{1 + i // 4:02d}T10:00:00",
+            "hotel_amenities": ["Wi-Fi", "Pool"],
+            "total_cost": 1000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("order", ["booking_id", "timestamp"])
+def test_resuming_from_any_key_continues_without_gaps_or_repeats(order) -> None:
+    collection = FakeCollection(make_bookings(40))
+    everything = list(iter_bookings(order=order, collection=collection))
+
+    for cut in [0, 7, 39]:
+        after = keyset_after(everything[cut], order)
+        rest = list(iter_bookings(order=order, after=after, collection=collection))
+        assert rest == everything[cut + 1:]
+
+
+def test_filter_and_keyset_combine() -> None:
+    collection = FakeCollection(make_bookings(40))
+    query = build_filter(status="confirmed", since="2025-01-03", until="2025-01-08")
+
+    confirmed = list(iter_bookings(query, order="timestamp", collection=collection))
+    rest = list(iter_bookings(query, order="timestamp", after=keyset_after(confirmed[2], "timestamp"), collection=collection))
+
+    assert confirmed and all(b["status"] == "confirmed" and "2025-01-03" <= b["timestamp"] < "2025-01-08" for b in confirmed)
+    assert rest == confirmed[3:]
+    assert "$and" in keyset_query(query, "timestamp", ["2025-01-03T10:00:00", "B00001"])
+
+
+def test_key_fields_are_always_projected() -> None:
+    collection = FakeCollection(make_bookings(5))
+
+    bookings = list(iter_bookings(fields=["customer_name"], order="timestamp", collection=collection))
+
+    assert set(bookings[0]) == {"customer_name", "timestamp", "booking_id"}
+    assert collection.calls[0]["projection"]["_id"] == 0
+
+
+def test_wrong_key_length_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        keyset_query({}, "timestamp", ["B00001"])
+
+
+def test_csv_and_ndjson_output() -> None:
+    bookings = make_bookings(3)
+    progress = {"count": 0, "after": None}
+    out = io.StringIO()
+
+    export(iter(bookings), out, "csv", None, "booking_id", progress)
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+    assert progress == {"count": 3, "after": [bookings[-1]["booking_id"]]}
+    assert rows[0]["booking_id"] == bookings[0]["booking_id"]
+    assert rows[0]["hotel_amenities"] == "Wi-Fi; Pool"
+
+    out = io.StringIO()
+    export(iter(bookings), out, "ndjson", None, "booking_id", {"count": 0, "after": None})
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == bookings
+
+
+def test_interrupted_export_reports_resume_key(monkeypatch, tmp_path, capsys) -> None:
+    import mongodb_utils
+
+    collection = FakeCollection(make_bookings(10))
+    collection.fail_after = 4
+    monkeypatch.setattr(mongodb_utils, "get_mongodb_connection", lambda: (None, None, collection))
+    output = tmp_path / "bookings.ndjson"
+
+    with pytest.raises(SystemExit):
+        main(["--output", str(output)])
+    resume = capsys.readouterr().err.split("--after ")[1].strip()
+
+    collection.fail_after = None
+    main(["--output", str(output), "--append", "--after", resume])
+
+    exported = [json.loads(line)["booking_id"] for line in output.read_text().splitlines()]
+    assert exported == sorted(b["booking_id"] for b in make_bookings(10))
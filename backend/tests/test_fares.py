@@ -0,0 +1,59 @@
+import csv
+import itertools
+
+import numpy as np
+
+from fares import FareTable, main
+from route_graph import RouteGraph
+from travel_data import DISTANCES, TRAVEL_MODES
+
+ROUTES = RouteGraph(DISTANCES)
+TABLE = FareTable(ROUTES, TRAVEL_MODES)
+
+
+def test_grid_matches_scalar_formula() -> None:
+    travelers = [1, 2, 5]
+    grid = TABLE.grid(travelers)
+
+    assert grid.shape == (len(TRAVEL_MODES), len(ROUTES.cities), len(ROUTES.cities), 3)
+    for (m, mode), (i, a), (j, b) in itertools.product(
+        enumerate(TABLE.modes), enumerate(ROUTES.cities), enumerate(ROUTES.cities)
+    ):
+        distance = ROUTES.distance(a, b)
+        for p, party in enumerate(travelers):
+            assert grid[m, i, j, p] == distance * TRAVEL_MODES[mode]["cost_per_km"] * party
+
+
+def test_quote_for_listed_pair() -> None:
+    quote = TABLE.quote("Delhi", "Goa", "train", 3)
+
+    assert quote == {
+        "mode": "train",
+        "distance_km": 1800,
+        "cost": 1800 * 1.5 * 3,
+        "duration_hours": 1800 / 60,
+    }
+    assert TABLE.quote("Delhi", "Goa", "rocket", 3) is None
+    assert TABLE.quote("Delhi", "Atlantis", "train", 3) is None
+
+
+def test_what_if_overrides_do_not_touch_baseline() -> None:
+    cheaper = TABLE.with_overrides({"plane": {"cost_per_km": 4}})
+
+    assert cheaper.quote("Delhi", "Goa", "plane", 1)["cost"] == 7200
+    assert TABLE.quote("Delhi", "Goa", "plane", 1)["cost"] == 9000
+    assert TRAVEL_MODES["plane"]["cost_per_km"] == 5
+    assert np.array_equal(cheaper.duration_hours, TABLE.duration_hours)
+
+
+def test_cli_writes_what_if_sheet(tmp_path) -> None:
+    output = tmp_path / "fares.csv"
+
+    main(["--travelers", "1", "2", "--modes", "plane", "--set", "plane.cost_per_km=4", "--output", str(output)])
+
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    pairs = len(ROUTES.cities) * (len(ROUTES.cities) - 1)
+    assert len(rows) == pairs * 2
+    row = next(r for r in rows if (r["origin"], r["destination"], r["travelers"]) == ("Delhi", "Goa", "2"))
+    assert (row["cost"], row["what_if_cost"], row["cost_change_pct"]) == ("18000", "14400", "-20.0")
@@ -0,0 +1,203 @@
+import asyncio
+import gc
+import json
+import os
+import random
+
+import pytest
+
+from agent import load_hotels
+from hotel_catalog import CatalogReloader, HotelCatalog, parse_catalog
+
+HOTEL_DATA = load_hotels()
+
+AMENITIES = ["Wi-Fi", "Pool", "Breakfast", "Spa", "Gym", "Beach Access"]
+
+
+def linear_filter(hotels, budget, amenities):
+    """The original suggest_hotels scan, kept as the reference behaviour."""
+    filtered = []
+    for hotel in hotels:
+        if not hotel["availability"]:
+            continue
+        if budget == "low" and hotel["price_per_night"] > 5000:
+            continue
+        if budget == "high" and hotel["price_per_night"] < 15000:
+            continue
+        if amenities and not all(a in hotel["amenities"] for a in amenities):
+            continue
+        filtered.append(hotel)
+    return filtered
+
+
+def synthetic_hotels(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"Hotel {i}",
+            "rating": rng.randint(1, 5),
+            "price_per_night": rng.choice([2000, 5000, 5001, 9000, 14999, 15000, 30000]),
+            "amenities": rng.sample(AMENITIES, rng.randint(0, len(AMENITIES))),
+            "availability": rng.random() > 0.2,
+            "description": "",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("budget", [None, "low", "medium", "high"])
+@pytest.mark.parametrize("amenities", [None, [], ["Wi-Fi"], ["Pool", "Spa"], ["Sauna"]])
+def test_matches_linear_scan(budget, amenities) -> None:
+    data = {**HOTEL_DATA, "Synthetic": synthetic_hotels(500)}
+    catalog = HotelCatalog(data)
+
+    for city, hotels in data.items():
+        expected = linear_filter(hotels, budget, amenities)
+        assert catalog.find_hotels(city, budget, amenities) == expected
+        assert catalog.find_hotels(city, budget, amenities, limit=3) == expected[:3]
+
+
+def test_name_lookup_is_case_insensitive() -> None:
+    catalog = HotelCatalog(HOTEL_DATA)
+
+    hotel = catalog.get_hotel("Mumbai", "taj MAHAL palace")
+
+    assert hotel is HOTEL_DATA["Mumbai"][0]
+    assert catalog.get_hotel("Mumbai", "Nowhere Inn") is None
+    assert catalog.get_hotel("Atlantis", "taj mahal palace") is None
+
+
+def test_find_by_price_is_cheapest_first() -> None:
+    catalog = HotelCatalog({"Synthetic": synthetic_hotels(200)})
+
+    results = catalog.find_by_price("Synthetic", 5000, 15000)
+
+    prices = [price for price, _ in results]
+    assert prices == sorted(prices)
+    assert all(5000 <= price <= 15000 for price in prices)
+    assert len(catalog.find_by_price("Synthetic", 5000, 15000, limit=4)) == 4
+
+
+def _write_hotels(path, price) -> None:
+    hotels = {"Goa": [{"name": "Sea View", "rating": 4, "price_per_night": price,
+                       "amenities": ["Wi-Fi"], "availability": True, "description": ""}]}
+    path.write_text(json.dumps(hotels), encoding="utf-8")
+
+
+@pytest.mark.asyncio
+async def test_reloader_swaps_in_edits(tmp_path) -> None:
+    path = tmp_path / "hotels.json"
+    _write_hotels(path, 4000)
+    reloader = CatalogReloader(str(path))
+    snapshot = reloader.catalog
+
+    assert not await reloader.check()
+
+    _write_hotels(path, 45000)
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert await reloader.check()
+
+    assert reloader.catalog.get_hotel("Goa", "sea view")["price_per_night"] == 45000
+    assert snapshot.get_hotel("Goa", "sea view")["price_per_night"] == 4000
+    assert reloader.stats["reloads"] == 1
+    assert reloader.stats["last_reload_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_reloader_picks_up_an_atomic_rename(tmp_path) -> None:
+    path = tmp_path / "hotels.json"
+    _write_hotels(path, 4000)
+    reloader = CatalogReloader(str(path))
+    mtime_ns = path.stat().st_mtime_ns
+
+    # Same size and mtime as the file it replaces: only the inode tells them apart
+    staged = tmp_path / "hotels.json.tmp"
+    _write_hotels(staged, 5000)
+    os.utime(staged, ns=(0, mtime_ns))
+    os.replace(staged, path)
+    assert await reloader.check()
+
+    assert reloader.catalog.get_hotel("Goa", "sea view")["price_per_night"] == 5000
+
+
+@pytest.mark.asyncio
+async def test_sessions_keep_their_snapshot_while_a_reload_swaps(tmp_path) -> None:
+    path = tmp_path / "hotels.json"
+    _write_hotels(path, 4000)
+    reloader = CatalogReloader(str(path))
+    session_catalog = reloader.catalog
+    seen = set()
+
+    async def read_while_reloading():
+        while not reloaded.done():
+            catalog = reloader.catalog
+            seen.add(id(catalog))
+            # Whichever catalog a reader gets is complete, never half built
+            assert catalog.get_hotel("Goa", "sea view")["price_per_night"] in (4000, 45000)
+            await asyncio.sleep(0)
+
+    _write_hotels(path, 45000)
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    reloaded = asyncio.ensure_future(reloader.check())
+    await asyncio.gather(reloaded, read_while_reloading())
+
+    assert reloaded.result()
+    assert id(session_catalog) in seen
+    assert seen <= {id(session_catalog), id(reloader.catalog)}
+    assert reloader.catalog is not session_catalog
+    assert session_catalog.get_hotel("Goa", "sea view")["price_per_night"] == 4000
+    assert reloader.catalog.get_hotel("Goa", "sea view")["price_per_night"] == 45000
+
+
+@pytest.mark.asyncio
+async def test_reload_leaves_the_garbage_collector_alone(tmp_path) -> None:
+    path = tmp_path / "hotels.json"
+    _write_hotels(path, 4000)
+    reloader = CatalogReloader(str(path))
+    frozen = gc.get_freeze_count()
+
+    _write_hotels(path, 45000)
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert await reloader.check()
+
+    # Collection is process-wide; a reload in a worker thread mustn't pause or freeze it for everyone
+    assert gc.isenabled()
+    assert gc.get_freeze_count() == frozen
+
+
+@pytest.mark.asyncio
+async def test_reloader_keeps_catalog_on_bad_file(tmp_path) -> None:
+    path = tmp_path / "hotels.json"
+    _write_hotels(path, 4000)
+    reloader = CatalogReloader(str(path))
+    snapshot = reloader.catalog
+
+    path.write_text('{"Goa": [', encoding="utf-8")
+    assert not await reloader.check()
+
+    assert reloader.catalog is snapshot
+    assert reloader.stats["failures"] == 1
+
+    # The broken file is retried, and the fixed one swapped in
+    assert not await reloader.check()
+    _write_hotels(path, 45000)
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert await reloader.check()
+    assert reloader.catalog.get_hotel("Goa", "sea view")["price_per_night"] == 45000
+    assert reloader.stats["failures"] == 2
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps(HOTEL_DATA, indent=2),
+    json.dumps(HOTEL_DATA, separators=(",", ":")),
+    '{ "Goa" : [ ] , "Agra": [{"name": "A"}] }',
+    "{}",
+])
+def test_parse_catalog_matches_json(text) -> None:
+    assert parse_catalog(text) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ['{"Goa": [', '{"Goa": [{}] } x', '[]', '{"Goa": {}}'])
+def test_parse_catalog_rejects_invalid(text) -> None:
+    with pytest.raises(ValueError):
+        parse_catalog(text)
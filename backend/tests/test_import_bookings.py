@@ -0,0 +1,198 @@
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+import import_bookings
+from booking_cache import BookingCache
+from import_bookings import iter_bookings_file, iter_json, iter_ndjson
+from mongodb_utils import DUPLICATE_KEY_ERROR, AsyncBookingRepository, save_bookings
+
+
+class FakeCollection:
+    """Unordered bulk writes against a unique booking_id index."""
+
+    def __init__(self, docs=()):
+        self.docs = {d["booking_id"]: d for d in docs}
+        self.calls = []
+
+    def _raise(self, written, errors, replace):
+        counts = {"nUpserted": written, "nMatched": 0} if replace else {"nInserted": written}
+        raise BulkWriteError({**counts, "writeErrors": errors})
+
+    def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        self.calls.append(len(docs))
+        errors = []
+        for i, doc in enumerate(docs):
+            if doc.get("invalid"):
+                errors.append({"index": i, "code": 121, "errmsg": "Document failed validation"})
+            elif doc["booking_id"] in self.docs:
+                errors.append({"index": i, "code": DUPLICATE_KEY_ERROR, "errmsg": "E11000 duplicate key error"})
+            else:
+                self.docs[doc["booking_id"]] = doc
+        if errors:
+            self._raise(len(docs) - len(errors), errors, replace=False)
+        return SimpleNamespace(inserted_ids=list(range(len(docs))))
+
+    def bulk_write(self, requests, ordered=True):
+        assert ordered is False
+        self.calls.append(len(requests))
+        upserted = matched = 0
+        for request in requests:
+            doc = request._doc
+            if doc["booking_id"] in self.docs:
+                matched += 1
+            else:
+                upserted += 1
+            self.docs[doc["booking_id"]] = doc
+        return SimpleNamespace(upserted_count=upserted, matched_count=matched)
+
+
+class AsyncFakeCollection(FakeCollection):
+    async def insert_many(self, docs, ordered=True):
+        return FakeCollection.insert_many(self, docs, ordered)
+
+    async def bulk_write(self, requests, ordered=True):
+        return FakeCollection.bulk_write(self, requests, ordered)
+
+
+def bookings(n, start=0):
+    return [{"booking_id": f"bk{i:06d}", "customer_name": f"Guest {i}", "status": "confirmed"}
+            for i in range(start, start + n)]
+
+
+def test_save_bookings_writes_in_chunks():
+    collection = FakeCollection()
+    report = save_bookings(iter(bookings(25)), chunk_size=10, collection=collection)
+
+    assert report.written == 25
+    assert report.failed == 0
+    assert collection.calls == [10, 10, 5]
+    # Ids are normalised and a timestamp is filled in, as save_booking does
+    assert "BK000000" in collection.docs
+    assert "timestamp" in collection.docs["BK000000"]
+
+
+def test_save_bookings_reports_duplicates_per_document():
+    collection = FakeCollection([{"booking_id": "BK000003"}, {"booking_id": "BK000007"}])
+    report = save_bookings(bookings(10), chunk_size=4, collection=collection)
+
+    # Unordered writes keep going past the duplicates
+    assert report.written == 8
+    assert report.duplicates == ["BK000003", "BK000007"]
+    assert report.errors == []
+    assert len(collection.docs) == 10
+
+
+def test_save_bookings_reports_other_errors_and_missing_ids():
+    data = [*bookings(3), {"customer_name": "No id"}]
+    data[1]["invalid"] = True
+    report = save_bookings(data, collection=FakeCollection())
+
+    assert report.written == 2
+    assert [e["booking_id"] for e in report.errors] == [None, "BK000001"]
+    assert report.errors[1]["code"] == 121
+    assert report.failed == 2
+
+
+def test_save_bookings_does_not_mutate_input():
+    data = bookings(2)
+    data[0]["_id"] = "old"
+    save_bookings(data, collection=FakeCollection())
+    assert data[0]["booking_id"] == "bk000000"
+    assert data[0]["_id"] == "old"
+    assert "timestamp" not in data[1]
+
+
+def test_save_bookings_replace_upserts():
+    collection = FakeCollection([{"booking_id": "BK000001", "status": "cancelled"}])
+    report = save_bookings(bookings(3), replace=True, collection=collection)
+
+    assert report.written == 3
+    assert report.duplicates == []
+    assert collection.docs["BK000001"]["status"] == "confirmed"
+
+
+@pytest.mark.asyncio
+async def test_async_save_bookings_invalidates_cache_on_replace():
+    cache = BookingCache()
+    cache.put("BK000001", {"booking_id": "BK000001", "status": "cancelled"})
+    repository = AsyncBookingRepository(cache=cache)
+    repository._collection = AsyncFakeCollection([{"booking_id": "BK000001"}])
+
+    report = await repository.save_bookings(bookings(5), chunk_size=2)
+    assert report.written == 4
+    assert report.duplicates == ["BK000001"]
+    assert cache.get("BK000001") is not None
+
+    report = await repository.save_bookings(bookings(5), chunk_size=2, replace=True)
+    assert report.written == 5
+    assert cache.get("BK000001") is None
+
+
+def test_iter_json_streams_array_across_reads(monkeypatch):
+    monkeypatch.setattr(import_bookings, "READ_SIZE", 7)
+    data = bookings(50)
+    data[3]["notes"] = "brackets ] and, commas [ in strings"
+    assert list(iter_json(io.StringIO(json.dumps(data, indent=2)))) == data
+    assert list(iter_json(io.StringIO("  [ ]"))) == []
+
+
+def test_iter_json_rejects_truncated_array(monkeypatch):
+    monkeypatch.setattr(import_bookings, "READ_SIZE", 16)
+    text = json.dumps(bookings(3))[:-20]
+    with pytest.raises(ValueError):
+        list(iter_json(io.StringIO(text)))
+
+
+def test_iter_json_legacy_objects():
+    keyed = {"BK000001": {"customer_name": "A"}, "BK000002": {"customer_name": "B"}}
+    assert list(iter_json(io.StringIO(json.dumps(keyed)))) == [
+        {"booking_id": "BK000001", "customer_name": "A"},
+        {"booking_id": "BK000002", "customer_name": "B"},
+    ]
+    wrapped = {"bookings": bookings(2)}
+    assert list(iter_json(io.StringIO(json.dumps(wrapped)))) == bookings(2)
+    single = bookings(1)[0]
+    assert list(iter_json(io.StringIO(json.dumps(single)))) == [single]
+
+
+def test_iter_ndjson_skips_blank_lines_and_reports_bad_ones():
+    text = "\n".join(json.dumps(b) for b in bookings(3)) + "\n\n"
+    assert list(iter_ndjson(io.StringIO(text))) == bookings(3)
+    with pytest.raises(ValueError, match="Line 2"):
+        list(iter_ndjson(io.StringIO('{"booking_id": "A"}\n{oops\n')))
+
+
+def test_iter_bookings_file_detects_format(tmp_path):
+    ndjson = tmp_path / "bookings.ndjson"
+    ndjson.write_text("\n".join(json.dumps(b) for b in bookings(2)))
+    array = tmp_path / "booking.json"
+    array.write_text(json.dumps(bookings(2)))
+    assert list(iter_bookings_file(str(ndjson))) == bookings(2)
+    assert list(iter_bookings_file(str(array))) == bookings(2)
+
+
+def test_main_reports_and_exits_nonzero_on_errors(tmp_path, monkeypatch, capsys):
+    import mongodb_utils
+
+    collection = FakeCollection([{"booking_id": "BK000000"}])
+    monkeypatch.setattr(mongodb_utils, "get_mongodb_connection", lambda: (None, None, collection))
+    path = tmp_path / "bookings.jsonl"
+    path.write_text("\n".join(json.dumps(b) for b in bookings(4)))
+
+    with pytest.raises(SystemExit) as exit_info:
+        import_bookings.main([str(path), "--chunk-size", "2"])
+    assert exit_info.value.code == 0
+    out = capsys.readouterr().out
+    assert "3 written, 1 duplicates, 0 errors" in out
+    assert "duplicate: BK000000" in out
+
+    bad = tmp_path / "bad.json"
+    bad.write_text("[{")
+    with pytest.raises(SystemExit) as exit_info:
+        import_bookings.main([str(bad)])
+    assert exit_info.value.code == 1
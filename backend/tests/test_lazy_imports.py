@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+
+LAZY_MODULES = [
+    "livekit.plugins.google",
+    "livekit.plugins.murf",
+    "livekit.plugins.deepgram",
+    "livekit.plugins.silero",
+    "livekit.plugins.noise_cancellation",
+    "pymongo",
+    "smtplib",
+    "mongodb_utils",
+    "email_outbox",
+    "compiled_catalog",
+    "capacity",
+    "room_inventory",
+    "name_matcher",
+]
+
+
+def test_importing_agent_loads_no_plugins_storage_or_catalog() -> None:
+    probe = f"import sys, agent; print([m for m in {LAZY_MODULES!r} if m in sys.modules], agent._catalog_state)"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=SRC, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[] None"
+
+
+def test_accessors_load_on_first_use() -> None:
+    probe = (
+        "import sys, agent; agent.get_fare_table(); agent.get_booking_repository(); agent.get_room_inventory(); "
+        "print('compiled_catalog' in sys.modules, 'pymongo' in sys.modules, 'room_inventory' in sys.modules, "
+        "agent._catalog_state is not None)"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], cwd=SRC, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "True True True True"
+
+
+def test_outbox_for_sqlite_loads_no_mongo_driver() -> None:
+    probe = ("import sys, email_outbox; email_outbox.get_email_outbox(); "
+             "print('pymongo' in sys.modules, 'mongodb_utils' in sys.modules)")
+    env = {**os.environ, "BOOKING_STORE": "sqlite", "BOOKING_SQLITE_PATH": ":memory:"}
+    result = subprocess.run([sys.executable, "-c", probe], cwd=SRC, env=env, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False False"
@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from livekit.agents.llm import is_function_tool
+from prometheus_client import CollectorRegistry, generate_latest
+
+import agent
+import metrics
+from booking_store import MemoryBookingStore
+
+
+@pytest.fixture
+def registry():
+    registry = CollectorRegistry()
+    metrics.enable(registry)
+    yield registry
+    metrics.disable()
+
+
+def sample(registry, name, operation, component="tool", room=""):
+    labels = {"component": component, "operation": operation, "room": room}
+    return registry.get_sample_value(name, labels)
+
+
+def context(**state):
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState(**state)))
+
+
+def test_disabled_is_a_no_op(monkeypatch):
+    monkeypatch.delenv("METRICS_PORT", raising=False)
+    metrics.disable()
+    store = MemoryBookingStore()
+
+    assert metrics.instrument_tool(agent.set_trip_details) is agent.set_trip_details
+    assert metrics.instrument_store(store) is store
+    assert metrics.timer("tool", "x") is metrics.timer("store", "y")
+    assert metrics.worker_options() == {}
+
+
+def test_worker_options_serve_job_metrics(monkeypatch, tmp_path):
+    monkeypatch.setenv("METRICS_PORT", "9464")
+    monkeypatch.setenv("METRICS_MULTIPROC_DIR", str(tmp_path))
+
+    assert metrics.worker_options() == {"prometheus_port": 9464, "prometheus_multiproc_dir": str(tmp_path)}
+
+
+async def test_tool_calls_are_timed_per_room(registry):
+    tool = metrics.instrument_tool(agent.set_trip_details)
+    assert is_function_tool(tool)
+    assert tool.info.name == "set_trip_details"
+
+    metrics.set_room("room-a")
+    assert "Goa" in await tool(context(), "goa")
+    await tool(context(), "goa")
+
+    assert sample(registry, "travel_agent_call_duration_seconds_count", "set_trip_details", room="room-a") == 2
+    assert sample(registry, "travel_agent_calls_in_flight", "set_trip_details", room="room-a") == 0
+    assert not sample(registry, "travel_agent_call_errors_total", "set_trip_details", room="room-a")
+
+
+async def test_errors_and_in_flight(registry):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        with metrics.timer("smtp", "send", room=False):
+            started.set()
+            await release.wait()
+            raise OSError("connection reset")
+
+    task = asyncio.create_task(slow())
+    await started.wait()
+    assert sample(registry, "travel_agent_calls_in_flight", "send", component="smtp") == 1
+    release.set()
+    with pytest.raises(OSError):
+        await task
+
+    assert sample(registry, "travel_agent_calls_in_flight", "send", component="smtp") == 0
+    assert sample(registry, "travel_agent_call_errors_total", "send", component="smtp") == 1
+
+
+async def test_store_calls_are_timed(registry):
+    inner = MemoryBookingStore()
+    store = metrics.instrument_store(inner)
+
+    assert await store.save_booking({"booking_id": "ABCD1234", "email": "a@example.com", "status": "confirmed"})
+    assert (await store.get_booking("ABCD1234"))["email"] == "a@example.com"
+    assert store.invalidator is inner.invalidator
+
+    assert sample(registry, "travel_agent_call_duration_seconds_count", "save_booking", component="store") == 1
+    assert sample(registry, "travel_agent_call_duration_seconds_count", "get_booking", component="store") == 1
+    text = generate_latest(registry).decode()
+    assert 'travel_agent_call_duration_seconds_bucket{component="store",le="0.001",operation="get_booking",room=""}' in text
+
+
+def test_room_label_can_be_dropped():
+    registry = CollectorRegistry()
+    metrics.enable(registry, room_label=False)
+    try:
+        metrics.set_room("room-b")
+        with metrics.timer("tool", "set_origin"):
+            pass
+    finally:
+        metrics.disable()
+
+    assert sample(registry, "travel_agent_call_duration_seconds_count", "set_origin") == 1
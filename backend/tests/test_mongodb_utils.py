@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from mongodb_utils import AsyncBookingRepository
+
+# Nothing listens on port 1, so every operation waits out server selection
+UNREACHABLE_URI = "mongodb://127.0.0.1:1"
+
+
+def _unreachable_repository() -> AsyncBookingRepository:
+    return AsyncBookingRepository(
+        uri=UNREACHABLE_URI,
+        serverSelectionTimeoutMS=300,
+        connectTimeoutMS=300,
+    )
+
+
+async def _ticker(stop: asyncio.Event, interval: float = 0.01) -> int:
+    ticks = 0
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        ticks += 1
+    return ticks
+
+
+@pytest.mark.asyncio
+async def test_unreachable_server_does_not_block_event_loop() -> None:
+    """A cold or unreachable server must not freeze other coroutines."""
+    repository = _unreachable_repository()
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop))
+
+    start = time.perf_counter()
+    booking = await repository.get_booking("abcd1234")
+    elapsed = time.perf_counter() - start
+    stop.set()
+    ticks = await ticker
+
+    assert booking is None
+    assert elapsed >= 0.25
+    # The ticker should have kept running for most of the server selection wait
+    assert ticks >= int(elapsed / 0.01 * 0.5)
+
+
+@pytest.mark.asyncio
+async def test_failed_operations_report_failure() -> None:
+    repository = _unreachable_repository()
+
+    results = await asyncio.gather(
+        repository.save_booking({"booking_id": "ABCD1234"}),
+        repository.update_booking("abcd1234", {"status": "cancelled"}),
+        repository.delete_booking("abcd1234"),
+        repository.load_bookings(),
+    )
+
+    assert results == [False, False, False, []]
+
+
+def test_client_options_override_pool_defaults() -> None:
+    repository = AsyncBookingRepository(maxPoolSize=5, w="majority")
+
+    assert repository.client_options["maxPoolSize"] == 5
+    assert repository.client_options["w"] == "majority"
+    assert "serverSelectionTimeoutMS" in repository.client_options
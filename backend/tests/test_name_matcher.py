@@ -0,0 +1,175 @@
+import gc
+import weakref
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+from hotel_catalog import HotelCatalog
+from name_matcher import CITY_ALIASES, NameMatcher, normalise, phonetic_key
+
+# How speech-to-text writes what callers say, and the destination they mean (the top suggestion)
+CITY_QUERIES = [
+    ("Udaypur", "Udaipur"), ("oodaipoor", "Udaipur"), ("Bengaluru", "Bangalore"), ("banglore", "Bangalore"),
+    ("Bombay", "Mumbai"), ("mumbay", "Mumbai"), ("Kochi", "Kerala"), ("cochin", "Kerala"),
+    ("trivandrum", "Kerala"), ("Kerela", "Kerala"), ("calcutta", "Kolkata"), ("kolkatta", "Kolkata"),
+    ("hydrabad", "Hyderabad"), ("haiderabad", "Hyderabad"), ("chenai", "Chennai"), ("Madras", "Chennai"),
+    ("dehli", "Delhi"), ("New Delhi", "Delhi"), ("jaipoor", "Jaipur"), ("simla", "Shimla"),
+    ("shimlah", "Shimla"), ("manaali", "Manali"), ("aagra", "Agra"), ("go a", "Goa"), ("panjim", "Goa"),
+]
+
+# Of those, the ones resolved without asking: names, aliases, close spellings and sound-alikes that
+# only one name fits and that are still spelt much like it
+CITY_RESOLVED = {"Udaypur", "Bengaluru", "banglore", "Bombay", "mumbay", "Kochi", "cochin", "trivandrum", "Kerela",
+                 "calcutta", "kolkatta", "hydrabad", "haiderabad", "chenai", "Madras", "New Delhi", "simla",
+                 "shimlah", "manaali", "aagra", "panjim"}
+
+# Real cities we don't serve that sound like, contain or are spelt like ones we do
+NEAR_MISSES = ["Kota", "Gaya", "Mangalore", "Madurai", "Puri", "Delhi Cantt", "Goa Velha"]
+
+# (city, heard, hotel meant)
+HOTEL_QUERIES = [
+    ("Mumbai", "taj mahal palace hotel", "Taj Mahal Palace"),
+    ("Mumbai", "the oberoi", "The Oberoi Mumbai"),
+    ("Mumbai", "trident", "Trident Nariman Point"),
+    ("Mumbai", "itc grand central", "ITC Grand Central"),
+    ("Goa", "taj mahal palace", "The Taj Mahal Palace Goa"),
+    ("Goa", "park hyat", "Park Hyatt Goa Resort and Spa"),
+    ("Delhi", "leela palace", "The Leela Palace New Delhi"),
+    ("Jaipur", "rambag palace", "Rambagh Palace"),
+    ("Jaipur", "oberoi raj vilas", "The Oberoi Rajvilas"),
+    ("Udaipur", "oberoi udai vilas", "The Oberoi Udaivilas"),
+    ("Udaipur", "lake palace", "Taj Lake Palace"),
+    ("Hyderabad", "falaknuma palace", "Taj Falaknuma Palace"),
+    ("Hyderabad", "itc kohinoor", "ITC Kohenur"),
+    ("Kolkata", "hotel and motel sitara", "Hotel & Motel Sitara"),
+    ("Agra", "amar vilas", "The Oberoi Amarvilas"),
+    ("Chennai", "grand chola", "ITC Grand Chola"),
+    ("Shimla", "wild flower hall", "Wildflower Hall"),
+    ("Manali", "johnson lodge", "Johnson Lodge & Spa"),
+]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return agent.get_catalog_reloader().catalog
+
+
+def test_phonetic_key_folds_spelling_variants() -> None:
+    keys = {phonetic_key(normalise(name)) for name in ["Udaypur", "udaipur", "Oodaipoor"]}
+    assert len(keys) == 1
+    assert phonetic_key("kochi") != phonetic_key("cochin")
+    assert normalise("The Taj Hotel & Spa") == "taj spa"
+
+
+def test_city_accuracy(catalog) -> None:
+    matcher = agent.city_matcher(catalog)
+
+    wrong = [(heard, matcher.suggest(heard)) for heard, city in CITY_QUERIES if matcher.suggest(heard)[:1] != [city]]
+    resolved = {heard: matcher.resolve(heard) for heard, _ in CITY_QUERIES}
+
+    assert not wrong
+    assert {heard for heard, city in CITY_QUERIES if resolved[heard] == city} == CITY_RESOLVED
+    assert {resolved[heard] for heard, _ in CITY_QUERIES if heard not in CITY_RESOLVED} == {None}
+
+
+@pytest.mark.parametrize("heard", NEAR_MISSES)
+def test_near_miss_cities_are_not_resolved(catalog, heard) -> None:
+    assert agent.city_matcher(catalog).resolve(heard) is None
+    assert agent.origin_matcher().resolve(heard) is None
+
+
+def test_hotel_accuracy(catalog) -> None:
+    wrong = []
+    for city, heard, hotel in HOTEL_QUERIES:
+        matcher = agent.hotel_matcher(catalog, city)
+        resolved, suggested = matcher.resolve(heard), matcher.suggest(heard)
+        # Resolved to the hotel meant, or left for the caller to confirm with it offered first
+        if resolved not in (hotel, None) or suggested[:1] != [hotel]:
+            wrong.append((city, heard, resolved, suggested))
+
+    assert not wrong
+
+
+@pytest.mark.parametrize(("heard", "city"), [("Udaypur", "Udaipur"), ("Jaipurr", "Jaipur"), ("Shimlaa", "Shimla"),
+                                             ("Manaali", "Manali")])
+def test_sound_alike_spellings_resolve(catalog, heard, city) -> None:
+    assert agent.city_matcher(catalog).resolve(heard) == city
+    assert agent.origin_matcher().resolve(heard) == city
+
+
+def test_sound_alikes_shared_by_two_names_are_not_resolved() -> None:
+    matcher = NameMatcher(["Puri", "Pori"])
+
+    assert matcher.resolve("poory") is None
+    assert set(matcher.suggest("poory")) == {"Puri", "Pori"}
+
+
+def test_unknown_and_ambiguous_names_are_not_resolved(catalog) -> None:
+    matcher = agent.city_matcher(catalog)
+
+    assert matcher.resolve("London") is None
+    assert matcher.match("London") == []
+    # Two destinations in one phrase: offered back instead of picking one
+    assert matcher.resolve("Shimla Manali") is None
+    assert set(matcher.suggest("Shimla Manali")) == {"Shimla", "Manali"}
+
+
+def test_matchers_let_replaced_catalogs_go() -> None:
+    old = HotelCatalog({"Goa": [{"name": "Taj Exotica", "rating": 5, "price_per_night": 20000,
+                                 "amenities": [], "availability": True}]})
+    assert agent.city_matcher(old).resolve("goa") == "Goa"
+    assert agent.hotel_matcher(old, "Goa") is agent.hotel_matcher(old, "Goa")
+    ref = weakref.ref(old)
+
+    del old
+    gc.collect()
+
+    assert ref() is None
+
+
+def test_ranked_matches_name_the_alias_that_matched() -> None:
+    matcher = NameMatcher(["Bangalore", "Mangalore"], {"Bengaluru": "Bangalore"})
+
+    best, runner_up = matcher.match("bengaluru")
+
+    assert (best.name, best.score, best.matched) == ("Bangalore", 1.0, "Bengaluru")
+    assert runner_up.name == "Mangalore" and runner_up.score < best.score
+    # Aliases for names that aren't indexed are dropped
+    assert len(NameMatcher(["Goa"], CITY_ALIASES)) == 3
+
+
+def context(**state):
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState(**state)))
+
+
+async def test_tools_resolve_misheard_names() -> None:
+    ctx = context()
+
+    assert "Saved destination Udaipur, origin Mumbai." in await agent.set_trip_details(
+        ctx, destination="udaipur", origin="bombay")
+    assert "Selected The Oberoi Udaivilas." in await agent.select_hotel(ctx, "oberoi udai vilas")
+    assert ctx.userdata.travel_state.hotel_name == "The Oberoi Udaivilas"
+
+
+async def test_tools_confirm_sound_alike_cities() -> None:
+    ctx = context()
+
+    reply = await agent.set_trip_details(ctx, destination="Gaya", origin="Kota")
+
+    assert "we don't have hotels in Gaya (did you mean Goa? Confirm with the caller)" in reply
+    assert "we have no routes from Kota (did you mean Kolkata? Confirm with the caller)" in reply
+    state = ctx.userdata.travel_state
+    assert (state.destination, state.origin) == (None, None)
+    # An origin nothing sounds like is kept as said
+    assert "Saved origin Pune." in await agent.set_trip_details(ctx, origin="pune")
+
+
+async def test_tools_offer_close_names_back() -> None:
+    ctx = context(destination="Mumbai")
+
+    assert "(did you mean Shimla or Manali? Confirm with the caller)" in await agent.set_trip_details(ctx, destination="Shimla Manali")
+    assert ctx.userdata.travel_state.destination == "Mumbai"
+    reply = await agent.select_hotel(ctx, "Marine Drive Palace")
+    assert "not found" in reply and "Taj Mahal Palace" in reply
+    assert ctx.userdata.travel_state.hotel_name is None
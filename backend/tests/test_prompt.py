@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+from livekit.agents import AgentSession, llm
+from livekit.agents.llm import ChatChunk, ChoiceDelta
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+import agent
+from booking_store import MemoryBookingStore
+
+
+class RecordingStream(llm.LLMStream):
+    async def _run(self):
+        self._event_ch.send_nowait(ChatChunk(id="reply", delta=ChoiceDelta(role="assistant", content="Sure.")))
+
+
+class RecordingLLM(llm.LLM):
+    def __init__(self):
+        super().__init__()
+        self.contexts = []
+
+    def chat(self, *, chat_ctx, tools=None, conn_options=DEFAULT_API_CONNECT_OPTIONS, **kwargs):
+        self.contexts.append(chat_ctx)
+        return RecordingStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+def system_messages(chat_ctx):
+    return [item.text_content for item in chat_ctx.items if item.type == "message" and item.role == "system"]
+
+
+def test_instructions_do_not_list_destinations() -> None:
+    catalog = agent.get_catalog_reloader().catalog
+
+    # Only the city in the summary format example
+    assert [city for city in catalog.destinations() if city in agent.INSTRUCTIONS] == ["Goa"]
+    assert "list_destinations" in agent.INSTRUCTIONS
+
+
+def test_progress_names_collected_details_and_next_step() -> None:
+    state = agent.TravelState()
+    assert agent.describe_progress(state) == "Trip so far: nothing yet. Next: ask for the destination."
+
+    state = agent.TravelState(destination="Goa", origin="Mumbai", num_adults=2, budget="medium", amenities=())
+    assert agent.describe_progress(state) == (
+        "Trip so far: destination: Goa; origin: Mumbai; travelers: 2 adults, 0 children; "
+        "budget: medium; amenities: none. Next: ask for the travel dates."
+    )
+
+
+def test_progress_after_booking() -> None:
+    state = agent.TravelState(destination="Goa", hotel_name="Taj Fort Aguada", booking_id="ABCD1234")
+
+    assert agent.describe_progress(state).endswith("hotel: Taj Fort Aguada. Booked as ABCD1234.")
+
+
+async def test_list_destinations() -> None:
+    ctx = SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState()))
+    catalog = ctx.userdata.catalog
+
+    assert await agent.list_destinations(ctx) == f"{len(catalog.destinations())} destination(s): {', '.join(catalog.destinations())}."
+    assert "Goa" in await agent.list_destinations(ctx, "go")
+    assert "No destinations match" in await agent.list_destinations(ctx, "Atlantis")
+
+
+def progress_notes(chat_ctx):
+    return [item.text_content for item in chat_ctx.items
+            if item.type == "message" and item.role == "user" and item.text_content.startswith("<trip_progress>")]
+
+
+async def test_progress_is_sent_when_it_changes(monkeypatch) -> None:
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: MemoryBookingStore())
+    fake_llm = RecordingLLM()
+    userdata = agent.Userdata(travel_state=agent.TravelState())
+
+    async with AgentSession(llm=fake_llm, userdata=userdata) as session:
+        await session.start(agent.TravelAgent())
+        await session.run(user_input="Hi")
+        userdata.travel_state.destination = "Goa"
+        await session.run(user_input="Goa please")
+        await session.run(user_input="Hmm")
+
+    first, second, third = fake_llm.contexts
+    # The system prompt is the instructions alone, the same for every call
+    assert system_messages(first) == system_messages(second) == system_messages(third) == [agent.INSTRUCTIONS]
+    assert first.items[-1].role == "user"
+    assert first.items[-1].text_content == (
+        "<trip_progress>\nTrip so far: nothing yet. Next: ask for the destination.\n</trip_progress>")
+    assert "destination: Goa. Next: ask for the origin city." in second.items[-1].text_content
+    # Nothing changed since the last call, and progress is not kept in the session history
+    assert progress_notes(third) == []
+    assert [item.text_content for item in third.items if item.type == "message" and item.role == "user"] == [
+        "Hi", "Goa please", "Hmm"]
+
+
+async def test_restored_trip_opens_the_history(monkeypatch) -> None:
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: MemoryBookingStore())
+    fake_llm = RecordingLLM()
+    restored = agent.TravelState(destination="Goa", origin="Mumbai")
+    userdata = agent.Userdata(travel_state=restored)
+
+    async with AgentSession(llm=fake_llm, userdata=userdata) as session:
+        await session.start(agent.TravelAgent(restored))
+        await session.run(user_input="Where were we?")
+        await session.run(user_input="Right")
+
+    note = f"<trip_progress>\n{agent.describe_progress(restored)}\n</trip_progress>"
+    assert progress_notes(fake_llm.contexts[0]) == progress_notes(fake_llm.contexts[1]) == [note]
+    # Kept in the history, ahead of the caller's first words
+    users = [item.text_content for item in fake_llm.contexts[1].items if item.type == "message" and item.role == "user"]
+    assert users == [note, "Where were we?", "Right"]
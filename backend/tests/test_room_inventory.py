@@ -0,0 +1,120 @@
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+from booking_store import MemoryBookingStore, SQLiteBookingStore
+from room_inventory import CityRooms, RoomInventory, hotel_rooms, stay_nights
+from trip_quotes import trip_dates
+
+FIRST = date(2025, 12, 1)
+HOTELS = [{"name": "A", "rooms": 2}, {"name": "B", "rooms": 5}, {"name": "C", "availability": False}]
+
+
+def day(d: int) -> date:
+    """The d-th night of the matrix, counting from 1."""
+    return FIRST + timedelta(days=d - 1)
+
+
+def test_city_rooms_free_bits() -> None:
+    rooms = CityRooms(HOTELS, {"A": {"2025-12-03": 2}, "B": {"2025-12-04": 3, "2025-11-30": 5}, "Gone": {}},
+                      FIRST, nights=30)
+
+    assert rooms.free_bits(day(1), day(3), 1) == 0b011
+    # A is full on the 3rd; B has 2 rooms left on the 4th
+    assert rooms.free_bits(day(2), day(5), 1) == 0b010
+    assert rooms.free_bits(day(2), day(5), 3) == 0
+    rooms.add("B", day(4), day(5), -3)
+    assert rooms.free_bits(day(2), day(5), 3) == 0b010
+    # Past the horizon nothing is known to be booked, so only capacity counts
+    assert rooms.free_bits(day(40), day(45), 2) == 0b011
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+async def bookings(request, monkeypatch, tmp_path):
+    store = MemoryBookingStore() if request.param == "memory" else SQLiteBookingStore(str(tmp_path / "bookings.db"))
+    outbox = SimpleNamespace(enqueue_booking_confirmation=lambda booking: asyncio.sleep(0, True))
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: store)
+    monkeypatch.setattr(agent, "get_email_outbox", lambda: outbox)
+    # Every session in a test shares one inventory, as sessions in a worker process do
+    inventory = RoomInventory(lambda: store)
+    monkeypatch.setattr(agent, "get_room_inventory", lambda: inventory)
+    yield store
+    await store.close()
+
+
+def context(**state):
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState(**state)))
+
+
+async def book(ctx, hotel, dates="12-18 Dec", travelers=2):
+    await agent.set_trip_details(ctx, destination="Goa", origin="Mumbai", dates=dates, num_adults=travelers,
+                                 num_children=0, budget="medium", amenities="none")
+    await agent.select_travel_mode(ctx, "plane")
+    await agent.select_hotel(ctx, hotel["name"])
+    await agent.set_customer_name(ctx, "Asha")
+    await agent.set_mobile_number(ctx, "9876543210")
+    await agent.set_email(ctx, "asha@example.com")
+    return await agent.confirm_booking(ctx)
+
+
+async def fill(store, hotel, dates="12-18 Dec", left=0):
+    nights = stay_nights(*trip_dates(dates))
+    assert await store.reserve_rooms("Goa", hotel["name"], nights, hotel_rooms(hotel) - left, hotel_rooms(hotel))
+
+
+async def test_index_follows_own_reservations(bookings) -> None:
+    catalog = agent.get_catalog_reloader().catalog
+    hotel = catalog.hotels("Goa")[0]
+    stay = trip_dates("12-18 Dec")
+    inventory = RoomInventory(lambda: bookings, refresh=3600)
+    assert inventory.free_hotels(catalog, "Goa", *stay, 1) is None
+
+    await inventory.load(catalog, "Goa")
+    assert inventory.free_hotels(catalog, "Goa", *stay, 1) & 1
+    assert await inventory.reserve("Goa", hotel, *stay, hotel_rooms(hotel))
+    assert not inventory.free_hotels(catalog, "Goa", *stay, 1) & 1
+    assert await inventory.release("Goa", hotel["name"], *stay, 1)
+    assert inventory.free_hotels(catalog, "Goa", *stay, 1) & 1
+
+
+async def test_suggestions_skip_hotels_full_on_the_dates(bookings) -> None:
+    ctx = context(destination="Goa", budget="medium", amenities=())
+    full = (await ctx.userdata.quotes.shortlist(ctx.userdata.travel_state))[0]
+    await fill(bookings, full)
+
+    ctx = context(destination="Goa", budget="medium", amenities=())
+    await agent.set_trip_details(ctx, dates="12-18 Dec")
+    assert full["name"] not in await agent.suggest_hotels(ctx)
+    await agent.set_trip_details(ctx, dates="20-22 Dec")
+    assert full["name"] in await agent.suggest_hotels(ctx)
+
+
+async def test_booking_holds_rooms_until_cancelled(bookings) -> None:
+    ctx = context()
+    hotel = agent.get_catalog_reloader().catalog.hotels("Goa")[0]
+    await fill(bookings, hotel, left=2)
+
+    assert "booking has been confirmed" in await book(ctx, hotel, travelers=3)
+    booking = await bookings.get_booking(ctx.userdata.travel_state.booking_id)
+    check_in, check_out = trip_dates("12-18 Dec")
+    assert (booking["check_in"], booking["check_out"], booking["rooms"]) == (
+        check_in.isoformat(), check_out.isoformat(), 2)
+    assert "no longer has 1 room(s) free" in await book(context(), hotel, travelers=1)
+
+    assert "cancelled" in await agent.cancel_booking(ctx, booking["booking_id"])
+    assert "booking has been confirmed" in await book(context(), hotel, travelers=1)
+
+
+async def test_concurrent_bookings_for_the_last_room(bookings) -> None:
+    hotel = agent.get_catalog_reloader().catalog.hotels("Goa")[0]
+    await fill(bookings, hotel, left=1)
+
+    replies = await asyncio.gather(*(book(context(), hotel) for _ in range(30)))
+
+    assert sum("booking has been confirmed" in reply for reply in replies) == 1
+    assert sum("no longer has 1 room(s) free" in reply for reply in replies) == 29
+    booked = await bookings.load_room_nights("Goa", since="2000-01-01")
+    assert set(booked[hotel["name"]].values()) == {hotel_rooms(hotel)}
@@ -0,0 +1,56 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+from agent import DISTANCES, get_route_graph
+from route_graph import RouteGraph
+
+ROUTE_GRAPH = get_route_graph()
+
+
+def test_direct_pairs_keep_table_distance() -> None:
+    for (a, b), km in DISTANCES.items():
+        assert ROUTE_GRAPH.distance(a, b) == km
+        assert ROUTE_GRAPH.distance(b, a) == km
+        assert ROUTE_GRAPH.path(a, b) == [a, b]
+
+
+def test_every_pair_is_quoted() -> None:
+    for a, b in itertools.permutations(ROUTE_GRAPH.cities, 2):
+        distance = ROUTE_GRAPH.distance(a, b)
+        assert distance is not None and distance > 0
+        legs = ROUTE_GRAPH.legs(a, b)
+        assert legs[0]["from"] == a and legs[-1]["to"] == b
+        assert sum(leg["distance_km"] for leg in legs) == distance
+
+
+def test_missing_pair_uses_multi_leg_route() -> None:
+    assert ("Manali", "Goa") not in DISTANCES and ("Goa", "Manali") not in DISTANCES
+
+    assert ROUTE_GRAPH.distance("Manali", "Goa") == 540 + 1800
+    assert ROUTE_GRAPH.legs("Manali", "Goa") == [
+        {"from": "Manali", "to": "Delhi", "distance_km": 540, "mode": "private_car"},
+        {"from": "Delhi", "to": "Goa", "distance_km": 1800, "mode": "plane"},
+    ]
+
+
+def test_unknown_and_disconnected_cities() -> None:
+    graph = RouteGraph({("A", "B"): 10, ("C", "D"): 20})
+
+    assert graph.distance("A", "Atlantis") is None
+    assert graph.distance("A", "C") is None
+    assert graph.path("A", "C") == []
+    assert graph.distance_via("A", "B", "A") == 20
+
+
+@pytest.mark.asyncio
+async def test_select_travel_mode_quotes_missing_pair() -> None:
+    state = agent.TravelState(origin="Manali", destination="Goa", num_adults=2)
+    ctx = SimpleNamespace(userdata=agent.Userdata(travel_state=state))
+
+    reply = await agent.select_travel_mode(ctx, "plane")
+
+    assert "Distance 2340km via Delhi" in reply
+    assert "Cost ₹23400" in reply
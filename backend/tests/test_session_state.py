@@ -0,0 +1,191 @@
+import asyncio
+import json
+import marshal
+from types import SimpleNamespace
+
+from livekit.agents import AgentSession, llm
+from livekit.agents.llm import ChatChunk, ChoiceDelta, FunctionToolCall
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+from livekit.agents.voice.events import CloseEvent, CloseReason
+
+import agent
+from booking_store import MemoryBookingStore
+from session_state import (
+    SessionCheckpointer,
+    TravelState,
+    decode_state,
+    encode_state,
+    session_key,
+)
+
+
+def planned_state(**fields):
+    return TravelState(origin="Mumbai", destination="Goa", travel_dates="12-18 Dec", num_adults=2,
+                       budget="medium", amenities=("Wi-Fi", "Pool"), selected_mode="plane",
+                       hotel_name="The Leela Goa", selected_quote={"mode": "plane", "cost": 9000},
+                       **fields)
+
+
+def test_snapshot_round_trip() -> None:
+    state = planned_state(customer_name="Asha")
+
+    snapshot = encode_state(state)
+
+    assert decode_state(snapshot) == state
+    # The hotel goes in by name, not as its catalog entry
+    assert len(snapshot) < 300
+
+
+def test_unreadable_or_foreign_snapshots_start_afresh() -> None:
+    assert decode_state(b"not a snapshot") is None
+    assert decode_state(marshal.dumps((99, ()))) is None
+    values = list(marshal.loads(encode_state(TravelState()))[1])
+    values[3] = "two"  # num_adults
+    assert decode_state(marshal.dumps((1, tuple(values)))) is None
+
+
+class SlowStore(MemoryBookingStore):
+    def __init__(self, fail=False):
+        super().__init__()
+        self.writes = []
+        self.fail = fail
+
+    async def save_session(self, session_id, snapshot):
+        await asyncio.sleep(0.01)
+        self.writes.append(decode_state(snapshot))
+        return not self.fail and await super().save_session(session_id, snapshot)
+
+
+async def test_checkpoints_skip_unchanged_state_and_coalesce() -> None:
+    store = SlowStore()
+    checkpoints = SessionCheckpointer(store, "room-1")
+    state = TravelState()
+
+    state.destination = "Goa"
+    checkpoints.checkpoint(state)
+    await asyncio.sleep(0)
+    # Changes made while that is being written go in one more write
+    state.origin = "Mumbai"
+    checkpoints.checkpoint(state)
+    state.num_adults = 2
+    checkpoints.checkpoint(state)
+    await checkpoints.flush()
+    checkpoints.checkpoint(state)
+    await checkpoints.flush()
+
+    assert [(s.destination, s.origin, s.num_adults) for s in store.writes] == [("Goa", None, 0), ("Goa", "Mumbai", 2)]
+    assert await SessionCheckpointer(store, "room-1").restore() == state
+
+
+async def test_failed_checkpoints_are_retried() -> None:
+    store = SlowStore(fail=True)
+    checkpoints = SessionCheckpointer(store, "room-1")
+    state = TravelState(destination="Goa")
+
+    checkpoints.checkpoint(state)
+    await checkpoints.flush()
+    store.fail = False
+    checkpoints.checkpoint(state)
+    await checkpoints.flush()
+
+    assert len(store.writes) == 2
+    assert await SessionCheckpointer(store, "room-1").restore() == state
+
+
+async def test_restore_gives_up_on_a_slow_store() -> None:
+    class HangingStore(MemoryBookingStore):
+        async def load_session(self, session_id, max_age=0):
+            await asyncio.sleep(10)
+
+    assert await SessionCheckpointer(HangingStore(), "room-1", restore_timeout=0.01).restore() is None
+
+
+class OneToolLLM(llm.LLM):
+    """Answers the user with a set_trip_details call, and its result with a short reply."""
+
+    def chat(self, *, chat_ctx, tools=None, conn_options=DEFAULT_API_CONNECT_OPTIONS, **kwargs):
+        # Skip the progress note TravelAgent.llm_node adds when the trip changes
+        last = next(item for item in reversed(chat_ctx.items)
+                    if item.type != "message" or not item.text_content.startswith("<trip_progress>"))
+        if last.type == "message":
+            call = FunctionToolCall(name="set_trip_details", call_id="call_1",
+                                    arguments=json.dumps({"destination": "Goa", "num_adults": 2}))
+            delta = ChoiceDelta(role="assistant", tool_calls=[call])
+        else:
+            delta = ChoiceDelta(role="assistant", content="Done.")
+        return ReplyStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options, delta=delta)
+
+
+class ReplyStream(llm.LLMStream):
+    def __init__(self, fake_llm, *, delta, **kwargs):
+        super().__init__(fake_llm, **kwargs)
+        self._delta = delta
+
+    async def _run(self):
+        self._event_ch.send_nowait(ChatChunk(id="reply", delta=self._delta))
+
+
+async def test_tool_calls_are_checkpointed_and_restored(monkeypatch) -> None:
+    store = MemoryBookingStore()
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: store)
+    checkpoints = SessionCheckpointer(store, "room-1")
+    userdata = agent.Userdata(travel_state=TravelState())
+
+    async with AgentSession(llm=OneToolLLM(), userdata=userdata) as session:
+        checkpoints.watch(session, userdata)
+        await session.start(agent.TravelAgent())
+        await session.run(user_input="Goa for two")
+        await checkpoints.flush()
+
+        # A new job for the same session, after this one crashed mid-call, picks the trip up again
+        restored = await SessionCheckpointer(store, "room-1").restore()
+        assert (restored.destination, restored.num_adults) == ("Goa", 2)
+        assert agent.describe_progress(restored).endswith("Next: ask for the origin city.")
+
+    # The call ended normally: nothing is left to resume
+    await checkpoints.flush()
+    assert await store.load_session("room-1") is None
+
+
+async def test_confirmed_booking_drops_the_checkpoint() -> None:
+    store = MemoryBookingStore()
+    checkpoints = SessionCheckpointer(store, "room-1")
+    state = planned_state(customer_name="Asha")
+    checkpoints.checkpoint(state)
+    await checkpoints.flush()
+
+    state.booking_id = "AB12CD34"
+    checkpoints.checkpoint(state)
+    await checkpoints.flush()
+
+    assert await SessionCheckpointer(store, "room-1").restore() is None
+
+
+async def test_checkpoint_kept_unless_the_call_ended() -> None:
+    store = MemoryBookingStore()
+    handlers = {}
+    session = SimpleNamespace(on=lambda event, handler: handlers.setdefault(event, handler))
+    checkpoints = SessionCheckpointer(store, "room-1")
+    checkpoints.watch(session, SimpleNamespace(travel_state=planned_state()))
+    handlers["function_tools_executed"](None)
+    await checkpoints.flush()
+
+    # Closed by a worker shutdown or an error: a new job may resume it
+    handlers["close"](CloseEvent(reason=CloseReason.JOB_SHUTDOWN))
+    await checkpoints.flush()
+    assert await store.load_session("room-1") is not None
+    handlers["close"](CloseEvent(reason=CloseReason.PARTICIPANT_DISCONNECTED))
+    await checkpoints.flush()
+    assert await store.load_session("room-1") is None
+
+
+def test_session_keys_differ_for_a_reused_room_name() -> None:
+    # Two rooms created with the same name get different SIDs
+    assert session_key("RM_first", "voice_assistant_user_42") != session_key("RM_second", "voice_assistant_user_42")
+    assert session_key("RM_first", "voice_assistant_user_42") != session_key("RM_first", "voice_assistant_user_7")
+
+
+async def test_restored_hotel_is_read_from_the_catalog() -> None:
+    userdata = agent.Userdata(travel_state=decode_state(encode_state(planned_state())))
+
+    assert userdata.selected_hotel is userdata.catalog.get_hotel("Goa", "The Leela Goa")
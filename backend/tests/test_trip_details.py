@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import agent
+
+
+def context(**state):
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState(**state)))
+
+
+async def test_sets_everything_in_one_call() -> None:
+    ctx = context()
+
+    reply = await agent.set_trip_details(ctx, destination="goa", origin="delhi", dates="next weekend",
+                                         num_adults=2, num_children=0, budget="Medium", amenities="Wi-Fi, Pool")
+
+    state = ctx.userdata.travel_state
+    assert (state.destination, state.origin, state.travel_dates) == ("Goa", "Delhi", "next weekend")
+    assert (state.num_adults, state.num_children) == (2, 0)
+    assert (state.budget, state.amenities) == ("medium", ("Wi-Fi", "Pool"))
+    assert "Still needed" not in reply
+    assert reply.endswith("All trip details are set; offer travel modes next.")
+
+
+async def test_reports_only_what_is_missing() -> None:
+    ctx = context()
+
+    reply = await agent.set_trip_details(ctx, destination="Goa", num_adults=2, budget="medium")
+
+    assert reply == ("Saved destination Goa, 2 adults and 0 children, medium budget. "
+                     "Still needed: origin, dates, amenities.")
+
+
+async def test_invalid_details_are_rejected_and_the_rest_saved() -> None:
+    ctx = context()
+
+    reply = await agent.set_trip_details(ctx, destination="Atlantis", origin="Mumbai", budget="lavish",
+                                         num_adults=0, num_children=2)
+
+    state = ctx.userdata.travel_state
+    assert state.destination is None
+    assert state.origin == "Mumbai"
+    assert state.budget is None
+    assert state.num_children == 0
+    assert "we don't have hotels in Atlantis" in reply
+    assert "budget must be low, medium or high" in reply
+    assert "children need at least one adult" in reply
+    assert "Still needed: destination, dates, travelers, budget, amenities." in reply
+
+
+async def test_details_are_validated_together() -> None:
+    ctx = context(num_adults=2)
+
+    reply = await agent.set_trip_details(ctx, destination="Goa", origin="goa", num_children=1)
+
+    state = ctx.userdata.travel_state
+    assert state.origin is None
+    assert "origin Goa is the destination" in reply
+    # Adults from an earlier turn count for the children given now
+    assert (state.num_adults, state.num_children) == (2, 1)
+
+
+async def test_one_detail_per_turn() -> None:
+    ctx = context()
+
+    assert "we don't have hotels in Atlantis" in await agent.set_trip_details(ctx, destination="Atlantis")
+    assert "Saved destination Goa." in await agent.set_trip_details(ctx, destination="goa")
+    assert "Saved 2 adults and 1 children." in await agent.set_trip_details(ctx, num_adults=2, num_children=1)
+    await agent.set_trip_details(ctx, amenities="none")
+    assert ctx.userdata.travel_state.amenities == ()
+    assert "Still needed: origin, dates, budget." in await agent.set_trip_details(ctx, budget="huge")
@@ -0,0 +1,162 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+from booking_store import MemoryBookingStore
+from trip_quotes import DEFAULT_NIGHTS, Speculation, trip_nights
+
+TODAY = date(2025, 10, 1)
+
+
+@pytest.mark.parametrize("dates, nights", [
+    ("12-18 Dec", 6),
+    ("12th to 18th December", 6),
+    ("Dec 28 - Jan 3", 6),
+    ("28 Dec to 3rd Jan", 6),
+    ("28-3 March", 3),
+    ("2025-12-12 to 2025-12-20", 8),
+    ("next weekend", None),
+    ("12 Dec", None),
+    ("1 Jan to 28 Apr", None),
+    ("31-32 Jan", None),
+    (None, None),
+])
+def test_trip_nights(dates, nights) -> None:
+    assert trip_nights(dates, today=TODAY) == nights
+
+
+class Counted:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key):
+        self.calls.append(key)
+        return f"value for {key}"
+
+
+async def test_speculation_computes_in_background() -> None:
+    compute = Counted()
+    speculation = Speculation(compute)
+
+    speculation.refresh("a")
+    assert compute.calls == []
+    await asyncio.sleep(0.01)
+    assert compute.calls == ["a"]
+
+    assert await speculation.get("a") == "value for a"
+    assert compute.calls == ["a"]
+
+
+async def test_speculation_follows_changed_inputs() -> None:
+    compute = Counted()
+    speculation = Speculation(compute)
+
+    speculation.refresh("a")
+    speculation.refresh("b")
+    assert await speculation.get("b") == "value for b"
+    # Work for stale inputs is cancelled before it starts
+    assert compute.calls == ["b"]
+    # Inputs that were never refreshed are computed on demand, then reused
+    assert await speculation.get("c") == "value for c"
+    assert await speculation.get("c") == "value for c"
+    assert compute.calls == ["b", "c"]
+
+
+async def test_speculation_retries_failures_inline() -> None:
+    attempts = []
+
+    def flaky(key):
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return key
+
+    speculation = Speculation(flaky)
+    speculation.refresh("a")
+    assert await speculation.get("a") == "a"
+    assert attempts == ["a", "a"]
+
+
+def context(**state):
+    return SimpleNamespace(userdata=agent.Userdata(travel_state=agent.TravelState(**state)))
+
+
+@pytest.fixture
+def bookings(monkeypatch):
+    store = MemoryBookingStore()
+    outbox = SimpleNamespace(enqueue_booking_confirmation=lambda booking: asyncio.sleep(0, True))
+    monkeypatch.setattr(agent, "get_booking_repository", lambda: store)
+    monkeypatch.setattr(agent, "get_email_outbox", lambda: outbox)
+    return store
+
+
+async def plan(ctx, dates="12-18 Dec"):
+    await agent.set_trip_details(ctx, destination="Goa", origin="Mumbai", dates=dates, num_adults=2,
+                                 num_children=0, budget="medium", amenities="none")
+    await agent.select_travel_mode(ctx, "plane")
+    hotel = ctx.userdata.catalog.hotels("Goa")[0]
+    await agent.select_hotel(ctx, hotel["name"])
+    await agent.set_customer_name(ctx, "Asha")
+    await agent.set_mobile_number(ctx, "9876543210")
+    await agent.set_email(ctx, "asha@example.com")
+    return hotel
+
+
+async def confirmed_booking(ctx, store):
+    reply = await agent.confirm_booking(ctx)
+    assert "booking has been confirmed" in reply
+    return await store.get_booking(ctx.userdata.travel_state.booking_id)
+
+
+async def test_tools_read_precomputed_quotes(bookings) -> None:
+    ctx = context()
+    await agent.set_trip_details(ctx, destination="Goa", origin="Mumbai", num_adults=2, num_children=0)
+    await asyncio.sleep(0.01)
+
+    quotes = ctx.userdata.quotes
+    # Anything not computed in the background would now fail
+    quotes._fares.compute = quotes._shortlist.compute = None
+    assert "Selected plane" in await agent.select_travel_mode(ctx, "plane")
+    assert "Hotel suggestions for Goa" in await agent.suggest_hotels(ctx)
+
+
+async def test_confirmation_charges_the_quoted_fare_for_the_booked_nights(bookings) -> None:
+    ctx = context()
+    hotel = await plan(ctx)
+    quoted = ctx.userdata.travel_state.selected_quote
+
+    booking = await confirmed_booking(ctx, bookings)
+
+    assert booking["nights"] == 6
+    assert booking["total_cost"] == quoted["cost"] + hotel["price_per_night"] * 6 * 1
+
+
+async def test_confirmation_bills_the_rooms_it_holds(bookings) -> None:
+    ctx = context()
+    hotel = await plan(ctx)
+    await agent.set_trip_details(ctx, num_adults=3, num_children=1)
+    fares = await ctx.userdata.quotes.fares(ctx.userdata.travel_state)
+
+    reply = await agent.confirm_booking(ctx)
+
+    # Four guests hold two rooms and pay for two, not four
+    total = fares["quotes"]["plane"]["cost"] + hotel["price_per_night"] * 6 * 2
+    assert f"The total cost is {total} rupees." in reply
+    booking = await bookings.get_booking(ctx.userdata.travel_state.booking_id)
+    assert (booking["rooms"], booking["total_cost"]) == (2, total)
+
+
+async def test_confirmation_requotes_a_changed_trip(bookings) -> None:
+    ctx = context()
+    hotel = await plan(ctx, dates="sometime in spring")
+    heard = ctx.userdata.travel_state.selected_quote["cost"]
+    await agent.set_trip_details(ctx, num_adults=4, num_children=0)
+
+    booking = await confirmed_booking(ctx, bookings)
+
+    travel_cost = booking["total_cost"] - hotel["price_per_night"] * DEFAULT_NIGHTS * 2
+    assert booking["nights"] == DEFAULT_NIGHTS
+    assert travel_cost == 2 * heard
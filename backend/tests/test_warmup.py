@@ -0,0 +1,56 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+from mongodb_utils import AsyncBookingRepository
+from warmup import run_async_stage, run_stages
+
+
+def test_stages_run_in_parallel() -> None:
+    start = time.perf_counter()
+    results = run_stages({
+        "first": lambda: time.sleep(0.2) or "a",
+        "second": lambda: time.sleep(0.2) or "b",
+    })
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35
+    assert [r.value for r in results.values()] == ["a", "b"]
+    assert all(r.ok and r.elapsed_ms >= 200 for r in results.values())
+
+
+def test_failed_and_slow_stages_fall_back() -> None:
+    def broken():
+        raise RuntimeError("model files missing")
+
+    results = run_stages({"broken": broken, "slow": lambda: time.sleep(1), "fine": lambda: 1}, timeout=0.2)
+
+    assert not results["broken"].ok and "model files missing" in results["broken"].error
+    assert not results["slow"].ok and "timed out" in results["slow"].error
+    assert results["fine"].ok
+
+
+@pytest.mark.asyncio
+async def test_unreachable_mongo_warmup_reports_failure() -> None:
+    repository = AsyncBookingRepository(uri="mongodb://127.0.0.1:1", serverSelectionTimeoutMS=200)
+
+    result = await run_async_stage("mongo_pool", repository.warm)
+
+    assert not result.ok
+
+
+def test_prewarm_falls_back_when_models_are_unavailable(monkeypatch) -> None:
+    def missing():
+        raise RuntimeError("not downloaded")
+
+    vad = SimpleNamespace(VAD=SimpleNamespace(load=missing))
+    monkeypatch.setattr(agent, "load_plugins", lambda: SimpleNamespace(silero=vad))
+    monkeypatch.setattr(agent, "check_turn_detector", missing)
+    proc = SimpleNamespace(userdata={})
+
+    agent.prewarm(proc)
+
+    assert "vad" not in proc.userdata
+    assert proc.userdata["turn_detector"] is False